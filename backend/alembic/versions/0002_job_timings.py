@@ -0,0 +1,39 @@
+"""job phase timings and worker resource usage
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("jobs", sa.Column("queued_at", sa.DateTime(), nullable=True))
+    op.add_column("jobs", sa.Column("started_at", sa.DateTime(), nullable=True))
+    op.add_column("jobs", sa.Column("worker_started_at", sa.DateTime(), nullable=True))
+    op.add_column("jobs", sa.Column("worker_finished_at", sa.DateTime(), nullable=True))
+    op.add_column("jobs", sa.Column("finished_at", sa.DateTime(), nullable=True))
+    op.add_column("jobs", sa.Column("worker_peak_rss_bytes", sa.BigInteger(), nullable=True))
+    op.add_column("jobs", sa.Column("worker_cpu_seconds", sa.Float(), nullable=True))
+    # Existing jobs were queued when they were created
+    op.execute("UPDATE jobs SET queued_at = created_at")
+
+
+def downgrade():
+    with op.batch_alter_table("jobs") as batch:
+        batch.drop_column("worker_cpu_seconds")
+        batch.drop_column("worker_peak_rss_bytes")
+        batch.drop_column("finished_at")
+        batch.drop_column("worker_finished_at")
+        batch.drop_column("worker_started_at")
+        batch.drop_column("started_at")
+        batch.drop_column("queued_at")
@@ -0,0 +1,37 @@
+"""post-job verification outcome
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("jobs", sa.Column("verification_status", sa.String(), nullable=True))
+    op.add_column("jobs", sa.Column("verification_tree_sha256", sa.String(), nullable=True))
+    op.add_column("jobs", sa.Column("verification_exit_code", sa.Integer(), nullable=True))
+    op.add_column("jobs", sa.Column("verification_seconds", sa.Float(), nullable=True))
+    op.add_column("jobs", sa.Column("verification_cached", sa.Boolean(), nullable=True))
+    op.add_column("jobs", sa.Column("verification_output", sa.Text(), nullable=True))
+    op.add_column("jobs", sa.Column("verified_at", sa.DateTime(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table("jobs") as batch:
+        batch.drop_column("verified_at")
+        batch.drop_column("verification_output")
+        batch.drop_column("verification_cached")
+        batch.drop_column("verification_seconds")
+        batch.drop_column("verification_exit_code")
+        batch.drop_column("verification_tree_sha256")
+        batch.drop_column("verification_status")
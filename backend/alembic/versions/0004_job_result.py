@@ -0,0 +1,26 @@
+"""per-job parsed worker result
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Results of existing jobs are not backfilled: their shared result.json only holds the latest job's
+    op.add_column("jobs", sa.Column("result", sa.JSON(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table("jobs") as batch:
+        batch.drop_column("result")
@@ -0,0 +1,40 @@
+"""job dependencies and pipelines
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-19
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "pipelines",
+        sa.Column("id", sa.String(), primary_key=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.Column("on_failure", sa.String(), nullable=False),
+    )
+    with op.batch_alter_table("jobs") as batch:
+        batch.add_column(sa.Column("depends_on", sa.JSON(), nullable=True))
+        batch.add_column(sa.Column("pipeline_id", sa.String(), nullable=True))
+        batch.add_column(sa.Column("step", sa.String(), nullable=True))
+        batch.create_foreign_key("fk_jobs_pipeline_id", "pipelines", ["pipeline_id"], ["id"])
+
+
+def downgrade():
+    with op.batch_alter_table("jobs") as batch:
+        batch.drop_constraint("fk_jobs_pipeline_id", type_="foreignkey")
+        batch.drop_column("step")
+        batch.drop_column("pipeline_id")
+        batch.drop_column("depends_on")
+    op.drop_table("pipelines")
@@ -1,6 +1,15 @@
 from typing import Generator
 
+from fastapi import HTTPException
+from sqlalchemy import exists
+from sqlalchemy.orm import Session
+
+from app.db import models
 from app.db.session import SessionLocal
+from app.services.hot_tier import hot_tier
+from app.services.lifecycle import ensure_workspace
+from app.services.singleflight import flights
+from app.services.snapshot_views import snapshot_view
 
 
 def get_db() -> Generator:
@@ -9,3 +18,32 @@ def get_db() -> Generator:
         yield db
     finally:
         db.close()
+
+
+def get_project_workspace(project_id: str, db: Session, hot: bool = True, consistency: str = "live") -> str:
+    """
+    Resolve a project's workspace path for read-only file routes, or raise 404.
+    The path is derived from the project id (sharded layout, legacy fallback);
+    the stored path only matters for workspaces outside both layouts.
+    Concurrent lookups of the same project share one query.
+    An archived workspace is restored before the path is returned; a workspace
+    promoted to the hot tier is served from its RAM copy (unless hot=False).
+    With consistency="snapshot", a project with a running job is served from
+    a read-only view of its last committed snapshot instead, so readers never
+    see a half-applied job and never wait for it. Without a snapshot (no
+    HEAD) there is nothing to isolate with, and the live tree is served.
+    """
+    running = exists().where(models.Job.project_id == models.Project.id, models.Job.status == "in_progress")
+    row = flights.do(
+        ("project_workspace", project_id),
+        lambda: db.query(models.Project.workspace_path, running).filter(models.Project.id == project_id).first(),
+    )
+    if row is None:
+        raise HTTPException(status_code=404, detail="Project not found")
+    stored_path, job_running = row
+    if job_running and consistency == "snapshot":
+        view = snapshot_view(project_id)
+        if view is not None:
+            return view
+    durable = ensure_workspace(project_id, stored_path)
+    return hot_tier.resolve(project_id, durable) if hot else durable
@@ -1,8 +1,13 @@
 from fastapi import APIRouter
 
-from . import projects, files, jobs
+from . import projects, files, jobs, forks, metrics, pipelines, storage, templates
 
 api_router = APIRouter()
 api_router.include_router(projects.router, prefix="/projects", tags=["projects"])
 api_router.include_router(files.router, tags=["files"])
 api_router.include_router(jobs.router, tags=["jobs"])
+api_router.include_router(forks.router, tags=["projects"])
+api_router.include_router(pipelines.router, prefix="/pipelines", tags=["pipelines"])
+api_router.include_router(metrics.router, prefix="/metrics", tags=["metrics"])
+api_router.include_router(storage.router, prefix="/storage", tags=["storage"])
+api_router.include_router(templates.router, prefix="/templates", tags=["templates"])
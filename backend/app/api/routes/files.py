@@ -1,32 +1,233 @@
-from fastapi import APIRouter, Depends, HTTPException
+import json
+import time
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import Response, StreamingResponse
+from pydantic import BaseModel
 from sqlalchemy.orm import Session
 
-from app.api.deps import get_db
-from app.db import models
-from app.schemas import FileListResponse, FileContentResponse
-from app.services.workspaces import list_files, read_file, InvalidWorkspacePath
+from app.api.deps import get_db, get_project_workspace
+from app.core.config import settings
+from app.schemas import (
+    FileListResponse,
+    FileContentResponse,
+    FileBatchRequest,
+    FileBatchResponse,
+    ChangeFeedResponse,
+)
+from app.services.change_feed import ChangeFeedUnavailable, WatchLimitExceeded, change_feed
+from app.services.compression import compressor, negotiate_encoding
+from app.services.workspaces import (
+    list_files,
+    read_file_entry,
+    read_file_range,
+    read_files,
+    count_lines,
+    expand_paths,
+    InvalidWorkspacePath,
+)
 
 router = APIRouter()
 
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+# snapshot: while a job runs, serve the last committed version; live: the workspace as it is now
+Consistency = Literal["snapshot", "live"]
+SSE_MEDIA_TYPE = "text/event-stream"
+SSE_HEARTBEAT_SECONDS = 15.0
+
+
+def _encoded_response(request: Request, model: BaseModel, cache_key: Optional[tuple] = None):
+    """
+    Serialize a response model and compress it when the client accepts gzip/zstd.
+    Falls back to identity for small bodies, clients that do not ask for
+    compression, or when the compression CPU budget is exhausted. Every
+    variant carries Vary: Accept-Encoding so shared caches keep them apart.
+    """
+    encoding = negotiate_encoding(request.headers.get("accept-encoding"))
+    body = model.model_dump_json().encode("utf-8")
+    encoded = compressor.encode(body, encoding, cache_key) if encoding is not None else None
+    if encoded is None:
+        return Response(content=body, media_type="application/json", headers={"Vary": "Accept-Encoding"})
+    return Response(
+        content=encoded,
+        media_type="application/json",
+        headers={"Content-Encoding": encoding, "Vary": "Accept-Encoding"},
+    )
+
 
 @router.get("/{project_id}/files", response_model=FileListResponse)
-def get_project_files(project_id: str, db: Session = Depends(get_db)):
-    project = db.query(models.Project).filter(models.Project.id == project_id).first()
-    if not project:
-        raise HTTPException(status_code=404, detail="Project not found")
-    files = list_files(project.workspace_path)
-    return FileListResponse(files=files)
+def get_project_files(
+    project_id: str,
+    request: Request,
+    consistency: Consistency = "snapshot",
+    db: Session = Depends(get_db),
+):
+    workspace_path = get_project_workspace(project_id, db, consistency=consistency)
+    files = list_files(workspace_path)
+    return _encoded_response(request, FileListResponse(files=files))
+
+
+@router.post("/{project_id}/files:batchGet", response_model=FileBatchResponse)
+def batch_get_files(
+    project_id: str,
+    payload: FileBatchRequest,
+    request: Request,
+    stream: bool = False,
+    consistency: Consistency = "snapshot",
+    db: Session = Depends(get_db),
+):
+    """
+    Fetch many files in one round trip.
+    - One project lookup and one workspace root resolution for the whole batch.
+    - Per-path errors are reported inline instead of failing the request.
+    - With ?stream=true or Accept: application/x-ndjson, items are streamed as
+      NDJSON lines followed by a final {"done": true, ...} summary line.
+    """
+    workspace_path = get_project_workspace(project_id, db, consistency=consistency)
+    budget = settings.FILES_BATCH_MAX_BYTES
+    if payload.max_bytes is not None:
+        budget = min(budget, payload.max_bytes)
+
+    paths = expand_paths(workspace_path, payload.paths)
+    items = read_files(workspace_path, paths, budget)
+
+    if stream or NDJSON_MEDIA_TYPE in request.headers.get("accept", ""):
+        def ndjson():
+            total = 0
+            truncated = False
+            for item in items:
+                if item.get("error") is None:
+                    total += item["size"]
+                elif item["error"] == "byte_budget_exceeded":
+                    truncated = True
+                yield json.dumps(item) + "\n"
+            yield json.dumps({"done": True, "total_bytes": total, "truncated": truncated}) + "\n"
+
+        return StreamingResponse(ndjson(), media_type=NDJSON_MEDIA_TYPE)
+
+    files = list(items)
+    total = sum(f["size"] for f in files if f.get("error") is None)
+    truncated = any(f.get("error") == "byte_budget_exceeded" for f in files)
+    return FileBatchResponse(files=files, total_bytes=total, truncated=truncated)
+
+
+async def _sse_changes(workspace_path: str, cursor: Optional[str], limit: int):
+    """
+    Server-sent events: one "change" event per change, its id being the
+    cursor to resume from (EventSource sends it back as Last-Event-ID), and a
+    "reset" event when the cursor cannot be served. Ends after
+    CHANGE_FEED_SSE_MAX_SECONDS; clients reconnect and resume.
+    Waits happen on the event loop, so an idle subscriber holds no thread.
+    """
+    deadline = time.monotonic() + settings.CHANGE_FEED_SSE_MAX_SECONDS
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return
+        result = await change_feed.changes_async(
+            workspace_path, cursor, limit=limit, wait=min(SSE_HEARTBEAT_SECONDS, remaining)
+        )
+        if result["reset"]:
+            yield f"id: {result['cursor'] or ''}\nevent: reset\ndata: {{}}\n\n"
+            if result["cursor"] is None:
+                return
+        elif cursor is None:
+            yield f"id: {result['cursor']}\nevent: ready\ndata: {{}}\n\n"
+        elif not result["changes"]:
+            yield ": keep-alive\n\n"
+        epoch = result["cursor"].split("-", 1)[0]
+        for change in result["changes"]:
+            yield f"id: {epoch}-{change['seq']}\nevent: change\ndata: {json.dumps(change)}\n\n"
+        cursor = result["cursor"]
+
+
+@router.get("/{project_id}/changes", response_model=ChangeFeedResponse)
+async def get_project_changes(
+    project_id: str,
+    request: Request,
+    cursor: Optional[str] = None,
+    wait: float = Query(default=0.0, ge=0, le=30),
+    limit: int = Query(default=1000, ge=1, le=10000),
+    stream: bool = False,
+    db: Session = Depends(get_db),
+):
+    """
+    Files created, modified or deleted in the workspace, from an inotify watch.
+    - Without a cursor the feed starts now; pass the returned cursor back to
+      get the changes after it. wait long-polls up to that many seconds.
+    - reset=true means changes were lost (watch evicted, backend restarted):
+      re-list the files and continue from the new cursor.
+    - With ?stream=true or Accept: text/event-stream, changes are pushed as
+      server-sent events (Last-Event-ID resumes).
+    Jobs running on the hot tier show up when their changes are written back.
+    The route is async: blocking lookups run in the threadpool, waits do not.
+    """
+    workspace_path = await run_in_threadpool(get_project_workspace, project_id, db, hot=False)
+    sse = stream or SSE_MEDIA_TYPE in request.headers.get("accept", "")
+    if sse:
+        cursor = cursor or request.headers.get("last-event-id") or None
+    try:
+        await run_in_threadpool(change_feed.watch, workspace_path)
+        if sse:
+            return StreamingResponse(
+                _sse_changes(workspace_path, cursor, limit),
+                media_type=SSE_MEDIA_TYPE,
+                headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+            )
+        result = await change_feed.changes_async(workspace_path, cursor, limit=limit, wait=wait)
+        return ChangeFeedResponse(**result)
+    except ChangeFeedUnavailable:
+        raise HTTPException(status_code=501, detail="Change feed not available on this platform")
+    except WatchLimitExceeded:
+        raise HTTPException(status_code=503, detail="Too many directories to watch")
 
 
 @router.get("/{project_id}/files/{file_path:path}", response_model=FileContentResponse)
-def get_file_contents(project_id: str, file_path: str, db: Session = Depends(get_db)):
-    project = db.query(models.Project).filter(models.Project.id == project_id).first()
-    if not project:
-        raise HTTPException(status_code=404, detail="Project not found")
+def get_file_contents(
+    project_id: str,
+    file_path: str,
+    request: Request,
+    start_line: Optional[int] = Query(default=None, ge=1),
+    end_line: Optional[int] = Query(default=None, ge=1),
+    offset: Optional[int] = Query(default=None, ge=0),
+    length: Optional[int] = Query(default=None, ge=0),
+    consistency: Consistency = "snapshot",
+    db: Session = Depends(get_db),
+):
+    """
+    Return file contents, optionally only a window of them.
+    - start_line/end_line: 1-based inclusive line range.
+    - offset/length: byte range.
+    Line and byte parameters are mutually exclusive.
+    While a job is running the last committed version is served, unless
+    consistency=live (the same applies to the listing and batch routes).
+    """
+    line_mode = start_line is not None or end_line is not None
+    byte_mode = offset is not None or length is not None
+    if line_mode and byte_mode:
+        raise HTTPException(status_code=400, detail="Use either line or byte range parameters, not both")
+    if start_line is not None and end_line is not None and end_line < start_line:
+        raise HTTPException(status_code=400, detail="end_line must be >= start_line")
+
+    workspace_path = get_project_workspace(project_id, db, consistency=consistency)
     try:
-        contents = read_file(project.workspace_path, file_path)
+        if line_mode or byte_mode:
+            window = read_file_range(
+                workspace_path,
+                file_path,
+                start_line=start_line,
+                end_line=end_line,
+                offset=offset,
+                length=length,
+            )
+            return _encoded_response(request, FileContentResponse(path=file_path, **window))
+        entry = read_file_entry(workspace_path, file_path)
     except InvalidWorkspacePath:
         raise HTTPException(status_code=400, detail="Invalid path")
     except FileNotFoundError:
         raise HTTPException(status_code=404, detail="File not found")
-    return FileContentResponse(path=file_path, contents=contents)
+    model = FileContentResponse(path=file_path, contents=entry.contents, total_lines=count_lines(entry.contents))
+    # The requested spelling of the path is echoed in the body, so it is part of the variant key
+    return _encoded_response(request, model, cache_key=entry.key + (file_path,))
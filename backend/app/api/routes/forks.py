@@ -0,0 +1,121 @@
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+
+from app.api.deps import get_db
+from app.core.logging import logger
+from app.db import models
+from app.db.models import JOB_TIMING_COLUMNS, JOB_VERIFICATION_COLUMNS, generate_uuid
+from app.schemas import ProjectFork, ProjectForkResponse
+from app.services.codex_runner import record_snapshot
+from app.services.cow import clone_tree
+from app.services.lifecycle import QuotaExceeded, check_quota, ensure_workspace, locked_workspace, project_lock
+from app.services.snapshots import fork_snapshots, head_job_id
+from app.services.storage_backends import publish_workspace
+from app.services.workspaces import create_workspace
+
+router = APIRouter()
+
+# Statuses a job does not leave any more; copies of any other job would never finish
+_FINAL_STATUSES = {"completed", "error", "cancelled", "discarded"}
+
+
+def _forked_status(status: str) -> str:
+    if status in _FINAL_STATUSES:
+        return status
+    # Preview trees, the scheduler's queue and running workers are not forked
+    return "discarded" if status == "preview" else "cancelled"
+
+
+@router.post("/{project_id}/fork", response_model=ProjectForkResponse)
+def fork_project(project_id: str, payload: Optional[ProjectFork] = None, db: Session = Depends(get_db)):
+    """
+    Branch an existing project into a new one without replaying its jobs.
+    The workspace is materialized with reflinks where supported (forking then
+    costs metadata, not bytes), otherwise with copies.
+    The source is cloned under its project lock, so a running job's partial
+    writes are never forked. Every fork gets a HEAD snapshot: the copied
+    history's, or else a "fork" job recording the cloned tree.
+    """
+    payload = payload or ProjectFork()
+    source = db.query(models.Project).filter(models.Project.id == project_id).first()
+    if not source:
+        raise HTTPException(status_code=404, detail="Project not found")
+    try:
+        check_quota()
+    except QuotaExceeded:
+        raise HTTPException(status_code=409, detail="Disk quota exceeded")
+
+    fork_id = generate_uuid()
+    ws = create_workspace(fork_id)
+    ensure_workspace(source.id, source.workspace_path)
+
+    with project_lock(source.id):
+        # Tree, job rows and snapshots are taken from the same point in the source's history
+        db.refresh(source)
+        source_ws = locked_workspace(source.id, source.workspace_path)
+        fork = models.Project(
+            id=fork_id,
+            instruction=source.instruction,
+            status=_forked_status(source.status),
+            summary=f"Forked from project {source.id}",
+            workspace_path=str(ws),
+        )
+        db.add(fork)
+        files_cloned = clone_tree(source_ws, ws)
+        if payload.copy_jobs:
+            job_id_map = {}
+            for job in sorted(source.jobs, key=lambda j: j.created_at):
+                new_id = generate_uuid()
+                job_id_map[job.id] = new_id
+                copied = {column: getattr(job, column) for column in JOB_TIMING_COLUMNS + JOB_VERIFICATION_COLUMNS}
+                if job.verification_status == "pending":
+                    # The outcome is stored on the source job only; the copy would stay pending
+                    copied["verification_status"] = None
+                db.add(models.Job(
+                    id=new_id,
+                    project_id=fork_id,
+                    created_at=job.created_at,
+                    job_type=job.job_type,
+                    instruction=job.instruction,
+                    status=_forked_status(job.status),
+                    dry_run=job.dry_run,
+                    result_path=str(ws / ".codex" / "result.json") if job.result_path else None,
+                    logs_path=job.logs_path,
+                    result=job.result,
+                    **copied,
+                ))
+            fork_snapshots(source.id, fork_id, job_id_map)
+
+    db.commit()
+    if head_job_id(fork_id) is None:
+        # No history copied (or none to copy): the fork point itself becomes HEAD
+        fork_job = models.Job(
+            project_id=fork_id,
+            job_type="fork",
+            instruction=f"Fork of project {source.id}",
+            status="completed",
+        )
+        db.add(fork_job)
+        db.commit()
+        db.refresh(fork_job)
+        record_snapshot(fork, fork_job, ws)
+    else:
+        try:
+            publish_workspace(fork_id, str(ws))
+        except Exception:
+            logger.error("Publishing workspace failed for fork %s", fork_id, exc_info=True)
+    db.refresh(fork)
+    logger.info("Forked project %s -> %s (%s)", source.id, fork_id, files_cloned)
+
+    return ProjectForkResponse(
+        id=fork.id,
+        instruction=fork.instruction,
+        status=fork.status,
+        summary=fork.summary,
+        created_at=fork.created_at,
+        updated_at=fork.updated_at,
+        forked_from=source.id,
+        files_cloned=files_cloned,
+    )
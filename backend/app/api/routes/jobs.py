@@ -1,10 +1,20 @@
+from pathlib import Path
+from typing import Literal
+
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 
 from app.api.deps import get_db
+from app.core.config import settings
 from app.db import models
-from app.schemas import JobCreate, JobSummary, JobDetail
-from app.services.codex_runner import run_codex_job
+from app.schemas import JobCreate, JobSummary, JobDetail, JobDiff
+from app.services.codex_runner import run_codex_job, record_snapshot
+from app.services.hot_tier import hot_tier
+from app.services.lifecycle import QuotaExceeded, check_quota, ensure_workspace, locked_workspace, project_lock
+from app.services.previews import PreviewConflict, PreviewNotFound, discard_preview, preview_diff, promote_preview
+from app.services.scheduler import scheduler
+from app.services.snapshots import SnapshotNotFound, diff_job, restore_snapshot, unified_diff
+from app.services.verification import VerificationUnavailable, check_verifiable, verifier
 
 router = APIRouter()
 
@@ -14,12 +24,19 @@ def create_job(project_id: str, payload: JobCreate, db: Session = Depends(get_db
     project = db.query(models.Project).filter(models.Project.id == project_id).first()
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
+    try:
+        check_quota(ensure_workspace(project.id, project.workspace_path))
+    except QuotaExceeded:
+        raise HTTPException(status_code=409, detail="Disk quota exceeded")
+    if payload.depends_on is not None:
+        return _schedule_job(db, project, payload)
 
     job = models.Job(
         project_id=project.id,
         job_type=payload.job_type,
         instruction=payload.instruction,
         status="in_progress",
+        dry_run=payload.dry_run,
     )
     db.add(job)
     db.commit()
@@ -31,6 +48,28 @@ def create_job(project_id: str, payload: JobCreate, db: Session = Depends(get_db
     return job
 
 
+def _schedule_job(db: Session, project: models.Project, payload: JobCreate) -> models.Job:
+    """Queue a job with dependencies (any project's jobs); it is answered at once and run by the scheduler."""
+    wanted = set(payload.depends_on)
+    known = {job_id for (job_id,) in db.query(models.Job.id).filter(models.Job.id.in_(wanted))} if wanted else set()
+    missing = sorted(wanted - known)
+    if missing:
+        raise HTTPException(status_code=400, detail=f"Unknown dependency: {', '.join(missing)}")
+    job = models.Job(
+        project_id=project.id,
+        job_type=payload.job_type,
+        instruction=payload.instruction,
+        status="queued",
+        dry_run=payload.dry_run,
+        depends_on=list(payload.depends_on),
+    )
+    db.add(job)
+    db.commit()
+    scheduler.release()
+    db.refresh(job)
+    return job
+
+
 @router.get("/{project_id}/jobs/{job_id}", response_model=JobDetail)
 def get_job(project_id: str, job_id: str, db: Session = Depends(get_db)):
     job = db.query(models.Job).filter(
@@ -39,3 +78,167 @@ def get_job(project_id: str, job_id: str, db: Session = Depends(get_db)):
     if not job:
         raise HTTPException(status_code=404, detail="Job not found")
     return job
+
+
+@router.post("/{project_id}/jobs/{job_id}/verify", response_model=JobDetail, status_code=202)
+def verify_job(project_id: str, job_id: str, db: Session = Depends(get_db)):
+    """
+    Queue a run of the workspace's tests against the tree this job produced.
+    Answered at once with verification_status "pending"; poll the job for the
+    outcome (from the verification cache when the same tree was verified before).
+    409 for a job without a snapshot, or when there is no image to run the tests in.
+    """
+    job = db.query(models.Job).filter(
+        models.Job.id == job_id, models.Job.project_id == project_id
+    ).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job.status != "completed":
+        raise HTTPException(status_code=409, detail="Only completed jobs can be verified")
+    try:
+        check_verifiable(project_id, job_id)
+    except VerificationUnavailable as exc:
+        raise HTTPException(status_code=409, detail=str(exc))
+    job.verification_status = "pending"
+    db.commit()
+    db.refresh(job)
+    # Same bounded pool as post-job verification
+    verifier.submit(project_id, job_id)
+    return job
+
+
+@router.get("/{project_id}/jobs/{job_id}/diff", response_model=JobDiff)
+def get_job_diff(
+    project_id: str,
+    job_id: str,
+    format: Literal["structured", "unified"] = "structured",
+    db: Session = Depends(get_db),
+):
+    """
+    What a job changed, compared with the snapshot of the job before it.
+    For an unconfirmed dry run: what confirming it would change.
+    """
+    job = db.query(models.Job).filter(
+        models.Job.id == job_id, models.Job.project_id == project_id
+    ).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    try:
+        diff = preview_diff(project_id, job_id) if job.status == "preview" else diff_job(project_id, job_id)
+    except PreviewNotFound:
+        raise HTTPException(status_code=404, detail="Preview not found")
+    except SnapshotNotFound:
+        raise HTTPException(status_code=404, detail="Snapshot not found")
+    if format == "unified":
+        diff["unified"] = unified_diff(diff["changes"])
+    return JobDiff(**diff)
+
+
+def _ensure_idle(db: Session, project_id: str) -> None:
+    """409 while a job writes to the project's workspace (dry runs work on their own clone)."""
+    running = db.query(models.Job.id).filter(
+        models.Job.project_id == project_id, models.Job.status == "in_progress", models.Job.dry_run.is_(False)
+    ).first()
+    if running:
+        raise HTTPException(status_code=409, detail="A job is running on this project")
+
+
+def _get_preview_job(db: Session, project_id: str, job_id: str) -> models.Job:
+    job = db.query(models.Job).filter(
+        models.Job.id == job_id, models.Job.project_id == project_id
+    ).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job.status != "preview":
+        raise HTTPException(status_code=409, detail="Job is not an unconfirmed preview")
+    return job
+
+
+@router.post("/{project_id}/jobs/{job_id}/confirm", response_model=JobSummary)
+def confirm_job(project_id: str, job_id: str, db: Session = Depends(get_db)):
+    """
+    Promote a dry run: its changes are moved into the workspace in one step and
+    the job completes like a regular one (snapshot, verification).
+    409 while a job is running on the project, or if a file it changes was
+    changed in the workspace since the preview.
+    """
+    project = db.query(models.Project).filter(models.Project.id == project_id).first()
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+    job = _get_preview_job(db, project_id, job_id)
+    _ensure_idle(db, project_id)
+
+    ensure_workspace(project_id, project.workspace_path)
+    # Jobs hold the same lock while they run: the promoted tree and its snapshot are never mixed
+    with project_lock(project_id):
+        workspace_path = locked_workspace(project_id, project.workspace_path)
+        # Promotion writes the durable tree; fold any hot copy into it first
+        hot_tier.demote(project_id)
+        try:
+            promote_preview(project_id, job_id, workspace_path)
+        except PreviewNotFound:
+            raise HTTPException(status_code=404, detail="Preview not found")
+        except PreviewConflict as exc:
+            raise HTTPException(status_code=409, detail=f"Changed in the workspace since the preview: {exc}")
+
+        job.status = "completed"
+        job.result_path = str(Path(workspace_path) / ".codex" / "result.json")
+        record_snapshot(project, job, Path(workspace_path))
+    if settings.VERIFY_JOBS and (job.result or {}).get("status") != "error":
+        job.verification_status = "pending"
+    db.commit()
+    db.refresh(job)
+    if job.verification_status == "pending":
+        verifier.submit(project_id, job_id)
+    return job
+
+
+@router.post("/{project_id}/jobs/{job_id}/discard", response_model=JobSummary)
+def discard_job(project_id: str, job_id: str, db: Session = Depends(get_db)):
+    """Drop a dry run's preview; the workspace is left as it is."""
+    job = _get_preview_job(db, project_id, job_id)
+    discard_preview(project_id, job_id)
+    job.status = "discarded"
+    db.commit()
+    db.refresh(job)
+    return job
+
+
+@router.post("/{project_id}/jobs/{job_id}/restore", response_model=JobSummary)
+def restore_job(project_id: str, job_id: str, db: Session = Depends(get_db)):
+    """
+    Roll the workspace back (or forward) to a job's snapshot.
+    Recorded as a new "restore" job with its own snapshot, so history stays linear.
+    409 while a job is running on the project.
+    """
+    project = db.query(models.Project).filter(models.Project.id == project_id).first()
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+    source = db.query(models.Job).filter(
+        models.Job.id == job_id, models.Job.project_id == project_id
+    ).first()
+    if not source:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    _ensure_idle(db, project_id)
+    ensure_workspace(project_id, project.workspace_path)
+    with project_lock(project_id):
+        workspace_path = locked_workspace(project_id, project.workspace_path)
+        # Restore rewrites the durable tree; fold any hot copy into it first
+        hot_tier.demote(project_id)
+        try:
+            restore_snapshot(project_id, job_id, workspace_path)
+        except SnapshotNotFound:
+            raise HTTPException(status_code=404, detail="Snapshot not found")
+
+        job = models.Job(
+            project_id=project.id,
+            job_type="restore",
+            instruction=f"Restore workspace to job {job_id}",
+            status="completed",
+        )
+        db.add(job)
+        db.commit()
+        db.refresh(job)
+        record_snapshot(project, job, workspace_path)
+    return job
@@ -0,0 +1,22 @@
+from fastapi import APIRouter
+
+from app.schemas import MetricsResponse
+from app.services.change_feed import change_feed
+from app.services.compression import compressor
+from app.services.file_cache import file_cache
+from app.services.hot_tier import hot_tier
+from app.services.singleflight import flights
+
+router = APIRouter()
+
+
+@router.get("", response_model=MetricsResponse)
+def get_metrics():
+    return MetricsResponse(
+        file_cache=file_cache.stats(),
+        compression=compressor.stats(),
+        compression_cache=compressor.variants.stats(),
+        singleflight=flights.stats(),
+        hot_tier=hot_tier.stats(),
+        change_feed=change_feed.stats(),
+    )
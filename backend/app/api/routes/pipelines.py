@@ -0,0 +1,96 @@
+from datetime import datetime, timedelta
+
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+
+from app.api.deps import get_db
+from app.core.config import settings
+from app.db import models
+from app.db.models import generate_uuid
+from app.schemas import PipelineCreate, PipelineDetail
+from app.services.lifecycle import QuotaExceeded, check_quota
+from app.services.scheduler import find_cycle, pipeline_status, scheduler
+
+router = APIRouter()
+
+
+def _detail(pipeline: models.Pipeline) -> PipelineDetail:
+    jobs = sorted(pipeline.jobs, key=lambda j: j.created_at)
+    return PipelineDetail(
+        id=pipeline.id,
+        on_failure=pipeline.on_failure,
+        status=pipeline_status(jobs),
+        created_at=pipeline.created_at,
+        updated_at=pipeline.updated_at,
+        jobs=[
+            {
+                "id": j.id, "project_id": j.project_id, "job_type": j.job_type, "instruction": j.instruction,
+                "status": j.status, "dry_run": j.dry_run, "created_at": j.created_at, "updated_at": j.updated_at,
+                "step": j.step, "depends_on": j.depends_on or [],
+            }
+            for j in jobs
+        ],
+    )
+
+
+@router.post("/", response_model=PipelineDetail)
+def create_pipeline(payload: PipelineCreate, db: Session = Depends(get_db)):
+    """
+    Submit several jobs at once as a DAG (or, without depends_on, a chain in list order).
+    Returns right away with every job queued; the scheduler runs each step once
+    its dependencies completed, steps on different projects in parallel.
+    """
+    edges = {
+        step.key: step.depends_on if step.depends_on is not None else ([payload.steps[i - 1].key] if i else [])
+        for i, step in enumerate(payload.steps)
+    }
+    external = {dep for deps in edges.values() for dep in deps if dep not in edges}
+    if external:
+        known = {job_id for (job_id,) in db.query(models.Job.id).filter(models.Job.id.in_(external))}
+        missing = sorted(external - known)
+        if missing:
+            raise HTTPException(status_code=400, detail=f"Unknown dependency: {', '.join(missing)}")
+    cycle = find_cycle(edges)
+    if cycle:
+        raise HTTPException(status_code=400, detail=f"Dependency cycle: {' -> '.join(cycle)}")
+    project_ids = {step.project_id for step in payload.steps}
+    found = {pid for (pid,) in db.query(models.Project.id).filter(models.Project.id.in_(project_ids))}
+    if found != project_ids:
+        raise HTTPException(status_code=404, detail="Project not found")
+    try:
+        check_quota()
+    except QuotaExceeded:
+        raise HTTPException(status_code=409, detail="Disk quota exceeded")
+
+    pipeline = models.Pipeline(on_failure=payload.on_failure or settings.PIPELINE_ON_FAILURE)
+    db.add(pipeline)
+    db.flush()
+    job_ids = {step.key: generate_uuid() for step in payload.steps}
+    submitted = datetime.utcnow()
+    for index, step in enumerate(payload.steps):
+        db.add(models.Job(
+            id=job_ids[step.key],
+            project_id=step.project_id,
+            # Steps keep their list order among jobs of the same project
+            created_at=submitted + timedelta(microseconds=index),
+            queued_at=submitted,
+            job_type=step.job_type,
+            instruction=step.instruction,
+            status="queued",
+            pipeline_id=pipeline.id,
+            step=step.key,
+            depends_on=[job_ids.get(dep, dep) for dep in edges[step.key]],
+        ))
+    db.commit()
+
+    scheduler.release()
+    db.refresh(pipeline)
+    return _detail(pipeline)
+
+
+@router.get("/{pipeline_id}", response_model=PipelineDetail)
+def get_pipeline(pipeline_id: str, db: Session = Depends(get_db)):
+    pipeline = db.query(models.Pipeline).filter(models.Pipeline.id == pipeline_id).first()
+    if not pipeline:
+        raise HTTPException(status_code=404, detail="Pipeline not found")
+    return _detail(pipeline)
@@ -1,39 +1,63 @@
-from fastapi import APIRouter, Depends, HTTPException
+import json
+import shutil
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
 from app.api.deps import get_db
+from app.api.routes.files import NDJSON_MEDIA_TYPE
 from app.core.logging import logger
 from app.db import models
-from app.schemas import ProjectCreate, ProjectSummary, ProjectDetail
-from app.services.workspaces import create_workspace
-from app.services.codex_runner import run_codex_job
+from app.db.models import generate_uuid
+from app.schemas import ProjectCreate, ProjectSummary, ProjectDetail, ProjectBatchCreate, ProjectBatchResponse
+from app.services.workspaces import create_workspace, resolve_workspace_dir, workspace_dir
+from app.services.codex_runner import record_snapshot, run_codex_job
+from app.services.lifecycle import QuotaExceeded, check_quota
+from app.services.scheduler import scheduler
+from app.services.templates import UnknownTemplate, templates
 
 router = APIRouter()
 
+# Ids per IN (...) lookup; stays below SQLite's bound-parameter limit
+_ID_CHUNK = 500
+
 
 
 @router.post("/", response_model=ProjectSummary)
 def create_project(payload: ProjectCreate, db: Session = Depends(get_db)):
+    try:
+        check_quota()
+    except QuotaExceeded:
+        raise HTTPException(status_code=409, detail="Disk quota exceeded")
+    if payload.template:
+        try:
+            templates.source(payload.template)
+        except UnknownTemplate:
+            raise HTTPException(status_code=400, detail=f"Unknown template: {payload.template}")
+
+    # Pick the id up front so the workspace is created once, at its final path
+    project_id = generate_uuid()
     project = models.Project(
+        id=project_id,
         instruction=payload.instruction,
         status="queued",
-        workspace_path=str(create_workspace("temp")),  # temp; we fix ID after insert
+        workspace_path=str(create_workspace(project_id)),
     )
     db.add(project)
     db.commit()
     db.refresh(project)
 
-    # Now fix workspace path to use actual project.id
-    from app.services.workspaces import create_workspace as create_ws_again
-
-    ws = create_ws_again(project.id)
-    project.workspace_path = str(ws)
-    db.add(project)
-    db.commit()
-    db.refresh(project)
-
     logger.info("Created project %s", project.id)
 
+    if payload.template:
+        return _start_from_template(db, project, payload.template)
+
     # Create initial job
     job = models.Job(
         project_id=project.id,
@@ -58,6 +82,203 @@ def create_project(payload: ProjectCreate, db: Session = Depends(get_db)):
     return project
 
 
+def _start_from_template(db: Session, project: models.Project, template: str) -> models.Project:
+    """Materialize a prebuilt template instead of running an initial job; recorded as a "template" job."""
+    cloned = templates.materialize(template, Path(project.workspace_path))
+    job = models.Job(
+        project_id=project.id,
+        job_type="template",
+        instruction=f"Create project from template {template}",
+        status="completed",
+    )
+    db.add(job)
+    project.status = "completed"
+    project.summary = f"Created from template {template}"
+    db.add(project)
+    db.commit()
+    db.refresh(job)
+    record_snapshot(project, job, project.workspace_path)
+    db.refresh(project)
+    logger.info("Project %s started from template %s (%s)", project.id, template, cloned)
+    return project
+
+
+def _chunks(items: list, size: int = _ID_CHUNK):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _known_template(name: str) -> bool:
+    try:
+        templates.source(name)
+        return True
+    except UnknownTemplate:
+        return False
+
+
+def _claim_workspace(project_id: str) -> Optional[Path]:
+    """
+    Create the project's workspace, or None if its directory already exists:
+    it belongs to someone else (another request with the same id), so it is
+    neither used nor ever removed here.
+    """
+    ws = workspace_dir(project_id)
+    ws.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        ws.mkdir()
+    except FileExistsError:
+        return None
+    return create_workspace(project_id)
+
+
+def _insert_batch(db: Session, rows: list, claimed: dict) -> None:
+    """
+    Insert (result, project row, job row) tuples with two bulk INSERTs. If one
+    of the ids was inserted concurrently (IntegrityError), the rows go in one by
+    one instead and the conflicting items are reported as already_exists.
+    Committed ids are dropped from claimed ({id: workspace created by this request}).
+    """
+    try:
+        db.execute(insert(models.Project), [project for _, project, _ in rows])
+        db.execute(insert(models.Job), [job for _, _, job in rows])
+        db.commit()
+        claimed.clear()
+        return
+    except IntegrityError:
+        db.rollback()
+    for result, project, job in rows:
+        try:
+            db.execute(insert(models.Project), [project])
+            db.execute(insert(models.Job), [job])
+            db.commit()
+        except IntegrityError:
+            db.rollback()
+            result["status"], result["error"] = None, "already_exists"
+            shutil.rmtree(claimed[result["id"]], ignore_errors=True)
+        claimed.pop(result["id"])
+
+
+def _create_chunk(db: Session, chunk: list, submitted: datetime) -> None:
+    """
+    Create one chunk of accepted (result, item) pairs in one transaction.
+    On failure its rows are rolled back and the workspaces it created are removed.
+    """
+    existing = {
+        pid for (pid,) in db.query(models.Project.id).filter(models.Project.id.in_([r["id"] for r, _ in chunk]))
+    }
+    rows, claimed = [], {}
+    try:
+        for result, item in chunk:
+            workspace = None if result["id"] in existing else _claim_workspace(result["id"])
+            if workspace is None:
+                result["error"] = "already_exists"
+                continue
+            claimed[result["id"]] = workspace
+            if item.template:
+                templates.materialize(item.template, workspace)
+                status, summary = "completed", f"Created from template {item.template}"
+                job = {"job_type": "template", "instruction": f"Create project from template {item.template}",
+                       "status": "completed", "depends_on": None}
+            else:
+                # No dependencies: the scheduler runs it as soon as it has a free slot
+                status, summary = "queued", None
+                job = {"job_type": "initial_project", "instruction": item.instruction,
+                       "status": "queued", "depends_on": []}
+            # Initial jobs are scheduled in request order
+            created_at = submitted + timedelta(microseconds=result["index"])
+            rows.append((result, {
+                "id": result["id"], "instruction": item.instruction, "status": status, "summary": summary,
+                "workspace_path": str(workspace), "created_at": created_at, "updated_at": created_at,
+            }, {
+                "id": generate_uuid(), "project_id": result["id"], "created_at": created_at,
+                "updated_at": created_at, "queued_at": created_at, **job,
+            }))
+            result["status"] = status
+        if rows:
+            _insert_batch(db, rows, claimed)
+    except BaseException:
+        db.rollback()
+        for result, _ in chunk:
+            if result["id"] in claimed:
+                result["status"] = None
+                shutil.rmtree(claimed[result["id"]], ignore_errors=True)
+        raise
+
+    template_ids = [r["id"] for r, item in chunk if item.template and r["error"] is None]
+    if template_ids:
+        for job in db.query(models.Job).filter(models.Job.project_id.in_(template_ids)):
+            record_snapshot(job.project, job, job.project.workspace_path)
+    scheduler.release()
+
+
+@router.post(":batch", response_model=ProjectBatchResponse)
+def create_projects_batch(
+    payload: ProjectBatchCreate,
+    request: Request,
+    stream: bool = False,
+    db: Session = Depends(get_db),
+):
+    """
+    Create many projects in one request, in transactions of up to _ID_CHUNK projects.
+    - Ids are UUIDs chosen by the client or generated here, so each workspace
+      is created once at its final path and each chunk's rows go in with two bulk INSERTs.
+    - Initial jobs are queued for the scheduler instead of run in the request;
+      template projects are materialized right away.
+    - Per-item errors (duplicate or existing id, unknown template) are reported
+      inline; the other items are still created. A failure otherwise rolls back
+      the chunk in flight; committed chunks are already_exists on a retry.
+    - With ?stream=true or Accept: application/x-ndjson, each item's result is
+      streamed as an NDJSON line once its chunk is committed, followed by a final
+      {"done": true, ...} summary line.
+    """
+    try:
+        check_quota()
+    except QuotaExceeded:
+        raise HTTPException(status_code=409, detail="Disk quota exceeded")
+
+    results, accepted, seen, known_templates = [], [], set(), {}
+    for index, item in enumerate(payload.projects):
+        project_id = str(item.id) if item.id else generate_uuid()
+        result = {"index": index, "id": project_id, "status": None, "error": None}
+        if project_id in seen:
+            result["error"] = "duplicate_id"
+        elif item.template and not known_templates.setdefault(item.template, _known_template(item.template)):
+            result["error"] = "unknown_template"
+        else:
+            accepted.append((result, item))
+        seen.add(project_id)
+        results.append(result)
+
+    submitted = datetime.utcnow()
+
+    def create():
+        """Results in request order, each once its chunk is committed."""
+        done = 0
+        for chunk in _chunks(accepted, _ID_CHUNK):
+            _create_chunk(db, chunk, submitted)
+            last = chunk[-1][0]["index"] + 1
+            yield from results[done:last]
+            done = last
+        yield from results[done:]
+
+    def summary() -> dict:
+        failed = sum(1 for result in results if result["error"])
+        logger.info("Created %d projects in one batch (%d failed)", len(results) - failed, failed)
+        return {"created": len(results) - failed, "failed": failed}
+
+    if stream or NDJSON_MEDIA_TYPE in request.headers.get("accept", ""):
+        def ndjson():
+            for result in create():
+                yield json.dumps(result) + "\n"
+            yield json.dumps({"done": True, **summary()}) + "\n"
+
+        return StreamingResponse(ndjson(), media_type=NDJSON_MEDIA_TYPE)
+
+    for _ in create():
+        pass
+    return ProjectBatchResponse(projects=results, **summary())
+
+
 @router.get("/{project_id}", response_model=ProjectDetail)
 def get_project(project_id: str, db: Session = Depends(get_db)):
     project = db.query(models.Project).filter(models.Project.id == project_id).first()
@@ -71,6 +292,6 @@ def get_project(project_id: str, db: Session = Depends(get_db)):
         summary=project.summary,
         created_at=project.created_at,
         updated_at=project.updated_at,
-        workspace_path=project.workspace_path,
+        workspace_path=str(resolve_workspace_dir(project.id, project.workspace_path)),
         jobs=project.jobs,
     )
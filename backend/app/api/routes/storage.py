@@ -0,0 +1,36 @@
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+
+from app.api.deps import get_db
+from app.db import models
+from app.schemas import LayoutMigrationReport, StorageReport
+from app.services.dedupe import storage_report
+from app.services.layout_migration import migrate_workspace_layout
+from app.services.workspaces import resolve_workspace_dir
+
+router = APIRouter()
+
+
+@router.get("/report", response_model=StorageReport)
+def get_storage_report(db: Session = Depends(get_db)):
+    """Dedupe effectiveness across all project workspaces and the blob store."""
+    paths = [
+        str(resolve_workspace_dir(project_id, stored_path))
+        for project_id, stored_path in db.query(models.Project.id, models.Project.workspace_path)
+    ]
+    return StorageReport(**storage_report(paths))
+
+
+@router.post("/layout/migrate", response_model=LayoutMigrationReport)
+def migrate_layout(
+    limit: Optional[int] = Query(default=None, ge=1),
+    dry_run: bool = False,
+    db: Session = Depends(get_db),
+):
+    """
+    Move flat-layout workspaces into their shards while the API serves traffic.
+    Runs in the server process, whose project locks jobs and archival also take.
+    """
+    return LayoutMigrationReport(**migrate_workspace_layout(db, limit=limit, dry_run=dry_run))
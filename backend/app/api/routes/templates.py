@@ -0,0 +1,14 @@
+from fastapi import APIRouter
+
+from app.schemas import TemplateInfo, TemplateListResponse
+from app.services.templates import templates
+
+router = APIRouter()
+
+
+@router.get("", response_model=TemplateListResponse)
+def list_templates():
+    """Scaffolds accepted by POST /projects {"template": ...}."""
+    return TemplateListResponse(
+        templates=[TemplateInfo(name=name, files=templates.files(name)) for name in templates.names()]
+    )
@@ -23,6 +23,98 @@ class Settings(BaseSettings):
 
     # Workspaces
     WORKSPACE_ROOT: str = "./workspaces"
+    # Host path of WORKSPACE_ROOT (docker-compose sets it). When set, each job container
+    # mounts only its project's directory instead of --volumes-from the backend.
+    HOST_WORKSPACES_DIR: str = ""
+    # RAM-backed hot tier (e.g. a tmpfs mount) for active workspaces; empty disables.
+    # Jobs run on the hot copy; changes are written back before a job completes.
+    HOT_TIER_ROOT: str = ""
+    HOT_TIER_MAX_BYTES: int = 512 * 1024 * 1024
+    HOT_TIER_MIN_FREE_BYTES: int = 64 * 1024 * 1024  # demote when the tmpfs gets this full
+    # Disk quotas checked before each job (bytes; 0 = unlimited)
+    PROJECT_DISK_QUOTA_BYTES: int = 0
+    GLOBAL_DISK_QUOTA_BYTES: int = 0
+    # Idle workspaces are archived to STORE_ROOT/archives and restored on next access (0 disables)
+    WORKSPACE_IDLE_TTL_SECONDS: float = 7 * 24 * 3600.0
+    # Background archival + orphan cleanup; 0 disables
+    WORKSPACE_GC_INTERVAL_SECONDS: float = 3600.0
+    # Workspace dirs without a projects row are removed once older than this
+    WORKSPACE_ORPHAN_MIN_AGE_SECONDS: float = 3600.0
+    # inotify change feed (GET /{project_id}/changes); watches are per directory
+    CHANGE_FEED_MAX_WORKSPACES: int = 256  # watched workspaces, evicted LRU
+    CHANGE_FEED_MAX_WATCHES: int = 8192  # total directory watches (stay below fs.inotify.max_user_watches)
+    CHANGE_FEED_BUFFER_EVENTS: int = 1024  # changes kept per workspace for cursor polling
+    CHANGE_FEED_COALESCE_MS: int = 50  # bursts on one path within this window become one change
+    CHANGE_FEED_IDLE_SECONDS: float = 600.0  # unwatch workspaces nobody polled for this long
+    CHANGE_FEED_SSE_MAX_SECONDS: float = 300.0  # SSE streams end after this; clients resume via Last-Event-ID
+    # Durable workspace + blob storage behind app.services.storage_backends: local | memory | s3
+    # (with memory/s3, WORKSPACE_ROOT and the blob store are node-local caches of it)
+    WORKSPACE_STORAGE: str = "local"
+    # S3-compatible object store (path-style requests; MinIO, Ceph RGW, AWS)
+    S3_ENDPOINT_URL: str = "http://localhost:9000"
+    S3_BUCKET: str = "codex-workspaces"
+    S3_REGION: str = "us-east-1"
+    S3_ACCESS_KEY_ID: str = ""
+    S3_SECRET_ACCESS_KEY: str = ""
+    S3_PREFIX: str = ""  # key prefix for everything this deployment stores
+    S3_POOL_SIZE: int = 8  # keep-alive connections per endpoint
+    S3_PART_SIZE_BYTES: int = 8 * 1024 * 1024  # streams larger than one part use multipart upload
+
+    # Content-addressed store (blobs + per-job snapshot manifests)
+    STORE_ROOT: str = "./store"
+    SNAPSHOTS_ENABLED: bool = True
+    # Dedupe mode: after each job, workspace files become hardlinks to their blobs
+    WORKSPACE_DEDUPE: bool = False
+    BLOB_GC_INTERVAL_SECONDS: float = 3600.0  # background GC of unreferenced blobs; 0 disables
+    BLOB_GC_GRACE_SECONDS: float = 3600.0  # never collect blobs younger than this
+    # Reads during a running job are served from a view of the last snapshot (STORE_ROOT/views);
+    # views are removed by the workspace GC once unused and older than this
+    SNAPSHOT_VIEW_MIN_AGE_SECONDS: float = 300.0
+
+    # Dry-run jobs run on a clone under WORKSPACE_ROOT/.previews until confirmed or discarded;
+    # unconfirmed previews are discarded by the workspace GC after this long (0 keeps them)
+    PREVIEW_TTL_SECONDS: float = 24 * 3600.0
+
+    # How forks, previews and templates materialize files: auto (reflink -> copy) | reflink | hardlink | copy
+    # (hardlink shares inodes with the source; only safe while every writer replaces files)
+    WORKSPACE_CLONE_MODE: str = "auto"
+
+    # Batch file reads (POST /{project_id}/files:batchGet)
+    FILES_BATCH_MAX_BYTES: int = 8 * 1024 * 1024  # hard ceiling for a single batch
+
+    # Line-range reads: memory for per-file line-offset indexes (8 bytes per line; 0 disables)
+    LINE_INDEX_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+
+    # In-memory LRU for hot file contents (0 disables)
+    FILE_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+    FILE_CACHE_MAX_ENTRY_BYTES: int = 1024 * 1024
+
+    # Response compression (gzip always; zstd when the "zstandard" package is installed)
+    COMPRESSION_MIN_BYTES: int = 1024  # smaller bodies are sent as-is
+    COMPRESSION_CPU_BUDGET_MS: int = 250  # compression CPU time allowed per second; 0 disables
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_ZSTD_LEVEL: int = 3
+    COMPRESSION_CACHE_MAX_BYTES: int = 32 * 1024 * 1024  # precompressed file-body variants
+    COMPRESSION_CACHE_MAX_ENTRY_BYTES: int = 1024 * 1024
+
+    # Request coalescing: max seconds a caller waits on an identical in-flight read (0 disables)
+    SINGLEFLIGHT_TIMEOUT_SECONDS: float = 10.0
+
+    # Post-job verification: run the workspace's tests after each successful job.
+    # Outcomes are cached by tree content hash (+ command) under STORE_ROOT/verify.
+    # Tests run where jobs run: in VERIFY_IMAGE without network, or locally with the dummy worker.
+    VERIFY_JOBS: bool = False
+    VERIFY_COMMAND: str = "{python} -m pytest -q -p no:cacheprovider"  # {python}: the interpreter where tests run
+    VERIFY_IMAGE: str = ""  # required with the real worker: must provide the test runner (the worker image has none)
+    VERIFY_TIMEOUT_SECONDS: float = 120.0
+    VERIFY_MAX_WORKERS: int = 2  # concurrent test runs across all projects
+    VERIFY_OUTPUT_MAX_BYTES: int = 16 * 1024  # tail of the test output kept on the job
+
+    # Job scheduler for jobs with depends_on and pipelines (POST /api/v1/pipelines)
+    SCHEDULER_MAX_WORKERS: int = 4  # jobs run at once across projects; one per project at a time
+    # What a failed job does to the jobs after it, unless its pipeline says otherwise:
+    # cancel_dependents | cancel_pipeline | continue
+    PIPELINE_ON_FAILURE: str = "cancel_dependents"
 
     # Worker behavior
     USE_DUMMY_WORKER: bool = True  # Toggle this off when you wire real Codex
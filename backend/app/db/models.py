@@ -1,7 +1,7 @@
 import uuid
 from datetime import datetime
 
-from sqlalchemy import Column, DateTime, String, Text, ForeignKey, event
+from sqlalchemy import JSON, BigInteger, Boolean, Column, DateTime, Float, Integer, String, Text, ForeignKey, event
 from sqlalchemy.orm import declarative_base, relationship
 
 Base = declarative_base()
@@ -27,6 +27,20 @@ class Project(Base):
     jobs = relationship("Job", back_populates="project")
 
 
+class Pipeline(Base):
+    """A set of jobs submitted together whose depends_on edges form a DAG (app.services.scheduler)."""
+    __tablename__ = "pipelines"
+
+    id = Column(String, primary_key=True, default=generate_uuid)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+    # What a failed job does to the rest: cancel_dependents | cancel_pipeline | continue
+    on_failure = Column(String, nullable=False)
+
+    jobs = relationship("Job", back_populates="pipeline")
+
+
 class Job(Base):
     __tablename__ = "jobs"
 
@@ -38,12 +52,66 @@ class Job(Base):
 
     job_type = Column(String, nullable=False)  # initial_project | edit
     instruction = Column(Text, nullable=False)
-    status = Column(String, default="queued", nullable=False)  # queued|in_progress|completed|error
+    status = Column(String, default="queued", nullable=False)  # queued|in_progress|completed|error|preview|discarded|cancelled
+    # Dry run: the job ran on a preview clone (status "preview") until confirmed (-> completed) or discarded
+    dry_run = Column(Boolean, default=False, nullable=False)
+    # Scheduled jobs stay queued until every job in depends_on has completed (app.services.scheduler);
+    # None for jobs run directly by their request
+    depends_on = Column(JSON, nullable=True)
+    pipeline_id = Column(String, ForeignKey("pipelines.id"), nullable=True)
+    step = Column(String, nullable=True)  # the job's step key within its pipeline
 
     result_path = Column(String, nullable=True)  # path to .result.json if any
     logs_path = Column(String, nullable=True)
+    # The worker's result.json as parsed and validated when the job finished (app.schemas.JobResult);
+    # result_path is shared by every job of a project, this is the job's own copy
+    result = Column(JSON, nullable=True)
+
+    # Phase timestamps: queued -> started (runner picked it up) -> worker started/finished -> finished
+    queued_at = Column(DateTime, default=datetime.utcnow, nullable=True)
+    started_at = Column(DateTime, nullable=True)
+    worker_started_at = Column(DateTime, nullable=True)
+    worker_finished_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+
+    # Worker resource usage, as reported in result.json "timings"
+    worker_peak_rss_bytes = Column(BigInteger, nullable=True)
+    worker_cpu_seconds = Column(Float, nullable=True)
+
+    # Post-job verification (workspace tests); status: pending|passed|failed|no_tests|timeout|error
+    verification_status = Column(String, nullable=True)
+    verification_tree_sha256 = Column(String, nullable=True)
+    verification_exit_code = Column(Integer, nullable=True)
+    verification_seconds = Column(Float, nullable=True)
+    verification_cached = Column(Boolean, nullable=True)
+    verification_output = Column(Text, nullable=True)
+    verified_at = Column(DateTime, nullable=True)
 
     project = relationship("Project", back_populates="jobs")
+    pipeline = relationship("Pipeline", back_populates="jobs")
+
+
+# Job columns describing how a run went; copied along with job history (forks)
+JOB_TIMING_COLUMNS = (
+    "queued_at",
+    "started_at",
+    "worker_started_at",
+    "worker_finished_at",
+    "finished_at",
+    "worker_peak_rss_bytes",
+    "worker_cpu_seconds",
+)
+
+# Verification outcome of a job's tree; still valid for a copy of that tree (forks)
+JOB_VERIFICATION_COLUMNS = (
+    "verification_status",
+    "verification_tree_sha256",
+    "verification_exit_code",
+    "verification_seconds",
+    "verification_cached",
+    "verification_output",
+    "verified_at",
+)
 
 
 # SQLAlchemy events to ensure updated_at bumps on UPDATE operations
@@ -1,7 +1,30 @@
-from .projects import ProjectCreate, ProjectSummary, ProjectDetail
-from .jobs import JobCreate, JobSummary, JobDetail
-from .files import FileInfo, FileListResponse, FileContentResponse
+from .projects import (
+    ProjectCreate,
+    ProjectSummary,
+    ProjectDetail,
+    ProjectFork,
+    ProjectForkResponse,
+    ProjectBatchItem,
+    ProjectBatchCreate,
+    ProjectBatchResult,
+    ProjectBatchResponse,
+)
+from .jobs import JobCreate, JobSummary, JobDetail, JobPhases, JobResult, FileChange, JobDiff
+from .pipelines import PipelineStep, PipelineCreate, PipelineJob, PipelineDetail
+from .files import (
+    FileInfo,
+    FileListResponse,
+    FileContentResponse,
+    FileBatchRequest,
+    FileBatchItem,
+    FileBatchResponse,
+    WorkspaceChange,
+    ChangeFeedResponse,
+)
 from .errors import ErrorResponse
+from .storage import LayoutMigrationReport, StorageReport
+from .templates import TemplateInfo, TemplateListResponse
+from .metrics import CacheStats, CompressionStats, SingleFlightStats, HotTierStats, ChangeFeedStats, MetricsResponse
 
 # Resolve forward references for Pydantic v2
 ProjectDetail.model_rebuild()
@@ -1,5 +1,5 @@
-from typing import List
-from pydantic import BaseModel
+from typing import List, Optional, Annotated
+from pydantic import BaseModel, Field
 
 
 class FileInfo(BaseModel):
@@ -14,3 +14,43 @@ class FileListResponse(BaseModel):
 class FileContentResponse(BaseModel):
     path: str
     contents: str
+    total_lines: Optional[int] = None
+    # Echo of the served window for partial reads (line or byte mode)
+    start_line: Optional[int] = None
+    end_line: Optional[int] = None
+    offset: Optional[int] = None
+    length: Optional[int] = None
+
+
+class FileBatchRequest(BaseModel):
+    # Literal workspace-relative paths or globs (e.g. "src/*.py")
+    paths: Annotated[List[str], Field(min_length=1, max_length=500)]
+    # Overall byte budget for the batch; capped by FILES_BATCH_MAX_BYTES
+    max_bytes: Optional[int] = Field(default=None, ge=1)
+
+
+class FileBatchItem(BaseModel):
+    path: str
+    contents: Optional[str] = None
+    size: Optional[int] = None
+    error: Optional[str] = None  # invalid_path | not_found | decode_error | byte_budget_exceeded
+
+
+class FileBatchResponse(BaseModel):
+    files: List[FileBatchItem]
+    total_bytes: int
+    truncated: bool = False
+
+
+class WorkspaceChange(BaseModel):
+    seq: int
+    path: str
+    type: str  # created | modified | deleted
+
+
+class ChangeFeedResponse(BaseModel):
+    # Pass back as ?cursor= to get the changes after this point
+    cursor: Optional[str] = None
+    changes: List[WorkspaceChange]
+    # True when the cursor can no longer be served (evicted, restarted, overflowed): re-list the files
+    reset: bool = False
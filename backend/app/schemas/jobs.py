@@ -1,8 +1,8 @@
 from datetime import datetime
-from typing import Optional, Annotated
+from typing import List, Literal, Optional, Annotated
 from enum import Enum
 
-from pydantic import BaseModel, ConfigDict, Field, field_validator
+from pydantic import BaseModel, ConfigDict, Field, field_validator, model_validator
 
 
 class JobType(str, Enum):
@@ -13,6 +13,10 @@ class JobType(str, Enum):
 class JobCreate(BaseModel):
     job_type: JobType  # restricted enum
     instruction: Annotated[str, Field(min_length=1, max_length=2000)]
+    # Run on a preview clone; the workspace changes only on POST .../confirm
+    dry_run: bool = False
+    # Job ids to wait for: the job is queued and run by the scheduler once they completed
+    depends_on: Optional[Annotated[List[str], Field(max_length=100)]] = None
 
     @field_validator("instruction", mode="before")
     @classmethod
@@ -36,6 +40,16 @@ class JobCreate(BaseModel):
                     "job_type": "edit",
                     "instruction": "Append a comment line to app.py describing the change."
                 },
+                {
+                    "job_type": "edit",
+                    "instruction": "Split the Fibonacci logic into its own module.",
+                    "dry_run": True
+                },
+                {
+                    "job_type": "edit",
+                    "instruction": "Add a CHANGELOG section to the README.",
+                    "depends_on": ["<job id>"]
+                },
             ]
         }
     )
@@ -47,12 +61,91 @@ class JobSummary(BaseModel):
     job_type: str
     instruction: str
     status: str
+    dry_run: bool = False
     created_at: datetime
     updated_at: datetime
 
     model_config = ConfigDict(from_attributes=True)
 
 
+def _seconds(start: Optional[datetime], end: Optional[datetime]) -> Optional[float]:
+    if start is None or end is None:
+        return None
+    return round((end - start).total_seconds(), 3)
+
+
+class JobPhases(BaseModel):
+    """Where a job's wall time went; None when a phase did not happen (or predates timing)."""
+    queued_seconds: Optional[float] = None  # queued_at -> started_at
+    startup_seconds: Optional[float] = None  # started_at -> worker_started_at (checkout, container start)
+    worker_seconds: Optional[float] = None  # worker_started_at -> worker_finished_at
+    commit_seconds: Optional[float] = None  # worker_finished_at -> finished_at (checkin, snapshot)
+    total_seconds: Optional[float] = None  # queued_at -> finished_at
+
+
+class JobResult(BaseModel):
+    """The worker's result.json, validated; unknown keys are dropped."""
+    status: str
+    summary: Optional[str] = None
+    created_files: List[str] = []
+    modified_files: List[str] = []
+    errors: List[str] = []
+    logs: List[str] = []
+    timings: Optional[dict] = None
+
+    model_config = ConfigDict(extra="ignore")
+
+
 class JobDetail(JobSummary):
     result_path: Optional[str] = None
     logs_path: Optional[str] = None
+    result: Optional[JobResult] = None  # None for jobs without a (valid) worker result
+    depends_on: Optional[List[str]] = None  # None for jobs not run by the scheduler
+    pipeline_id: Optional[str] = None
+    step: Optional[str] = None
+
+    queued_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    worker_started_at: Optional[datetime] = None
+    worker_finished_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    worker_peak_rss_bytes: Optional[int] = None
+    worker_cpu_seconds: Optional[float] = None
+    phases: Optional[JobPhases] = None
+
+    # Post-job verification; status is None when the job was never verified
+    verification_status: Optional[str] = None  # pending|passed|failed|no_tests|timeout|error
+    verification_tree_sha256: Optional[str] = None
+    verification_exit_code: Optional[int] = None
+    verification_seconds: Optional[float] = None
+    verification_cached: Optional[bool] = None
+    verification_output: Optional[str] = None
+    verified_at: Optional[datetime] = None
+
+    @model_validator(mode="after")
+    def _derive_phases(self):
+        if self.phases is None and self.queued_at is not None:
+            self.phases = JobPhases(
+                queued_seconds=_seconds(self.queued_at, self.started_at),
+                startup_seconds=_seconds(self.started_at, self.worker_started_at),
+                worker_seconds=_seconds(self.worker_started_at, self.worker_finished_at),
+                commit_seconds=_seconds(self.worker_finished_at, self.finished_at),
+                total_seconds=_seconds(self.queued_at, self.finished_at),
+            )
+        return self
+
+
+class FileChange(BaseModel):
+    path: str
+    change: Literal["added", "modified", "deleted"]
+    old_sha256: Optional[str] = None
+    new_sha256: Optional[str] = None
+    old_size: Optional[int] = None
+    new_size: Optional[int] = None
+
+
+class JobDiff(BaseModel):
+    job_id: str
+    base_job_id: Optional[str] = None  # previous snapshot; None means "diff against empty"
+    changes: List[FileChange]
+    unified: Optional[str] = None  # present when format=unified
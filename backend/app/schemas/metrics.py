@@ -0,0 +1,59 @@
+from typing import List
+
+from pydantic import BaseModel
+
+
+class CacheStats(BaseModel):
+    entries: int
+    bytes: int
+    max_bytes: int
+    hits: int
+    misses: int
+    evictions: int
+    invalidations: int
+    hit_rate: float
+
+
+class CompressionStats(BaseModel):
+    encodings: List[str]
+    compressed: int
+    skipped_small: int
+    skipped_budget: int
+    bytes_in: int
+    bytes_out: int
+
+
+class SingleFlightStats(BaseModel):
+    in_flight: int
+    leaders: int
+    shared: int
+    timeouts: int
+    retries: int
+
+
+class HotTierStats(BaseModel):
+    entries: int
+    bytes: int
+    max_bytes: int
+    pinned: int  # workspaces with a job running on the hot copy
+    promotions: int
+    demotions: int
+    write_backs: int
+
+
+class ChangeFeedStats(BaseModel):
+    workspaces: int
+    watches: int  # inotify watches held (one per directory)
+    max_watches: int
+    events: int
+    evictions: int
+    overflows: int
+
+
+class MetricsResponse(BaseModel):
+    file_cache: CacheStats
+    compression: CompressionStats
+    compression_cache: CacheStats
+    singleflight: SingleFlightStats
+    hot_tier: HotTierStats
+    change_feed: ChangeFeedStats
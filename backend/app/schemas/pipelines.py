@@ -0,0 +1,84 @@
+from datetime import datetime
+from typing import List, Literal, Optional, Annotated
+
+from pydantic import BaseModel, ConfigDict, Field, field_validator, model_validator
+
+from .jobs import JobSummary, JobType
+
+
+class PipelineStep(BaseModel):
+    key: Optional[Annotated[str, Field(min_length=1, max_length=64)]] = None  # defaults to the step's index
+    project_id: Optional[str] = None  # defaults to the pipeline's project_id
+    job_type: JobType = JobType.edit
+    instruction: Annotated[str, Field(min_length=1, max_length=2000)]
+    # Step keys or existing job ids to wait for; None means the previous step, so a plain list is a chain
+    depends_on: Optional[Annotated[List[str], Field(max_length=100)]] = None
+
+    @field_validator("instruction", mode="before")
+    @classmethod
+    def _trim_and_require_non_empty(cls, v):
+        if v is None:
+            return v
+        if isinstance(v, str):
+            v = v.strip()
+            if v == "":
+                raise ValueError("instruction must not be empty")
+        return v
+
+
+class PipelineCreate(BaseModel):
+    project_id: Optional[str] = None
+    # Default: PIPELINE_ON_FAILURE
+    on_failure: Optional[Literal["cancel_dependents", "cancel_pipeline", "continue"]] = None
+    steps: Annotated[List[PipelineStep], Field(min_length=1, max_length=100)]
+
+    @model_validator(mode="after")
+    def _keys_and_projects(self):
+        for index, step in enumerate(self.steps):
+            if step.key is None:
+                step.key = str(index)
+            if step.project_id is None:
+                if self.project_id is None:
+                    raise ValueError(f"step {step.key}: project_id is required")
+                step.project_id = self.project_id
+        keys = [step.key for step in self.steps]
+        if len(set(keys)) != len(keys):
+            raise ValueError("step keys must be unique")
+        return self
+
+    model_config = ConfigDict(
+        json_schema_extra={
+            "examples": [
+                {
+                    "project_id": "<project id>",
+                    "steps": [
+                        {"instruction": "Refactor: split the Fibonacci logic into its own module."},
+                        {"instruction": "Add CLI argument parsing for the count."},
+                        {"instruction": "Add a CHANGELOG section to the README."},
+                    ],
+                },
+                {
+                    "on_failure": "continue",
+                    "steps": [
+                        {"key": "a", "project_id": "<project id>", "instruction": "Add CLI argument parsing.", "depends_on": []},
+                        {"key": "b", "project_id": "<fork id>", "instruction": "Refactor into modules.", "depends_on": []},
+                        {"key": "docs", "project_id": "<project id>", "instruction": "Document the CLI.", "depends_on": ["a"]},
+                    ],
+                },
+            ]
+        }
+    )
+
+
+class PipelineJob(JobSummary):
+    step: Optional[str] = None
+    depends_on: List[str] = []
+
+
+class PipelineDetail(BaseModel):
+    id: str
+    on_failure: str
+    status: str  # queued | running | completed | failed
+    created_at: datetime
+    updated_at: datetime
+    jobs: List[PipelineJob]
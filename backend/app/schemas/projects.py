@@ -1,11 +1,14 @@
 from datetime import datetime
-from typing import Optional, List, Annotated
+from typing import Dict, Optional, List, Annotated
+from uuid import UUID
 
 from pydantic import BaseModel, ConfigDict, Field, field_validator
 
 
 class ProjectCreate(BaseModel):
     instruction: Annotated[str, Field(min_length=5, max_length=2000)]
+    # Start from a prebuilt scaffold (see GET /api/v1/templates) instead of running an initial job
+    template: Optional[Annotated[str, Field(pattern=r"^[a-z0-9][a-z0-9_-]{0,63}$")]] = None
 
     @field_validator("instruction", mode="before")
     @classmethod
@@ -43,3 +46,35 @@ class ProjectSummary(BaseModel):
 class ProjectDetail(ProjectSummary):
     workspace_path: str
     jobs: List["JobSummary"] = []  # defined in jobs.py via forward ref
+
+
+class ProjectFork(BaseModel):
+    # Also copy job rows (and their snapshots) so the fork keeps its history
+    copy_jobs: bool = False
+
+
+class ProjectForkResponse(ProjectSummary):
+    forked_from: str
+    files_cloned: Dict[str, int]  # files per clone method: reflink | hardlink | copy
+
+
+class ProjectBatchItem(ProjectCreate):
+    # Chosen by the client so a retried batch can be matched up; generated when omitted
+    id: Optional[UUID] = None
+
+
+class ProjectBatchCreate(BaseModel):
+    projects: Annotated[List[ProjectBatchItem], Field(min_length=1, max_length=10000)]
+
+
+class ProjectBatchResult(BaseModel):
+    index: int  # position in the request
+    id: Optional[str] = None
+    status: Optional[str] = None  # queued (initial job enqueued) | completed (template)
+    error: Optional[str] = None  # duplicate_id | already_exists | unknown_template
+
+
+class ProjectBatchResponse(BaseModel):
+    projects: List[ProjectBatchResult]
+    created: int
+    failed: int
@@ -0,0 +1,17 @@
+from pydantic import BaseModel
+
+
+class StorageReport(BaseModel):
+    workspaces: int
+    logical_bytes: int  # sum of file sizes as seen through the workspaces
+    physical_bytes: int  # bytes on disk, each inode counted once (workspaces + blob store)
+    blob_count: int
+    blob_bytes: int
+    linked_blobs: int  # blobs currently hardlinked into at least one workspace
+    dedupe_ratio: float  # logical / physical
+
+
+class LayoutMigrationReport(BaseModel):
+    migrated: int  # moved into their shard (with dry_run: would be moved)
+    busy: int  # skipped: a job is queued or running on the project
+    skipped: int  # already moved, or became busy, by the time the lock was held
@@ -0,0 +1,12 @@
+from typing import List
+
+from pydantic import BaseModel
+
+
+class TemplateInfo(BaseModel):
+    name: str
+    files: List[str]
+
+
+class TemplateListResponse(BaseModel):
+    templates: List[TemplateInfo]
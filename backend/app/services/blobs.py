@@ -0,0 +1,165 @@
+import hashlib
+import os
+import tempfile
+from pathlib import Path
+from typing import Iterable, Iterator, Tuple
+
+from app.core.config import settings
+
+_CHUNK_SIZE = 1024 * 1024
+
+
+def _remote_storage():
+    """The configured storage backend if it is remote (the local store is then a cache of its blobs)."""
+    # Imported lazily: the storage backends build on the snapshot services, which use this module
+    from app.services.storage_backends import get_storage
+
+    storage = get_storage()
+    return storage if storage.remote else None
+
+
+def _file_chunks(path: Path) -> Iterator[bytes]:
+    with open(path, "rb") as fh:
+        while True:
+            chunk = fh.read(_CHUNK_SIZE)
+            if not chunk:
+                return
+            yield chunk
+
+
+class BlobStore:
+    """
+    Content-addressed store of immutable file bodies.
+    - Blobs live at <root>/objects/<sha[:2]>/<sha[2:]> and are never modified.
+    - Writes go to a temp file inside the store and are renamed into place, so
+      a reader never observes a partial blob.
+    - With a remote storage backend (WORKSPACE_STORAGE), new blobs are also
+      written there, and blobs this node lacks are fetched from it on read.
+    """
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self.objects = self.root / "objects"
+        self.tmp = self.root / "tmp"
+
+    def ensure(self) -> None:
+        self.objects.mkdir(parents=True, exist_ok=True)
+        self.tmp.mkdir(parents=True, exist_ok=True)
+
+    def path_for(self, sha: str) -> Path:
+        return self.objects / sha[:2] / sha[2:]
+
+    def has(self, sha: str) -> bool:
+        if self.path_for(sha).exists():
+            return True
+        remote = _remote_storage()
+        return remote is not None and remote.has_blob(sha)
+
+    def local_path(self, sha: str) -> Path:
+        """path_for(sha), fetching the blob from remote storage first if this node lacks it."""
+        path = self.path_for(sha)
+        if not path.exists():
+            remote = _remote_storage()
+            if remote is not None:
+                self.put_chunks(sha, [remote.read_blob(sha)])
+        return path
+
+    def put_chunks(self, sha: str, chunks: Iterable[bytes]) -> None:
+        """Store a blob whose hash is already known (e.g. fetched from remote storage)."""
+        self.ensure()
+        fd, tmp_name = tempfile.mkstemp(dir=self.tmp)
+        try:
+            with os.fdopen(fd, "wb") as out:
+                for chunk in chunks:
+                    out.write(chunk)
+            dest = self.path_for(sha)
+            dest.parent.mkdir(parents=True, exist_ok=True)
+            os.chmod(tmp_name, 0o444)
+            os.replace(tmp_name, dest)
+        except BaseException:
+            if os.path.exists(tmp_name):
+                os.unlink(tmp_name)
+            raise
+
+    def _mirror(self, sha: str) -> None:
+        remote = _remote_storage()
+        if remote is not None and not remote.has_blob(sha):
+            remote.write_blob(sha, _file_chunks(self.path_for(sha)))
+
+    def put_file(self, source: Path) -> Tuple[str, int]:
+        """
+        Copy a file into the store, hashing it in the same pass.
+        Returns (sha256, size). If the blob already exists the copy is dropped
+        and the blob's mtime refreshed, which restarts its GC grace period.
+        """
+        self.ensure()
+        digest = hashlib.sha256()
+        size = 0
+        fd, tmp_name = tempfile.mkstemp(dir=self.tmp)
+        try:
+            with os.fdopen(fd, "wb") as out, open(source, "rb") as src:
+                while True:
+                    chunk = src.read(_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    digest.update(chunk)
+                    out.write(chunk)
+                    size += len(chunk)
+            sha = digest.hexdigest()
+            dest = self.path_for(sha)
+            try:
+                # Referenced again, maybe before any manifest names it: not GC's to take
+                os.utime(dest)
+                os.unlink(tmp_name)
+            except FileNotFoundError:
+                dest.parent.mkdir(parents=True, exist_ok=True)
+                os.chmod(tmp_name, 0o444)
+                os.replace(tmp_name, dest)
+            self._mirror(sha)
+            return sha, size
+        except BaseException:
+            if os.path.exists(tmp_name):
+                os.unlink(tmp_name)
+            raise
+
+    def is_linked(self, sha: str, st: os.stat_result) -> bool:
+        """True if st describes a hardlink of the blob itself (its content is then known)."""
+        try:
+            blob_st = os.stat(self.path_for(sha))
+        except FileNotFoundError:
+            return False
+        return (blob_st.st_dev, blob_st.st_ino) == (st.st_dev, st.st_ino)
+
+    def read_bytes(self, sha: str) -> bytes:
+        return self.local_path(sha).read_bytes()
+
+    def copy_to(self, sha: str, dest: Path) -> None:
+        """Materialize a blob at dest via temp file + rename (never writes through an existing inode)."""
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=dest.parent, prefix=".restore-")
+        try:
+            with os.fdopen(fd, "wb") as out, open(self.local_path(sha), "rb") as src:
+                while True:
+                    chunk = src.read(_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    out.write(chunk)
+            os.chmod(tmp_name, 0o644)
+            os.replace(tmp_name, dest)
+        except BaseException:
+            if os.path.exists(tmp_name):
+                os.unlink(tmp_name)
+            raise
+
+    def iter_blobs(self) -> Iterator[Tuple[str, Path]]:
+        if not self.objects.exists():
+            return
+        for prefix in os.scandir(self.objects):
+            if not prefix.is_dir():
+                continue
+            for entry in os.scandir(prefix.path):
+                yield prefix.name + entry.name, Path(entry.path)
+
+
+def get_blob_store() -> BlobStore:
+    return BlobStore(Path(settings.STORE_ROOT) / "blobs")
@@ -0,0 +1,497 @@
+import asyncio
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import struct
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+from app.core.config import settings
+from app.core.logging import logger
+from app.services.workspaces import (
+    invalidate_cached_files,
+    invalidate_cached_workspace,
+    iter_workspace_files,
+    listing_cache,
+)
+
+# <sys/inotify.h>
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_DONT_FOLLOW = 0x02000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = 0o2000000
+
+_WATCH_MASK = (
+    IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE
+    | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR | IN_DONT_FOLLOW
+)
+_EVENT = struct.Struct("iIII")  # wd, mask, cookie, len (+ NUL-padded name)
+
+# How a newer event on the same path combines with a pending one (None = drop both)
+_COALESCE = {
+    ("created", "modified"): "created",
+    ("created", "deleted"): None,
+    ("deleted", "created"): "modified",
+    ("deleted", "modified"): "modified",
+    ("modified", "created"): "modified",
+    ("modified", "deleted"): "deleted",
+}
+
+
+class ChangeFeedUnavailable(RuntimeError):
+    """inotify is not available on this platform."""
+    pass
+
+
+class WatchLimitExceeded(RuntimeError):
+    """A workspace needs more directory watches than the feed may hold."""
+    pass
+
+
+class _Inotify:
+    """Thin ctypes binding for the three inotify syscalls."""
+
+    def __init__(self):
+        name = ctypes.util.find_library("c") or "libc.so.6"
+        try:
+            libc = ctypes.CDLL(name, use_errno=True)
+            self._add = libc.inotify_add_watch
+            self._rm = libc.inotify_rm_watch
+            init = libc.inotify_init1
+        except (OSError, AttributeError):
+            raise ChangeFeedUnavailable("inotify is not available")
+        self._add.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self._rm.argtypes = [ctypes.c_int, ctypes.c_int]
+        self.fd = init(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise ChangeFeedUnavailable(os.strerror(ctypes.get_errno()))
+
+    def add_watch(self, path: str, mask: int) -> int:
+        wd = self._add(self.fd, os.fsencode(path), mask)
+        if wd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err), path)
+        return wd
+
+    def rm_watch(self, wd: int) -> None:
+        self._rm(self.fd, wd)  # EINVAL for an already-removed watch is fine
+
+    def read_events(self) -> List[Tuple[int, int, int, str]]:
+        try:
+            buf = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+        events = []
+        offset = 0
+        while offset + _EVENT.size <= len(buf):
+            wd, mask, cookie, length = _EVENT.unpack_from(buf, offset)
+            offset += _EVENT.size
+            name = buf[offset:offset + length].split(b"\0", 1)[0]
+            offset += length
+            events.append((wd, mask, cookie, os.fsdecode(name)))
+        return events
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+class _Watched:
+    """Feed state for one workspace root."""
+
+    def __init__(self, root: str, buffer_events: int):
+        self.root = root
+        self.epoch = uuid.uuid4().hex[:8]
+        self.dirs: Dict[int, str] = {}  # wd -> workspace-relative dir ("" for the root)
+        self.seq = 0
+        self.events: "deque[dict]" = deque(maxlen=buffer_events)
+        self.pending: "OrderedDict[str, str]" = OrderedDict()
+        self.last_raw = 0.0
+        self.first_pending = 0.0
+        self.last_used = time.monotonic()
+
+    def cursor(self) -> str:
+        return f"{self.epoch}-{self.seq}"
+
+    def record(self, rel: str, kind: str) -> None:
+        prev = self.pending.pop(rel, None)
+        if prev is not None:
+            kind = _COALESCE.get((prev, kind), kind)
+            if kind is None:
+                return
+        now = time.monotonic()
+        if not self.pending:
+            self.first_pending = now
+        self.pending[rel] = kind
+        self.last_raw = now
+
+    def flush(self) -> int:
+        for rel, kind in self.pending.items():
+            self.seq += 1
+            self.events.append({"seq": self.seq, "path": rel, "type": kind})
+        flushed = len(self.pending)
+        self.pending.clear()
+        return flushed
+
+
+class ChangeFeed:
+    """
+    inotify-backed change stream per active workspace.
+    - One inotify instance and one reader thread for all workspaces; a
+      workspace is watched from its first watch() (or poll) until it is
+      evicted LRU, sits idle past idle_seconds, or disappears.
+    - inotify is not recursive, so every directory costs one watch; the
+      total is capped at max_watches and at most max_workspaces are held.
+    - Raw events invalidate the listing and content caches immediately;
+      the published stream coalesces bursts per path over coalesce_ms.
+    - Cursors are "<epoch>-<seq>". A cursor from another epoch (workspace
+      re-watched, backend restarted, inotify queue overflow) or older than
+      the buffered events yields reset=True: the client must re-list.
+    - changes_async() waits on the caller's event loop instead of a thread,
+      so long-polls and SSE streams do not hold threadpool workers.
+    """
+
+    def __init__(self, max_workspaces: int, max_watches: int, buffer_events: int = 1024,
+                 coalesce_ms: int = 50, idle_seconds: float = 600.0):
+        self.max_workspaces = max_workspaces
+        self.max_watches = max_watches
+        self.buffer_events = buffer_events
+        self.coalesce = coalesce_ms / 1000.0
+        self.idle_seconds = idle_seconds
+        self._inotify: Optional[_Inotify] = None
+        self._watched: "OrderedDict[str, _Watched]" = OrderedDict()
+        self._by_wd: Dict[int, _Watched] = {}
+        self._cond = threading.Condition()
+        self._async_waiters: Set[Tuple[asyncio.AbstractEventLoop, asyncio.Event]] = set()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.overflows = 0
+        self.evictions = 0
+        self.events_published = 0
+
+    def _start(self) -> None:
+        if self._inotify is None:
+            self._inotify = _Inotify()
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="codex-change-feed", daemon=True)
+            self._thread.start()
+
+    def watch(self, workspace_path: str) -> str:
+        """Start (or refresh) watching a workspace; returns its current cursor."""
+        root = str(Path(workspace_path).resolve())
+        with self._cond:
+            self._start()
+            state = self._watched.get(root)
+            if state is None:
+                state = self._add_workspace(root)
+            self._watched.move_to_end(root)
+            state.last_used = time.monotonic()
+            return state.cursor()
+
+    def _watch_count(self) -> int:
+        return len(self._by_wd)
+
+    def _add_workspace(self, root: str) -> _Watched:
+        dirs = [""] + [
+            os.path.relpath(os.path.join(dirpath, d), root)
+            for dirpath, dirnames, _ in os.walk(root, followlinks=False)
+            for d in dirnames
+            if not os.path.islink(os.path.join(dirpath, d))
+        ]
+        if len(dirs) > self.max_watches:
+            raise WatchLimitExceeded(f"{len(dirs)} directories exceed the watch limit")
+        while self._watched and (
+            len(self._watched) >= self.max_workspaces or self._watch_count() + len(dirs) > self.max_watches
+        ):
+            self._evict_lru()
+        state = _Watched(root, self.buffer_events)
+        self._watched[root] = state
+        listing_cache.track(root)
+        try:
+            for rel in dirs:
+                self._add_dir(state, rel)
+        except BaseException:
+            self._drop(state)
+            raise
+        return state
+
+    def _add_dir(self, state: _Watched, rel: str) -> None:
+        path = os.path.join(state.root, rel) if rel else state.root
+        while True:
+            try:
+                wd = self._inotify.add_watch(path, _WATCH_MASK)
+                break
+            except OSError as exc:
+                if exc.errno == errno.ENOSPC and self._evict_lru(keep=state.root):
+                    continue  # system-wide max_user_watches reached: free an LRU workspace
+                if exc.errno in (errno.ENOENT, errno.ENOTDIR) and rel:
+                    return  # removed since the walk; its delete event covers it
+                if exc.errno == errno.ENOSPC:
+                    raise WatchLimitExceeded(str(exc))
+                raise
+        state.dirs[wd] = rel
+        self._by_wd[wd] = state
+
+    def _evict_lru(self, keep: Optional[str] = None) -> bool:
+        victim = next((s for root, s in self._watched.items() if root != keep), None)
+        if victim is None:
+            return False
+        self._drop(victim)
+        self.evictions += 1
+        return True
+
+    def _drop(self, state: _Watched) -> None:
+        for wd in list(state.dirs):
+            self._inotify.rm_watch(wd)
+            self._by_wd.pop(wd, None)
+        state.dirs.clear()
+        self._watched.pop(state.root, None)
+        listing_cache.untrack(state.root)
+        self._notify_all()
+
+    def unwatch(self, workspace_path: str) -> None:
+        root = str(Path(workspace_path).resolve())
+        with self._cond:
+            state = self._watched.get(root)
+            if state is not None:
+                self._drop(state)
+
+    def changes(self, workspace_path: str, cursor: Optional[str], limit: int = 1000,
+                wait: float = 0.0) -> dict:
+        """
+        Changes after cursor: {"cursor", "changes", "reset"}. With no cursor
+        the feed starts at "now". Blocks up to wait seconds for a change.
+        """
+        root = str(Path(workspace_path).resolve())
+        self.watch(root)
+        deadline = time.monotonic() + wait
+        with self._cond:
+            while True:
+                state = self._watched.get(root)
+                if state is None:
+                    # Evicted or deleted while waiting: the stream is broken
+                    return {"cursor": None, "changes": [], "reset": True}
+                state.last_used = time.monotonic()
+                result = self._since(state, cursor, limit)
+                remaining = deadline - time.monotonic()
+                if result["changes"] or result["reset"] or remaining <= 0:
+                    return result
+                self._cond.wait(remaining)
+
+    async def changes_async(self, workspace_path: str, cursor: Optional[str], limit: int = 1000,
+                            wait: float = 0.0) -> dict:
+        """changes() for async callers: the wait parks on the event loop, not on a thread."""
+        root = str(Path(workspace_path).resolve())
+        with self._cond:
+            state = self._watched.get(root)
+        if state is None:
+            # (Re)adding a watch walks the tree: keep it off the event loop
+            await asyncio.to_thread(self.watch, root)
+        deadline = time.monotonic() + wait
+        while True:
+            waiter = (asyncio.get_running_loop(), asyncio.Event())
+            with self._cond:
+                state = self._watched.get(root)
+                if state is None:
+                    return {"cursor": None, "changes": [], "reset": True}
+                state.last_used = time.monotonic()
+                self._watched.move_to_end(root)
+                result = self._since(state, cursor, limit)
+                remaining = deadline - time.monotonic()
+                if result["changes"] or result["reset"] or remaining <= 0:
+                    return result
+                # Registered under the lock that notifiers hold: no wake-up is missed
+                self._async_waiters.add(waiter)
+            try:
+                await asyncio.wait_for(waiter[1].wait(), remaining)
+            except asyncio.TimeoutError:
+                pass
+            finally:
+                with self._cond:
+                    self._async_waiters.discard(waiter)
+
+    def _notify_all(self) -> None:
+        """Wake sync and async waiters. Caller holds self._cond."""
+        self._cond.notify_all()
+        for loop, event in self._async_waiters:
+            try:
+                loop.call_soon_threadsafe(event.set)
+            except RuntimeError:
+                pass  # loop closed; its waiter is gone with it
+
+    def _since(self, state: _Watched, cursor: Optional[str], limit: int) -> dict:
+        if cursor is None:
+            return {"cursor": state.cursor(), "changes": [], "reset": False}
+        epoch, _, seq = cursor.partition("-")
+        try:
+            after = int(seq)
+        except ValueError:
+            after = -1
+        oldest = state.events[0]["seq"] if state.events else state.seq + 1
+        if epoch != state.epoch or after < oldest - 1 or after > state.seq:
+            return {"cursor": state.cursor(), "changes": [], "reset": True}
+        changes = [dict(e) for e in state.events if e["seq"] > after][:limit]
+        next_seq = changes[-1]["seq"] if changes else after
+        return {"cursor": f"{state.epoch}-{next_seq}", "changes": changes, "reset": False}
+
+    def _run(self) -> None:
+        fd = self._inotify.fd
+        while not self._stop.is_set():
+            with self._cond:
+                pending = any(s.pending for s in self._watched.values())
+            timeout = self.coalesce if pending else 1.0
+            try:
+                ready, _, _ = select.select([fd], [], [], timeout)
+            except (OSError, ValueError):
+                return  # fd closed by close()
+            try:
+                events = self._inotify.read_events() if ready else []
+                with self._cond:
+                    for event in events:
+                        self._handle(*event)
+                    self._flush_due()
+                    self._expire_idle()
+            except Exception:
+                logger.error("Change feed reader failed", exc_info=True)
+
+    def _handle(self, wd: int, mask: int, cookie: int, name: str) -> None:
+        if mask & IN_Q_OVERFLOW:
+            self._overflow()
+            return
+        state = self._by_wd.get(wd)
+        if state is None:
+            return
+        base = state.dirs.get(wd)
+        if mask & IN_IGNORED:
+            self._by_wd.pop(wd, None)
+            state.dirs.pop(wd, None)
+            if base == "":
+                self._drop(state)
+            return
+        if mask & (IN_DELETE_SELF | IN_MOVE_SELF):
+            if base == "":
+                # Workspace archived, deleted or migrated: its stream ends here
+                invalidate_cached_workspace(state.root)
+                self._drop(state)
+            return
+        if not name:
+            return
+        rel = f"{base}/{name}" if base else name
+        if mask & IN_ISDIR:
+            self._handle_dir(state, rel, mask)
+            return
+        if mask & (IN_CREATE | IN_MOVED_TO):
+            kind = "created"
+        elif mask & (IN_DELETE | IN_MOVED_FROM):
+            kind = "deleted"
+        else:
+            kind = "modified"
+        invalidate_cached_files(state.root, [rel])
+        state.record(rel, kind)
+
+    def _handle_dir(self, state: _Watched, rel: str, mask: int) -> None:
+        if mask & (IN_CREATE | IN_MOVED_TO):
+            # Files may land before the new watch exists: report what is already there
+            subdirs = [rel] + [
+                os.path.relpath(os.path.join(dirpath, d), state.root)
+                for dirpath, dirnames, _ in os.walk(os.path.join(state.root, rel), followlinks=False)
+                for d in dirnames
+            ]
+            try:
+                for sub_rel in subdirs:
+                    if self._watch_count() >= self.max_watches:
+                        raise WatchLimitExceeded(state.root)
+                    self._add_dir(state, sub_rel)
+            except (WatchLimitExceeded, OSError):
+                logger.warning("Watch limit reached; %s is only partly watched", state.root)
+            for sub, _, _ in iter_workspace_files(Path(state.root, rel).resolve()):
+                state.record(f"{rel}/{Path(sub).as_posix()}", "created")
+            invalidate_cached_workspace(state.root)
+        elif mask & IN_MOVED_FROM:
+            # Children vanish without their own events; report the directory itself
+            for wd, d in list(state.dirs.items()):
+                if d == rel or d.startswith(rel + "/"):
+                    self._inotify.rm_watch(wd)
+            invalidate_cached_workspace(state.root)
+            state.record(rel, "deleted")
+        elif mask & IN_DELETE:
+            listing_cache.invalidate(state.root)
+
+    def _flush_due(self) -> None:
+        now = time.monotonic()
+        flushed = 0
+        for state in self._watched.values():
+            if state.pending and (
+                now - state.last_raw >= self.coalesce or now - state.first_pending >= 10 * self.coalesce
+            ):
+                flushed += state.flush()
+        if flushed:
+            self.events_published += flushed
+            self._notify_all()
+
+    def _expire_idle(self) -> None:
+        if self.idle_seconds <= 0:
+            return
+        cutoff = time.monotonic() - self.idle_seconds
+        for state in [s for s in self._watched.values() if s.last_used < cutoff]:
+            self._drop(state)
+
+    def _overflow(self) -> None:
+        # Events were lost: every cache and every cursor is suspect
+        self.overflows += 1
+        logger.warning("inotify queue overflowed; resetting change feeds")
+        for state in self._watched.values():
+            invalidate_cached_workspace(state.root)
+            state.pending.clear()
+            state.events.clear()
+            state.epoch = uuid.uuid4().hex[:8]
+        self._notify_all()
+
+    def close(self) -> None:
+        with self._cond:
+            for state in list(self._watched.values()):
+                self._drop(state)
+            inotify, self._inotify = self._inotify, None
+        self._stop.set()
+        if inotify is not None:
+            inotify.close()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def stats(self) -> Dict[str, int]:
+        with self._cond:
+            return {
+                "workspaces": len(self._watched),
+                "watches": self._watch_count(),
+                "max_watches": self.max_watches,
+                "events": self.events_published,
+                "evictions": self.evictions,
+                "overflows": self.overflows,
+            }
+
+
+change_feed = ChangeFeed(
+    settings.CHANGE_FEED_MAX_WORKSPACES,
+    settings.CHANGE_FEED_MAX_WATCHES,
+    buffer_events=settings.CHANGE_FEED_BUFFER_EVENTS,
+    coalesce_ms=settings.CHANGE_FEED_COALESCE_MS,
+    idle_seconds=settings.CHANGE_FEED_IDLE_SECONDS,
+)
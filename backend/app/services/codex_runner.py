@@ -1,18 +1,37 @@
 import json
 import subprocess
+from datetime import datetime
 from pathlib import Path
-from typing import Optional
+from typing import List, Optional, Tuple
 
+from pydantic import ValidationError
 from sqlalchemy.orm import Session
 
 from app.core.config import settings
 from app.core.logging import logger
 from app.db import models
+from app.schemas.jobs import JobResult
+from app.services.cow import write_text_private
+from app.services.dedupe import dedupe_workspace
+from app.services.hot_tier import hot_tier
+from app.services.lifecycle import ensure_workspace, locked_workspace, project_lock
+from app.services.previews import create_preview, discard_preview, finish_preview
+from app.services.snapshot_views import publish_snapshot_view
+from app.services.snapshots import take_snapshot
+from app.services.storage_backends import publish_workspace
+from app.services.templates import templates
+from app.services.verification import verifier
+from app.services.workspaces import invalidate_cached_files, invalidate_cached_workspace
 
 
 def write_job_request(workspace: Path, job: models.Job) -> Path:
+    """
+    Write .codex/request.json for the job. The previous job's result.json is
+    removed, so a worker that writes none is not credited with it.
+    """
     codex_dir = workspace / ".codex"
     codex_dir.mkdir(exist_ok=True)
+    (codex_dir / "result.json").unlink(missing_ok=True)
     request_path = codex_dir / "request.json"
 
     payload = {
@@ -22,142 +41,280 @@ def write_job_request(workspace: Path, job: models.Job) -> Path:
         "instruction": job.instruction,
     }
 
-    request_path.write_text(json.dumps(payload, indent=2), encoding="utf-8")
+    write_text_private(request_path, json.dumps(payload, indent=2))
     return request_path
 
 
 def dummy_worker_generate_snake_game(workspace: Path, job: models.Job) -> Path:
     """
-    Fallback worker that just copies a static snake-game template
-    for the initial_project job type. This is for smoke testing.
-    """
-
-    # Generate a minimal Python CLI project (file-based, easy to validate without a browser)
-    readme_path = workspace / "README.md"
-    app_path = workspace / "app.py"
-    tests_dir = workspace / "tests"
-    tests_dir.mkdir(exist_ok=True)
-    test_path = tests_dir / "test_cli.py"
-
-    readme_contents = (
-        "# Python CLI — Fibonacci Example\n\n"
-        "This project was generated by the dummy worker.\n\n"
-        "Contents:\n"
-        "- app.py: simple CLI that prints the first 10 Fibonacci numbers\n"
-        "- tests/test_cli.py: a minimal test for fibonacci()\n"
-        "- .codex/{request.json,result.json}\n\n"
-        "Run:\n"
-        "  python app.py\n"
-    )
-
-    app_contents = (
-        "def fibonacci(n: int) -> list[int]:\n"
-        "    \"\"\"Return the first n Fibonacci numbers as a list.\"\"\"\n"
-        "    if n <= 0:\n"
-        "        return []\n"
-        "    seq = [0, 1]\n"
-        "    while len(seq) < n:\n"
-        "        seq.append(seq[-1] + seq[-2])\n"
-        "    return seq[:n]\n"
-        "\n"
-        "if __name__ == \"__main__\":\n"
-        "    nums = fibonacci(10)\n"
-        "    print(\",\".join(map(str, nums)))\n"
-    )
-
-    test_contents = (
-        "from app import fibonacci\n"
-        "\n"
-        "def test_fibonacci_basic():\n"
-        "    seq = fibonacci(10)\n"
-        "    assert len(seq) == 10\n"
-        "    assert seq[-1] == 34\n"
-    )
-
-    readme_path.write_text(readme_contents, encoding="utf-8")
-    app_path.write_text(app_contents, encoding="utf-8")
-    test_path.write_text(test_contents, encoding="utf-8")
+    Fallback worker that materializes the prebuilt "python-cli" template
+    (a minimal Python CLI, easy to validate without a browser). Files are
+    reflinked (or copied) from the immutable template build. This is for
+    smoke testing.
+    """
+    templates.materialize("python-cli", workspace)
 
     result = {
         "status": "success",
         "summary": "Dummy worker: created Python CLI Fibonacci example.",
-        "created_files": ["README.md", "app.py", "tests/test_cli.py"],
+        "created_files": templates.files("python-cli"),
         "modified_files": [],
         "errors": [],
         "logs": ["Dummy worker used instead of Codex."],
     }
 
     result_path = workspace / ".codex" / "result.json"
-    result_path.write_text(json.dumps(result, indent=2), encoding="utf-8")
+    write_text_private(result_path, json.dumps(result, indent=2))
     return result_path
 
 
+def read_job_result(result_path: Optional[Path]) -> Optional[dict]:
+    """Parse .codex/result.json; returns None if missing or malformed."""
+    if result_path is None or not result_path.exists():
+        return None
+    try:
+        data = json.loads(result_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        logger.warning("Unreadable worker result at %s", result_path)
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def validate_job_result(data: Optional[dict]) -> Optional[dict]:
+    """The result as stored on the job (JobResult fields only); None if missing or invalid."""
+    if data is None:
+        return None
+    try:
+        return JobResult.model_validate(data).model_dump()
+    except ValidationError as exc:
+        logger.warning("Invalid worker result: %s", exc.errors(include_url=False))
+        return None
+
+
+def _parse_utc(value) -> Optional[datetime]:
+    if not isinstance(value, str):
+        return None
+    try:
+        return datetime.fromisoformat(value.rstrip("Z"))
+    except ValueError:
+        return None
+
+
+def record_worker_timings(job: models.Job, result: Optional[dict], launched: datetime, returned: datetime) -> None:
+    """
+    Fill the job's worker phase and resource columns.
+    - worker_started_at/worker_finished_at come from the worker's own
+      result.json "timings" when present (so container start-up is not
+      counted as worker time), clamped to when the backend launched it and
+      saw it return; otherwise those launch/return times are used.
+    - Peak RSS and CPU time are only known from the worker's report.
+    """
+    timings = (result or {}).get("timings")
+    timings = timings if isinstance(timings, dict) else {}
+    started = _parse_utc(timings.get("started_at"))
+    finished = _parse_utc(timings.get("finished_at"))
+    job.worker_started_at = min(max(started, launched), returned) if started else launched
+    job.worker_finished_at = min(max(finished, job.worker_started_at), returned) if finished else returned
+    rss = timings.get("peak_rss_bytes")
+    job.worker_peak_rss_bytes = rss if isinstance(rss, int) else None
+    cpu = [timings.get(k) for k in ("cpu_user_seconds", "cpu_system_seconds")]
+    job.worker_cpu_seconds = round(sum(cpu), 3) if all(isinstance(c, (int, float)) for c in cpu) else None
+
+
+def invalidate_job_outputs(workspace: Path, result: Optional[dict]) -> None:
+    """
+    Drop cached contents of every file the job reports as created/modified.
+    .codex artifacts are rewritten on every job and always included.
+    """
+    paths = [".codex/request.json", ".codex/result.json"]
+    if result:
+        for key in ("created_files", "modified_files"):
+            paths += [p for p in result.get(key) or [] if isinstance(p, str)]
+    invalidate_cached_files(str(workspace), paths)
+
+
+def record_snapshot(project: models.Project, job: models.Job, workspace: Path) -> None:
+    """
+    Snapshot the workspace for a completed job and publish it to a remote
+    storage backend (WORKSPACE_STORAGE); failures are logged, never fatal to the job.
+    """
+    if job.status != "completed":
+        return
+    if settings.SNAPSHOTS_ENABLED:
+        try:
+            manifest = take_snapshot(project.id, job.id, str(workspace))
+            if settings.WORKSPACE_DEDUPE:
+                stats = dedupe_workspace(str(workspace), manifest)
+                logger.info("Deduplicated workspace for job %s: %s", job.id, stats)
+        except Exception:
+            logger.error("Snapshot failed for job %s", job.id, exc_info=True)
+    try:
+        publish_workspace(project.id, str(workspace))
+    except Exception:
+        logger.error("Publishing workspace failed for job %s", job.id, exc_info=True)
+
+
 def run_codex_job(db: Session, project: models.Project, job: models.Job) -> Optional[Path]:
     """
     Entry point orchestrator uses to run a job.
     - Writes .codex/request.json
     - Either runs dummy worker or real Codex worker
     - Returns path to .codex/result.json (if exists)
+    The job runs on the workspace's hot-tier copy when enabled; its changes
+    are written back to the durable workspace before the job is marked done.
+    Until then readers are served the last committed snapshot; the job's
+    snapshot (HEAD) becomes visible in one rename when it completes.
+    With VERIFY_JOBS, a successful job is then queued for verification.
+    The job holds the project lock throughout, so archival, restore and
+    preview promotion never interleave with the worker's writes.
+    Dry-run jobs are handed to run_preview_job() instead.
     """
 
-    workspace = Path(project.workspace_path)
-    write_job_request(workspace, job)
-
-    if settings.USE_DUMMY_WORKER:
-        logger.info("Using dummy worker for job %s", job.id)
-        result_path = dummy_worker_generate_snake_game(workspace, job)
-        job.status = "completed"
-        job.result_path = str(result_path)
-        db.add(job)
-        db.commit()
-        db.refresh(job)
-        return result_path
-
-    # TODO: implement real Codex worker invocation, e.g.:
-    #
-    # docker run \\
-    #   -v {workspace}:/workspace \\
-    #   {settings.CODEX_WORKER_IMAGE} \\
-    #   python /app/run_codex_job.py
-    #
-    # You can use subprocess or docker SDK here.
+    job.started_at = datetime.utcnow()
+    durable = Path(ensure_workspace(project.id, project.workspace_path))
+    if job.dry_run:
+        return run_preview_job(db, project, job, durable)
+    with project_lock(project.id):
+        # Archived or moved into its shard while this job waited for the lock
+        durable = Path(locked_workspace(project.id, project.workspace_path))
+        return _run_locked(db, project, job, durable)
+
 
+def _run_locked(db: Session, project: models.Project, job: models.Job, durable: Path) -> Optional[Path]:
+    publish_snapshot_view(project.id)
+    workspace = Path(hot_tier.checkout(project.id, str(durable)))
+    failed = False
+    launched = None
     try:
-        # Use --volumes-from to share the backend's bind-mounted workspaces into the worker.
-        # IMPORTANT: Pass the CONTAINER path, not host path, for WORKSPACE_DIR.
-        # Backend mounts host ./backend/workspaces → container:/app/workspaces.
-        # Therefore worker must use /app/workspaces/{project.id}
-        container_ws = f"/app/workspaces/{project.id}"
-        cmd = [
-            "docker",
-            "run",
-            "--rm",
-            "--volumes-from",
-            "codex-backend",
-            "-e", "OPENAI_API_KEY",
-            "-e", "OPENAI_ORG_ID",
-            "-e", "OPENAI_PROJECT",
-            "-e", f"WORKSPACE_DIR={container_ws}",
-            settings.CODEX_WORKER_IMAGE,
-        ]
-        logger.info("Running Codex worker: %s (WORKSPACE_DIR=%s)", " ".join(cmd), container_ws)
-        subprocess.run(cmd, check=True)
-
-        result_path = workspace / ".codex" / "result.json"
+        write_job_request(workspace, job)
+        launched = datetime.utcnow()
+        if settings.USE_DUMMY_WORKER:
+            logger.info("Using dummy worker for job %s", job.id)
+            dummy_worker_generate_snake_game(workspace, job)
+        else:
+            run_worker_container(job, workspace, hot=workspace != durable)
+    except subprocess.CalledProcessError as exc:
+        logger.error("Codex worker failed for job %s: %s", job.id, exc)
+        failed = True
+    finally:
+        returned = datetime.utcnow()
+        # The job is only marked done once its output is on durable storage
+        written_back = hot_tier.checkin(project.id)
+
+    result_path = durable / ".codex" / "result.json"
+    if not written_back:
+        logger.error("Output of job %s did not reach durable storage", job.id)
+        failed = True
+    if failed:
+        # A failed worker may have written files without reporting them
+        invalidate_cached_workspace(str(durable))
+        job.status = "error"
+        if launched is not None:
+            record_worker_timings(job, None, launched, returned)
+    else:
+        result = read_job_result(result_path)
+        job.result = validate_job_result(result)
+        record_worker_timings(job, result, launched, returned)
+        invalidate_job_outputs(durable, result)
+        if workspace != durable:
+            invalidate_job_outputs(workspace, result)
         if result_path.exists():
             job.status = "completed"
             job.result_path = str(result_path)
+            record_snapshot(project, job, durable)
+            if settings.VERIFY_JOBS and (result or {}).get("status") != "error":
+                job.verification_status = "pending"
         else:
             job.status = "error"
-        db.add(job)
-        db.commit()
-        db.refresh(job)
-        return result_path if result_path.exists() else None
+    job.finished_at = datetime.utcnow()
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    if job.verification_status == "pending":
+        # Verification runs off the request path, on the bounded pool
+        verifier.submit(project.id, job.id)
+    return result_path if job.status == "completed" else None
+
 
+def run_preview_job(db: Session, project: models.Project, job: models.Job, durable: Path) -> Optional[Path]:
+    """
+    Run a dry-run job on a preview clone of the durable workspace.
+    The workspace, its snapshots and readers are untouched; the job ends in
+    status "preview" with its result and diff recorded, until it is confirmed
+    (promote_preview) or discarded. A failed run leaves no preview behind.
+    """
+    with project_lock(project.id):
+        # Only the clone reads the workspace; the worker then writes to the preview alone
+        durable = Path(locked_workspace(project.id, project.workspace_path))
+        workspace = create_preview(project.id, job.id, str(durable))
+    failed = False
+    launched = None
+    try:
+        write_job_request(workspace, job)
+        launched = datetime.utcnow()
+        if settings.USE_DUMMY_WORKER:
+            logger.info("Using dummy worker for dry-run job %s", job.id)
+            dummy_worker_generate_snake_game(workspace, job)
+        else:
+            run_worker_container(job, workspace)
     except subprocess.CalledProcessError as exc:
-        logger.error("Codex worker failed for job %s: %s", job.id, exc)
+        logger.error("Codex worker failed for dry-run job %s: %s", job.id, exc)
+        failed = True
+    returned = datetime.utcnow()
+
+    result_path = workspace / ".codex" / "result.json"
+    result = None if failed else read_job_result(result_path)
+    if launched is not None:
+        record_worker_timings(job, result, launched, returned)
+    if not failed and result_path.exists():
+        job.result = validate_job_result(result)
+        finish_preview(project.id, job.id)
+        job.status = "preview"
+    else:
+        discard_preview(project.id, job.id)
         job.status = "error"
-        db.add(job)
-        db.commit()
-        db.refresh(job)
-        return None
+    job.finished_at = datetime.utcnow()
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    return result_path if job.status == "preview" else None
+
+
+def worker_mount_args(workspace: Path, hot: bool = False) -> Tuple[List[str], str]:
+    """
+    Docker volume arguments for a job and the workspace path inside the worker.
+    - With HOST_WORKSPACES_DIR set, only this project's directory is mounted,
+      at the worker's default /workspace.
+    - Otherwise fall back to --volumes-from, which shares the backend's whole
+      workspace tree. Backend mounts host ./backend/workspaces → container:/app/workspaces,
+      so the worker must be given the CONTAINER path, not the host path.
+    - A hot-tier copy lives under HOT_TIER_ROOT, which must be a volume of the
+      backend container too; it is visible to the worker at the same path.
+    - Dry-run previews (WORKSPACE_ROOT/.previews) and the tree copies tests
+      are verified on (WORKSPACE_ROOT/.verify) are mounted like workspaces.
+    """
+    if hot:
+        return ["--volumes-from", "codex-backend"], str(workspace)
+    rel = workspace.resolve().relative_to(Path(settings.WORKSPACE_ROOT).resolve()).as_posix()
+    if settings.HOST_WORKSPACES_DIR:
+        host_ws = f"{settings.HOST_WORKSPACES_DIR.rstrip('/')}/{rel}"
+        return ["-v", f"{host_ws}:/workspace"], "/workspace"
+    return ["--volumes-from", "codex-backend"], f"/app/workspaces/{rel}"
+
+
+def run_worker_container(job: models.Job, workspace: Path, hot: bool = False) -> None:
+    """Run the real Codex worker image against the workspace; raises CalledProcessError on failure."""
+    volume_args, container_ws = worker_mount_args(workspace, hot)
+    cmd = [
+        "docker",
+        "run",
+        "--rm",
+        *volume_args,
+        "-e", "OPENAI_API_KEY",
+        "-e", "OPENAI_ORG_ID",
+        "-e", "OPENAI_PROJECT",
+        "-e", f"WORKSPACE_DIR={container_ws}",
+        settings.CODEX_WORKER_IMAGE,
+    ]
+    logger.info("Running Codex worker for job %s: %s (WORKSPACE_DIR=%s)", job.id, " ".join(cmd), container_ws)
+    subprocess.run(cmd, check=True)
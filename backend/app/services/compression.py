@@ -0,0 +1,158 @@
+import gzip
+import threading
+import time
+from typing import Optional
+
+from app.core.config import settings
+from app.services.file_cache import LRUCache
+
+try:  # optional: zstd is preferred when available, gzip otherwise
+    import zstandard
+except ImportError:  # pragma: no cover - depends on installed extras
+    zstandard = None
+
+
+def supported_encodings() -> list:
+    return ["zstd", "gzip"] if zstandard is not None else ["gzip"]
+
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """
+    Pick a response encoding from an Accept-Encoding header.
+    - Honors q-values (q=0 refuses an encoding) and "*".
+    - Among equally weighted candidates, zstd wins over gzip.
+    - Returns None for identity.
+    """
+    if not accept_encoding:
+        return None
+
+    weights = {}
+    for part in accept_encoding.split(","):
+        token, _, params = part.strip().partition(";")
+        token = token.strip().lower()
+        if not token:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[token] = q
+
+    best, best_q = None, 0.0
+    for enc in supported_encodings():
+        q = weights.get(enc, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = enc, q
+    return best
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "zstd":
+        return zstandard.ZstdCompressor(level=settings.COMPRESSION_ZSTD_LEVEL).compress(body)
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=settings.COMPRESSION_GZIP_LEVEL, mtime=0)
+    raise ValueError(f"Unsupported encoding: {encoding}")
+
+
+class CpuBudget:
+    """
+    Token bucket of compression CPU time.
+    The bucket refills at budget_ms per second up to one second's worth; when
+    it is empty, callers serve identity responses instead of compressing.
+    """
+
+    def __init__(self, budget_ms: float):
+        self.capacity = budget_ms / 1000.0
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def available(self) -> bool:
+        if self.capacity <= 0:
+            return False
+        with self._lock:
+            self._refill()
+            return self._tokens > 0
+
+    def charge(self, seconds: float) -> None:
+        with self._lock:
+            self._refill()
+            self._tokens -= seconds
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.capacity)
+        self._updated = now
+
+
+class Compressor:
+    """
+    Compression front-end shared by the file and listing routes.
+    - Bodies under COMPRESSION_MIN_BYTES are never compressed.
+    - Fresh compressions are charged against the CPU budget.
+    - When a cache key is given (file bodies), compressed variants are kept in
+      an LRU keyed like the content cache plus the encoding, so repeated
+      downloads of an unchanged file never recompress.
+    """
+
+    def __init__(self):
+        self.variants = LRUCache(settings.COMPRESSION_CACHE_MAX_BYTES, settings.COMPRESSION_CACHE_MAX_ENTRY_BYTES)
+        self.budget = CpuBudget(settings.COMPRESSION_CPU_BUDGET_MS)
+        self._lock = threading.Lock()
+        self.compressed = 0
+        self.skipped_small = 0
+        self.skipped_budget = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    def encode(self, body: bytes, encoding: Optional[str], cache_key: Optional[tuple] = None) -> Optional[bytes]:
+        """Return the encoded body, or None when the identity body should be sent."""
+        if encoding is None:
+            return None
+        if len(body) < settings.COMPRESSION_MIN_BYTES:
+            self._count("skipped_small")
+            return None
+
+        variant_key = cache_key + (encoding,) if cache_key is not None else None
+        if variant_key is not None and self.variants.enabled:
+            cached = self.variants.get(variant_key)
+            if cached is not None:
+                return cached
+
+        if not self.budget.available():
+            self._count("skipped_budget")
+            return None
+
+        # CPU of this thread only; process_time() would also count concurrent requests
+        started = time.thread_time()
+        out = compress(body, encoding)
+        self.budget.charge(time.thread_time() - started)
+
+        with self._lock:
+            self.compressed += 1
+            self.bytes_in += len(body)
+            self.bytes_out += len(out)
+        if variant_key is not None:
+            self.variants.put(variant_key, out, len(out))
+        return out
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "encodings": supported_encodings(),
+                "compressed": self.compressed,
+                "skipped_small": self.skipped_small,
+                "skipped_budget": self.skipped_budget,
+                "bytes_in": self.bytes_in,
+                "bytes_out": self.bytes_out,
+            }
+
+    def _count(self, attr: str) -> None:
+        with self._lock:
+            setattr(self, attr, getattr(self, attr) + 1)
+
+
+compressor = Compressor()
@@ -0,0 +1,144 @@
+import errno
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Dict
+
+from app.core.config import settings
+from app.services.workspaces import iter_workspace_files
+
+# linux/fs.h: _IOW(0x94, 9, int)
+FICLONE = 0x40049409
+
+# errnos meaning "this filesystem/pair of paths cannot do that", not a real failure
+_UNSUPPORTED = {errno.EOPNOTSUPP, errno.ENOTTY, errno.EINVAL, errno.EXDEV, errno.ENOSYS, errno.EPERM, errno.EMLINK}
+
+CLONE_MODES = ("auto", "reflink", "hardlink", "copy")
+
+
+def reflink(src: Path, dst: Path) -> None:
+    """Create dst as a copy-on-write clone of src (Linux FICLONE). Raises OSError if unsupported."""
+    import fcntl
+
+    with open(src, "rb") as fsrc:
+        fd = os.open(dst, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+        try:
+            fcntl.ioctl(fd, FICLONE, fsrc.fileno())
+        except BaseException:
+            os.close(fd)
+            os.unlink(dst)
+            raise
+        os.close(fd)
+    shutil.copystat(src, dst)
+
+
+def _make_writable(path) -> None:
+    # Private copies of read-only sources (blobs, templates) belong to the workspace
+    mode = os.stat(path).st_mode
+    if not mode & 0o200:
+        os.chmod(path, mode | 0o200)
+
+
+class TreeCloner:
+    """
+    Materialize files from one tree into another as cheaply as the filesystem allows.
+    - reflink: independent inodes sharing extents; writes are copy-on-write in the kernel.
+    - hardlink: shared inode; writers must go through break_hardlink() first
+      (copy-on-first-write). One writer that does not (a tool writing in
+      place, a chmod) would change every link, including read-only sources
+      such as template builds, so "auto" never hardlinks: it is an explicit
+      opt-in for trees whose every writer is known.
+    - copy: plain byte copy, always works.
+    In "auto" mode (reflink, else copy) reflinking is tried once and abandoned
+    for the rest of the tree on the first "unsupported" error.
+    """
+
+    def __init__(self, mode: str = "auto"):
+        if mode not in CLONE_MODES:
+            raise ValueError(f"Unknown clone mode: {mode}")
+        self.mode = mode
+        self._can_reflink = mode in ("auto", "reflink")
+        self._can_hardlink = mode == "hardlink"
+        self.stats: Dict[str, int] = {"reflink": 0, "hardlink": 0, "copy": 0}
+
+    def clone_file(self, src: Path, dst: Path) -> str:
+        dst.parent.mkdir(parents=True, exist_ok=True)
+        if dst.exists() or dst.is_symlink():
+            dst.unlink()
+
+        if self._can_reflink:
+            try:
+                reflink(src, dst)
+                _make_writable(dst)
+                self.stats["reflink"] += 1
+                return "reflink"
+            except (OSError, ImportError) as exc:
+                if isinstance(exc, OSError) and exc.errno not in _UNSUPPORTED:
+                    raise
+                self._can_reflink = False
+
+        if self._can_hardlink:
+            try:
+                os.link(src, dst)
+                self.stats["hardlink"] += 1
+                return "hardlink"
+            except OSError as exc:
+                if exc.errno not in _UNSUPPORTED:
+                    raise
+                self._can_hardlink = False
+
+        shutil.copy2(src, dst)
+        _make_writable(dst)
+        self.stats["copy"] += 1
+        return "copy"
+
+    def clone_tree(self, src_root: Path, dst_root: Path) -> Dict[str, int]:
+        """Clone every file list_files() would show; symlink escapes are never followed."""
+        src_real = Path(src_root).resolve()
+        dst_root = Path(dst_root)
+        dst_root.mkdir(parents=True, exist_ok=True)
+        for rel, fpath, _ in iter_workspace_files(src_real):
+            self.clone_file(fpath.resolve(), dst_root / rel)
+        return dict(self.stats)
+
+
+def clone_tree(src_root: Path, dst_root: Path, mode: str = None) -> Dict[str, int]:
+    return TreeCloner(mode or settings.WORKSPACE_CLONE_MODE).clone_tree(src_root, dst_root)
+
+
+def break_hardlink(path: Path) -> bool:
+    """
+    Copy-on-first-write for hardlinked workspace files.
+    If path shares its inode with another link (a fork or the blob store), give
+    it a private copy via temp file + rename so the caller can write in place
+    without touching the other links. Returns True if a copy was made.
+    """
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return False
+    if st.st_nlink <= 1:
+        return False
+    fd, tmp_name = tempfile.mkstemp(dir=Path(path).parent, prefix=".cow-")
+    os.close(fd)
+    try:
+        shutil.copy2(path, tmp_name)
+        _make_writable(tmp_name)
+        os.replace(tmp_name, path)
+    except BaseException:
+        if os.path.exists(tmp_name):
+            os.unlink(tmp_name)
+        raise
+    return True
+
+
+def write_text_private(path: Path, contents: str) -> None:
+    """Path.write_text() that never writes through a shared hardlink."""
+    path = Path(path)
+    if path.exists():
+        st = os.stat(path)
+        if st.st_nlink > 1:
+            # Full overwrite: dropping our link is enough, no need to copy first
+            path.unlink()
+    path.write_text(contents, encoding="utf-8")
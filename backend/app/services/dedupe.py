@@ -0,0 +1,150 @@
+import errno
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, Iterable, Set
+
+from app.core.config import settings
+from app.core.logging import logger
+from app.services.blobs import BlobStore, get_blob_store
+from app.services.workspaces import iter_workspace_files, safe_resolve_path
+
+
+def dedupe_workspace(workspace_path: str, manifest: dict, store: BlobStore = None) -> Dict[str, int]:
+    """
+    Replace workspace files by hardlinks to their blobs (WORKSPACE_DEDUPE mode).
+
+    Uses the hashes of a just-recorded snapshot manifest, so nothing is re-read.
+    Files that are already links (nlink > 1) are skipped, which keeps the cost
+    proportional to the files the job wrote. Readers are unaffected: the path
+    still names a regular file with the same bytes. Writers must break the link
+    first (write_text_private / the worker's write_file do).
+    """
+    store = store or get_blob_store()
+    stats = {"linked": 0, "skipped": 0, "unsupported": 0}
+    for rel, entry in manifest.get("files", {}).items():
+        try:
+            path = safe_resolve_path(workspace_path, rel)
+            st = os.lstat(path)
+        except (FileNotFoundError, ValueError):
+            stats["skipped"] += 1
+            continue
+        blob = store.path_for(entry["sha256"])
+        if st.st_nlink > 1 or not blob.exists() or st.st_size != entry["size"]:
+            stats["skipped"] += 1
+            continue
+
+        fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=".dedupe-")
+        os.close(fd)
+        os.unlink(tmp_name)
+        try:
+            os.link(blob, tmp_name)
+            os.replace(tmp_name, path)
+            stats["linked"] += 1
+        except OSError as exc:
+            if os.path.exists(tmp_name):
+                os.unlink(tmp_name)
+            if exc.errno in (errno.EXDEV, errno.EMLINK, errno.EPERM, errno.EOPNOTSUPP):
+                # Store on another filesystem (or link limit reached): keep the private copy
+                stats["unsupported"] += 1
+                continue
+            raise
+    return stats
+
+
+def referenced_blobs() -> Set[str]:
+    """Every blob hash named by any snapshot manifest."""
+    live: Set[str] = set()
+    snapshots_root = Path(settings.STORE_ROOT) / "snapshots"
+    if not snapshots_root.exists():
+        return live
+    for manifest_path in snapshots_root.glob("*/*.json"):
+        try:
+            manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            logger.warning("Skipping unreadable manifest %s during blob GC", manifest_path)
+            continue
+        live.update(entry["sha256"] for entry in manifest.get("files", {}).values())
+    return live
+
+
+def gc_blobs(grace_seconds: float = None) -> Dict[str, int]:
+    """
+    Delete blobs nobody references.
+    A blob is live if a snapshot manifest names it or a workspace hardlinks it
+    (st_nlink > 1). Blobs younger than the grace period are kept so a snapshot
+    that is still being written cannot lose its blobs.
+    """
+    store = get_blob_store()
+    grace = settings.BLOB_GC_GRACE_SECONDS if grace_seconds is None else grace_seconds
+    live = referenced_blobs()
+    cutoff = time.time() - grace
+    stats = {"scanned": 0, "deleted": 0, "freed_bytes": 0}
+    for sha, path in store.iter_blobs():
+        stats["scanned"] += 1
+        if sha in live:
+            continue
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            continue
+        if st.st_nlink > 1 or st.st_mtime > cutoff:
+            continue
+        os.unlink(path)
+        stats["deleted"] += 1
+        stats["freed_bytes"] += st.st_size
+    logger.info("Blob GC: %s", stats)
+    return stats
+
+
+def storage_report(workspace_paths: Iterable[str]) -> dict:
+    """
+    Logical vs physical bytes across workspaces and the blob store.
+    Physical bytes count each (device, inode) once, so hardlinked duplicates
+    (deduplicated files, hardlinked forks) are only paid for once.
+    """
+    store = get_blob_store()
+    seen = set()
+    logical = 0
+    physical = 0
+    workspaces = 0
+    for ws in workspace_paths:
+        root = Path(ws)
+        if not root.is_dir():
+            continue
+        workspaces += 1
+        for _, _, st in iter_workspace_files(root.resolve()):
+            logical += st.st_size
+            key = (st.st_dev, st.st_ino)
+            if key not in seen:
+                seen.add(key)
+                physical += st.st_size
+
+    blob_count = 0
+    blob_bytes = 0
+    shared_blobs = 0
+    for _, path in store.iter_blobs():
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            continue
+        blob_count += 1
+        blob_bytes += st.st_size
+        if st.st_nlink > 1:
+            shared_blobs += 1
+        key = (st.st_dev, st.st_ino)
+        if key not in seen:
+            seen.add(key)
+            physical += st.st_size
+
+    return {
+        "workspaces": workspaces,
+        "logical_bytes": logical,
+        "physical_bytes": physical,
+        "blob_count": blob_count,
+        "blob_bytes": blob_bytes,
+        "linked_blobs": shared_blobs,
+        "dedupe_ratio": (logical / physical) if physical else 1.0,
+    }
@@ -0,0 +1,115 @@
+import sys
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+from app.core.config import settings
+
+# (workspace real path, workspace-relative path, inode, size, mtime_ns)
+CacheKey = Tuple[str, str, int, int, int]
+
+
+class LRUCache:
+    """
+    Size-bounded, thread-safe LRU keyed by file identity.
+
+    Entries are charged their approximate in-memory size; inserting past
+    max_bytes evicts least-recently-used entries. Items larger than
+    max_entry_bytes are never cached so one huge file cannot flush the cache.
+    A secondary (workspace, path) index lets job completion drop every
+    version of a file without knowing its old stat key.
+    """
+
+    def __init__(self, max_bytes: int, max_entry_bytes: int):
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes
+        self._entries: "OrderedDict[tuple, Tuple[object, int]]" = OrderedDict()
+        self._by_path: Dict[Tuple[str, str], Set[tuple]] = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def get(self, key: tuple) -> Optional[object]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: tuple, value: object, cost: int) -> None:
+        if not self.enabled or cost > self.max_entry_bytes or cost > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (value, cost)
+            self._by_path.setdefault(key[:2], set()).add(key)
+            self._bytes += cost
+            while self._bytes > self.max_bytes and self._entries:
+                oldest = next(iter(self._entries))
+                self._drop(oldest)
+                self.evictions += 1
+
+    def invalidate(self, workspace: str, rel_paths: Iterable[str]) -> int:
+        """Drop all cached versions of the given workspace-relative paths."""
+        dropped = 0
+        with self._lock:
+            for rel in rel_paths:
+                for key in self._by_path.pop((workspace, rel), set()):
+                    if key in self._entries:
+                        value, cost = self._entries.pop(key)
+                        self._bytes -= cost
+                        dropped += 1
+            self.invalidations += dropped
+        return dropped
+
+    def invalidate_workspace(self, workspace: str) -> int:
+        with self._lock:
+            paths = [rel for (ws, rel) in self._by_path if ws == workspace]
+        return self.invalidate(workspace, paths)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._by_path.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "hit_rate": (self.hits / lookups) if lookups else 0.0,
+            }
+
+    def _drop(self, key: tuple) -> None:
+        _, cost = self._entries.pop(key)
+        self._bytes -= cost
+        siblings = self._by_path.get(key[:2])
+        if siblings is not None:
+            siblings.discard(key)
+            if not siblings:
+                del self._by_path[key[:2]]
+
+
+def text_cost(text: str) -> int:
+    return sys.getsizeof(text)
+
+
+file_cache = LRUCache(settings.FILE_CACHE_MAX_BYTES, settings.FILE_CACHE_MAX_ENTRY_BYTES)
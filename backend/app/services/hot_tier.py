@@ -0,0 +1,289 @@
+import os
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict, defaultdict
+from pathlib import Path
+from typing import Dict, Optional
+
+from app.core.config import settings
+from app.core.logging import logger
+from app.services.cow import TreeCloner
+from app.services.workspaces import invalidate_cached_files, invalidate_cached_workspace, iter_workspace_files
+
+
+class _Entry:
+    __slots__ = ("durable", "hot", "size", "pins")
+
+    def __init__(self, durable: str, hot: str, size: int):
+        self.durable = durable
+        self.hot = hot
+        self.size = size
+        self.pins = 0
+
+
+def _tree_size(root: str) -> int:
+    return sum(st.st_size for _, _, st in iter_workspace_files(Path(root).resolve()))
+
+
+def _fsync_dir(path: Path) -> None:
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def sync_tree(src: str, dst: str) -> list:
+    """
+    Make dst hold exactly the files of src; returns the changed relative paths.
+    Files whose size and mtime match are skipped. Changed files are written via
+    temp file + rename, so hardlinked durable files (forks, dedupe) are never
+    written through. File contents are fsynced before their rename, and every
+    directory whose entries changed is fsynced before returning, so the
+    changes are on disk when this returns.
+    """
+    src_real = Path(src).resolve()
+    dst_root = Path(dst)
+    dst_real = dst_root.resolve()
+    changed = []
+    seen = set()
+    dirty_dirs = set()
+    existing = {rel: st for rel, _, st in iter_workspace_files(dst_real)} if dst_root.is_dir() else {}
+    for rel, fpath, st in iter_workspace_files(src_real):
+        seen.add(rel)
+        prev = existing.get(rel)
+        if prev is not None and prev.st_size == st.st_size and prev.st_mtime_ns == st.st_mtime_ns:
+            continue
+        dest = dst_root / rel
+        parent = dest.parent
+        missing = parent
+        while not missing.is_dir():
+            # New directories must also be recorded in the directory holding them
+            dirty_dirs.update((missing, missing.parent))
+            missing = missing.parent
+        parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=parent, prefix=".writeback-")
+        try:
+            with os.fdopen(fd, "wb") as out, open(fpath, "rb") as src_file:
+                shutil.copyfileobj(src_file, out)
+                out.flush()
+                os.fsync(out.fileno())
+            shutil.copystat(fpath, tmp_name)
+            os.replace(tmp_name, dest)
+        except BaseException:
+            if os.path.exists(tmp_name):
+                os.unlink(tmp_name)
+            raise
+        dirty_dirs.add(parent)
+        changed.append(rel)
+    for rel in existing:
+        if rel not in seen:
+            try:
+                (dst_root / rel).unlink()
+            except FileNotFoundError:
+                pass
+            dirty_dirs.add((dst_root / rel).parent)
+            changed.append(rel)
+    for directory in dirty_dirs:
+        _fsync_dir(directory)
+    return changed
+
+
+class HotTier:
+    """
+    RAM-backed (tmpfs) copies of active workspaces.
+    - checkout() promotes a workspace for a job and pins it; checkin() writes
+      every change back to the durable workspace and unpins it. Write-back
+      happens before the job is marked done, so committed job output is
+      always on durable storage.
+    - resolve() sends readers to the hot copy when one exists.
+    - Unpinned copies are demoted in LRU order when the byte budget or the
+      tmpfs free space runs out. Demotion writes back first, then drops the
+      copy; a pinned (running) workspace is never demoted.
+    - Tree copies (promote, write-back) run under a per-project lock; the
+      global lock only guards the entry table, so resolve() never waits for
+      another project's copy. A project being promoted is served from durable
+      storage until its copy is complete.
+    Disabled (every call returns the durable path) when HOT_TIER_ROOT is empty.
+    """
+
+    def __init__(self, root: str, max_bytes: int, min_free_bytes: int = 0):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.min_free_bytes = min_free_bytes
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._project_locks: Dict[str, threading.Lock] = defaultdict(threading.Lock)
+        self._reserved = 0  # bytes of promotions still copying
+        self.promotions = 0
+        self.demotions = 0
+        self.write_backs = 0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.root) and self.max_bytes > 0
+
+    def _project_lock(self, project_id: str) -> threading.Lock:
+        with self._lock:
+            return self._project_locks[project_id]
+
+    def resolve(self, project_id: str, durable: str) -> str:
+        if not self.enabled:
+            return durable
+        with self._lock:
+            entry = self._entries.get(project_id)
+            if entry is None or entry.durable != durable:
+                return durable
+            self._entries.move_to_end(project_id)
+        return entry.hot if os.path.isdir(entry.hot) else durable
+
+    def checkout(self, project_id: str, durable: str) -> str:
+        """Promote (if needed) and pin a workspace for a job; returns the path to work in."""
+        if not self.enabled:
+            return durable
+        with self._project_lock(project_id):
+            with self._lock:
+                entry = self._entries.get(project_id)
+                if entry is not None:
+                    entry.pins += 1
+                    self._entries.move_to_end(project_id)
+                    return entry.hot
+            entry = self._promote(project_id, durable)
+            return entry.hot if entry is not None else durable
+
+    def checkin(self, project_id: str) -> bool:
+        """
+        Write a job's changes back to durable storage and unpin the workspace.
+        Returns False when the write-back did not reach durable storage; the
+        job must then not be marked done.
+        """
+        durable = True
+        with self._project_lock(project_id):
+            with self._lock:
+                entry = self._entries.get(project_id)
+            if entry is None:
+                return True
+            try:
+                durable = self._write_back(entry)
+            except OSError:
+                logger.error("Write-back of %s to %s failed", entry.hot, entry.durable, exc_info=True)
+                durable = False
+            finally:
+                with self._lock:
+                    entry.pins = max(0, entry.pins - 1)
+        self._make_room(0)
+        return durable
+
+    def demote(self, project_id: str) -> bool:
+        """Write back and drop a hot copy (e.g. before archival or restore). Pinned copies stay."""
+        with self._project_lock(project_id):
+            with self._lock:
+                entry = self._entries.get(project_id)
+                if entry is None or entry.pins:
+                    return False
+            self._demote(project_id, entry)
+            return True
+
+    def _promote(self, project_id: str, durable: str) -> Optional[_Entry]:
+        """Copy a workspace in and register it pinned. Caller holds the project lock."""
+        size = _tree_size(durable)
+        if not self._make_room(size):
+            logger.info("Hot tier full; project %s runs on durable storage", project_id)
+            return None
+        hot = str(Path(self.root) / project_id)
+        try:
+            # A copy left by a previous process is stale: the durable tree is authoritative
+            shutil.rmtree(hot, ignore_errors=True)
+            TreeCloner("copy").clone_tree(Path(durable), Path(hot))
+            (Path(hot) / ".codex").mkdir(exist_ok=True)
+        except BaseException:
+            shutil.rmtree(hot, ignore_errors=True)
+            with self._lock:
+                self._reserved -= size
+            raise
+        entry = _Entry(durable, hot, size)
+        entry.pins = 1
+        with self._lock:
+            self._reserved -= size
+            self._entries[project_id] = entry
+            self.promotions += 1
+        return entry
+
+    def _write_back(self, entry: _Entry) -> bool:
+        """Mirror the hot copy onto durable storage (fsynced); False if there was nothing to mirror."""
+        if not os.path.isdir(entry.hot):
+            # Never mirror a vanished hot copy: that would delete the durable files
+            logger.error("Hot copy %s is gone; keeping durable workspace %s as is", entry.hot, entry.durable)
+            return False
+        changed = sync_tree(entry.hot, entry.durable)
+        if changed:
+            invalidate_cached_files(entry.durable, changed)
+        size = _tree_size(entry.hot)
+        with self._lock:
+            entry.size = size
+            self.write_backs += 1
+        return True
+
+    def _demote(self, project_id: str, entry: _Entry) -> None:
+        """Write back and drop an unpinned copy. Caller holds the project lock."""
+        self._write_back(entry)
+        with self._lock:
+            # Readers go back to the durable tree before the copy disappears
+            del self._entries[project_id]
+            self.demotions += 1
+        shutil.rmtree(entry.hot, ignore_errors=True)
+        invalidate_cached_workspace(entry.hot)
+
+    def _free_bytes(self) -> Optional[int]:
+        try:
+            st = os.statvfs(self.root)
+        except (FileNotFoundError, AttributeError):
+            return None
+        return st.f_bavail * st.f_frsize
+
+    def _make_room(self, needed: int) -> bool:
+        """
+        Demote unpinned LRU copies until needed bytes fit; False if they cannot.
+        The bytes are reserved for the caller's promotion. Copies whose project
+        lock is taken (being checked in or out) are passed over, never waited for.
+        """
+        Path(self.root).mkdir(parents=True, exist_ok=True)
+        passed = set()
+        while True:
+            free = self._free_bytes()
+            with self._lock:
+                used = sum(e.size for e in self._entries.values()) + self._reserved
+                fits = used + needed <= self.max_bytes and (free is None or free - needed >= self.min_free_bytes)
+                if fits:
+                    self._reserved += needed
+                    return True
+                victim = next((pid for pid, e in self._entries.items() if not e.pins and pid not in passed), None)
+                if victim is None:
+                    return False
+                lock = self._project_locks[victim]
+            if not lock.acquire(blocking=False):
+                passed.add(victim)
+                continue
+            try:
+                with self._lock:
+                    entry = self._entries.get(victim)
+                if entry is not None and not entry.pins:
+                    self._demote(victim, entry)
+            finally:
+                lock.release()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": sum(e.size for e in self._entries.values()),
+                "max_bytes": self.max_bytes,
+                "pinned": sum(1 for e in self._entries.values() if e.pins),
+                "promotions": self.promotions,
+                "demotions": self.demotions,
+                "write_backs": self.write_backs,
+            }
+
+
+hot_tier = HotTier(settings.HOT_TIER_ROOT, settings.HOT_TIER_MAX_BYTES, settings.HOT_TIER_MIN_FREE_BYTES)
@@ -0,0 +1,83 @@
+"""
+Online migration of workspaces from the flat layout (WORKSPACE_ROOT/<id>)
+to the sharded layout (WORKSPACE_ROOT/ab/cd/<id>).
+
+Runs inside the API server (POST /api/v1/storage/layout/migrate), because
+the project locks it relies on are per process: a separate process could
+move a workspace under a starting job. Each workspace is moved with a single
+rename under the project lock, after re-checking under that lock that the
+project has no queued or running job (running jobs hold the lock, so none can
+start mid-move). Readers resolve paths from the project id (sharded first,
+legacy fallback), and lock holders resolve again once they hold the lock, so
+both find the workspace on either side of the rename. Busy projects are
+skipped and picked up by the next run.
+"""
+import os
+from typing import Dict, Optional
+
+from sqlalchemy.orm import Session
+
+from app.core.logging import logger
+from app.db import models
+from app.services.hot_tier import hot_tier
+from app.services.lifecycle import has_pending_jobs, project_lock
+from app.services.workspaces import (
+    invalidate_cached_workspace,
+    iter_workspace_dirs,
+    legacy_workspace_dir,
+    workspace_dir,
+)
+
+
+def migrate_workspace(db: Session, project: models.Project) -> bool:
+    """Move one legacy workspace into its shard and repoint stored paths. Returns True if moved."""
+    legacy = legacy_workspace_dir(project.id)
+    target = workspace_dir(project.id)
+    with project_lock(project.id):
+        if not legacy.is_dir() or has_pending_jobs(db, project.id):
+            return False
+        if target.exists():
+            logger.warning("Both %s and %s exist; leaving project %s unmigrated", legacy, target, project.id)
+            return False
+        hot_tier.demote(project.id)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        os.rename(legacy, target)
+        invalidate_cached_workspace(str(legacy))
+
+    old_prefix = str(legacy)
+    project.workspace_path = str(target)
+    for job in project.jobs:
+        for attr in ("result_path", "logs_path"):
+            value = getattr(job, attr)
+            if value and value.startswith(old_prefix):
+                setattr(job, attr, str(target) + value[len(old_prefix):])
+    db.commit()
+    return True
+
+
+def migrate_workspace_layout(db: Session, limit: Optional[int] = None, dry_run: bool = False) -> Dict[str, int]:
+    """Migrate every legacy workspace that belongs to a project (orphans are left to the GC)."""
+    stats = {"migrated": 0, "busy": 0, "skipped": 0}
+    busy = {
+        pid for (pid,) in db.query(models.Job.project_id).filter(models.Job.status.in_(("queued", "in_progress")))
+    }
+    legacy_ids = [name for name, path in iter_workspace_dirs() if path == legacy_workspace_dir(name)]
+    for project_id in legacy_ids:
+        if limit is not None and stats["migrated"] >= limit:
+            break
+        project = db.query(models.Project).filter(models.Project.id == project_id).first()
+        if project is None:
+            continue
+        if project_id in busy:
+            stats["busy"] += 1
+            continue
+        if dry_run:
+            logger.info("Would migrate %s -> %s", legacy_workspace_dir(project_id), workspace_dir(project_id))
+            stats["migrated"] += 1
+            continue
+        if migrate_workspace(db, project):
+            stats["migrated"] += 1
+        else:
+            stats["skipped"] += 1
+    return stats
+
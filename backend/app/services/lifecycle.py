@@ -0,0 +1,306 @@
+import os
+import shutil
+import tarfile
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.logging import logger
+from app.db import models
+from app.services.hot_tier import hot_tier
+from app.services.workspaces import (
+    ensure_workspace_root,
+    invalidate_cached_workspace,
+    iter_workspace_dirs,
+    iter_workspace_files,
+    resolve_workspace_dir,
+)
+
+# Global usage walks the whole WORKSPACE_ROOT; reuse a recent total for this long
+_GLOBAL_USAGE_TTL_SECONDS = 30.0
+# Prefix of directories being archived/restored; never mistaken for a workspace
+_TMP_PREFIX = ".lifecycle-"
+
+
+class QuotaExceeded(RuntimeError):
+    """Raised when starting a job would run on top of a full disk quota."""
+    pass
+
+
+# Archive and restore of one project never overlap
+_locks: Dict[str, threading.Lock] = defaultdict(threading.Lock)
+_locks_guard = threading.Lock()
+# project_id -> time.time() of the last file access or job (this process only)
+_last_access: Dict[str, float] = {}
+_global_usage = {"bytes": 0, "at": 0.0}
+
+
+def project_lock(project_id: str) -> threading.Lock:
+    with _locks_guard:
+        return _locks[project_id]
+
+
+def _archives_dir() -> Path:
+    return Path(settings.STORE_ROOT) / "archives"
+
+
+def archive_path(project_id: str) -> Path:
+    return _archives_dir() / f"{project_id}.tar.gz"
+
+
+def workspace_usage(workspace_path: str) -> int:
+    """Bytes used by the files of one workspace (as list_files() sees them)."""
+    root = Path(workspace_path)
+    if not root.is_dir():
+        return 0
+    return sum(st.st_size for _, _, st in iter_workspace_files(root.resolve()))
+
+
+def global_usage(refresh: bool = False) -> int:
+    """
+    Bytes on disk under WORKSPACE_ROOT, each inode counted once so hardlinked
+    forks and deduplicated files are paid for once. Cached briefly.
+    """
+    now = time.time()
+    if not refresh and now - _global_usage["at"] < _GLOBAL_USAGE_TTL_SECONDS:
+        return _global_usage["bytes"]
+    seen = set()
+    total = 0
+    for dirpath, _, filenames in os.walk(ensure_workspace_root(), followlinks=False):
+        for name in filenames:
+            try:
+                st = os.lstat(os.path.join(dirpath, name))
+            except FileNotFoundError:
+                continue
+            key = (st.st_dev, st.st_ino)
+            if key not in seen:
+                seen.add(key)
+                total += st.st_size
+    _global_usage.update(bytes=total, at=now)
+    return total
+
+
+def check_quota(workspace_path: Optional[str] = None) -> None:
+    """
+    Raise QuotaExceeded if the project (when given) or all workspaces together
+    are at or over their quota. Checked before a job starts, so a job is never
+    cut off half-way; the job that crosses the line is the last one admitted.
+    """
+    if workspace_path and settings.PROJECT_DISK_QUOTA_BYTES > 0:
+        used = workspace_usage(workspace_path)
+        if used >= settings.PROJECT_DISK_QUOTA_BYTES:
+            raise QuotaExceeded(f"Project uses {used} of {settings.PROJECT_DISK_QUOTA_BYTES} bytes")
+    if settings.GLOBAL_DISK_QUOTA_BYTES > 0:
+        used = global_usage()
+        if used >= settings.GLOBAL_DISK_QUOTA_BYTES:
+            # Recount before refusing; the cached total may predate deletions
+            used = global_usage(refresh=True)
+            if used >= settings.GLOBAL_DISK_QUOTA_BYTES:
+                raise QuotaExceeded(f"Workspaces use {used} of {settings.GLOBAL_DISK_QUOTA_BYTES} bytes")
+
+
+def touch(project_id: str) -> None:
+    _last_access[project_id] = time.time()
+
+
+def ensure_workspace(project_id: str, stored_path: Optional[str] = None) -> str:
+    """
+    Return the workspace path, restoring it from its archive first if needed.
+    The path is resolved from the project id (see resolve_workspace_dir).
+    Called on every file access and job; the common case is one or two stat()s.
+    """
+    touch(project_id)
+    workspace_path = str(resolve_workspace_dir(project_id, stored_path))
+    if os.path.isdir(workspace_path):
+        return workspace_path
+    with project_lock(project_id):
+        if not os.path.isdir(workspace_path):
+            restore_workspace(project_id, workspace_path)
+    return workspace_path
+
+
+def locked_workspace(project_id: str, stored_path: Optional[str] = None) -> str:
+    """
+    ensure_workspace() for a caller that holds the project lock. The path is
+    resolved again: the workspace may have been archived, or moved into its
+    shard by the layout migration, while the caller waited for the lock.
+    """
+    workspace_path = str(resolve_workspace_dir(project_id, stored_path))
+    if not os.path.isdir(workspace_path):
+        restore_workspace(project_id, workspace_path)
+    return workspace_path
+
+
+def restore_workspace(project_id: str, workspace_path: str) -> bool:
+    """
+    Unpack an archived workspace into place (extract to a temp dir, then rename).
+    Without a local archive, a remote storage backend is asked for the
+    workspace instead (pull_workspace). Returns False if neither has it.
+    Caller holds the project lock.
+    """
+    bundle = archive_path(project_id)
+    if not bundle.exists():
+        # Imported lazily: the storage backends build on this module
+        from app.services.storage_backends import pull_workspace
+
+        return pull_workspace(project_id, workspace_path)
+    dest = Path(workspace_path)
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    tmp_dir = Path(tempfile.mkdtemp(dir=dest.parent, prefix=_TMP_PREFIX))
+    try:
+        with tarfile.open(bundle, "r:gz") as tar:
+            if hasattr(tarfile, "data_filter"):
+                tar.extractall(tmp_dir, filter="data")
+            else:
+                tar.extractall(tmp_dir)
+        os.replace(tmp_dir, dest)
+    except BaseException:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+    bundle.unlink()
+    logger.info("Restored archived workspace for project %s", project_id)
+    return True
+
+
+def has_pending_jobs(db: Session, project_id: str) -> bool:
+    return db.query(models.Job.id).filter(
+        models.Job.project_id == project_id, models.Job.status.in_(("queued", "in_progress"))
+    ).first() is not None
+
+
+def archive_workspace(project_id: str, workspace_path: str, db: Optional[Session] = None) -> bool:
+    """
+    Pack a workspace into STORE_ROOT/archives/<project_id>.tar.gz and remove it.
+    The bundle is complete on disk (temp file + rename) before the directory
+    is touched, so a crash at any point leaves at least one full copy.
+    With db, a project with a queued or running job is left alone; this is
+    checked under the project lock, which running jobs hold.
+    """
+    with project_lock(project_id):
+        src = Path(workspace_path)
+        if not src.is_dir():
+            return False
+        if db is not None and has_pending_jobs(db, project_id):
+            return False
+        hot_tier.demote(project_id)
+        bundle = archive_path(project_id)
+        bundle.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=bundle.parent, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as fh:
+                with tarfile.open(fileobj=fh, mode="w:gz") as tar:
+                    tar.add(src, arcname=".")
+                fh.flush()
+                os.fsync(fh.fileno())
+            os.replace(tmp_name, bundle)
+        except BaseException:
+            if os.path.exists(tmp_name):
+                os.unlink(tmp_name)
+            raise
+
+        # Hide the directory first so readers see "archived", never half-deleted
+        doomed = src.parent / f"{_TMP_PREFIX}{project_id}"
+        os.replace(src, doomed)
+        shutil.rmtree(doomed, ignore_errors=True)
+    _global_usage["at"] = 0.0
+    invalidate_cached_workspace(workspace_path)
+    logger.info("Archived idle workspace for project %s", project_id)
+    return True
+
+
+def archive_idle_workspaces(db: Session, ttl_seconds: Optional[float] = None) -> Dict[str, int]:
+    """
+    Archive workspaces with no file access or job activity within the TTL.
+    Projects with a job queued or in progress are never archived.
+    """
+    ttl = settings.WORKSPACE_IDLE_TTL_SECONDS if ttl_seconds is None else ttl_seconds
+    stats = {"archived": 0, "skipped": 0}
+    if ttl <= 0:
+        return stats
+    cutoff = datetime.utcnow() - timedelta(seconds=ttl)
+    last_job = (
+        db.query(models.Job.project_id, func.max(models.Job.updated_at).label("last"))
+        .group_by(models.Job.project_id)
+        .subquery()
+    )
+    busy = {
+        pid for (pid,) in db.query(models.Job.project_id).filter(models.Job.status.in_(("queued", "in_progress")))
+    }
+    rows = db.query(models.Project.id, models.Project.workspace_path, models.Project.updated_at, last_job.c.last).outerjoin(
+        last_job, last_job.c.project_id == models.Project.id
+    )
+    for project_id, stored_path, updated_at, last_job_at in rows:
+        workspace_path = str(resolve_workspace_dir(project_id, stored_path))
+        last = max(t for t in (updated_at, last_job_at) if t is not None)
+        accessed = _last_access.get(project_id)
+        if accessed is not None:
+            last = max(last, datetime.utcfromtimestamp(accessed))
+        if last > cutoff or project_id in busy or not os.path.isdir(workspace_path):
+            continue
+        try:
+            if archive_workspace(project_id, workspace_path, db):
+                stats["archived"] += 1
+            else:
+                stats["skipped"] += 1
+        except OSError:
+            logger.error("Archiving workspace of project %s failed", project_id, exc_info=True)
+            stats["skipped"] += 1
+    return stats
+
+
+def gc_orphan_workspaces(db: Session, min_age_seconds: Optional[float] = None) -> Dict[str, int]:
+    """
+    Remove workspace directories and archives whose project id has no
+    projects row (legacy and sharded layouts alike, plus stale temp dirs),
+    and their snapshot manifests and views; the blob GC then frees the blobs
+    only they referenced. Entries younger than min_age are kept: a project's
+    directory is created just before its row is committed.
+    """
+    min_age = settings.WORKSPACE_ORPHAN_MIN_AGE_SECONDS if min_age_seconds is None else min_age_seconds
+    cutoff = time.time() - min_age
+    known = {project_id for (project_id,) in db.query(models.Project.id)}
+    stats = {"workspaces": 0, "archives": 0, "snapshots": 0, "views": 0, "freed_bytes": 0}
+
+    for name, path in list(iter_workspace_dirs()):
+        if name in known or path.stat().st_mtime > cutoff:
+            continue
+        freed = workspace_usage(str(path))
+        shutil.rmtree(path, ignore_errors=True)
+        stats["workspaces"] += 1
+        stats["freed_bytes"] += freed
+        logger.info("Removed orphan workspace %s", path)
+
+    archives = _archives_dir()
+    if archives.is_dir():
+        for bundle in archives.glob("*.tar.gz"):
+            project_id = bundle.name[: -len(".tar.gz")]
+            st = bundle.stat()
+            if project_id in known or st.st_mtime > cutoff:
+                continue
+            bundle.unlink()
+            stats["archives"] += 1
+            stats["freed_bytes"] += st.st_size
+
+    for kind in ("snapshots", "views"):
+        root = Path(settings.STORE_ROOT) / kind
+        if not root.is_dir():
+            continue
+        for entry in os.scandir(root):
+            if not entry.is_dir(follow_symlinks=False) or entry.name in known:
+                continue
+            if entry.stat(follow_symlinks=False).st_mtime > cutoff:
+                continue
+            shutil.rmtree(entry.path, ignore_errors=True)
+            stats[kind] += 1
+            logger.info("Removed orphan %s of project %s", kind, entry.name)
+    if stats["workspaces"]:
+        _global_usage["at"] = 0.0
+    return stats
@@ -0,0 +1,116 @@
+import os
+import threading
+from array import array
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional, Tuple
+
+from app.core.config import settings
+from app.services.singleflight import flights
+
+_CHUNK_SIZE = 1024 * 1024
+
+
+class LineIndex:
+    """
+    Byte offsets of every line start in a file.
+    - starts[i] is the offset of line i + 1 (lines are 1-based in the API).
+    - A trailing newline does not open an extra empty line.
+    """
+
+    __slots__ = ("starts", "size")
+
+    def __init__(self, starts: array, size: int):
+        self.starts = starts
+        self.size = size
+
+    @property
+    def total_lines(self) -> int:
+        return len(self.starts)
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory held by the index (8 bytes per line)."""
+        return len(self.starts) * self.starts.itemsize + 64
+
+    def byte_span(self, start_line: int, end_line: int) -> Tuple[int, int]:
+        """Return [begin, end) byte offsets covering lines start_line..end_line (inclusive)."""
+        begin = self.starts[start_line - 1]
+        end = self.starts[end_line] if end_line < len(self.starts) else self.size
+        return begin, end
+
+
+def build_line_index(path: Path) -> LineIndex:
+    """Scan a file once in fixed-size chunks and record line start offsets."""
+    starts = array("Q")
+    size = 0
+    at_line_start = True
+    with open(path, "rb") as fh:
+        while True:
+            chunk = fh.read(_CHUNK_SIZE)
+            if not chunk:
+                break
+            pos = 0
+            while True:
+                if at_line_start:
+                    starts.append(size + pos)
+                    at_line_start = False
+                nl = chunk.find(b"\n", pos)
+                if nl == -1:
+                    break
+                pos = nl + 1
+                at_line_start = True
+                if pos == len(chunk):
+                    break
+            size += len(chunk)
+    return LineIndex(starts, size)
+
+
+def _stat_key(st: os.stat_result) -> tuple:
+    return (st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns)
+
+
+class LineIndexCache:
+    """
+    LRU of line indexes keyed by (device, inode, size, mtime_ns), bounded by
+    the indexes' total size (max_bytes); an index larger than the whole budget
+    is served but not kept. Any rewrite of the file changes the key, so stale
+    entries are simply never hit again and age out of the LRU. Concurrent
+    first reads of the same file share one index build.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[tuple, LineIndex]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, path: Path, st: Optional[os.stat_result] = None) -> LineIndex:
+        st = st or path.stat()
+        key = _stat_key(st)
+        with self._lock:
+            index = self._entries.get(key)
+            if index is not None:
+                self._entries.move_to_end(key)
+                return index
+
+        index = flights.do(("line_index", key), lambda: build_line_index(path))
+
+        if 0 < index.nbytes <= self.max_bytes:
+            with self._lock:
+                if key not in self._entries:
+                    self._entries[key] = index
+                    self._bytes += index.nbytes
+                self._entries.move_to_end(key)
+                while self._bytes > self.max_bytes:
+                    _, oldest = self._entries.popitem(last=False)
+                    self._bytes -= oldest.nbytes
+        return index
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+
+line_index_cache = LineIndexCache(settings.LINE_INDEX_CACHE_MAX_BYTES)
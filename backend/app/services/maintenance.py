@@ -0,0 +1,79 @@
+import threading
+from typing import Callable, List, Tuple
+
+from app.core.logging import logger
+
+
+class Maintenance:
+    """
+    Minimal periodic task runner for background housekeeping (GC, archival).
+    One daemon thread runs every registered task at its own interval; a
+    failing task is logged and retried on its next tick.
+    """
+
+    def __init__(self):
+        self._tasks: List[Tuple[str, float, Callable[[], object]]] = []
+        self._stop = threading.Event()
+        self._thread = None
+
+    def register(self, name: str, interval_seconds: float, fn: Callable[[], object]) -> None:
+        if interval_seconds > 0:
+            self._tasks.append((name, interval_seconds, fn))
+
+    @property
+    def tasks(self) -> List[str]:
+        return [name for name, _, _ in self._tasks]
+
+    def start(self) -> None:
+        if not self._tasks or (self._thread and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="codex-maintenance", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _run(self) -> None:
+        tick = min(interval for _, interval, _ in self._tasks)
+        elapsed = {name: 0.0 for name, _, _ in self._tasks}
+        while not self._stop.wait(tick):
+            for name, interval, fn in self._tasks:
+                elapsed[name] += tick
+                if elapsed[name] < interval:
+                    continue
+                elapsed[name] = 0.0
+                try:
+                    fn()
+                except Exception:
+                    logger.error("Maintenance task %s failed", name, exc_info=True)
+
+
+def build_maintenance() -> Maintenance:
+    """Register the housekeeping tasks enabled by settings."""
+    from app.core.config import settings
+    from app.db.session import SessionLocal
+    from app.services.dedupe import gc_blobs
+    from app.services.lifecycle import archive_idle_workspaces, gc_orphan_workspaces
+    from app.services.previews import gc_previews
+    from app.services.snapshot_views import gc_snapshot_views
+
+    def with_db(fn):
+        def run():
+            db = SessionLocal()
+            try:
+                return fn(db)
+            finally:
+                db.close()
+        return run
+
+    maintenance = Maintenance()
+    maintenance.register("blob_gc", settings.BLOB_GC_INTERVAL_SECONDS, gc_blobs)
+    maintenance.register("workspace_archive", settings.WORKSPACE_GC_INTERVAL_SECONDS, with_db(archive_idle_workspaces))
+    maintenance.register("workspace_orphan_gc", settings.WORKSPACE_GC_INTERVAL_SECONDS, with_db(gc_orphan_workspaces))
+    maintenance.register("snapshot_view_gc", settings.WORKSPACE_GC_INTERVAL_SECONDS, with_db(gc_snapshot_views))
+    maintenance.register("preview_gc", settings.WORKSPACE_GC_INTERVAL_SECONDS, with_db(gc_previews))
+    return maintenance
@@ -0,0 +1,242 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.logging import logger
+from app.db import models
+from app.services.blobs import get_blob_store
+from app.services.cow import TreeCloner
+from app.services.snapshots import (
+    SnapshotNotFound,
+    diff_manifests,
+    head_job_id,
+    load_manifest,
+    scan_workspace,
+)
+from app.services.workspaces import (
+    PREVIEWS_DIRNAME,
+    invalidate_cached_files,
+    invalidate_cached_workspace,
+    iter_workspace_files,
+    safe_resolve_path,
+)
+
+# Job plumbing, rewritten by every job; never a reason to refuse a promotion
+_ARTIFACT_PREFIX = ".codex/"
+
+
+class PreviewNotFound(LookupError):
+    """Raised when a dry-run job has no preview tree (discarded, expired or never finished)."""
+    pass
+
+
+class PreviewConflict(RuntimeError):
+    """Raised when files a preview changes were changed in the workspace since it was taken."""
+
+    def __init__(self, paths: List[str]):
+        super().__init__(", ".join(paths))
+        self.paths = paths
+
+
+def previews_root() -> Path:
+    return Path(settings.WORKSPACE_ROOT) / PREVIEWS_DIRNAME
+
+
+def preview_dir(project_id: str, job_id: str) -> Path:
+    return previews_root() / project_id / job_id
+
+
+def _meta_path(project_id: str, job_id: str) -> Path:
+    return previews_root() / project_id / f"{job_id}.json"
+
+
+def _load_meta(project_id: str, job_id: str) -> dict:
+    try:
+        return json.loads(_meta_path(project_id, job_id).read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        raise PreviewNotFound(job_id)
+
+
+def _store_meta(project_id: str, job_id: str, meta: dict) -> None:
+    path = _meta_path(project_id, job_id)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as fh:
+            json.dump(meta, fh)
+        os.replace(tmp_name, path)
+    except BaseException:
+        if os.path.exists(tmp_name):
+            os.unlink(tmp_name)
+        raise
+
+
+def _clone_sig(st: os.stat_result) -> list:
+    # Workers replace files (new inode) or rewrite them (new size/mtime); either shows here
+    return [st.st_ino, st.st_size, st.st_mtime_ns]
+
+
+def create_preview(project_id: str, job_id: str, workspace_path: str) -> Path:
+    """
+    Clone the workspace into the job's preview tree and return its path.
+    - Files are reflinked (or copied, see WORKSPACE_CLONE_MODE) from the
+      workspace, which lives on the same filesystem, so with reflinks a
+      preview costs metadata, not data writes. Either way the preview shares
+      no inode with the workspace.
+    - The base (the workspace as the preview saw it) is recorded against the
+      HEAD snapshot, which makes it cheap when the workspace is committed.
+    """
+    store = get_blob_store()
+    base_job_id = head_job_id(project_id)
+    reference = None
+    if base_job_id:
+        try:
+            reference = load_manifest(project_id, base_job_id)
+        except SnapshotNotFound:
+            base_job_id = None
+    # Before cloning: hardlinking changes the ctime the stat reference relies on
+    base = scan_workspace(workspace_path, reference, store)
+
+    dest = preview_dir(project_id, job_id)
+    shutil.rmtree(dest, ignore_errors=True)
+    cloner = TreeCloner(settings.WORKSPACE_CLONE_MODE)
+    cloner.clone_tree(Path(workspace_path), dest)
+    (dest / ".codex").mkdir(exist_ok=True)
+    clones = {rel: _clone_sig(st) for rel, _, st in iter_workspace_files(dest.resolve())}
+    _store_meta(project_id, job_id, {
+        "project_id": project_id,
+        "job_id": job_id,
+        "base_job_id": base_job_id,
+        "base": base,
+        "clones": clones,
+        "clone_stats": cloner.stats,
+    })
+    logger.info("Preview for job %s cloned from %s: %s", job_id, workspace_path, cloner.stats)
+    return dest
+
+
+def finish_preview(project_id: str, job_id: str) -> List[dict]:
+    """
+    Record what the dry run changed relative to its base; returns the changes.
+    Only files the worker touched are hashed (and stored as blobs, so the
+    unified diff can render them); untouched clones reuse the base entry.
+    """
+    meta = _load_meta(project_id, job_id)
+    store = get_blob_store()
+    base, clones = meta["base"], meta["clones"]
+    files: Dict[str, dict] = {}
+    for rel, fpath, st in iter_workspace_files(preview_dir(project_id, job_id).resolve()):
+        if rel in base and clones.get(rel) == _clone_sig(st):
+            files[rel] = base[rel]
+            continue
+        sha, size = store.put_file(fpath)
+        files[rel] = {"sha256": sha, "size": size}
+    meta["changes"] = diff_manifests({"files": base}, {"files": files})
+    _store_meta(project_id, job_id, meta)
+    return meta["changes"]
+
+
+def preview_diff(project_id: str, job_id: str) -> dict:
+    """A finished preview's changes, in the shape of snapshots.diff_job()."""
+    meta = _load_meta(project_id, job_id)
+    if "changes" not in meta:
+        raise PreviewNotFound(job_id)
+    return {"job_id": job_id, "base_job_id": meta["base_job_id"], "changes": meta["changes"]}
+
+
+def _current_sha256(path: Path) -> Optional[str]:
+    try:
+        with open(path, "rb") as fh:
+            return hashlib.file_digest(fh, "sha256").hexdigest()
+    except (FileNotFoundError, IsADirectoryError):
+        return None
+
+
+def promote_preview(project_id: str, job_id: str, workspace_path: str) -> List[dict]:
+    """
+    Apply a finished preview to the workspace and drop it; returns the applied changes.
+    - Every changed path must still hold the preview's base content in the
+      workspace (only those files are read), otherwise PreviewConflict is
+      raised and nothing is written. Unrelated changes since are kept.
+    - Changed files are renamed from the preview into the workspace: no data
+      is copied. Across filesystems they are materialized from their blobs.
+    """
+    changes = preview_diff(project_id, job_id)["changes"]
+    conflicts = [
+        c["path"] for c in changes
+        if not c["path"].startswith(_ARTIFACT_PREFIX)
+        and _current_sha256(safe_resolve_path(workspace_path, c["path"])) != c["old_sha256"]
+    ]
+    if conflicts:
+        raise PreviewConflict(conflicts)
+
+    store = get_blob_store()
+    src_root = str(preview_dir(project_id, job_id))
+    for change in changes:
+        dest = safe_resolve_path(workspace_path, change["path"])
+        if change["new_sha256"] is None:
+            try:
+                dest.unlink()
+            except FileNotFoundError:
+                pass
+            continue
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            os.replace(safe_resolve_path(src_root, change["path"]), dest)
+        except OSError:
+            store.copy_to(change["new_sha256"], dest)
+
+    invalidate_cached_files(workspace_path, [c["path"] for c in changes])
+    discard_preview(project_id, job_id)
+    return changes
+
+
+def discard_preview(project_id: str, job_id: str) -> None:
+    tree = preview_dir(project_id, job_id)
+    shutil.rmtree(tree, ignore_errors=True)
+    invalidate_cached_workspace(str(tree))
+    _meta_path(project_id, job_id).unlink(missing_ok=True)
+
+
+def gc_previews(db: Session, ttl_seconds: Optional[float] = None) -> Dict[str, int]:
+    """
+    Remove preview trees nobody can confirm any more: their job is gone or
+    no longer a preview. Previews left unconfirmed for PREVIEW_TTL_SECONDS
+    are discarded and their jobs marked "discarded".
+    """
+    ttl = settings.PREVIEW_TTL_SECONDS if ttl_seconds is None else ttl_seconds
+    root = previews_root()
+    stats = {"removed": 0, "expired": 0}
+    if not root.is_dir():
+        return stats
+    cutoff = time.time() - ttl
+    for project in os.scandir(root):
+        if not project.is_dir(follow_symlinks=False):
+            continue
+        job_ids = {Path(name).stem for name in os.listdir(project.path) if not name.startswith(".")}
+        for job_id in job_ids:
+            job = db.query(models.Job).filter(models.Job.id == job_id).first()
+            if job is not None and job.status == "in_progress":
+                continue
+            if job is not None and job.status == "preview":
+                meta = _meta_path(project.name, job_id)
+                if ttl <= 0 or not meta.exists() or meta.stat().st_mtime > cutoff:
+                    continue
+                job.status = "discarded"
+                db.commit()
+                stats["expired"] += 1
+            discard_preview(project.name, job_id)
+            stats["removed"] += 1
+        try:
+            os.rmdir(project.path)
+        except OSError:
+            pass
+    return stats
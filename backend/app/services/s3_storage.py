@@ -0,0 +1,430 @@
+import datetime
+import hashlib
+import hmac
+import http.client
+import json
+import queue
+import threading
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import quote, urlsplit
+from xml.etree import ElementTree
+
+from app.core.config import settings
+from app.core.logging import logger
+from app.services.storage_backends import FileStat, WorkspaceStorage, normalize_key, pack_archive, unpack_archive
+
+_EMPTY_SHA256 = hashlib.sha256(b"").hexdigest()
+
+
+class S3Error(RuntimeError):
+    """Non-2xx response from the object store."""
+
+    def __init__(self, status: int, code: str, message: str = ""):
+        super().__init__(f"{status} {code}: {message}")
+        self.status = status
+        self.code = code
+
+
+def _uri_encode(value: str, safe: str = "-_.~") -> str:
+    return quote(value, safe=safe)
+
+
+def _xml_text(elem: ElementTree.Element, tag: str) -> Optional[str]:
+    # S3 responses are namespaced; match on the local tag name
+    for child in elem.iter():
+        if child.tag.rsplit("}", 1)[-1] == tag:
+            return child.text
+    return None
+
+
+def sign_v4(
+    method: str,
+    path: str,
+    query: Dict[str, str],
+    headers: Dict[str, str],
+    payload_sha256: str,
+    access_key: str,
+    secret_key: str,
+    region: str,
+    amz_date: str,
+    service: str = "s3",
+) -> str:
+    """
+    AWS Signature Version 4 Authorization header for one request.
+    headers must already contain host, x-amz-date and x-amz-content-sha256;
+    every header passed in is signed.
+    """
+    canonical_query = "&".join(
+        f"{_uri_encode(k)}={_uri_encode(v)}" for k, v in sorted(query.items())
+    )
+    lowered = {k.lower(): " ".join(str(v).split()) for k, v in headers.items()}
+    signed_headers = ";".join(sorted(lowered))
+    canonical_headers = "".join(f"{k}:{lowered[k]}\n" for k in sorted(lowered))
+    canonical_request = "\n".join([
+        method,
+        _uri_encode(path, safe="/-_.~"),
+        canonical_query,
+        canonical_headers,
+        signed_headers,
+        payload_sha256,
+    ])
+    date = amz_date[:8]
+    scope = f"{date}/{region}/{service}/aws4_request"
+    string_to_sign = "\n".join([
+        "AWS4-HMAC-SHA256",
+        amz_date,
+        scope,
+        hashlib.sha256(canonical_request.encode("utf-8")).hexdigest(),
+    ])
+    key = ("AWS4" + secret_key).encode("utf-8")
+    for part in (date, region, service, "aws4_request"):
+        key = hmac.new(key, part.encode("utf-8"), hashlib.sha256).digest()
+    signature = hmac.new(key, string_to_sign.encode("utf-8"), hashlib.sha256).hexdigest()
+    return f"AWS4-HMAC-SHA256 Credential={access_key}/{scope}, SignedHeaders={signed_headers}, Signature={signature}"
+
+
+class ConnectionPool:
+    """
+    Bounded pool of keep-alive HTTP(S) connections to one endpoint.
+    A connection that fails mid-request is closed and replaced, not reused.
+    """
+
+    def __init__(self, endpoint: str, size: int = 8, timeout: float = 30.0):
+        parts = urlsplit(endpoint)
+        self.scheme = parts.scheme or "http"
+        self.host = parts.hostname
+        self.port = parts.port
+        self.netloc = parts.netloc
+        self.timeout = timeout
+        self._idle: "queue.LifoQueue[http.client.HTTPConnection]" = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self.created = 0
+
+    def _new(self) -> http.client.HTTPConnection:
+        self.created += 1
+        cls = http.client.HTTPSConnection if self.scheme == "https" else http.client.HTTPConnection
+        return cls(self.host, self.port, timeout=self.timeout)
+
+    def request(self, method: str, target: str, body: Optional[bytes], headers: Dict[str, str]) -> Tuple[int, Dict[str, str], bytes]:
+        self._slots.acquire()
+        try:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                conn = self._new()
+            for attempt in (1, 2):
+                try:
+                    conn.request(method, target, body=body, headers=headers)
+                    resp = conn.getresponse()
+                    data = resp.read()
+                    break
+                except (http.client.HTTPException, ConnectionError, OSError):
+                    conn.close()
+                    if attempt == 2:
+                        raise
+                    # Stale keep-alive connection: retry once on a fresh one
+                    conn = self._new()
+            if resp.will_close:
+                conn.close()
+            else:
+                self._idle.put(conn)
+            return resp.status, {k.lower(): v for k, v in resp.getheaders()}, data
+        finally:
+            self._slots.release()
+
+    def close(self) -> None:
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+class S3Client:
+    """Minimal path-style S3 client (stdlib only): objects, listing and multipart uploads."""
+
+    def __init__(self, endpoint: str, bucket: str, access_key: str, secret_key: str,
+                 region: str = "us-east-1", pool_size: int = 8):
+        self.pool = ConnectionPool(endpoint, pool_size)
+        self.bucket = bucket
+        self.access_key = access_key
+        self.secret_key = secret_key
+        self.region = region
+
+    def _call(self, method: str, key: str = "", query: Optional[Dict[str, str]] = None,
+              body: bytes = b"", ok: Tuple[int, ...] = (200,)) -> Tuple[Dict[str, str], bytes]:
+        query = query or {}
+        path = f"/{self.bucket}/{key}" if key else f"/{self.bucket}"
+        payload_sha256 = hashlib.sha256(body).hexdigest() if body else _EMPTY_SHA256
+        amz_date = datetime.datetime.utcnow().strftime("%Y%m%dT%H%M%SZ")
+        headers = {
+            "host": self.pool.netloc,
+            "x-amz-date": amz_date,
+            "x-amz-content-sha256": payload_sha256,
+        }
+        headers["Authorization"] = sign_v4(
+            method, path, query, headers, payload_sha256,
+            self.access_key, self.secret_key, self.region, amz_date,
+        )
+        headers["Content-Length"] = str(len(body))
+        target = _uri_encode(path, safe="/-_.~")
+        if query:
+            target += "?" + "&".join(f"{_uri_encode(k)}={_uri_encode(v)}" for k, v in sorted(query.items()))
+        status, resp_headers, data = self.pool.request(method, target, body or None, headers)
+        if status not in ok:
+            code, message = str(status), ""
+            if data:
+                try:
+                    root = ElementTree.fromstring(data)
+                    code = _xml_text(root, "Code") or code
+                    message = _xml_text(root, "Message") or ""
+                except ElementTree.ParseError:
+                    pass
+            raise S3Error(status, code, message)
+        return resp_headers, data
+
+    def put_object(self, key: str, body: bytes) -> str:
+        headers, _ = self._call("PUT", key, body=body)
+        return headers.get("etag", "").strip('"')
+
+    def get_object(self, key: str) -> bytes:
+        return self._call("GET", key)[1]
+
+    def head_object(self, key: str) -> Dict[str, str]:
+        return self._call("HEAD", key)[0]
+
+    def delete_object(self, key: str) -> None:
+        self._call("DELETE", key, ok=(200, 204))
+
+    def list_objects(self, prefix: str) -> Iterator[Dict[str, str]]:
+        """Yield {"key", "size", "etag", "last_modified"} for every object under prefix (ListObjectsV2)."""
+        token = None
+        while True:
+            query = {"list-type": "2", "prefix": prefix}
+            if token:
+                query["continuation-token"] = token
+            root = ElementTree.fromstring(self._call("GET", query=query)[1])
+            for elem in root:
+                if elem.tag.rsplit("}", 1)[-1] != "Contents":
+                    continue
+                yield {
+                    "key": _xml_text(elem, "Key"),
+                    "size": int(_xml_text(elem, "Size") or 0),
+                    "etag": (_xml_text(elem, "ETag") or "").strip('"'),
+                    "last_modified": _xml_text(elem, "LastModified") or "",
+                }
+            if (_xml_text(root, "IsTruncated") or "false").lower() != "true":
+                return
+            token = _xml_text(root, "NextContinuationToken")
+
+    def upload_stream(self, key: str, chunks: Iterable[bytes], part_size: int) -> str:
+        """
+        Upload from an iterable without holding the whole object in memory.
+        Small bodies (< one part) use a single PUT; larger ones a multipart
+        upload, aborted on any failure so no orphaned parts are left behind.
+        """
+        buf = bytearray()
+        it = iter(chunks)
+        for chunk in it:
+            buf += chunk
+            if len(buf) >= part_size:
+                break
+        else:
+            return self.put_object(key, bytes(buf))
+
+        _, data = self._call("POST", key, query={"uploads": ""})
+        upload_id = _xml_text(ElementTree.fromstring(data), "UploadId")
+        parts: List[Tuple[int, str]] = []
+        try:
+            def send(part: bytes) -> None:
+                number = len(parts) + 1
+                headers, _ = self._call("PUT", key, query={"partNumber": str(number), "uploadId": upload_id}, body=part)
+                parts.append((number, headers.get("etag", "")))
+
+            for chunk in it:
+                buf += chunk
+                while len(buf) >= part_size:
+                    send(bytes(buf[:part_size]))
+                    del buf[:part_size]
+            while len(buf) >= part_size:
+                send(bytes(buf[:part_size]))
+                del buf[:part_size]
+            if buf or not parts:
+                send(bytes(buf))
+            body = "<CompleteMultipartUpload>" + "".join(
+                f"<Part><PartNumber>{n}</PartNumber><ETag>{etag}</ETag></Part>" for n, etag in parts
+            ) + "</CompleteMultipartUpload>"
+            _, data = self._call("POST", key, query={"uploadId": upload_id}, body=body.encode("utf-8"))
+        except BaseException:
+            try:
+                self._call("DELETE", key, query={"uploadId": upload_id}, ok=(200, 204))
+            except Exception:
+                logger.warning("Could not abort multipart upload %s for %s", upload_id, key)
+            raise
+        return (_xml_text(ElementTree.fromstring(data), "ETag") or "").strip('"')
+
+
+class S3Storage(WorkspaceStorage):
+    """
+    Workspaces as objects in an S3-compatible bucket:
+      <prefix>workspaces/<project_id>/<path>      file bodies
+      <prefix>blobs/<sha[:2]>/<sha>               content-addressed snapshot blobs
+      <prefix>snapshots/<project_id>/<job>.json   manifests (+ HEAD)
+      <prefix>archives/<project_id>.tar.gz        archived workspaces
+    Snapshots reuse the previous manifest's hash for objects whose ETag is
+    unchanged, so only new or modified objects are downloaded and hashed.
+    """
+
+    name = "s3"
+
+    def __init__(self, client: S3Client, prefix: str = "", part_size: int = 8 * 1024 * 1024):
+        self.client = client
+        self.prefix = prefix
+        self.part_size = part_size
+
+    @classmethod
+    def from_settings(cls) -> "S3Storage":
+        client = S3Client(
+            settings.S3_ENDPOINT_URL,
+            settings.S3_BUCKET,
+            settings.S3_ACCESS_KEY_ID,
+            settings.S3_SECRET_ACCESS_KEY,
+            region=settings.S3_REGION,
+            pool_size=settings.S3_POOL_SIZE,
+        )
+        return cls(client, prefix=settings.S3_PREFIX, part_size=settings.S3_PART_SIZE_BYTES)
+
+    def _ws_prefix(self, project_id: str) -> str:
+        return f"{self.prefix}workspaces/{project_id}/"
+
+    def _key(self, project_id: str, rel_path: str) -> str:
+        return self._ws_prefix(project_id) + normalize_key(rel_path)
+
+    def _objects(self, project_id: str) -> Iterator[Tuple[str, Dict[str, str]]]:
+        base = self._ws_prefix(project_id)
+        for obj in self.client.list_objects(base):
+            rel = obj["key"][len(base):]
+            if rel and rel != ".keep":
+                yield rel, obj
+
+    def _not_found(self, fn, *args):
+        try:
+            return fn(*args)
+        except S3Error as exc:
+            if exc.status == 404:
+                raise FileNotFoundError(args[0] if args else "")
+            raise
+
+    def create(self, project_id: str) -> None:
+        # Object stores have no directories; a marker makes an empty workspace visible
+        self.client.put_object(self._ws_prefix(project_id) + ".keep", b"")
+
+    def exists(self, project_id: str) -> bool:
+        return next(iter(self.client.list_objects(self._ws_prefix(project_id))), None) is not None
+
+    def list(self, project_id: str) -> List[dict]:
+        return [{"path": rel, "size": obj["size"]} for rel, obj in sorted(self._objects(project_id))]
+
+    def read(self, project_id: str, rel_path: str) -> bytes:
+        return self._not_found(self.client.get_object, self._key(project_id, rel_path))
+
+    def write(self, project_id: str, rel_path: str, data: bytes) -> None:
+        self.client.put_object(self._key(project_id, rel_path), data)
+
+    def write_stream(self, project_id: str, rel_path: str, chunks: Iterable[bytes]) -> None:
+        self.client.upload_stream(self._key(project_id, rel_path), chunks, self.part_size)
+
+    def stat(self, project_id: str, rel_path: str) -> FileStat:
+        headers = self._not_found(self.client.head_object, self._key(project_id, rel_path))
+        modified = headers.get("last-modified")
+        mtime_ns = 0
+        if modified:
+            parsed = datetime.datetime.strptime(modified, "%a, %d %b %Y %H:%M:%S GMT")
+            mtime_ns = int(parsed.replace(tzinfo=datetime.timezone.utc).timestamp()) * 1_000_000_000
+        return FileStat(int(headers.get("content-length", 0)), mtime_ns, headers.get("etag", "").strip('"'))
+
+    def delete(self, project_id: str, rel_path: str) -> None:
+        self.client.delete_object(self._key(project_id, rel_path))
+
+    def _manifest_key(self, project_id: str, name: str) -> str:
+        return f"{self.prefix}snapshots/{project_id}/{name}"
+
+    def _load_head(self, project_id: str) -> Optional[dict]:
+        try:
+            head = self.client.get_object(self._manifest_key(project_id, "HEAD")).decode("utf-8")
+            return json.loads(self.client.get_object(self._manifest_key(project_id, f"{head}.json")))
+        except S3Error as exc:
+            if exc.status == 404:
+                return None
+            raise
+
+    def snapshot(self, project_id: str, job_id: str) -> dict:
+        parent = self._load_head(project_id)
+        ref = (parent or {}).get("files", {})
+        files = {}
+        for rel, obj in self._objects(project_id):
+            prev = ref.get(rel)
+            if prev is not None and prev.get("etag") == obj["etag"]:
+                files[rel] = prev
+                continue
+            data = self.client.get_object(obj["key"])
+            sha = hashlib.sha256(data).hexdigest()
+            if not self.has_blob(sha):
+                self.client.put_object(self._blob_key(sha), data)
+            files[rel] = {"sha256": sha, "size": len(data), "etag": obj["etag"]}
+        manifest = {
+            "project_id": project_id,
+            "job_id": job_id,
+            "parent": (parent or {}).get("job_id"),
+            "files": files,
+        }
+        self.client.put_object(self._manifest_key(project_id, f"{job_id}.json"), json.dumps(manifest).encode("utf-8"))
+        self.client.put_object(self._manifest_key(project_id, "HEAD"), job_id.encode("utf-8"))
+        return manifest
+
+    def _blob_key(self, sha: str) -> str:
+        return f"{self.prefix}blobs/{sha[:2]}/{sha}"
+
+    def has_blob(self, sha: str) -> bool:
+        try:
+            self.client.head_object(self._blob_key(sha))
+        except S3Error as exc:
+            if exc.status == 404:
+                return False
+            raise
+        return True
+
+    def read_blob(self, sha: str) -> bytes:
+        return self._not_found(self.client.get_object, self._blob_key(sha))
+
+    def write_blob(self, sha: str, chunks: Iterable[bytes]) -> None:
+        self.client.upload_stream(self._blob_key(sha), chunks, self.part_size)
+
+    def _archive_key(self, project_id: str) -> str:
+        return f"{self.prefix}archives/{project_id}.tar.gz"
+
+    def archive(self, project_id: str) -> bool:
+        objects = list(self._objects(project_id))
+        if not objects:
+            return False
+        bundle = pack_archive((rel, self.client.get_object(obj["key"])) for rel, obj in objects)
+        # Archive is complete in the store before any workspace object is deleted
+        self.client.upload_stream(self._archive_key(project_id), [bundle], self.part_size)
+        for _, obj in objects:
+            self.client.delete_object(obj["key"])
+        marker = self._ws_prefix(project_id) + ".keep"
+        self.client.delete_object(marker)
+        return True
+
+    def restore(self, project_id: str) -> bool:
+        try:
+            bundle = self.client.get_object(self._archive_key(project_id))
+        except S3Error as exc:
+            if exc.status == 404:
+                return False
+            raise
+        self.create(project_id)
+        for rel, data in unpack_archive(bundle):
+            self.write(project_id, rel, data)
+        self.client.delete_object(self._archive_key(project_id))
+        return True
@@ -0,0 +1,238 @@
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Set
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.logging import logger
+from app.db import models
+from app.db.session import SessionLocal
+from app.services.codex_runner import run_codex_job
+from app.services.lifecycle import QuotaExceeded, check_quota, ensure_workspace
+
+# Statuses a job does not leave any more
+_FINISHED = {"completed", "error", "cancelled", "discarded"}
+# Queued jobs are examined in pages of this many, oldest first
+_SCAN_PAGE = 500
+
+
+def job_failed(job: models.Job) -> bool:
+    """Failed for its dependents: errored, cancelled, discarded, or completed with an "error" result."""
+    if job.status in ("error", "cancelled", "discarded"):
+        return True
+    return job.status == "completed" and (job.result or {}).get("status") == "error"
+
+
+def pipeline_status(jobs: Iterable[models.Job]) -> str:
+    """queued | running while jobs are pending; then completed, or failed if any job failed."""
+    jobs = list(jobs)
+    if any(j.status not in _FINISHED for j in jobs):
+        return "queued" if all(j.status == "queued" for j in jobs) else "running"
+    return "failed" if any(job_failed(j) for j in jobs) else "completed"
+
+
+def find_cycle(edges: Dict[str, List[str]]) -> Optional[List[str]]:
+    """A dependency cycle in {node: [nodes it depends on]} as a path, or None. Unknown nodes are leaves."""
+    state: Dict[str, int] = {}  # 1 = on the current path, 2 = done
+
+    def visit(node: str, path: List[str]) -> Optional[List[str]]:
+        state[node] = 1
+        for dep in edges.get(node, ()):
+            if state.get(dep) == 1:
+                return path[path.index(dep):] + [dep]
+            if dep in edges and dep not in state:
+                cycle = visit(dep, path + [dep])
+                if cycle:
+                    return cycle
+        state[node] = 2
+        return None
+
+    for node in edges:
+        if node not in state:
+            cycle = visit(node, [node])
+            if cycle:
+                return cycle
+    return None
+
+
+class JobScheduler:
+    """
+    Runs jobs that declare depends_on (standalone or in a pipeline).
+    - A queued job is released once every dependency has completed. When a
+      dependency fails, the failure policy (the pipeline's on_failure, else
+      PIPELINE_ON_FAILURE) either cancels its dependents (transitively), cancels
+      the rest of the pipeline, or lets dependents run anyway ("continue").
+    - Released jobs run on a bounded pool (SCHEDULER_MAX_WORKERS), at most one
+      per project at a time, so independent branches on different (e.g. forked)
+      projects run in parallel. Every finished job triggers another release.
+    - Jobs a previous process left in_progress are failed on start(), so their
+      dependents are released (or cancelled) by the failure policies.
+    """
+
+    def __init__(self):
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._release_lock = threading.Lock()
+        self._running: Set[str] = set()  # project ids with a scheduled job in flight
+        self._closed = False
+
+    def _executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(
+                    max_workers=max(1, settings.SCHEDULER_MAX_WORKERS), thread_name_prefix="scheduler"
+                )
+            return self._pool
+
+    def start(self) -> None:
+        """(Re)open after shutdown() and resume queued jobs, e.g. those left by a previous process."""
+        with self._release_lock:
+            self._closed = False
+            db = SessionLocal()
+            try:
+                self._fail_orphans(db)
+            except Exception:
+                logger.error("Failing orphaned jobs failed", exc_info=True)
+            finally:
+                db.close()
+        self.release()
+
+    def _fail_orphans(self, db: Session) -> None:
+        """
+        Mark jobs left in_progress by a process that died as "error". Nothing
+        runs them any more: left as they are they would hold back their
+        dependents, and keep their projects busy, forever.
+        """
+        orphans = db.query(models.Job).filter(models.Job.status == "in_progress").all()
+        for job in orphans:
+            if job.project_id in self._running:
+                continue  # still running here, started before a shutdown() and this start()
+            job.status = "error"
+            job.finished_at = datetime.utcnow()
+            if job.job_type == "initial_project" and job.project.status in ("queued", "in_progress"):
+                job.project.status = job.status
+                job.project.summary = f"Initial job status: {job.status}"
+            logger.warning("Job %s was left in progress by a previous process; marked as error", job.id)
+        db.commit()
+
+    def release(self) -> List[Future]:
+        """Apply failure policies and start every job that is ready; never raises."""
+        with self._release_lock:
+            if self._closed:
+                return []
+            db = SessionLocal()
+            try:
+                return [self._start(db, job) for job in self._ready(db)]
+            except Exception:
+                logger.error("Releasing scheduled jobs failed", exc_info=True)
+                return []
+            finally:
+                db.close()
+
+    def _ready(self, db: Session) -> List[models.Job]:
+        """
+        Cancel what the failure policies doom and return jobs to start, oldest
+        first, no more than there are free slots. The queue is read in pages and
+        the scan stops once the free slots are filled, so a large backlog (e.g.
+        a bulk project import) costs a page per release, not the whole queue.
+        """
+        slots = max(1, settings.SCHEDULER_MAX_WORKERS) - len(self._running)
+        ready: List[models.Job] = []
+        projects = set(self._running)
+        offset = 0
+        while slots > len(ready):
+            page = (
+                db.query(models.Job).filter(models.Job.status == "queued")
+                .order_by(models.Job.created_at, models.Job.id).offset(offset).limit(_SCAN_PAGE).all()
+            )
+            if not page:
+                break
+            cancelled = self._cancelled(db, [j for j in page if j.depends_on is not None], ready, projects, slots)
+            if cancelled:
+                for job in cancelled:
+                    job.status = "cancelled"
+                    job.finished_at = datetime.utcnow()
+                    logger.info("Cancelled job %s: a dependency failed", job.id)
+                db.commit()
+                # Cancelling a job can doom the jobs after it: scan again from the start
+                ready, projects, offset = [], set(self._running), 0
+                continue
+            offset += len(page)
+        return ready
+
+    def _cancelled(
+        self, db: Session, queued: List[models.Job], ready: List[models.Job], projects: Set[str], slots: int
+    ) -> List[models.Job]:
+        """Sort one page of queued jobs: returns the ones to cancel, appends runnable ones to ready."""
+        dep_ids = {dep for j in queued for dep in j.depends_on}
+        deps = {d.id: d for d in db.query(models.Job).filter(models.Job.id.in_(dep_ids))} if dep_ids else {}
+        cancelled = []
+        for job in queued:
+            policy = job.pipeline.on_failure if job.pipeline else settings.PIPELINE_ON_FAILURE
+            if policy == "cancel_pipeline" and job.pipeline and any(job_failed(j) for j in job.pipeline.jobs):
+                cancelled.append(job)
+                continue
+            parents = [deps.get(dep) for dep in job.depends_on]
+            # A dependency that does not exist (any more) counts as failed
+            failed = any(p is None or job_failed(p) for p in parents)
+            if failed and policy != "continue":
+                cancelled.append(job)
+            elif (
+                len(ready) < slots and job.project_id not in projects
+                and all(p is None or p.status in _FINISHED for p in parents)
+            ):
+                ready.append(job)
+                projects.add(job.project_id)
+        return cancelled
+
+    def _start(self, db: Session, job: models.Job) -> Future:
+        self._running.add(job.project_id)
+        job.status = "in_progress"
+        db.commit()
+        return self._executor().submit(self._run, job.project_id, job.id)
+
+    def _run(self, project_id: str, job_id: str) -> Optional[str]:
+        db = SessionLocal()
+        try:
+            job = db.query(models.Job).filter(models.Job.id == job_id).one()
+            project = job.project
+            try:
+                check_quota(ensure_workspace(project.id, project.workspace_path))
+                run_codex_job(db, project, job)
+            except QuotaExceeded:
+                logger.warning("Disk quota exceeded; scheduled job %s not run", job_id)
+                job.status = "error"
+                job.finished_at = datetime.utcnow()
+                db.commit()
+            except Exception:
+                logger.error("Scheduled job %s failed", job_id, exc_info=True)
+                db.rollback()
+                job.status = "error"
+                job.finished_at = datetime.utcnow()
+                db.commit()
+            if job.job_type == "initial_project" and project.status == "queued":
+                # Projects created with a queued initial job (POST /projects:batch)
+                project.status = job.status
+                project.summary = f"Initial job status: {job.status}"
+                db.commit()
+            logger.info("Scheduled job %s finished: %s", job_id, job.status)
+            return job.status
+        finally:
+            db.close()
+            with self._release_lock:
+                self._running.discard(project_id)
+            self.release()
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop releasing jobs; queued ones stay queued for the next start()."""
+        with self._release_lock:
+            self._closed = True
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=wait, cancel_futures=not wait)
+
+
+scheduler = JobScheduler()
@@ -0,0 +1,103 @@
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from app.core.config import settings
+
+
+class _Call:
+    __slots__ = ("done", "result", "error", "deadline")
+
+    def __init__(self, deadline: float):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.deadline = deadline
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent identical calls into one in-flight computation.
+
+    - The first caller for a key (the leader) runs fn; callers arriving while it
+      runs wait for and share its result or exception.
+    - Per-key timeout: a follower waits at most `timeout` seconds, then runs fn
+      itself. A flight older than its deadline is not joined by new callers, so
+      one stuck computation cannot stall a key indefinitely.
+    - Cancellation: if the leader is interrupted by a BaseException that is not
+      an Exception (e.g. CancelledError, KeyboardInterrupt), followers do not
+      inherit it; they retry the computation themselves.
+    Shared results must be treated as read-only by callers.
+    """
+
+    def __init__(self, timeout: float):
+        self.timeout = timeout
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+        self.leaders = 0
+        self.shared = 0
+        self.timeouts = 0
+        self.retries = 0
+
+    def do(self, key: Hashable, fn: Callable[[], Any], timeout: Optional[float] = None) -> Any:
+        timeout = self.timeout if timeout is None else timeout
+        if timeout <= 0:
+            return fn()
+
+        now = time.monotonic()
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None and call.deadline > now:
+                self.shared += 1
+                leader = False
+            else:
+                call = _Call(now + timeout)
+                self._calls[key] = call
+                self.leaders += 1
+                leader = True
+
+        if leader:
+            return self._lead(key, call, fn)
+
+        if not call.done.wait(timeout):
+            with self._lock:
+                self.timeouts += 1
+            return fn()
+        if call.error is not None:
+            if isinstance(call.error, Exception):
+                raise call.error
+            # Leader was cancelled; do not propagate its cancellation to us
+            with self._lock:
+                self.retries += 1
+            return fn()
+        return call.result
+
+    def _lead(self, key: Hashable, call: _Call, fn: Callable[[], Any]) -> Any:
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as exc:
+            call.error = exc
+            raise
+        finally:
+            with self._lock:
+                if self._calls.get(key) is call:
+                    del self._calls[key]
+            call.done.set()
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "in_flight": len(self._calls),
+                "leaders": self.leaders,
+                "shared": self.shared,
+                "timeouts": self.timeouts,
+                "retries": self.retries,
+            }
+
+
+flights = SingleFlight(settings.SINGLEFLIGHT_TIMEOUT_SECONDS)
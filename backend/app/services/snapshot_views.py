@@ -0,0 +1,109 @@
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.logging import logger
+from app.db import models
+from app.services.blobs import get_blob_store
+from app.services.singleflight import flights
+from app.services.snapshots import SnapshotNotFound, head_job_id, load_manifest
+from app.services.workspaces import safe_resolve_path
+
+
+def _views_dir(project_id: str) -> Path:
+    return Path(settings.STORE_ROOT) / "views" / project_id
+
+
+def _build_view(project_id: str, job_id: str, dest: Path) -> None:
+    """Materialize a manifest as a read-only tree of hardlinks to its blobs (copies across devices)."""
+    store = get_blob_store()
+    files = load_manifest(project_id, job_id)["files"]
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    tmp_dir = Path(tempfile.mkdtemp(dir=dest.parent, prefix=".build-"))
+    try:
+        for rel, entry in files.items():
+            target = safe_resolve_path(str(tmp_dir), rel)
+            target.parent.mkdir(parents=True, exist_ok=True)
+            blob = store.local_path(entry["sha256"])
+            try:
+                os.link(blob, target)
+            except OSError:
+                shutil.copyfile(blob, target)
+                os.chmod(target, 0o444)
+        try:
+            os.rename(tmp_dir, dest)
+        except OSError:
+            # Another reader built the same view first; views are immutable, so either is fine
+            if not dest.is_dir():
+                raise
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+    except BaseException:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+
+
+def snapshot_view(project_id: str) -> Optional[str]:
+    """
+    Read-only directory holding the project's last committed snapshot (HEAD),
+    built on first use. Returns None when snapshots are disabled, the project
+    has no HEAD (its files, if any, were never snapshotted, so an empty view
+    would hide them) or the view cannot be built; callers then fall back to
+    the live workspace.
+    """
+    if not settings.SNAPSHOTS_ENABLED:
+        return None
+    job_id = head_job_id(project_id)
+    if job_id is None:
+        return None
+    dest = _views_dir(project_id) / job_id
+    if dest.is_dir():
+        return str(dest)
+    try:
+        flights.do(("snapshot_view", str(dest)), lambda: dest.is_dir() or _build_view(project_id, job_id, dest))
+    except (SnapshotNotFound, OSError):
+        logger.warning("Could not build snapshot view %s", dest, exc_info=True)
+        return None
+    return str(dest)
+
+
+def publish_snapshot_view(project_id: str) -> None:
+    """Build the committed view before a job starts writing, so no reader waits for it."""
+    snapshot_view(project_id)
+
+
+def gc_snapshot_views(db: Session, min_age_seconds: Optional[float] = None) -> Dict[str, int]:
+    """
+    Remove views nobody can be served any more: every view of a project with
+    no running job, and superseded views of one that has. Views younger than
+    min_age_seconds are kept for readers that resolved them just before the swap.
+    """
+    min_age = settings.SNAPSHOT_VIEW_MIN_AGE_SECONDS if min_age_seconds is None else min_age_seconds
+    root = Path(settings.STORE_ROOT) / "views"
+    stats = {"removed": 0, "kept": 0}
+    if not root.is_dir():
+        return stats
+    running = {
+        pid for (pid,) in db.query(models.Job.project_id).filter(models.Job.status == "in_progress")
+    }
+    cutoff = time.time() - min_age
+    for project_dir in os.scandir(root):
+        if not project_dir.is_dir():
+            continue
+        current = head_job_id(project_dir.name) if project_dir.name in running else None
+        for view in os.scandir(project_dir.path):
+            if view.name == current or view.stat(follow_symlinks=False).st_mtime > cutoff:
+                stats["kept"] += 1
+                continue
+            shutil.rmtree(view.path, ignore_errors=True)
+            stats["removed"] += 1
+        try:
+            os.rmdir(project_dir.path)
+        except OSError:
+            pass  # still holds views
+    return stats
@@ -0,0 +1,251 @@
+import difflib
+import json
+import os
+import tempfile
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from app.core.config import settings
+from app.core.logging import logger
+from app.services.blobs import BlobStore, get_blob_store
+from app.services.workspaces import iter_workspace_files, invalidate_cached_files, safe_resolve_path
+
+# Files larger than this are reported as changed but not rendered in unified diffs
+_MAX_DIFF_BYTES = 512 * 1024
+
+
+class SnapshotNotFound(LookupError):
+    """Raised when a job has no recorded workspace snapshot."""
+    pass
+
+
+def _snapshot_dir(project_id: str) -> Path:
+    return Path(settings.STORE_ROOT) / "snapshots" / project_id
+
+
+def _manifest_path(project_id: str, job_id: str) -> Path:
+    return _snapshot_dir(project_id) / f"{job_id}.json"
+
+
+def _write_json_atomic(path: Path, data: dict) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as fh:
+            json.dump(data, fh, indent=2, sort_keys=True)
+        os.replace(tmp_name, path)
+    except BaseException:
+        if os.path.exists(tmp_name):
+            os.unlink(tmp_name)
+        raise
+
+
+def _write_head(project_id: str, job_id: str) -> None:
+    head = _snapshot_dir(project_id) / "HEAD"
+    head.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=head.parent, prefix=".tmp-")
+    with os.fdopen(fd, "w", encoding="utf-8") as fh:
+        fh.write(job_id)
+    os.replace(tmp_name, head)
+
+
+def head_job_id(project_id: str) -> Optional[str]:
+    """Job id of the project's most recent snapshot, if any."""
+    head = _snapshot_dir(project_id) / "HEAD"
+    try:
+        return head.read_text(encoding="utf-8").strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def load_manifest(project_id: str, job_id: str) -> dict:
+    try:
+        return json.loads(_manifest_path(project_id, job_id).read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        raise SnapshotNotFound(job_id)
+
+
+def _stat_sig(st: os.stat_result) -> list:
+    # Any content write changes at least one of these
+    return [st.st_size, st.st_mtime_ns, st.st_ctime_ns, st.st_ino]
+
+
+def scan_workspace(workspace_path: str, reference: Optional[dict], store: BlobStore) -> Dict[str, dict]:
+    """
+    Describe the workspace as {path: {sha256, size, stat}}.
+    Files whose stat signature matches the reference manifest reuse its hash;
+    only new or changed files are read, hashed and copied into the blob store.
+    """
+    ref_files = (reference or {}).get("files", {})
+    root_real = Path(workspace_path).resolve()
+    files: Dict[str, dict] = {}
+    for rel, fpath, st in iter_workspace_files(root_real):
+        sig = _stat_sig(st)
+        prev = ref_files.get(rel)
+        if prev is not None and prev.get("stat") == sig and store.has(prev["sha256"]):
+            files[rel] = prev
+            continue
+        if prev is not None and st.st_nlink > 1 and store.is_linked(prev["sha256"], st):
+            # Deduplicated file: it is the blob, so its content is known without hashing
+            files[rel] = dict(prev, stat=sig)
+            continue
+        try:
+            sha, size = store.put_file(fpath)
+        except FileNotFoundError:
+            continue
+        files[rel] = {"sha256": sha, "size": size, "stat": sig}
+    return files
+
+
+def take_snapshot(project_id: str, job_id: str, workspace_path: str) -> dict:
+    """
+    Record an immutable manifest of the workspace for a completed job.
+    The new manifest's parent is the project's previous HEAD snapshot, which
+    is also used as the stat reference, so cost scales with changed files.
+    """
+    store = get_blob_store()
+    parent_id = head_job_id(project_id)
+    parent = None
+    if parent_id:
+        try:
+            parent = load_manifest(project_id, parent_id)
+        except SnapshotNotFound:
+            parent_id = None
+
+    manifest = {
+        "project_id": project_id,
+        "job_id": job_id,
+        "parent": parent_id,
+        "created_at": datetime.utcnow().isoformat() + "Z",
+        "files": scan_workspace(workspace_path, parent, store),
+    }
+    _write_json_atomic(_manifest_path(project_id, job_id), manifest)
+    _write_head(project_id, job_id)
+    logger.info("Snapshot recorded for project %s job %s (%d files)", project_id, job_id, len(manifest["files"]))
+    return manifest
+
+
+def diff_manifests(old: Optional[dict], new: dict) -> List[dict]:
+    """Structured per-file changes between two manifests (old may be None = empty)."""
+    old_files = (old or {}).get("files", {})
+    new_files = new.get("files", {})
+    changes: List[dict] = []
+    for path in sorted(set(old_files) | set(new_files)):
+        before = old_files.get(path)
+        after = new_files.get(path)
+        if before and after and before["sha256"] == after["sha256"]:
+            continue
+        if before is None:
+            change = "added"
+        elif after is None:
+            change = "deleted"
+        else:
+            change = "modified"
+        changes.append({
+            "path": path,
+            "change": change,
+            "old_sha256": before["sha256"] if before else None,
+            "new_sha256": after["sha256"] if after else None,
+            "old_size": before["size"] if before else None,
+            "new_size": after["size"] if after else None,
+        })
+    return changes
+
+
+def _blob_lines(store: BlobStore, sha: Optional[str]) -> Optional[List[str]]:
+    if sha is None:
+        return []
+    data = store.read_bytes(sha)
+    if len(data) > _MAX_DIFF_BYTES or b"\0" in data:
+        return None
+    try:
+        return data.decode("utf-8").splitlines(keepends=True)
+    except UnicodeDecodeError:
+        return None
+
+
+def unified_diff(changes: List[dict]) -> str:
+    """Render structured changes as a git-style unified diff."""
+    store = get_blob_store()
+    out: List[str] = []
+    for change in changes:
+        path = change["path"]
+        a = f"a/{path}" if change["old_sha256"] else "/dev/null"
+        b = f"b/{path}" if change["new_sha256"] else "/dev/null"
+        old_lines = _blob_lines(store, change["old_sha256"])
+        new_lines = _blob_lines(store, change["new_sha256"])
+        if old_lines is None or new_lines is None:
+            out.append(f"Binary files {a} and {b} differ\n")
+            continue
+        for line in difflib.unified_diff(old_lines, new_lines, fromfile=a, tofile=b):
+            out.append(line if line.endswith("\n") else line + "\n\\ No newline at end of file\n")
+    return "".join(out)
+
+
+def diff_job(project_id: str, job_id: str) -> dict:
+    """Changes introduced by a job relative to the snapshot before it."""
+    manifest = load_manifest(project_id, job_id)
+    base_id = manifest.get("parent")
+    base = None
+    if base_id:
+        try:
+            base = load_manifest(project_id, base_id)
+        except SnapshotNotFound:
+            base_id = None
+    return {"job_id": job_id, "base_job_id": base_id, "changes": diff_manifests(base, manifest)}
+
+
+def restore_snapshot(project_id: str, job_id: str, workspace_path: str) -> List[dict]:
+    """
+    Make the workspace match a job's snapshot.
+    Only files whose content differs are rewritten (temp file + rename), and
+    files absent from the snapshot are removed. Returns the applied changes.
+    """
+    store = get_blob_store()
+    target = load_manifest(project_id, job_id)
+    head_id = head_job_id(project_id)
+    reference = None
+    if head_id:
+        try:
+            reference = load_manifest(project_id, head_id)
+        except SnapshotNotFound:
+            reference = None
+    current = {"files": scan_workspace(workspace_path, reference, store)}
+    changes = diff_manifests(current, target)
+
+    for change in changes:
+        dest = safe_resolve_path(workspace_path, change["path"])
+        if change["new_sha256"] is None:
+            try:
+                dest.unlink()
+            except FileNotFoundError:
+                pass
+        else:
+            store.copy_to(change["new_sha256"], dest)
+
+    invalidate_cached_files(workspace_path, [c["path"] for c in changes])
+    return changes
+
+
+def fork_snapshots(source_project_id: str, target_project_id: str, job_id_map: Dict[str, str]) -> int:
+    """
+    Copy snapshot manifests to a forked project, renaming job ids via job_id_map.
+    Blobs are content-addressed and shared, so this copies only small manifests.
+    """
+    copied = 0
+    for old_id, new_id in job_id_map.items():
+        try:
+            manifest = load_manifest(source_project_id, old_id)
+        except SnapshotNotFound:
+            continue
+        manifest["project_id"] = target_project_id
+        manifest["job_id"] = new_id
+        manifest["parent"] = job_id_map.get(manifest.get("parent"))
+        _write_json_atomic(_manifest_path(target_project_id, new_id), manifest)
+        copied += 1
+
+    head = job_id_map.get(head_job_id(source_project_id))
+    if head:
+        _write_head(target_project_id, head)
+    return copied
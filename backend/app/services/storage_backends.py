@@ -0,0 +1,429 @@
+import hashlib
+import io
+import json
+import os
+import shutil
+import tarfile
+import tempfile
+import threading
+import time
+from abc import ABC, abstractmethod
+from pathlib import Path, PurePosixPath
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional
+
+from app.core.config import settings
+from app.core.logging import logger
+from app.services.blobs import get_blob_store
+from app.services.lifecycle import archive_workspace, project_lock, restore_workspace
+from app.services.snapshots import take_snapshot
+from app.services.workspaces import (
+    InvalidWorkspacePath,
+    _is_windows_drive_path,
+    _open_in_root,
+    create_workspace,
+    invalidate_cached_files,
+    iter_workspace_files,
+    list_files,
+    resolve_workspace_dir,
+    safe_resolve_path,
+)
+
+
+_CHUNK_SIZE = 1024 * 1024
+
+
+class FileStat(NamedTuple):
+    size: int
+    mtime_ns: int
+    etag: str  # changes whenever the content may have changed
+
+
+def normalize_key(rel_path: str) -> str:
+    """
+    Validate a workspace-relative path for key-based backends and return it
+    in canonical posix form. Same rules as safe_resolve_path(), without a
+    filesystem to resolve against: no absolute/drive paths and no "..".
+    """
+    if not rel_path or _is_windows_drive_path(rel_path):
+        raise InvalidWorkspacePath("Absolute or drive path not allowed")
+    path = PurePosixPath(rel_path.replace("\\", "/"))
+    if path.is_absolute():
+        raise InvalidWorkspacePath("Absolute path not allowed")
+    parts = [p for p in path.parts if p not in ("", ".")]
+    if not parts or ".." in parts:
+        raise InvalidWorkspacePath("Path escapes workspace")
+    return "/".join(parts)
+
+
+def pack_archive(files: Iterable[tuple]) -> bytes:
+    """tar.gz of (rel_path, bytes) pairs; the bundle format shared by every backend."""
+    buf = io.BytesIO()
+    with tarfile.open(fileobj=buf, mode="w:gz") as tar:
+        for rel, data in files:
+            info = tarfile.TarInfo(rel)
+            info.size = len(data)
+            info.mtime = int(time.time())
+            tar.addfile(info, io.BytesIO(data))
+    return buf.getvalue()
+
+
+def unpack_archive(bundle: bytes) -> Iterator[tuple]:
+    with tarfile.open(fileobj=io.BytesIO(bundle), mode="r:gz") as tar:
+        for member in tar.getmembers():
+            if member.isfile():
+                yield normalize_key(member.name), tar.extractfile(member).read()
+
+
+class WorkspaceStorage(ABC):
+    """
+    Where workspace files and snapshot blobs live. Paths are workspace-relative
+    posix strings; implementations raise FileNotFoundError for missing files
+    and InvalidWorkspacePath for unsafe paths, like app.services.workspaces.
+    - snapshot() records a manifest {"files": {path: {"sha256", "size"}}}.
+    - archive() packs a workspace into a tar.gz bundle and removes it;
+      restore() brings it back. Both return False if there was nothing to do.
+    - Blobs are keyed by their sha256 and never modified once written.
+    A remote backend is the durable copy: WORKSPACE_ROOT and the local blob
+    store are then node-local caches of it (see publish_workspace()).
+    """
+
+    name = "abstract"
+    remote = True
+
+    @abstractmethod
+    def create(self, project_id: str) -> None: ...
+
+    @abstractmethod
+    def exists(self, project_id: str) -> bool: ...
+
+    @abstractmethod
+    def list(self, project_id: str) -> List[dict]: ...
+
+    @abstractmethod
+    def read(self, project_id: str, rel_path: str) -> bytes: ...
+
+    @abstractmethod
+    def write(self, project_id: str, rel_path: str, data: bytes) -> None: ...
+
+    def write_stream(self, project_id: str, rel_path: str, chunks: Iterable[bytes]) -> None:
+        """Write a file from an iterable of chunks; backends override to avoid buffering."""
+        self.write(project_id, rel_path, b"".join(chunks))
+
+    @abstractmethod
+    def stat(self, project_id: str, rel_path: str) -> FileStat: ...
+
+    @abstractmethod
+    def delete(self, project_id: str, rel_path: str) -> None: ...
+
+    @abstractmethod
+    def snapshot(self, project_id: str, job_id: str) -> dict: ...
+
+    @abstractmethod
+    def archive(self, project_id: str) -> bool: ...
+
+    @abstractmethod
+    def restore(self, project_id: str) -> bool: ...
+
+    @abstractmethod
+    def has_blob(self, sha: str) -> bool: ...
+
+    @abstractmethod
+    def read_blob(self, sha: str) -> bytes: ...
+
+    @abstractmethod
+    def write_blob(self, sha: str, chunks: Iterable[bytes]) -> None: ...
+
+
+class LocalStorage(WorkspaceStorage):
+    """The POSIX directory layout the rest of the backend uses (WORKSPACE_ROOT, STORE_ROOT)."""
+
+    name = "local"
+    remote = False
+
+    def _root(self, project_id: str) -> str:
+        return str(resolve_workspace_dir(project_id))
+
+    def create(self, project_id: str) -> None:
+        create_workspace(project_id)
+
+    def exists(self, project_id: str) -> bool:
+        return os.path.isdir(self._root(project_id))
+
+    def list(self, project_id: str) -> List[dict]:
+        return list_files(self._root(project_id))
+
+    def _path(self, project_id: str, rel_path: str) -> Path:
+        return safe_resolve_path(self._root(project_id), rel_path)
+
+    def read(self, project_id: str, rel_path: str) -> bytes:
+        root_real = Path(self._root(project_id)).resolve()
+        return _open_in_root(root_real, rel_path).read_bytes()
+
+    def write(self, project_id: str, rel_path: str, data: bytes) -> None:
+        self.write_stream(project_id, rel_path, [data])
+
+    def write_stream(self, project_id: str, rel_path: str, chunks: Iterable[bytes]) -> None:
+        dest = self._path(project_id, rel_path)
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        # temp file + rename: never writes through a hardlink shared with a fork/blob/template
+        fd, tmp_name = tempfile.mkstemp(dir=dest.parent, prefix=".write-")
+        try:
+            with os.fdopen(fd, "wb") as fh:
+                for chunk in chunks:
+                    fh.write(chunk)
+            os.chmod(tmp_name, 0o644)
+            os.replace(tmp_name, dest)
+        except BaseException:
+            if os.path.exists(tmp_name):
+                os.unlink(tmp_name)
+            raise
+        invalidate_cached_files(self._root(project_id), [rel_path])
+
+    def stat(self, project_id: str, rel_path: str) -> FileStat:
+        st = os.stat(self._path(project_id, rel_path))
+        return FileStat(st.st_size, st.st_mtime_ns, f"{st.st_ino}-{st.st_size}-{st.st_mtime_ns}")
+
+    def delete(self, project_id: str, rel_path: str) -> None:
+        self._path(project_id, rel_path).unlink()
+        invalidate_cached_files(self._root(project_id), [rel_path])
+
+    def snapshot(self, project_id: str, job_id: str) -> dict:
+        return take_snapshot(project_id, job_id, self._root(project_id))
+
+    def archive(self, project_id: str) -> bool:
+        return archive_workspace(project_id, self._root(project_id))
+
+    def restore(self, project_id: str) -> bool:
+        with project_lock(project_id):
+            return restore_workspace(project_id, self._root(project_id))
+
+    def has_blob(self, sha: str) -> bool:
+        return get_blob_store().has(sha)
+
+    def read_blob(self, sha: str) -> bytes:
+        try:
+            return get_blob_store().read_bytes(sha)
+        except FileNotFoundError:
+            raise FileNotFoundError(sha)
+
+    def write_blob(self, sha: str, chunks: Iterable[bytes]) -> None:
+        get_blob_store().put_chunks(sha, chunks)
+
+
+class MemoryStorage(WorkspaceStorage):
+    """Process-local dictionaries; for tests and benchmarks that should not touch disk."""
+
+    name = "memory"
+
+    def __init__(self):
+        self._workspaces: Dict[str, Dict[str, tuple]] = {}
+        self._manifests: Dict[tuple, dict] = {}
+        self._blobs: Dict[str, bytes] = {}
+        self._archives: Dict[str, bytes] = {}
+        self._lock = threading.Lock()
+
+    def _files(self, project_id: str) -> Dict[str, tuple]:
+        try:
+            return self._workspaces[project_id]
+        except KeyError:
+            raise FileNotFoundError(project_id)
+
+    def create(self, project_id: str) -> None:
+        with self._lock:
+            self._workspaces.setdefault(project_id, {})
+
+    def exists(self, project_id: str) -> bool:
+        return project_id in self._workspaces
+
+    def list(self, project_id: str) -> List[dict]:
+        files = self._files(project_id)
+        return [{"path": rel, "size": len(data)} for rel, (data, _) in sorted(files.items())]
+
+    def read(self, project_id: str, rel_path: str) -> bytes:
+        key = normalize_key(rel_path)
+        try:
+            return self._files(project_id)[key][0]
+        except KeyError:
+            raise FileNotFoundError(rel_path)
+
+    def write(self, project_id: str, rel_path: str, data: bytes) -> None:
+        key = normalize_key(rel_path)
+        with self._lock:
+            self._workspaces.setdefault(project_id, {})[key] = (bytes(data), time.time_ns())
+
+    def stat(self, project_id: str, rel_path: str) -> FileStat:
+        key = normalize_key(rel_path)
+        try:
+            data, mtime_ns = self._files(project_id)[key]
+        except KeyError:
+            raise FileNotFoundError(rel_path)
+        return FileStat(len(data), mtime_ns, f"{len(data)}-{mtime_ns}")
+
+    def delete(self, project_id: str, rel_path: str) -> None:
+        key = normalize_key(rel_path)
+        with self._lock:
+            try:
+                del self._files(project_id)[key]
+            except KeyError:
+                raise FileNotFoundError(rel_path)
+
+    def snapshot(self, project_id: str, job_id: str) -> dict:
+        files = {}
+        for rel, (data, _) in sorted(self._files(project_id).items()):
+            sha = hashlib.sha256(data).hexdigest()
+            self._blobs.setdefault(sha, data)
+            files[rel] = {"sha256": sha, "size": len(data)}
+        manifest = {"project_id": project_id, "job_id": job_id, "files": files}
+        self._manifests[(project_id, job_id)] = manifest
+        return manifest
+
+    def archive(self, project_id: str) -> bool:
+        with self._lock:
+            files = self._workspaces.pop(project_id, None)
+            if files is None:
+                return False
+            self._archives[project_id] = pack_archive((rel, data) for rel, (data, _) in sorted(files.items()))
+        return True
+
+    def restore(self, project_id: str) -> bool:
+        with self._lock:
+            bundle = self._archives.pop(project_id, None)
+            if bundle is None:
+                return False
+            now = time.time_ns()
+            self._workspaces[project_id] = {rel: (data, now) for rel, data in unpack_archive(bundle)}
+        return True
+
+    def has_blob(self, sha: str) -> bool:
+        return sha in self._blobs
+
+    def read_blob(self, sha: str) -> bytes:
+        try:
+            return self._blobs[sha]
+        except KeyError:
+            raise FileNotFoundError(sha)
+
+    def write_blob(self, sha: str, chunks: Iterable[bytes]) -> None:
+        data = b"".join(chunks)
+        with self._lock:
+            self._blobs.setdefault(sha, data)
+
+
+_storage: Optional[WorkspaceStorage] = None
+
+
+def build_storage(kind: str) -> WorkspaceStorage:
+    if kind == "local":
+        return LocalStorage()
+    if kind == "memory":
+        return MemoryStorage()
+    if kind == "s3":
+        from app.services.s3_storage import S3Storage
+
+        return S3Storage.from_settings()
+    raise ValueError(f"Unknown WORKSPACE_STORAGE backend: {kind}")
+
+
+def get_storage() -> WorkspaceStorage:
+    """The configured backend (WORKSPACE_STORAGE), created on first use."""
+    global _storage
+    if _storage is None:
+        _storage = build_storage(settings.WORKSPACE_STORAGE)
+    return _storage
+
+
+def _published_path(project_id: str) -> Path:
+    return Path(settings.STORE_ROOT) / "published" / f"{project_id}.json"
+
+
+def _load_published(project_id: str) -> Dict[str, list]:
+    try:
+        return json.loads(_published_path(project_id).read_text(encoding="utf-8"))
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def _save_published(project_id: str, index: Dict[str, list]) -> None:
+    path = _published_path(project_id)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as fh:
+            json.dump(index, fh)
+        os.replace(tmp_name, path)
+    except BaseException:
+        if os.path.exists(tmp_name):
+            os.unlink(tmp_name)
+        raise
+
+
+def _stat_sig(st: os.stat_result) -> list:
+    return [st.st_size, st.st_mtime_ns, st.st_ino]
+
+
+def _file_chunks(path: Path) -> Iterator[bytes]:
+    with open(path, "rb") as fh:
+        while True:
+            chunk = fh.read(_CHUNK_SIZE)
+            if not chunk:
+                return
+            yield chunk
+
+
+def publish_workspace(project_id: str, workspace_path: str) -> int:
+    """
+    Upload a workspace's committed state to a remote backend (no-op for local).
+    Files whose (size, mtime, inode) match the last publish from this node are
+    skipped and files removed since then are deleted, so a job costs uploads
+    of what it changed. Returns the number of files uploaded.
+    """
+    storage = get_storage()
+    if not storage.remote:
+        return 0
+    published = _load_published(project_id)
+    if not published:
+        storage.create(project_id)
+    current: Dict[str, list] = {}
+    uploaded = 0
+    for rel, fpath, st in iter_workspace_files(Path(workspace_path).resolve()):
+        current[rel] = _stat_sig(st)
+        if published.get(rel) != current[rel]:
+            storage.write_stream(project_id, rel, _file_chunks(fpath))
+            uploaded += 1
+    for rel in published.keys() - current.keys():
+        try:
+            storage.delete(project_id, rel)
+        except FileNotFoundError:
+            pass
+    _save_published(project_id, current)
+    logger.info("Published workspace %s to %s storage (%d files uploaded)", project_id, storage.name, uploaded)
+    return uploaded
+
+
+def pull_workspace(project_id: str, workspace_path: str) -> bool:
+    """
+    Materialize a workspace from a remote backend at workspace_path, which
+    must not exist (e.g. on a node that never ran the project). Files are
+    downloaded into a temp dir next to it and renamed into place at once.
+    Returns False for local storage or a workspace the backend does not have.
+    """
+    storage = get_storage()
+    if not storage.remote or not storage.exists(project_id):
+        return False
+    dest = Path(workspace_path)
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    tmp_dir = Path(tempfile.mkdtemp(dir=dest.parent, prefix=".pull-"))
+    try:
+        for entry in storage.list(project_id):
+            target = tmp_dir / normalize_key(entry["path"])
+            target.parent.mkdir(parents=True, exist_ok=True)
+            target.write_bytes(storage.read(project_id, entry["path"]))
+        os.chmod(tmp_dir, 0o755)
+        os.rename(tmp_dir, dest)
+    except BaseException:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+    # The pulled files are what the backend holds: the next publish sends only changes
+    _save_published(project_id, {rel: _stat_sig(st) for rel, _, st in iter_workspace_files(dest.resolve())})
+    logger.info("Pulled workspace %s from %s storage", project_id, storage.name)
+    return True
@@ -0,0 +1,123 @@
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from app.core.config import settings
+from app.core.logging import logger
+from app.services.cow import TreeCloner
+from app.services.workspaces import iter_workspace_files
+
+# Scaffolds shipped with the backend (app/templates/<name>)
+_BUILTIN_DIR = Path(__file__).resolve().parent.parent / "templates"
+# worker/dummy_snake_template: mounted into the backend by docker-compose, or the repo checkout
+_SNAKE_CANDIDATES = [
+    Path("/app/worker/dummy_snake_template"),
+    Path(__file__).resolve().parents[3] / "worker" / "dummy_snake_template",
+]
+
+
+class UnknownTemplate(LookupError):
+    """Raised when a template name is not registered (or its source is missing)."""
+    pass
+
+
+def _first_existing(paths: List[Path]) -> Optional[Path]:
+    return next((p for p in paths if p.is_dir()), None)
+
+
+def _source_files(root: Path):
+    # Bytecode caches (e.g. from compileall over the backend tree) are not part of a template
+    for rel, fpath, st in iter_workspace_files(root.resolve()):
+        if "__pycache__" not in Path(rel).parts:
+            yield rel, fpath, st
+
+
+def _tree_digest(root: Path) -> str:
+    digest = hashlib.sha256()
+    for rel, fpath, _ in sorted(_source_files(root)):
+        digest.update(rel.encode("utf-8") + b"\0")
+        digest.update(fpath.read_bytes())
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class TemplateRegistry:
+    """
+    Named project scaffolds, pre-built once into immutable directories.
+    - A template is built into STORE_ROOT/templates/<name>-<digest>; the digest
+      covers the source tree, so an edited source gets a fresh build.
+    - Built files are read-only and never modified. New workspaces are
+      materialized with reflinks where the filesystem supports them, else
+      with writable copies (see app.services.cow), so a workspace never
+      shares an inode with the build.
+    """
+
+    def __init__(self, sources: Dict[str, Optional[Path]]):
+        self._sources = sources
+        self._built: Dict[tuple, Path] = {}
+        self._lock = threading.Lock()
+
+    def names(self) -> List[str]:
+        return sorted(name for name, src in self._sources.items() if src is not None and src.is_dir())
+
+    def source(self, name: str) -> Path:
+        src = self._sources.get(name)
+        if src is None or not src.is_dir():
+            raise UnknownTemplate(name)
+        return src
+
+    def files(self, name: str) -> List[str]:
+        return sorted(rel for rel, _, _ in iter_workspace_files(self.prebuilt(name).resolve()))
+
+    def prebuilt(self, name: str) -> Path:
+        """Immutable build of a template; built on first use in this process (or reused from disk)."""
+        root = Path(settings.STORE_ROOT) / "templates"
+        key = (name, str(root))
+        built = self._built.get(key)
+        if built is not None and built.is_dir():
+            return built
+        with self._lock:
+            built = self._built.get(key)
+            if built is not None and built.is_dir():
+                return built
+            src = self.source(name)
+            built = root / f"{name}-{_tree_digest(src)[:16]}"
+            if not built.is_dir():
+                self._build(src, built)
+            self._built[key] = built
+            return built
+
+    def _build(self, src: Path, dest: Path) -> None:
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        tmp_dir = Path(tempfile.mkdtemp(dir=dest.parent, prefix=".build-"))
+        try:
+            for rel, fpath, _ in _source_files(src):
+                target = tmp_dir / rel
+                target.parent.mkdir(parents=True, exist_ok=True)
+                shutil.copy2(fpath, target)
+                os.chmod(target, 0o444)
+            try:
+                os.rename(tmp_dir, dest)
+            except OSError:
+                # Another process finished the same build first
+                if not dest.is_dir():
+                    raise
+                shutil.rmtree(tmp_dir, ignore_errors=True)
+        except BaseException:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+        logger.info("Built template %s", dest.name)
+
+    def materialize(self, name: str, workspace: Path, mode: Optional[str] = None) -> Dict[str, int]:
+        """Clone a template into a workspace; returns files per clone method."""
+        return TreeCloner(mode or settings.WORKSPACE_CLONE_MODE).clone_tree(self.prebuilt(name), Path(workspace))
+
+
+templates = TemplateRegistry({
+    "python-cli": _BUILTIN_DIR / "python-cli",
+    "snake": _first_existing(_SNAKE_CANDIDATES),
+})
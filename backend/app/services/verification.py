@@ -0,0 +1,315 @@
+import hashlib
+import json
+import os
+import re
+import shlex
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional
+
+from app.core.config import settings
+from app.core.logging import logger
+from app.db import models
+from app.db.session import SessionLocal
+from app.services.blobs import get_blob_store
+from app.services.singleflight import flights
+from app.services.snapshots import SnapshotNotFound, load_manifest
+from app.services.workspaces import VERIFY_DIRNAME, safe_resolve_path
+
+# pytest exit codes; anything else (usage error, crash) is "error"
+_EXIT_STATUS = {0: "passed", 1: "failed", 5: "no_tests"}
+# `python -m <runner>` without the runner installed also exits 1; that is an error, not failing tests
+_RUNNER_MISSING = re.compile(rb"^\S*python[\d.]*: No module named ", re.MULTILINE)
+# Outcomes that only depend on the tree and the command, so they are cached
+_CACHEABLE = {"passed", "failed", "no_tests"}
+# Job artifacts differ on every run but are not part of what the tests see
+_EXCLUDED_PREFIX = ".codex/"
+
+
+class VerificationUnavailable(Exception):
+    """The job cannot be verified: it has no snapshot, or no image to run its tests in."""
+
+
+def in_container() -> bool:
+    """Tests run where jobs run: in a container, unless the dummy worker (trusted templates) is used."""
+    return not settings.USE_DUMMY_WORKER
+
+
+def verify_image() -> str:
+    """VERIFY_IMAGE; required in a container, the worker image is stdlib-only and has no test runner."""
+    if not settings.VERIFY_IMAGE:
+        raise VerificationUnavailable("VERIFY_IMAGE is not set: there is no image to run the tests in")
+    return settings.VERIFY_IMAGE
+
+
+def verify_command(container: bool = False) -> list:
+    python = "python" if container else shlex.quote(sys.executable)
+    return shlex.split(settings.VERIFY_COMMAND.replace("{python}", python))
+
+
+def _manifest_files(project_id: str, job_id: str) -> Dict[str, dict]:
+    try:
+        return load_manifest(project_id, job_id)["files"]
+    except SnapshotNotFound:
+        raise VerificationUnavailable(f"Job {job_id} has no snapshot to verify")
+
+
+def check_verifiable(project_id: str, job_id: str) -> None:
+    """Raise VerificationUnavailable unless the job has a snapshot and its tests have somewhere to run."""
+    _manifest_files(project_id, job_id)
+    if in_container():
+        verify_image()
+
+
+def job_tree(project_id: str, job_id: str) -> Dict[str, dict]:
+    """
+    {path: {sha256, source}} of the tree a job produced, .codex excluded,
+    taken from the job's snapshot (blobs never change, so later jobs cannot
+    race the verification). The current workspace is never used in its place:
+    it may hold another job's tree.
+    """
+    store = get_blob_store()
+    return {
+        rel: {"sha256": entry["sha256"], "source": str(store.local_path(entry["sha256"]))}
+        for rel, entry in _manifest_files(project_id, job_id).items()
+        if not rel.startswith(_EXCLUDED_PREFIX)
+    }
+
+
+def tree_sha256(tree: Dict[str, dict]) -> str:
+    """Content hash of a tree: file paths and their content hashes, order-independent."""
+    digest = hashlib.sha256()
+    for rel in sorted(tree):
+        digest.update(f"{tree[rel]['sha256']}  {rel}\n".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _cache_key(tree_sha: str) -> str:
+    runner = verify_image() if in_container() else "local"
+    return hashlib.sha256(f"{tree_sha}\0{settings.VERIFY_COMMAND}\0{runner}".encode("utf-8")).hexdigest()
+
+
+def _cache_path(key: str) -> Path:
+    return Path(settings.STORE_ROOT) / "verify" / key[:2] / f"{key}.json"
+
+
+def load_cached(key: str) -> Optional[dict]:
+    try:
+        return json.loads(_cache_path(key).read_text(encoding="utf-8"))
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def _store_cached(key: str, outcome: dict) -> None:
+    path = _cache_path(key)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as fh:
+            json.dump(outcome, fh)
+        os.replace(tmp_name, path)
+    except BaseException:
+        if os.path.exists(tmp_name):
+            os.unlink(tmp_name)
+        raise
+
+
+def _tail(output: bytes) -> str:
+    limit = settings.VERIFY_OUTPUT_MAX_BYTES
+    text = output[-limit:].decode("utf-8", errors="replace") if limit > 0 else ""
+    return ("[...]\n" + text) if len(output) > limit else text
+
+
+def _run_command(cmd: list, cwd: Optional[Path] = None, env: Optional[dict] = None, on_timeout=None) -> dict:
+    """Run cmd in its own process group with VERIFY_TIMEOUT_SECONDS; on timeout the group is killed."""
+    started = time.monotonic()
+    try:
+        proc = subprocess.Popen(
+            cmd, cwd=cwd, env=env, stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE, stderr=subprocess.STDOUT, start_new_session=True,
+        )
+    except OSError as exc:
+        return {"status": "error", "exit_code": None, "output": str(exc), "duration_seconds": 0.0}
+    try:
+        output, _ = proc.communicate(timeout=settings.VERIFY_TIMEOUT_SECONDS)
+        status = _EXIT_STATUS.get(proc.returncode, "error")
+        if status == "failed" and _RUNNER_MISSING.search(output or b""):
+            status = "error"
+    except subprocess.TimeoutExpired:
+        if on_timeout is not None:
+            on_timeout()
+        try:
+            os.killpg(proc.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+        output, _ = proc.communicate()
+        status = "timeout"
+    return {
+        "status": status,
+        "exit_code": proc.returncode if status != "timeout" else None,
+        "output": _tail(output or b""),
+        "duration_seconds": round(time.monotonic() - started, 3),
+    }
+
+
+def run_tests(root: Path) -> dict:
+    """
+    Run the verification command in root as a local subprocess, with a
+    scrubbed environment (no backend secrets). Only for the dummy worker,
+    whose trees come from trusted templates; see run_tests_in_container().
+    """
+    env = {
+        "PATH": os.environ.get("PATH", "/usr/bin:/bin"),
+        "HOME": str(root),
+        "LANG": "C.UTF-8",
+        "PYTHONDONTWRITEBYTECODE": "1",
+        "PYTHONHASHSEED": "0",
+    }
+    return _run_command(verify_command(), cwd=root, env=env)
+
+
+def run_tests_in_container(root: Path) -> dict:
+    """
+    Run the verification command on root (a copy under WORKSPACE_ROOT) in
+    VERIFY_IMAGE, mounted like a job's workspace, with no network and only
+    the variables passed here. On timeout the container is killed too.
+    """
+    # Imported here: codex_runner imports the verifier
+    from app.services.codex_runner import worker_mount_args
+
+    volume_args, container_ws = worker_mount_args(root)
+    name = f"codex-verify-{uuid.uuid4().hex[:12]}"
+    cmd = [
+        "docker",
+        "run",
+        "--rm",
+        "--name", name,
+        "--network", "none",
+        *volume_args,
+        "-w", container_ws,
+        "-e", f"HOME={container_ws}",
+        "-e", "PYTHONDONTWRITEBYTECODE=1",
+        "-e", "PYTHONHASHSEED=0",
+        verify_image(),
+        *verify_command(container=True),
+    ]
+    return _run_command(cmd, on_timeout=lambda: subprocess.run(["docker", "kill", name], capture_output=True))
+
+
+def _verify_tree(tree: Dict[str, dict], key: str) -> dict:
+    """
+    Materialize the tree in a private temp dir (copies: tests may write), run the tests, cache the outcome.
+    For a container run the copy lives under WORKSPACE_ROOT, where worker containers can mount it.
+    """
+    cached = load_cached(key)
+    if cached is not None:
+        return dict(cached, cached=True)
+    container = in_container()
+    if container:
+        parent = Path(settings.WORKSPACE_ROOT) / VERIFY_DIRNAME
+        parent.mkdir(parents=True, exist_ok=True)
+        root = Path(tempfile.mkdtemp(dir=parent))
+    else:
+        root = Path(tempfile.mkdtemp(prefix="codex-verify-"))
+    try:
+        for rel, entry in tree.items():
+            target = safe_resolve_path(str(root), rel)
+            target.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copyfile(entry["source"], target)
+        outcome = run_tests_in_container(root) if container else run_tests(root)
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+    if outcome["status"] in _CACHEABLE:
+        _store_cached(key, outcome)
+    return dict(outcome, cached=False)
+
+
+def verify_job(project_id: str, job_id: str) -> dict:
+    """
+    Verification outcome for a job's tree: from the cache when this exact
+    tree (and command) was verified before, otherwise by running the tests.
+    Concurrent verifications of the same tree share one run.
+    Raises VerificationUnavailable for a job that cannot be verified.
+    """
+    check_verifiable(project_id, job_id)
+    tree = job_tree(project_id, job_id)
+    tree_sha = tree_sha256(tree)
+    key = _cache_key(tree_sha)
+    outcome = flights.do(("verify", key), lambda: _verify_tree(tree, key),
+                         timeout=settings.VERIFY_TIMEOUT_SECONDS + 60)
+    return dict(outcome, tree_sha256=tree_sha)
+
+
+def apply_outcome(job: models.Job, outcome: dict) -> None:
+    job.verification_status = outcome["status"]
+    job.verification_tree_sha256 = outcome.get("tree_sha256")
+    job.verification_exit_code = outcome.get("exit_code")
+    job.verification_seconds = outcome.get("duration_seconds")
+    job.verification_cached = outcome.get("cached", False)
+    job.verification_output = outcome.get("output")
+    job.verified_at = datetime.utcnow()
+
+
+class Verifier:
+    """
+    Bounded pool for post-job verification.
+    - At most VERIFY_MAX_WORKERS test runs at once, across all projects;
+      further jobs queue. The pool is created on first use.
+    - Each task verifies one job in its own DB session and stores the outcome
+      on the job row; failures are recorded as status "error", never raised.
+    """
+
+    def __init__(self):
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(
+                    max_workers=max(1, settings.VERIFY_MAX_WORKERS), thread_name_prefix="verify"
+                )
+            return self._pool
+
+    def submit(self, project_id: str, job_id: str) -> Future:
+        return self._executor().submit(self._run, project_id, job_id)
+
+    def _run(self, project_id: str, job_id: str) -> Optional[str]:
+        db = SessionLocal()
+        try:
+            job = db.query(models.Job).filter(models.Job.id == job_id).first()
+            if job is None:
+                return None
+            try:
+                outcome = verify_job(project_id, job_id)
+            except VerificationUnavailable as exc:
+                logger.warning("Cannot verify job %s: %s", job_id, exc)
+                outcome = {"status": "error", "output": str(exc)}
+            except Exception as exc:
+                logger.error("Verification failed for job %s", job_id, exc_info=True)
+                outcome = {"status": "error", "output": str(exc)}
+            apply_outcome(job, outcome)
+            db.commit()
+            logger.info("Verified job %s: %s%s", job_id, job.verification_status,
+                        " (cached)" if job.verification_cached else "")
+            return job.verification_status
+        finally:
+            db.close()
+
+    def shutdown(self, wait: bool = True) -> None:
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=wait, cancel_futures=not wait)
+
+
+verifier = Verifier()
@@ -1,9 +1,21 @@
 from pathlib import Path
-from typing import List
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+import fnmatch
 import os
 import re
+import threading
 
 from app.core.config import settings
+from app.services.compression import compressor
+from app.services.file_cache import file_cache, text_cost
+from app.services.line_index import line_index_cache
+from app.services.singleflight import flights
+
+
+# Dry-run job trees (app.services.previews) live under WORKSPACE_ROOT, on the workspaces' filesystem
+PREVIEWS_DIRNAME = ".previews"
+# Copies of job trees under test, mounted into verification containers
+VERIFY_DIRNAME = ".verify"
 
 
 class InvalidWorkspacePath(ValueError):
@@ -17,9 +29,70 @@ def ensure_workspace_root() -> Path:
     return root
 
 
-def create_workspace(project_id: str) -> Path:
+def shard_parts(project_id: str) -> Tuple[str, str]:
+    """Two levels of fan-out taken from the (hex) project id: "abcd..." -> ("ab", "cd")."""
+    key = project_id.replace("-", "").lower()
+    return key[0:2], key[2:4]
+
+
+def workspace_dir(project_id: str) -> Path:
+    """Sharded workspace location: WORKSPACE_ROOT/ab/cd/<project_id>."""
+    first, second = shard_parts(project_id)
+    return Path(settings.WORKSPACE_ROOT) / first / second / project_id
+
+
+def legacy_workspace_dir(project_id: str) -> Path:
+    """Pre-sharding location: WORKSPACE_ROOT/<project_id>."""
+    return Path(settings.WORKSPACE_ROOT) / project_id
+
+
+def resolve_workspace_dir(project_id: str, stored_path: Optional[str] = None) -> Path:
+    """
+    Workspace location derived from the project id: the sharded layout first,
+    then the legacy flat layout for workspaces not migrated yet. The stored
+    workspace_path is only consulted for workspaces living outside both
+    layouts. A workspace that exists nowhere resolves to its sharded location
+    (e.g. to be restored from an archive).
+    """
+    sharded = workspace_dir(project_id)
+    if sharded.is_dir():
+        return sharded
+    legacy = legacy_workspace_dir(project_id)
+    if legacy.is_dir():
+        return legacy
+    if stored_path and os.path.isdir(stored_path):
+        return Path(stored_path)
+    return sharded
+
+
+def _is_shard_dir(entry: os.DirEntry) -> bool:
+    return len(entry.name) == 2 and not entry.name.startswith(".") and entry.is_dir(follow_symlinks=False)
+
+
+def iter_workspace_dirs() -> Iterator[Tuple[str, Path]]:
+    """
+    Yield (name, path) for every directory that occupies a workspace slot:
+    WORKSPACE_ROOT/<name> (legacy) and WORKSPACE_ROOT/ab/cd/<name> (sharded).
+    name is the project id for real workspaces.
+    """
     root = ensure_workspace_root()
-    ws = root / project_id
+    for entry in os.scandir(root):
+        if not entry.is_dir(follow_symlinks=False) or entry.name in (PREVIEWS_DIRNAME, VERIFY_DIRNAME):
+            continue
+        if not _is_shard_dir(entry):
+            yield entry.name, Path(entry.path)
+            continue
+        for second in os.scandir(entry.path):
+            if not _is_shard_dir(second):
+                continue
+            for ws in os.scandir(second.path):
+                if ws.is_dir(follow_symlinks=False):
+                    yield ws.name, Path(ws.path)
+
+
+def create_workspace(project_id: str) -> Path:
+    ensure_workspace_root()
+    ws = workspace_dir(project_id)
     ws.mkdir(parents=True, exist_ok=True)
 
     codex_dir = ws / ".codex"
@@ -44,7 +117,11 @@ def safe_resolve_path(workspace_path: str, rel_path: str) -> Path:
     - For non-existent targets, resolution happens with strict=False, but the
       computed path must still remain under the workspace root.
     """
-    root = Path(workspace_path).resolve()
+    return _resolve_in_root(Path(workspace_path).resolve(), rel_path)
+
+
+def _resolve_in_root(root: Path, rel_path: str) -> Path:
+    """Containment checks for safe_resolve_path() against an already-resolved root."""
     if _is_windows_drive_path(rel_path):
         raise InvalidWorkspacePath("Absolute or drive path not allowed")
 
@@ -65,15 +142,77 @@ def safe_resolve_path(workspace_path: str, rel_path: str) -> Path:
     return candidate
 
 
+class ListingCache:
+    """
+    Cached listings for workspaces watched by the change feed.
+    - Only tracked workspaces are cached: without a watcher nothing reports
+      writes made by jobs, so their listings are always walked.
+    - Every invalidation bumps a generation; a walk that raced with a change
+      is not stored.
+    """
+
+    def __init__(self):
+        self._entries: Dict[str, Optional[List[dict]]] = {}
+        self._generations: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def track(self, root_real: str) -> None:
+        with self._lock:
+            self._entries.setdefault(root_real, None)
+            self._generations.setdefault(root_real, 0)
+
+    def untrack(self, root_real: str) -> None:
+        with self._lock:
+            self._entries.pop(root_real, None)
+            self._generations.pop(root_real, None)
+
+    def lookup(self, root_real: str) -> Tuple[Optional[List[dict]], Optional[int]]:
+        """(cached listing or None, generation to store under; None when untracked)."""
+        with self._lock:
+            if root_real not in self._entries:
+                return None, None
+            return self._entries[root_real], self._generations[root_real]
+
+    def store(self, root_real: str, generation: Optional[int], files: List[dict]) -> None:
+        with self._lock:
+            if generation is not None and self._generations.get(root_real) == generation:
+                self._entries[root_real] = files
+
+    def invalidate(self, root_real: str) -> None:
+        with self._lock:
+            if root_real in self._entries:
+                self._entries[root_real] = None
+                self._generations[root_real] += 1
+
+
+listing_cache = ListingCache()
+
+
 def list_files(workspace_path: str) -> List[dict]:
     """
     List files under the workspace, without following symlinked directories that
     escape the workspace. Files whose real path escapes are skipped.
+    Concurrent listings of the same workspace share one walk; watched
+    workspaces are served from the listing cache until a change arrives.
     """
-    files: List[dict] = []
-    root = Path(workspace_path)
-    root_real = root.resolve()
+    root_real = Path(workspace_path).resolve()
+    cached, generation = listing_cache.lookup(str(root_real))
+    if cached is not None:
+        return list(cached)
+    files = flights.do(("list_files", str(root_real)), lambda: _walk_files(root_real))
+    listing_cache.store(str(root_real), generation, files)
+    return list(files)
+
+
+def _walk_files(root_real: Path) -> List[dict]:
+    return [{"path": rel, "size": st.st_size} for rel, _, st in iter_workspace_files(root_real)]
 
+
+def iter_workspace_files(root_real: Path) -> Iterator[Tuple[str, Path, os.stat_result]]:
+    """
+    Yield (relative path, path, stat) for every file list_files() would show,
+    applying the same symlink-containment rules. root_real must be resolved.
+    """
     # Walk without following directory symlinks
     for dirpath, dirnames, filenames in os.walk(root_real, followlinks=False):
         # Prune any directory entries that would resolve outside the workspace
@@ -110,30 +249,26 @@ def list_files(workspace_path: str) -> List[dict]:
                 continue
 
             try:
-                size = fpath.stat().st_size
+                st = fpath.stat()
             except FileNotFoundError:
                 # Handle race conditions
                 continue
 
-            files.append({"path": str(rel), "size": size})
+            yield str(rel), fpath, st
 
-    return files
 
-
-def read_file(workspace_path: str, rel_path: str) -> str:
+def _open_in_root(root_real: Path, rel_path: str) -> Path:
     """
-    Safely read a file within the workspace.
-    - Raises InvalidWorkspacePath for unsafe paths or symlink escapes.
-    - Raises FileNotFoundError for safe-but-missing paths.
+    Resolve rel_path under root_real and verify it is a regular file that
+    stays inside the workspace. Shared by read_file() and read_files().
     """
-    target = safe_resolve_path(workspace_path, rel_path)
+    target = _resolve_in_root(root_real, rel_path)
 
     # Must exist and be a regular file
     if not target.exists() or not target.is_file():
         raise FileNotFoundError(rel_path)
 
     # Double-check final real path is still within workspace to guard symlink races
-    root_real = Path(workspace_path).resolve()
     real = target.resolve(strict=True)
     try:
         real.relative_to(root_real)
@@ -141,4 +276,218 @@ def read_file(workspace_path: str, rel_path: str) -> str:
         # Symlink points outside
         raise InvalidWorkspacePath("Symlink escapes workspace")
 
-    return target.read_text(encoding="utf-8")
+    return target
+
+
+class FileEntry(NamedTuple):
+    # (workspace real path, relative path, inode, size, mtime_ns); shared by
+    # the content cache and the compressed-variant cache
+    key: tuple
+    contents: str
+
+
+def _read_entry_cached(root_real: Path, target: Path, st: Optional[os.stat_result] = None) -> FileEntry:
+    """
+    Read a file that already passed _open_in_root() through the content cache.
+    The key includes inode, size and mtime_ns, so any rewrite is a miss even
+    before the job-completion invalidation runs.
+    """
+    st = st or target.stat()
+    key = (
+        str(root_real),
+        target.relative_to(root_real).as_posix(),
+        st.st_ino,
+        st.st_size,
+        st.st_mtime_ns,
+    )
+    cached = file_cache.get(key) if file_cache.enabled else None
+    if cached is not None:
+        return FileEntry(key, cached)
+    contents = target.read_text(encoding="utf-8")
+    file_cache.put(key, contents, text_cost(contents))
+    return FileEntry(key, contents)
+
+
+def read_file_entry(workspace_path: str, rel_path: str) -> FileEntry:
+    """
+    Like read_file(), but also returns the file's cache key.
+    Concurrent reads of the same path share one resolution and read; errors
+    (InvalidWorkspacePath, FileNotFoundError) are shared the same way.
+    """
+    root_real = Path(workspace_path).resolve()
+
+    def _read() -> FileEntry:
+        target = _open_in_root(root_real, rel_path)
+        return _read_entry_cached(root_real, target)
+
+    return flights.do(("read_file", str(root_real), rel_path), _read)
+
+
+def read_file(workspace_path: str, rel_path: str) -> str:
+    """
+    Safely read a file within the workspace.
+    - Raises InvalidWorkspacePath for unsafe paths or symlink escapes.
+    - Raises FileNotFoundError for safe-but-missing paths.
+    - Served from the content cache when the file is unchanged; the cache is
+      consulted only after the path-safety checks.
+    """
+    return read_file_entry(workspace_path, rel_path).contents
+
+
+def invalidate_cached_files(workspace_path: str, rel_paths: Iterable[str]) -> int:
+    """Drop cached contents for the given workspace-relative paths (e.g. a job's changed files)."""
+    root_real = str(Path(workspace_path).resolve())
+    rel_paths = [Path(p).as_posix() for p in rel_paths]
+    listing_cache.invalidate(root_real)
+    compressor.variants.invalidate(root_real, rel_paths)
+    return file_cache.invalidate(root_real, rel_paths)
+
+
+def invalidate_cached_workspace(workspace_path: str) -> int:
+    """Drop every cached file of a workspace (used when the change set is unknown)."""
+    root_real = str(Path(workspace_path).resolve())
+    listing_cache.invalidate(root_real)
+    compressor.variants.invalidate_workspace(root_real)
+    return file_cache.invalidate_workspace(root_real)
+
+
+def count_lines(contents: str) -> int:
+    """Line count matching LineIndex.total_lines (a trailing newline does not add a line)."""
+    if not contents:
+        return 0
+    return contents.count("\n") + (0 if contents.endswith("\n") else 1)
+
+
+def read_file_range(
+    workspace_path: str,
+    rel_path: str,
+    *,
+    start_line: Optional[int] = None,
+    end_line: Optional[int] = None,
+    offset: Optional[int] = None,
+    length: Optional[int] = None,
+) -> dict:
+    """
+    Safely read part of a file within the workspace.
+    - Line mode (start_line/end_line, 1-based, inclusive) decodes whole lines.
+    - Byte mode (offset/length) returns the raw slice.
+    - In both modes invalid UTF-8 (binary files, partial sequences at the
+      edges of a byte window) is replaced rather than rejected.
+    - Both modes use the cached line-offset index, so a random access costs one
+      seek plus the slice once the index exists. The result always carries
+      total_lines; start/end are clamped to the end of the file.
+    Same errors as read_file().
+    """
+    target = _open_in_root(Path(workspace_path).resolve(), rel_path)
+    st = target.stat()
+    index = line_index_cache.get(target, st)
+    total = index.total_lines
+
+    if offset is not None or length is not None:
+        begin = min(offset or 0, index.size)
+        end = index.size if length is None else min(begin + length, index.size)
+        with open(target, "rb") as fh:
+            fh.seek(begin)
+            data = fh.read(end - begin)
+        return {
+            "contents": data.decode("utf-8", errors="replace"),
+            "total_lines": total,
+            "offset": begin,
+            "length": len(data),
+        }
+
+    first = start_line or 1
+    last = total if end_line is None else min(end_line, total)
+    if first > last:
+        return {"contents": "", "total_lines": total, "start_line": first, "end_line": first - 1}
+
+    begin, end = index.byte_span(first, last)
+    with open(target, "rb") as fh:
+        fh.seek(begin)
+        data = fh.read(end - begin)
+    return {
+        "contents": data.decode("utf-8", errors="replace"),
+        "total_lines": total,
+        "start_line": first,
+        "end_line": last,
+    }
+
+
+def _is_glob(pattern: str) -> bool:
+    return any(ch in pattern for ch in "*?[")
+
+
+def expand_paths(workspace_path: str, patterns: Iterable[str]) -> List[str]:
+    """
+    Expand a mix of literal paths and glob patterns into workspace-relative paths.
+    - Literal paths are passed through untouched (validated later by the reader).
+    - Globs are matched against list_files(), so they can never reach outside
+      the workspace; a glob with no matches is passed through so the caller can
+      report it as missing.
+    - Order is preserved and duplicates are dropped.
+    """
+    seen = set()
+    out: List[str] = []
+    listing: Optional[List[str]] = None
+
+    for pattern in patterns:
+        if _is_glob(pattern):
+            if listing is None:
+                listing = sorted(f["path"] for f in list_files(workspace_path))
+            matches = [p for p in listing if fnmatch.fnmatchcase(p, pattern)]
+            if not matches:
+                matches = [pattern]
+        else:
+            matches = [pattern]
+
+        for m in matches:
+            if m not in seen:
+                seen.add(m)
+                out.append(m)
+    return out
+
+
+def read_files(workspace_path: str, rel_paths: Iterable[str], max_bytes: int) -> Iterator[dict]:
+    """
+    Read several files from one workspace, resolving the root only once.
+
+    Yields one dict per path with either "contents"/"size" or an "error" slug:
+    - invalid_path: unsafe path or symlink escape
+    - not_found: safe-but-missing path (or a glob with no matches)
+    - decode_error: file is not valid UTF-8
+    - byte_budget_exceeded: file would push the batch over max_bytes
+
+    Budget accounting uses the encoded size on disk, so oversized files are
+    skipped without being read. Smaller files later in the batch may still fit.
+    """
+    root_real = Path(workspace_path).resolve()
+    remaining = max_bytes
+
+    for rel_path in rel_paths:
+        try:
+            target = _open_in_root(root_real, rel_path)
+            st = target.stat()
+            size = st.st_size
+        except InvalidWorkspacePath:
+            yield {"path": rel_path, "error": "invalid_path"}
+            continue
+        except FileNotFoundError:
+            yield {"path": rel_path, "error": "not_found"}
+            continue
+
+        if size > remaining:
+            yield {"path": rel_path, "size": size, "error": "byte_budget_exceeded"}
+            continue
+
+        try:
+            contents = _read_entry_cached(root_real, target, st).contents
+        except FileNotFoundError:
+            # Removed between stat and read
+            yield {"path": rel_path, "error": "not_found"}
+            continue
+        except UnicodeDecodeError:
+            yield {"path": rel_path, "size": size, "error": "decode_error"}
+            continue
+
+        remaining -= size
+        yield {"path": rel_path, "size": size, "contents": contents}
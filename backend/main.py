@@ -1,3 +1,5 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.exceptions import RequestValidationError
@@ -10,10 +12,30 @@ from app.core.errors import (
     http_exception_handler,
     unhandled_exception_handler,
 )
+from app.services.change_feed import change_feed
+from app.services.maintenance import build_maintenance
+from app.services.scheduler import scheduler
+from app.services.verification import verifier
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Background housekeeping (blob GC, ...) runs only while the server is up
+    maintenance = build_maintenance()
+    maintenance.start()
+    # Resume scheduled jobs whose dependencies completed while the server was down
+    scheduler.start()
+    try:
+        yield
+    finally:
+        maintenance.stop()
+        change_feed.close()
+        verifier.shutdown(wait=False)
+        scheduler.shutdown(wait=False)
 
 
 def create_app() -> FastAPI:
-    app = FastAPI(title=settings.APP_NAME)
+    app = FastAPI(title=settings.APP_NAME, lifespan=lifespan)
 
     app.add_middleware(
         CORSMiddleware,
@@ -0,0 +1,180 @@
+import asyncio
+import os
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+# Ensure we can import "app.*" both locally and inside the backend container (mirror pattern from other tests)
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+CANDIDATE_PATHS = [
+    os.path.join(REPO_ROOT, "backend"),  # host repo layout
+    REPO_ROOT,  # container layout where /app/app exists
+]
+for p in CANDIDATE_PATHS:
+    if os.path.isdir(p) and p not in sys.path:
+        sys.path.insert(0, p)
+
+from backend.main import create_app  # noqa: E402
+from app.api.routes import files as files_routes  # noqa: E402
+from app.api.routes import metrics as metrics_routes  # noqa: E402
+from app.db.models import Base  # noqa: E402
+from app.db.session import engine as app_engine  # noqa: E402
+from app.services.change_feed import ChangeFeed, WatchLimitExceeded  # noqa: E402
+from app.services.workspaces import list_files, listing_cache  # noqa: E402
+
+pytestmark = pytest.mark.skipif(not sys.platform.startswith("linux"), reason="inotify is Linux-only")
+
+
+@pytest.fixture
+def feed():
+    feed = ChangeFeed(max_workspaces=8, max_watches=64, coalesce_ms=20)
+    yield feed
+    feed.close()
+
+
+def _drain(feed: ChangeFeed, root: Path, cursor: str, expected: int) -> tuple:
+    changes = []
+    for _ in range(20):
+        result = feed.changes(str(root), cursor, wait=1.0)
+        assert not result["reset"]
+        changes += result["changes"]
+        cursor = result["cursor"]
+        if len(changes) >= expected:
+            break
+    return {c["path"]: c["type"] for c in changes}, cursor
+
+
+def test_changes_are_coalesced_per_path(tmp_path: Path, feed: ChangeFeed):
+    ws = tmp_path / "ws"
+    ws.mkdir()
+    (ws / "old.txt").write_text("old", encoding="utf-8")
+    cursor = feed.watch(str(ws))
+
+    (ws / "app.py").write_text("print(1)\n", encoding="utf-8")
+    with open(ws / "app.py", "a", encoding="utf-8") as fh:
+        fh.write("print(2)\n")
+    (ws / "tmp.txt").write_text("scratch", encoding="utf-8")
+    (ws / "tmp.txt").unlink()
+    (ws / "old.txt").unlink()
+    (ws / "pkg" / "sub").mkdir(parents=True)
+    (ws / "pkg" / "sub" / "mod.py").write_text("x = 1\n", encoding="utf-8")
+
+    changes, cursor = _drain(feed, ws, cursor, expected=3)
+    # create+append is one "created"; create+delete never shows up
+    assert changes == {"app.py": "created", "old.txt": "deleted", "pkg/sub/mod.py": "created"}
+
+    (ws / "pkg" / "sub" / "mod.py").write_text("x = 2\n", encoding="utf-8")
+    changes, _ = _drain(feed, ws, cursor, expected=1)
+    assert changes == {"pkg/sub/mod.py": "modified"}
+
+
+def test_watched_listing_is_cached_until_a_change(tmp_path: Path, feed: ChangeFeed):
+    ws = tmp_path / "ws"
+    ws.mkdir()
+    (ws / "a.txt").write_text("a", encoding="utf-8")
+    cursor = feed.watch(str(ws))
+
+    assert [f["path"] for f in list_files(str(ws))] == ["a.txt"]
+    assert listing_cache.lookup(str(ws.resolve()))[0] is not None
+
+    (ws / "b.txt").write_text("b", encoding="utf-8")
+    _drain(feed, ws, cursor, expected=1)
+    assert sorted(f["path"] for f in list_files(str(ws))) == ["a.txt", "b.txt"]
+
+    feed.unwatch(str(ws))
+    assert listing_cache.lookup(str(ws.resolve())) == (None, None)
+
+
+def test_lru_eviction_resets_old_cursors(tmp_path: Path):
+    feed = ChangeFeed(max_workspaces=2, max_watches=64, coalesce_ms=20)
+    try:
+        roots = []
+        for name in ("a", "b", "c"):
+            (tmp_path / name).mkdir()
+            roots.append(tmp_path / name)
+        cursor_a = feed.watch(str(roots[0]))
+        feed.watch(str(roots[1]))
+        feed.watch(str(roots[2]))
+        assert feed.stats()["workspaces"] == 2
+        assert feed.stats()["evictions"] == 1
+
+        # "a" was evicted: re-watching starts a new epoch, so its old cursor is stale
+        result = feed.changes(str(roots[0]), cursor_a)
+        assert result["reset"] is True
+        assert result["cursor"] != cursor_a
+    finally:
+        feed.close()
+
+
+def test_watch_limit(tmp_path: Path):
+    feed = ChangeFeed(max_workspaces=8, max_watches=3)
+    try:
+        ws = tmp_path / "deep"
+        (ws / "a" / "b" / "c").mkdir(parents=True)
+        with pytest.raises(WatchLimitExceeded):
+            feed.watch(str(ws))
+        assert feed.stats()["watches"] == 0
+    finally:
+        feed.close()
+
+
+def test_async_waiters_hold_no_threads(tmp_path: Path, feed: ChangeFeed):
+    root = tmp_path / "ws"
+    root.mkdir()
+    cursor = feed.watch(str(root))
+    threads = threading.active_count()
+
+    async def main():
+        waiters = [asyncio.ensure_future(feed.changes_async(str(root), cursor, wait=5.0)) for _ in range(100)]
+        await asyncio.sleep(0.1)
+        # A hundred parked long-polls, no thread per waiter
+        assert threading.active_count() == threads
+        (root / "a.txt").write_text("a", encoding="utf-8")
+        return await asyncio.gather(*waiters)
+
+    results = asyncio.run(main())
+    assert all([c["path"] for c in r["changes"]] == ["a.txt"] for r in results)
+
+    # Timeouts return an empty batch at the same cursor
+    result = asyncio.run(feed.changes_async(str(root), results[0]["cursor"], wait=0.05))
+    assert result["changes"] == [] and result["cursor"] == results[0]["cursor"]
+
+
+def test_changes_endpoint_poll_and_sse(tmp_path: Path, feed: ChangeFeed, monkeypatch):
+    monkeypatch.setattr(files_routes, "change_feed", feed)
+    monkeypatch.setattr(metrics_routes, "change_feed", feed)
+    Base.metadata.create_all(bind=app_engine)
+    client = TestClient(create_app())
+    resp = client.post("/api/v1/projects/", json={"instruction": "Generate a minimal Python CLI with a test."})
+    assert resp.status_code == 200, resp.text
+    project_id = resp.json()["id"]
+    workspace = Path(client.get(f"/api/v1/projects/{project_id}").json()["workspace_path"])
+
+    resp = client.get(f"/api/v1/{project_id}/changes")
+    assert resp.status_code == 200
+    body = resp.json()
+    assert body["changes"] == [] and body["reset"] is False
+
+    (workspace / "notes.md").write_text("# notes\n", encoding="utf-8")
+    resp = client.get(f"/api/v1/{project_id}/changes", params={"cursor": body["cursor"], "wait": 5})
+    assert [(c["path"], c["type"]) for c in resp.json()["changes"]] == [("notes.md", "created")]
+    cursor = resp.json()["cursor"]
+
+    resp = client.get(f"/api/v1/{project_id}/changes", params={"cursor": "stale-1"})
+    assert resp.json()["reset"] is True
+
+    (workspace / "notes.md").unlink()
+    monkeypatch.setattr(files_routes.settings, "CHANGE_FEED_SSE_MAX_SECONDS", 1.0)
+    resp = client.get(
+        f"/api/v1/{project_id}/changes",
+        headers={"Accept": "text/event-stream", "Last-Event-ID": cursor},
+    )
+    assert resp.headers["content-type"].startswith("text/event-stream")
+    assert "event: change" in resp.text
+    assert '"path": "notes.md", "type": "deleted"' in resp.text
+
+    assert client.get("/api/v1/metrics").json()["change_feed"]["workspaces"] == 1
+    assert client.get("/api/v1/does-not-exist/changes").status_code == 404
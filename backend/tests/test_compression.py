@@ -0,0 +1,83 @@
+import os
+import sys
+import gzip
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+
+# Ensure we can import "app.*" both locally and inside the backend container (mirror pattern from other tests)
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+CANDIDATE_PATHS = [
+    os.path.join(REPO_ROOT, "backend"),  # host repo layout
+    REPO_ROOT,  # container layout where /app/app exists
+]
+for p in CANDIDATE_PATHS:
+    if os.path.isdir(p) and p not in sys.path:
+        sys.path.insert(0, p)
+
+from backend.main import create_app  # noqa: E402
+from app.db.models import Base, Project  # noqa: E402
+from app.db.session import engine as app_engine, SessionLocal as AppSessionLocal  # noqa: E402
+from app.services.compression import compressor, negotiate_encoding, zstandard  # noqa: E402
+
+
+def test_negotiate_encoding():
+    assert negotiate_encoding(None) is None
+    assert negotiate_encoding("identity") is None
+    assert negotiate_encoding("gzip") == "gzip"
+    assert negotiate_encoding("gzip;q=0, deflate") is None
+    assert negotiate_encoding("gzip;q=0.5, zstd;q=0.1") == "gzip"
+    assert negotiate_encoding("*") == ("zstd" if zstandard is not None else "gzip")
+
+
+def test_file_route_gzip_and_variant_cache(tmp_path: Path):
+    ws = tmp_path / "ws_gzip"
+    ws.mkdir()
+    source = "def f():\n    return 42\n" * 400
+    (ws / "app.py").write_text(source, encoding="utf-8")
+    (ws / "tiny.txt").write_text("hi", encoding="utf-8")
+
+    Base.metadata.create_all(bind=app_engine)
+    client = TestClient(create_app())
+    db = AppSessionLocal()
+    try:
+        p = Project(instruction="Gzip project", status="completed", workspace_path=str(ws))
+        db.add(p)
+        db.commit()
+        db.refresh(p)
+        pid = p.id
+    finally:
+        db.close()
+
+    headers = {"Accept-Encoding": "gzip"}
+    resp = client.get(f"/api/v1/{pid}/files/app.py", headers=headers)
+    assert resp.status_code == 200, resp.text
+    assert resp.headers.get("content-encoding") == "gzip"
+    assert resp.json()["contents"] == source
+    # Raw payload really is much smaller than the JSON body
+    assert int(resp.headers["content-length"]) < len(source) // 5
+
+    compressed_before = compressor.stats()["compressed"]
+    hits_before = compressor.variants.stats()["hits"]
+    resp = client.get(f"/api/v1/{pid}/files/app.py", headers=headers)
+    assert resp.json()["contents"] == source
+    assert compressor.stats()["compressed"] == compressed_before
+    assert compressor.variants.stats()["hits"] == hits_before + 1
+
+    # Small bodies are sent uncompressed
+    resp = client.get(f"/api/v1/{pid}/files/tiny.txt", headers=headers)
+    assert resp.headers.get("content-encoding") is None
+    assert "Accept-Encoding" in resp.headers.get("vary", "")
+    assert resp.json()["contents"] == "hi"
+
+    # Clients that do not ask for compression get identity JSON
+    resp = client.get(f"/api/v1/{pid}/files/app.py", headers={"Accept-Encoding": "identity"})
+    assert resp.headers.get("content-encoding") is None
+    assert "Accept-Encoding" in resp.headers.get("vary", "")
+    assert resp.json()["contents"] == source
+
+
+def test_gzip_roundtrip_helper():
+    body = b'{"a": "' + b"x" * 5000 + b'"}'
+    out = compressor.encode(body, "gzip")
+    assert out is not None and gzip.decompress(out) == body
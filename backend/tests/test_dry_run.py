@@ -0,0 +1,163 @@
+import os
+import sys
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+
+# Ensure we can import "app.*" both locally and inside the backend container (mirror pattern from other tests)
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+CANDIDATE_PATHS = [
+    os.path.join(REPO_ROOT, "backend"),  # host repo layout
+    REPO_ROOT,  # container layout where /app/app exists
+]
+for p in CANDIDATE_PATHS:
+    if os.path.isdir(p) and p not in sys.path:
+        sys.path.insert(0, p)
+
+from backend.main import create_app  # noqa: E402
+from app.db import models  # noqa: E402
+from app.db.models import Base  # noqa: E402
+from app.db.session import SessionLocal, engine as app_engine  # noqa: E402
+from app.services import codex_runner, lifecycle, previews  # noqa: E402
+from app.services.cow import write_text_private  # noqa: E402
+
+
+def _fake_worker(job, workspace, hot=False):
+    # Like the real worker: files are replaced, never written through
+    write_text_private(workspace / "app.py", "print('dry run')\n")
+    (workspace / "README.md").unlink()
+    write_text_private(workspace / ".codex" / "result.json",
+                       '{"status": "success", "summary": "edited", "modified_files": ["app.py"]}')
+
+
+def _setup(monkeypatch) -> TestClient:
+    monkeypatch.setattr(previews.settings, "WORKSPACE_CLONE_MODE", "hardlink")
+    Base.metadata.create_all(bind=app_engine)
+    client = TestClient(create_app())
+    return client
+
+
+def _project(client: TestClient):
+    project_id = client.post("/api/v1/projects/", json={"instruction": "Generate a minimal Python CLI."}).json()["id"]
+    workspace = Path(client.get(f"/api/v1/projects/{project_id}").json()["workspace_path"])
+    return project_id, workspace
+
+
+def _dry_run(client: TestClient, monkeypatch, project_id: str) -> dict:
+    monkeypatch.setattr(codex_runner.settings, "USE_DUMMY_WORKER", False)
+    monkeypatch.setattr(codex_runner, "run_worker_container", _fake_worker)
+    resp = client.post(f"/api/v1/{project_id}/jobs", json={
+        "job_type": "edit", "instruction": "Print something else.", "dry_run": True,
+    })
+    monkeypatch.setattr(codex_runner.settings, "USE_DUMMY_WORKER", True)
+    assert resp.status_code == 200, resp.text
+    return resp.json()
+
+
+def test_preview_then_confirm(monkeypatch):
+    client = _setup(monkeypatch)
+    project_id, workspace = _project(client)
+    app_before = (workspace / "app.py").read_text(encoding="utf-8")
+
+    job = _dry_run(client, monkeypatch, project_id)
+    assert job["status"] == "preview"
+    assert job["dry_run"] is True
+    tree = previews.preview_dir(project_id, job["id"])
+    # Untouched files are links to the workspace's, not copies
+    assert (tree / "tests" / "test_cli.py").stat().st_ino == (workspace / "tests" / "test_cli.py").stat().st_ino
+
+    # Nothing reached the workspace
+    assert (workspace / "app.py").read_text(encoding="utf-8") == app_before
+    assert (workspace / "README.md").exists()
+    assert client.get(f"/api/v1/{project_id}/files/app.py").json()["contents"] == app_before
+
+    detail = client.get(f"/api/v1/{project_id}/jobs/{job['id']}").json()
+    assert detail["result"]["summary"] == "edited"
+    diff = client.get(f"/api/v1/{project_id}/jobs/{job['id']}/diff", params={"format": "unified"}).json()
+    changes = {c["path"]: c["change"] for c in diff["changes"] if not c["path"].startswith(".codex/")}
+    assert changes == {"README.md": "deleted", "app.py": "modified"}
+    assert "+print('dry run')" in diff["unified"]
+
+    resp = client.post(f"/api/v1/{project_id}/jobs/{job['id']}/confirm")
+    assert resp.status_code == 200, resp.text
+    assert resp.json()["status"] == "completed"
+    assert (workspace / "app.py").read_text(encoding="utf-8") == "print('dry run')\n"
+    assert not (workspace / "README.md").exists()
+    assert client.get(f"/api/v1/{project_id}/files/app.py").json()["contents"] == "print('dry run')\n"
+    assert not tree.exists()
+    # Confirmed jobs are regular jobs: they have a snapshot
+    assert client.get(f"/api/v1/{project_id}/jobs/{job['id']}/diff").status_code == 200
+    assert client.post(f"/api/v1/{project_id}/jobs/{job['id']}/confirm").status_code == 409
+
+
+def test_conflicting_preview_is_refused_then_discarded(monkeypatch):
+    client = _setup(monkeypatch)
+    project_id, workspace = _project(client)
+    job = _dry_run(client, monkeypatch, project_id)
+
+    # The workspace changed under the preview
+    write_text_private(workspace / "app.py", "print('meanwhile')\n")
+    resp = client.post(f"/api/v1/{project_id}/jobs/{job['id']}/confirm")
+    assert resp.status_code == 409
+    assert "app.py" in resp.json()["detail"]
+    assert (workspace / "app.py").read_text(encoding="utf-8") == "print('meanwhile')\n"
+    assert (workspace / "README.md").exists()
+
+    resp = client.post(f"/api/v1/{project_id}/jobs/{job['id']}/discard")
+    assert resp.json()["status"] == "discarded"
+    assert not previews.preview_dir(project_id, job["id"]).exists()
+    assert client.post(f"/api/v1/{project_id}/jobs/{job['id']}/discard").status_code == 409
+
+
+def test_confirm_waits_for_running_jobs(monkeypatch):
+    client = _setup(monkeypatch)
+    project_id, workspace = _project(client)
+    job = _dry_run(client, monkeypatch, project_id)
+
+    # A regular job holds the project lock while its worker writes
+    held = []
+
+    def locked_worker(job, workspace, hot=False):
+        held.append(lifecycle.project_lock(project_id).locked())
+        write_text_private(workspace / ".codex" / "result.json", '{"status": "success", "summary": "ran"}')
+
+    monkeypatch.setattr(codex_runner.settings, "USE_DUMMY_WORKER", False)
+    monkeypatch.setattr(codex_runner, "run_worker_container", locked_worker)
+    resp = client.post(f"/api/v1/{project_id}/jobs", json={"job_type": "edit", "instruction": "Regular job."})
+    monkeypatch.setattr(codex_runner.settings, "USE_DUMMY_WORKER", True)
+    assert resp.json()["status"] == "completed"
+    assert held == [True]
+
+    db = SessionLocal()
+    try:
+        running = models.Job(project_id=project_id, job_type="edit", instruction="x", status="in_progress")
+        db.add(running)
+        db.commit()
+        resp = client.post(f"/api/v1/{project_id}/jobs/{job['id']}/confirm")
+        assert resp.status_code == 409
+        assert "running" in resp.json()["detail"]
+        assert (workspace / "README.md").exists()
+        running.status = "error"
+        db.commit()
+    finally:
+        db.close()
+    assert client.post(f"/api/v1/{project_id}/jobs/{job['id']}/confirm").status_code == 200
+
+
+def test_unconfirmed_previews_expire(monkeypatch):
+    client = _setup(monkeypatch)
+    project_id, _ = _project(client)
+    job = _dry_run(client, monkeypatch, project_id)
+
+    db = SessionLocal()
+    try:
+        assert previews.gc_previews(db)["expired"] == 0
+        meta = previews._meta_path(project_id, job["id"])
+        old = meta.stat().st_mtime - 3600
+        os.utime(meta, (old, old))
+        stats = previews.gc_previews(db, ttl_seconds=60)
+        assert stats["expired"] == 1
+        assert db.query(models.Job).filter(models.Job.id == job["id"]).one().status == "discarded"
+    finally:
+        db.close()
+    assert not previews.preview_dir(project_id, job["id"]).exists()
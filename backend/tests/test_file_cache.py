@@ -0,0 +1,85 @@
+import os
+import sys
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+# Ensure we can import "app.*" both locally and inside the backend container (mirror pattern from other tests)
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+CANDIDATE_PATHS = [
+    os.path.join(REPO_ROOT, "backend"),  # host repo layout
+    REPO_ROOT,  # container layout where /app/app exists
+]
+for p in CANDIDATE_PATHS:
+    if os.path.isdir(p) and p not in sys.path:
+        sys.path.insert(0, p)
+
+from backend.main import create_app  # noqa: E402
+from app.services.file_cache import LRUCache, file_cache  # noqa: E402
+from app.services.workspaces import (  # noqa: E402
+    InvalidWorkspacePath,
+    invalidate_cached_files,
+    read_file as ws_read_file,
+)
+
+
+def test_lru_evicts_by_bytes_and_skips_oversized():
+    cache = LRUCache(max_bytes=100, max_entry_bytes=60)
+    cache.put(("ws", "a", 1, 1, 1), "A", 40)
+    cache.put(("ws", "b", 2, 1, 1), "B", 40)
+    assert cache.get(("ws", "a", 1, 1, 1)) == "A"  # a becomes most recent
+    cache.put(("ws", "c", 3, 1, 1), "C", 40)  # evicts b
+
+    assert cache.get(("ws", "b", 2, 1, 1)) is None
+    assert cache.get(("ws", "c", 3, 1, 1)) == "C"
+    cache.put(("ws", "huge", 4, 1, 1), "H", 61)
+    assert cache.get(("ws", "huge", 4, 1, 1)) is None
+
+    stats = cache.stats()
+    assert stats["evictions"] == 1
+    assert stats["bytes"] == 80
+    assert stats["hits"] == 2 and stats["misses"] == 2
+
+    assert cache.invalidate("ws", ["a"]) == 1
+    assert cache.get(("ws", "a", 1, 1, 1)) is None
+
+
+def test_read_file_uses_cache_and_invalidation(tmp_path: Path):
+    ws = tmp_path / "ws_cache"
+    ws.mkdir()
+    f = ws / "README.md"
+    f.write_text("v1", encoding="utf-8")
+    file_cache.clear()
+
+    before = file_cache.stats()["hits"]
+    assert ws_read_file(str(ws), "README.md") == "v1"
+    assert ws_read_file(str(ws), "README.md") == "v1"
+    assert file_cache.stats()["hits"] == before + 1
+
+    # Rewrite changes size/mtime, so the stale entry cannot be served
+    f.write_text("version two", encoding="utf-8")
+    assert ws_read_file(str(ws), "README.md") == "version two"
+
+    assert invalidate_cached_files(str(ws), ["README.md"]) >= 1
+
+
+def test_cache_does_not_bypass_containment(tmp_path: Path):
+    ws = tmp_path / "ws_cache_escape"
+    ws.mkdir()
+    outside = tmp_path / "secret.txt"
+    outside.write_text("top-secret", encoding="utf-8")
+    # Warm the cache through a legitimate workspace that contains the file
+    assert ws_read_file(str(tmp_path), "secret.txt") == "top-secret"
+
+    (ws / "leak.txt").symlink_to(outside)
+    with pytest.raises(InvalidWorkspacePath):
+        ws_read_file(str(ws), "leak.txt")
+
+
+def test_metrics_endpoint_reports_file_cache():
+    client = TestClient(create_app())
+    resp = client.get("/api/v1/metrics")
+    assert resp.status_code == 200, resp.text
+    stats = resp.json()["file_cache"]
+    assert {"hits", "misses", "hit_rate", "bytes", "max_bytes"} <= set(stats)
@@ -0,0 +1,111 @@
+import os
+import sys
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+
+# Ensure we can import "app.*" both locally and inside the backend container (mirror pattern from other tests)
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+CANDIDATE_PATHS = [
+    os.path.join(REPO_ROOT, "backend"),  # host repo layout
+    REPO_ROOT,  # container layout where /app/app exists
+]
+for p in CANDIDATE_PATHS:
+    if os.path.isdir(p) and p not in sys.path:
+        sys.path.insert(0, p)
+
+from backend.main import create_app  # noqa: E402
+from app.db.models import Base, Project  # noqa: E402
+from app.db.session import engine as app_engine, SessionLocal as AppSessionLocal  # noqa: E402
+from app.services.line_index import LineIndexCache, build_line_index  # noqa: E402
+
+
+def test_build_line_index_offsets(tmp_path: Path):
+    f = tmp_path / "f.txt"
+    f.write_bytes(b"ab\ncd\n\nlast")
+    index = build_line_index(f)
+    assert list(index.starts) == [0, 3, 6, 7]
+    assert index.total_lines == 4
+    assert index.byte_span(2, 3) == (3, 7)
+    assert index.byte_span(4, 4) == (7, 11)
+
+    f.write_bytes(b"one\ntwo\n")
+    assert build_line_index(f).total_lines == 2
+
+    f.write_bytes(b"")
+    assert build_line_index(f).total_lines == 0
+
+
+def test_line_index_cache_is_bounded_by_bytes(tmp_path: Path):
+    files = []
+    for name in ("a", "b", "c"):
+        f = tmp_path / f"{name}.txt"
+        f.write_bytes(b"x\n" * 100)
+        files.append(f)
+    one = build_line_index(files[0]).nbytes
+    cache = LineIndexCache(max_bytes=2 * one)
+
+    first = cache.get(files[0])
+    assert cache.get(files[0]) is first
+    cache.get(files[1])
+    cache.get(files[2])
+    # Oldest index was evicted to stay within the byte budget
+    assert cache._bytes <= 2 * one
+    assert cache.get(files[0]) is not first
+
+    # An index larger than the whole budget is served but not kept
+    big = tmp_path / "big.txt"
+    big.write_bytes(b"y\n" * 1000)
+    cache.clear()
+    assert cache.get(big).total_lines == 1000
+    assert cache._bytes == 0
+
+
+def test_line_and_byte_range_api(tmp_path: Path):
+    ws = tmp_path / "ws_ranges"
+    ws.mkdir()
+    (ws / "log.txt").write_text("".join(f"line {i}\n" for i in range(1, 501)), encoding="utf-8")
+
+    Base.metadata.create_all(bind=app_engine)
+    client = TestClient(create_app())
+    db = AppSessionLocal()
+    try:
+        p = Project(instruction="Range project", status="completed", workspace_path=str(ws))
+        db.add(p)
+        db.commit()
+        db.refresh(p)
+        pid = p.id
+    finally:
+        db.close()
+
+    base = f"/api/v1/{pid}/files/log.txt"
+
+    resp = client.get(base, params={"start_line": 10, "end_line": 12})
+    assert resp.status_code == 200, resp.text
+    body = resp.json()
+    assert body["contents"] == "line 10\nline 11\nline 12\n"
+    assert body["total_lines"] == 500
+    assert (body["start_line"], body["end_line"]) == (10, 12)
+
+    # Clamped to EOF
+    body = client.get(base, params={"start_line": 499, "end_line": 900}).json()
+    assert body["contents"] == "line 499\nline 500\n"
+    assert body["end_line"] == 500
+
+    # Byte window
+    body = client.get(base, params={"offset": 0, "length": 6}).json()
+    assert body["contents"] == "line 1"
+    assert (body["offset"], body["length"], body["total_lines"]) == (0, 6, 500)
+
+    # Full read still reports total line count
+    body = client.get(base).json()
+    assert body["total_lines"] == 500
+
+    # Invalid UTF-8 is replaced in line mode as in byte mode
+    (ws / "bin.dat").write_bytes(b"ok\n\xff\xfe\n")
+    resp = client.get(f"/api/v1/{pid}/files/bin.dat", params={"start_line": 1, "end_line": 2})
+    assert resp.status_code == 200, resp.text
+    assert resp.json()["contents"] == "ok\n\ufffd\ufffd\n"
+
+    assert client.get(base, params={"start_line": 5, "end_line": 2}).status_code == 400
+    assert client.get(base, params={"start_line": 1, "offset": 0}).status_code == 400
@@ -0,0 +1,103 @@
+import os
+import sys
+import json
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+
+# Ensure we can import "app.*" both locally and inside the backend container (mirror pattern from other tests)
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+CANDIDATE_PATHS = [
+    os.path.join(REPO_ROOT, "backend"),  # host repo layout
+    REPO_ROOT,  # container layout where /app/app exists
+]
+for p in CANDIDATE_PATHS:
+    if os.path.isdir(p) and p not in sys.path:
+        sys.path.insert(0, p)
+
+from backend.main import create_app  # noqa: E402
+from app.db.models import Base, Project  # noqa: E402
+from app.db.session import engine as app_engine, SessionLocal as AppSessionLocal  # noqa: E402
+
+
+def _setup(tmp_path: Path):
+    ws = tmp_path / "ws_batch"
+    (ws / "src").mkdir(parents=True)
+    (ws / "README.md").write_text("# Readme\n", encoding="utf-8")
+    (ws / "src" / "a.py").write_text("a = 1\n", encoding="utf-8")
+    (ws / "src" / "b.py").write_text("b = 2\n", encoding="utf-8")
+    (ws / "big.txt").write_text("x" * 4096, encoding="utf-8")
+
+    Base.metadata.create_all(bind=app_engine)
+    client = TestClient(create_app())
+
+    db = AppSessionLocal()
+    try:
+        p = Project(instruction="Batch project", status="completed", workspace_path=str(ws))
+        db.add(p)
+        db.commit()
+        db.refresh(p)
+        pid = p.id
+    finally:
+        db.close()
+    return client, pid
+
+
+def test_batch_get_paths_globs_and_errors(tmp_path: Path):
+    client, pid = _setup(tmp_path)
+
+    resp = client.post(
+        f"/api/v1/{pid}/files:batchGet",
+        json={"paths": ["README.md", "src/*.py", "missing.txt", "../etc/passwd"]},
+    )
+    assert resp.status_code == 200, resp.text
+    body = resp.json()
+    by_path = {f["path"]: f for f in body["files"]}
+
+    assert by_path["README.md"]["contents"] == "# Readme\n"
+    assert by_path["src/a.py"]["contents"] == "a = 1\n"
+    assert by_path["src/b.py"]["contents"] == "b = 2\n"
+    assert by_path["missing.txt"]["error"] == "not_found"
+    assert by_path["../etc/passwd"]["error"] == "invalid_path"
+    assert body["total_bytes"] == len("# Readme\n") + 12
+    assert body["truncated"] is False
+
+
+def test_batch_get_byte_budget(tmp_path: Path):
+    client, pid = _setup(tmp_path)
+
+    resp = client.post(
+        f"/api/v1/{pid}/files:batchGet",
+        json={"paths": ["big.txt", "README.md"], "max_bytes": 100},
+    )
+    assert resp.status_code == 200, resp.text
+    body = resp.json()
+    by_path = {f["path"]: f for f in body["files"]}
+    assert by_path["big.txt"]["error"] == "byte_budget_exceeded"
+    assert "contents" not in by_path["big.txt"] or by_path["big.txt"]["contents"] is None
+    # Smaller files later in the batch still fit
+    assert by_path["README.md"]["contents"] == "# Readme\n"
+    assert body["truncated"] is True
+
+
+def test_batch_get_ndjson_stream(tmp_path: Path):
+    client, pid = _setup(tmp_path)
+
+    resp = client.post(
+        f"/api/v1/{pid}/files:batchGet?stream=true",
+        json={"paths": ["README.md", "missing.txt"]},
+    )
+    assert resp.status_code == 200, resp.text
+    assert resp.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in resp.text.splitlines() if line]
+    assert lines[0]["path"] == "README.md"
+    assert lines[1]["error"] == "not_found"
+    assert lines[-1] == {"done": True, "total_bytes": len("# Readme\n"), "truncated": False}
+
+
+def test_batch_get_unknown_project():
+    Base.metadata.create_all(bind=app_engine)
+    client = TestClient(create_app())
+    resp = client.post("/api/v1/does-not-exist/files:batchGet", json={"paths": ["a"]})
+    assert resp.status_code == 404
+    assert resp.json()["detail"] == "Project not found"
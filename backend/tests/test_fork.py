@@ -0,0 +1,142 @@
+import os
+import sys
+import json
+import threading
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+# Ensure we can import "app.*" both locally and inside the backend container (mirror pattern from other tests)
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+CANDIDATE_PATHS = [
+    os.path.join(REPO_ROOT, "backend"),  # host repo layout
+    REPO_ROOT,  # container layout where /app/app exists
+]
+for p in CANDIDATE_PATHS:
+    if os.path.isdir(p) and p not in sys.path:
+        sys.path.insert(0, p)
+
+from backend.main import create_app  # noqa: E402
+from app.db.models import Base, Job  # noqa: E402
+from app.db.session import engine as app_engine, SessionLocal as AppSessionLocal  # noqa: E402
+from app.services import blobs, snapshots  # noqa: E402
+from app.services.cow import TreeCloner, break_hardlink  # noqa: E402
+from app.services.lifecycle import project_lock  # noqa: E402
+
+
+@pytest.fixture
+def store_root(tmp_path, monkeypatch):
+    root = tmp_path / "store"
+    monkeypatch.setattr(snapshots.settings, "STORE_ROOT", str(root))
+    monkeypatch.setattr(blobs.settings, "STORE_ROOT", str(root))
+    return root
+
+
+def test_hardlink_clone_and_copy_on_first_write(tmp_path: Path):
+    src = tmp_path / "src"
+    (src / "pkg").mkdir(parents=True)
+    (src / "pkg" / "mod.py").write_text("x = 1\n", encoding="utf-8")
+    dst = tmp_path / "dst"
+
+    stats = TreeCloner("hardlink").clone_tree(src, dst)
+    assert stats["hardlink"] == 1
+    assert os.stat(dst / "pkg" / "mod.py").st_ino == os.stat(src / "pkg" / "mod.py").st_ino
+
+    assert break_hardlink(dst / "pkg" / "mod.py") is True
+    (dst / "pkg" / "mod.py").write_text("x = 2\n", encoding="utf-8")
+    assert (src / "pkg" / "mod.py").read_text(encoding="utf-8") == "x = 1\n"
+    assert break_hardlink(dst / "pkg" / "mod.py") is False
+
+    copy_stats = TreeCloner("copy").clone_tree(src, tmp_path / "dst_copy")
+    assert copy_stats == {"reflink": 0, "hardlink": 0, "copy": 1}
+
+
+def test_fork_api_isolates_workspaces_and_copies_history(store_root: Path):
+    Base.metadata.create_all(bind=app_engine)
+    client = TestClient(create_app())
+
+    resp = client.post("/api/v1/projects/", json={"instruction": "Generate a minimal Python CLI with a test."})
+    assert resp.status_code == 200, resp.text
+    source_id = resp.json()["id"]
+
+    resp = client.post(f"/api/v1/{source_id}/fork", json={"copy_jobs": True})
+    assert resp.status_code == 200, resp.text
+    fork = resp.json()
+    fork_id = fork["id"]
+    assert fork["forked_from"] == source_id
+    assert sum(fork["files_cloned"].values()) >= 5
+
+    source_files = client.get(f"/api/v1/{source_id}/files").json()["files"]
+    fork_files = client.get(f"/api/v1/{fork_id}/files").json()["files"]
+    assert sorted(f["path"] for f in source_files) == sorted(f["path"] for f in fork_files)
+
+    # Copied job history, with snapshots that still diff
+    fork_jobs = client.get(f"/api/v1/projects/{fork_id}").json()["jobs"]
+    assert len(fork_jobs) == 1
+    resp = client.get(f"/api/v1/{fork_id}/jobs/{fork_jobs[0]['id']}/diff")
+    assert resp.status_code == 200, resp.text
+
+    # A job on the fork must not leak into the source workspace
+    resp = client.post(f"/api/v1/{fork_id}/jobs", json={"job_type": "edit", "instruction": "Only in the fork."})
+    assert resp.status_code == 200, resp.text
+    source_req = json.loads(client.get(f"/api/v1/{source_id}/files/.codex/request.json").json()["contents"])
+    fork_req = json.loads(client.get(f"/api/v1/{fork_id}/files/.codex/request.json").json()["contents"])
+    assert source_req["project_id"] == source_id
+    assert fork_req["instruction"] == "Only in the fork."
+
+
+def test_fork_unknown_project():
+    Base.metadata.create_all(bind=app_engine)
+    client = TestClient(create_app())
+    resp = client.post("/api/v1/does-not-exist/fork")
+    assert resp.status_code == 404
+
+
+def test_fork_cancels_unfinished_jobs(store_root: Path):
+    Base.metadata.create_all(bind=app_engine)
+    client = TestClient(create_app())
+    source_id = client.post("/api/v1/projects/", json={"instruction": "Generate a minimal Python CLI."}).json()["id"]
+
+    db = AppSessionLocal()
+    try:
+        for status in ("in_progress", "queued", "preview"):
+            db.add(Job(project_id=source_id, job_type="edit", instruction=status, status=status,
+                       verification_status="pending" if status == "in_progress" else None))
+        db.commit()
+    finally:
+        db.close()
+
+    fork_id = client.post(f"/api/v1/{source_id}/fork", json={"copy_jobs": True}).json()["id"]
+    db = AppSessionLocal()
+    try:
+        copies = {j.instruction: j for j in db.query(Job).filter(Job.project_id == fork_id)}
+    finally:
+        db.close()
+    assert copies["in_progress"].status == "cancelled"
+    assert copies["in_progress"].verification_status is None
+    assert copies["queued"].status == "cancelled"
+    assert copies["preview"].status == "discarded"
+
+
+def test_fork_without_history_gets_head_and_waits_for_source_lock(store_root: Path):
+    Base.metadata.create_all(bind=app_engine)
+    client = TestClient(create_app())
+    source_id = client.post("/api/v1/projects/", json={"instruction": "Generate a minimal Python CLI."}).json()["id"]
+
+    result = {}
+    with project_lock(source_id):
+        # A job holding the source's lock is never cloned half-written
+        thread = threading.Thread(target=lambda: result.update(resp=client.post(f"/api/v1/{source_id}/fork")))
+        thread.start()
+        thread.join(timeout=0.5)
+        assert thread.is_alive()
+    thread.join(timeout=10)
+    resp = result["resp"]
+    assert resp.status_code == 200, resp.text
+    fork_id = resp.json()["id"]
+
+    jobs = client.get(f"/api/v1/projects/{fork_id}").json()["jobs"]
+    assert [j["job_type"] for j in jobs] == ["fork"]
+    assert snapshots.head_job_id(fork_id) == jobs[0]["id"]
+    assert client.get(f"/api/v1/{fork_id}/jobs/{jobs[0]['id']}/diff").status_code == 200
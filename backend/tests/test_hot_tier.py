@@ -0,0 +1,161 @@
+import os
+import sys
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+
+# Ensure we can import "app.*" both locally and inside the backend container (mirror pattern from other tests)
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+CANDIDATE_PATHS = [
+    os.path.join(REPO_ROOT, "backend"),  # host repo layout
+    REPO_ROOT,  # container layout where /app/app exists
+]
+for p in CANDIDATE_PATHS:
+    if os.path.isdir(p) and p not in sys.path:
+        sys.path.insert(0, p)
+
+from backend.main import create_app  # noqa: E402
+from app.db.models import Base  # noqa: E402
+from app.db.session import engine as app_engine  # noqa: E402
+from app.services import hot_tier as hot_tier_module  # noqa: E402
+from app.services.hot_tier import HotTier, hot_tier  # noqa: E402
+
+
+def _durable(root: Path, name: str, size: int = 10) -> Path:
+    ws = root / name
+    (ws / "src").mkdir(parents=True)
+    (ws / "src" / "keep.py").write_text("k" * size, encoding="utf-8")
+    (ws / "gone.txt").write_text("bye", encoding="utf-8")
+    return ws
+
+
+def test_checkin_writes_back_changes(tmp_path: Path):
+    tier = HotTier(str(tmp_path / "hot"), max_bytes=1024 * 1024)
+    durable = _durable(tmp_path, "p1")
+
+    hot = Path(tier.checkout("p1", str(durable)))
+    assert hot != durable and (hot / "src" / "keep.py").exists()
+    assert tier.resolve("p1", str(durable)) == str(hot)
+
+    (hot / "new.py").write_text("new", encoding="utf-8")
+    (hot / "src" / "keep.py").write_text("changed", encoding="utf-8")
+    (hot / "gone.txt").unlink()
+    # Nothing reaches durable storage until the job checks in
+    assert not (durable / "new.py").exists()
+
+    assert tier.checkin("p1") is True
+    assert (durable / "new.py").read_text(encoding="utf-8") == "new"
+    assert (durable / "src" / "keep.py").read_text(encoding="utf-8") == "changed"
+    assert not (durable / "gone.txt").exists()
+    assert tier.stats()["write_backs"] == 1
+
+
+def test_write_back_is_fsynced_and_failures_are_reported(tmp_path: Path, monkeypatch):
+    tier = HotTier(str(tmp_path / "hot"), max_bytes=1024 * 1024)
+    durable = _durable(tmp_path, "p1")
+    hot = Path(tier.checkout("p1", str(durable)))
+    (hot / "pkg" / "deep").mkdir(parents=True)
+    (hot / "pkg" / "deep" / "mod.py").write_text("x = 1\n", encoding="utf-8")
+
+    synced = []
+    real_fsync = os.fsync
+
+    def fsync(fd):
+        synced.append(os.readlink(f"/proc/self/fd/{fd}"))
+        real_fsync(fd)
+
+    monkeypatch.setattr(hot_tier_module.os, "fsync", fsync)
+    assert tier.checkin("p1") is True
+    # The file, the new directories and the directory that now holds "pkg"
+    assert str(durable / "pkg" / "deep") in synced
+    assert str(durable / "pkg") in synced
+    assert str(durable) in synced
+    assert len([p for p in synced if p.startswith(str(durable / "pkg" / "deep" / ".writeback-"))]) == 1
+
+    def broken(src, dst):
+        raise OSError("disk full")
+
+    tier.checkout("p1", str(durable))
+    monkeypatch.setattr(hot_tier_module, "sync_tree", broken)
+    assert tier.checkin("p1") is False
+    assert tier.stats()["pinned"] == 0
+
+
+def test_lru_demotion_keeps_output_and_spares_pinned(tmp_path: Path):
+    tier = HotTier(str(tmp_path / "hot"), max_bytes=150)
+    a = _durable(tmp_path, "a", size=100)
+    b = _durable(tmp_path, "b", size=100)
+
+    hot_a = Path(tier.checkout("a", str(a)))
+    (hot_a / "out.txt").write_text("job output", encoding="utf-8")
+    # While "a" is pinned by its job it cannot be evicted: "b" runs on durable storage
+    assert tier.checkout("b", str(b)) == str(b)
+    tier.checkin("b")
+
+    tier.checkin("a")
+    hot_b = tier.checkout("b", str(b))
+    assert hot_b != str(b)
+    # "a" was demoted to make room; its output survived on durable storage
+    assert tier.resolve("a", str(a)) == str(a)
+    assert not hot_a.exists()
+    assert (a / "out.txt").read_text(encoding="utf-8") == "job output"
+    assert tier.stats()["demotions"] == 1
+    tier.checkin("b")
+
+
+def test_promotion_copies_outside_the_global_lock(tmp_path: Path, monkeypatch):
+    tier = HotTier(str(tmp_path / "hot"), max_bytes=1024 * 1024)
+    warm = _durable(tmp_path, "warm")
+    big = _durable(tmp_path, "big")
+    hot_warm = tier.checkout("warm", str(warm))
+    tier.checkin("warm")
+
+    copying, release = threading.Event(), threading.Event()
+    real_cloner = hot_tier_module.TreeCloner
+
+    class SlowCloner(real_cloner):
+        def clone_tree(self, src, dst):
+            copying.set()
+            release.wait(5)
+            return super().clone_tree(src, dst)
+
+    monkeypatch.setattr(hot_tier_module, "TreeCloner", SlowCloner)
+    worker = threading.Thread(target=tier.checkout, args=("big", str(big)))
+    worker.start()
+    try:
+        assert copying.wait(5)
+        # Mid-copy: other projects resolve without waiting, "big" is served from durable storage
+        assert tier.resolve("warm", str(warm)) == hot_warm
+        assert tier.resolve("big", str(big)) == str(big)
+        assert tier.stats()["entries"] == 1
+    finally:
+        release.set()
+        worker.join(5)
+    assert tier.resolve("big", str(big)) == str(tmp_path / "hot" / "big")
+    tier.checkin("big")
+
+
+def test_jobs_run_hot_and_results_are_durable(tmp_path: Path, monkeypatch):
+    monkeypatch.setattr(hot_tier, "root", str(tmp_path / "hot"))
+    monkeypatch.setattr(hot_tier, "max_bytes", 64 * 1024 * 1024)
+    monkeypatch.setattr(hot_tier, "_entries", OrderedDict())
+    Base.metadata.create_all(bind=app_engine)
+    client = TestClient(create_app())
+
+    resp = client.post("/api/v1/projects/", json={"instruction": "Generate a minimal Python CLI with a test."})
+    assert resp.status_code == 200, resp.text
+    project_id = resp.json()["id"]
+    durable = Path(client.get(f"/api/v1/projects/{project_id}").json()["workspace_path"])
+
+    assert (durable / "app.py").exists()
+    assert (durable / ".codex" / "result.json").exists()
+    assert hot_tier.resolve(project_id, str(durable)) == str(tmp_path / "hot" / project_id)
+
+    resp = client.get(f"/api/v1/{project_id}/files/app.py")
+    assert resp.status_code == 200
+    assert resp.json()["contents"] == (durable / "app.py").read_text(encoding="utf-8")
+
+    metrics = client.get("/api/v1/metrics").json()["hot_tier"]
+    assert metrics["entries"] == 1 and metrics["pinned"] == 0
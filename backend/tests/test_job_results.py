@@ -0,0 +1,83 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+# Ensure we can import "app.*" both locally and inside the backend container (mirror pattern from other tests)
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+CANDIDATE_PATHS = [
+    os.path.join(REPO_ROOT, "backend"),  # host repo layout
+    REPO_ROOT,  # container layout where /app/app exists
+]
+for p in CANDIDATE_PATHS:
+    if os.path.isdir(p) and p not in sys.path:
+        sys.path.insert(0, p)
+
+from backend.main import create_app  # noqa: E402
+from app.db.models import Base  # noqa: E402
+from app.db.session import engine as app_engine  # noqa: E402
+from app.services import codex_runner  # noqa: E402
+
+WORKER = Path(REPO_ROOT) / "worker" / "run_codex_job.py"
+
+
+def _client(monkeypatch, run_worker) -> TestClient:
+    monkeypatch.setattr(codex_runner.settings, "USE_DUMMY_WORKER", False)
+    monkeypatch.setattr(codex_runner, "run_worker_container", run_worker)
+    Base.metadata.create_all(bind=app_engine)
+    return TestClient(create_app())
+
+
+def _jobs(client: TestClient, project_id: str) -> list:
+    project = client.get(f"/api/v1/projects/{project_id}").json()
+    return [client.get(f"/api/v1/{project_id}/jobs/{j['id']}").json() for j in project["jobs"]]
+
+
+@pytest.mark.skipif(not WORKER.exists(), reason="worker source not available in this layout")
+def test_each_job_keeps_its_own_result(monkeypatch):
+    def run_worker_here(job, workspace, hot=False):
+        subprocess.run([sys.executable, str(WORKER)], env=dict(os.environ, WORKSPACE_DIR=str(workspace)), check=True)
+
+    client = _client(monkeypatch, run_worker_here)
+    project_id = client.post("/api/v1/projects/", json={"instruction": "Generate a minimal Python CLI."}).json()["id"]
+    resp = client.post(f"/api/v1/{project_id}/jobs", json={
+        "job_type": "edit", "instruction": "Modify the CLI to print the first 15 Fibonacci numbers.",
+    })
+    assert resp.status_code == 200
+
+    initial, edit = sorted(_jobs(client, project_id), key=lambda j: j["created_at"])
+    # Both jobs share .codex/result.json on disk; the stored results are per job
+    assert initial["result_path"] == edit["result_path"]
+    assert initial["result"]["status"] == "success"
+    assert initial["result"]["created_files"] == ["README.md", "app.py", "tests/test_cli.py"]
+    assert edit["result"]["created_files"] == []
+    assert edit["result"]["modified_files"] == ["app.py"]
+    assert edit["result"]["timings"]["phases_ms"]["edit"] >= 0
+    # Only JobResult fields are stored
+    assert "handlers" not in edit["result"]
+
+
+def test_invalid_and_missing_results(monkeypatch):
+    outputs = iter([
+        {"status": "success", "summary": "ok", "created_files": "app.py"},  # not a list
+        None,  # worker wrote nothing
+    ])
+
+    def fake_worker(job, workspace, hot=False):
+        result = next(outputs)
+        if result is not None:
+            (workspace / ".codex" / "result.json").write_text(json.dumps(result), encoding="utf-8")
+
+    client = _client(monkeypatch, fake_worker)
+    project_id = client.post("/api/v1/projects/", json={"instruction": "Generate a minimal Python CLI."}).json()["id"]
+    job = _jobs(client, project_id)[0]
+    assert job["status"] == "completed"
+    assert job["result"] is None
+
+    # The previous job's result.json is not taken for this job's
+    resp = client.post(f"/api/v1/{project_id}/jobs", json={"job_type": "edit", "instruction": "Change something."})
+    assert resp.json()["status"] == "error"
@@ -0,0 +1,97 @@
+import os
+import subprocess
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+# Ensure we can import "app.*" both locally and inside the backend container (mirror pattern from other tests)
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+CANDIDATE_PATHS = [
+    os.path.join(REPO_ROOT, "backend"),  # host repo layout
+    REPO_ROOT,  # container layout where /app/app exists
+]
+for p in CANDIDATE_PATHS:
+    if os.path.isdir(p) and p not in sys.path:
+        sys.path.insert(0, p)
+
+from backend.main import create_app  # noqa: E402
+from app.db import models  # noqa: E402
+from app.db.models import Base  # noqa: E402
+from app.db.session import engine as app_engine  # noqa: E402
+from app.services import codex_runner  # noqa: E402
+
+WORKER = Path(REPO_ROOT) / "worker" / "run_codex_job.py"
+
+
+def _create_and_fetch_job(client: TestClient) -> dict:
+    resp = client.post("/api/v1/projects/", json={"instruction": "Generate a minimal Python CLI with a test."})
+    assert resp.status_code == 200, resp.text
+    project = client.get(f"/api/v1/projects/{resp.json()['id']}").json()
+    resp = client.get(f"/api/v1/{project['id']}/jobs/{project['jobs'][0]['id']}")
+    assert resp.status_code == 200
+    return resp.json()
+
+
+def _assert_phases_ordered(job: dict) -> None:
+    stamps = [job[k] for k in ("queued_at", "started_at", "worker_started_at", "worker_finished_at", "finished_at")]
+    assert all(stamps)
+    assert stamps == sorted(stamps)
+    phases = job["phases"]
+    assert all(phases[k] is not None and phases[k] >= 0 for k in phases)
+    parts = phases["queued_seconds"] + phases["startup_seconds"] + phases["worker_seconds"] + phases["commit_seconds"]
+    assert parts == pytest.approx(phases["total_seconds"], abs=0.005)
+
+
+def test_dummy_worker_job_reports_phases():
+    Base.metadata.create_all(bind=app_engine)
+    client = TestClient(create_app())
+    job = _create_and_fetch_job(client)
+    _assert_phases_ordered(job)
+    # The in-process dummy worker does not report resource usage
+    assert job["worker_peak_rss_bytes"] is None
+    assert job["worker_cpu_seconds"] is None
+
+
+@pytest.mark.skipif(not WORKER.exists(), reason="worker source not available in this layout")
+def test_worker_timings_and_resources_are_recorded(monkeypatch):
+    def run_worker_here(job, workspace, hot=False):
+        env = dict(os.environ, WORKSPACE_DIR=str(workspace))
+        subprocess.run([sys.executable, str(WORKER)], env=env, check=True)
+
+    monkeypatch.setattr(codex_runner.settings, "USE_DUMMY_WORKER", False)
+    monkeypatch.setattr(codex_runner, "run_worker_container", run_worker_here)
+    Base.metadata.create_all(bind=app_engine)
+    client = TestClient(create_app())
+
+    job = _create_and_fetch_job(client)
+    assert job["status"] == "completed"
+    _assert_phases_ordered(job)
+    # Interpreter start-up counts as start-up, not as worker time
+    assert job["phases"]["startup_seconds"] > 0
+    assert job["worker_peak_rss_bytes"] > 1024 * 1024
+    assert job["worker_cpu_seconds"] >= 0
+
+
+def test_worker_clock_is_clamped_to_what_the_backend_saw():
+    launched = datetime(2026, 1, 1, 12, 0, 0)
+    returned = launched + timedelta(seconds=10)
+    job = models.Job()
+    result = {"timings": {
+        "started_at": "2026-01-01T11:59:59Z",  # before launch (clock skew)
+        "finished_at": "2026-01-01T12:00:04.500000Z",
+        "peak_rss_bytes": 123456,
+        "cpu_user_seconds": 0.25,
+        "cpu_system_seconds": 0.05,
+    }}
+    codex_runner.record_worker_timings(job, result, launched, returned)
+    assert job.worker_started_at == launched
+    assert job.worker_finished_at == launched + timedelta(seconds=4.5)
+    assert job.worker_peak_rss_bytes == 123456
+    assert job.worker_cpu_seconds == 0.3
+
+    codex_runner.record_worker_timings(job, {"timings": {"started_at": "soon", "peak_rss_bytes": "big"}}, launched, returned)
+    assert (job.worker_started_at, job.worker_finished_at) == (launched, returned)
+    assert job.worker_peak_rss_bytes is None and job.worker_cpu_seconds is None
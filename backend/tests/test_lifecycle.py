@@ -0,0 +1,162 @@
+import os
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+# Ensure we can import "app.*" both locally and inside the backend container (mirror pattern from other tests)
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+CANDIDATE_PATHS = [
+    os.path.join(REPO_ROOT, "backend"),  # host repo layout
+    REPO_ROOT,  # container layout where /app/app exists
+]
+for p in CANDIDATE_PATHS:
+    if os.path.isdir(p) and p not in sys.path:
+        sys.path.insert(0, p)
+
+from backend.main import create_app  # noqa: E402
+from app.db import models  # noqa: E402
+from app.db.models import Base  # noqa: E402
+from app.db.session import engine as app_engine  # noqa: E402
+from app.services import lifecycle  # noqa: E402
+from app.services.workspaces import create_workspace  # noqa: E402
+
+
+@pytest.fixture
+def store_root(tmp_path, monkeypatch):
+    root = tmp_path / "store"
+    monkeypatch.setattr(lifecycle.settings, "STORE_ROOT", str(root))
+    return root
+
+
+@pytest.fixture
+def client():
+    Base.metadata.create_all(bind=app_engine)
+    return TestClient(create_app())
+
+
+@pytest.fixture
+def isolated_db(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'lifecycle.db'}")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    yield db
+    db.close()
+
+
+def _create_project(client) -> dict:
+    resp = client.post("/api/v1/projects/", json={"instruction": "Generate a minimal Python CLI with a test."})
+    assert resp.status_code == 200, resp.text
+    return resp.json()
+
+
+def test_create_project_leaves_no_temp_workspace(client):
+    temp = Path(lifecycle.settings.WORKSPACE_ROOT) / "temp"
+    if temp.exists():
+        temp.rmdir()
+    _create_project(client)
+    assert not temp.exists()
+
+
+def test_archived_workspace_is_restored_on_access(client, store_root: Path):
+    project_id = _create_project(client)["id"]
+    detail = client.get(f"/api/v1/projects/{project_id}").json()
+    ws = detail["workspace_path"]
+    before = client.get(f"/api/v1/{project_id}/files/app.py").json()["contents"]
+
+    assert lifecycle.archive_workspace(project_id, ws) is True
+    assert not os.path.exists(ws)
+    assert lifecycle.archive_path(project_id).exists()
+
+    resp = client.get(f"/api/v1/{project_id}/files/app.py")
+    assert resp.status_code == 200, resp.text
+    assert resp.json()["contents"] == before
+    assert not lifecycle.archive_path(project_id).exists()
+
+    # Jobs restore too
+    lifecycle.archive_workspace(project_id, ws)
+    resp = client.post(f"/api/v1/{project_id}/jobs", json={"job_type": "edit", "instruction": "After archival."})
+    assert resp.status_code == 200, resp.text
+    assert resp.json()["status"] == "completed"
+
+
+def test_project_quota_refuses_new_jobs(client, monkeypatch):
+    project_id = _create_project(client)["id"]
+    monkeypatch.setattr(lifecycle.settings, "PROJECT_DISK_QUOTA_BYTES", 1)
+    resp = client.post(f"/api/v1/{project_id}/jobs", json={"job_type": "edit", "instruction": "Over quota."})
+    assert resp.status_code == 409
+    assert resp.json()["detail"] == "Disk quota exceeded"
+
+
+def test_idle_archival_skips_active_and_busy_projects(tmp_path: Path, isolated_db, store_root: Path, monkeypatch):
+    monkeypatch.setattr(lifecycle.settings, "WORKSPACE_ROOT", str(tmp_path / "workspaces"))
+    old = datetime.utcnow() - timedelta(days=30)
+    paths = {}
+    for name in ("idle", "busy", "fresh"):
+        ws = create_workspace(name)
+        (ws / "main.py").write_text("print(1)\n", encoding="utf-8")
+        paths[name] = ws
+        isolated_db.add(models.Project(
+            id=name, instruction="x", workspace_path=str(ws),
+            created_at=old, updated_at=datetime.utcnow() if name == "fresh" else old,
+        ))
+    isolated_db.add(models.Job(project_id="busy", job_type="edit", instruction="x", status="in_progress"))
+    isolated_db.commit()
+    # The job row is fresh; backdate it so only its status keeps the project hot
+    isolated_db.query(models.Job).update({"updated_at": old})
+    isolated_db.commit()
+
+    stats = lifecycle.archive_idle_workspaces(isolated_db, ttl_seconds=24 * 3600)
+    assert stats["archived"] == 1
+    assert not paths["idle"].exists()
+    assert paths["busy"].exists() and paths["fresh"].exists()
+
+    assert lifecycle.ensure_workspace("idle") == str(paths["idle"])
+    assert (paths["idle"] / "main.py").read_text(encoding="utf-8") == "print(1)\n"
+
+
+def test_archive_rechecks_jobs_under_the_lock(tmp_path: Path, isolated_db, store_root: Path, monkeypatch):
+    monkeypatch.setattr(lifecycle.settings, "WORKSPACE_ROOT", str(tmp_path / "workspaces"))
+    ws = create_workspace("late")
+    (ws / "main.py").write_text("print(1)\n", encoding="utf-8")
+    isolated_db.add(models.Project(id="late", instruction="x", workspace_path=str(ws)))
+    # Queued after archive_idle_workspaces() computed its busy set
+    isolated_db.add(models.Job(project_id="late", job_type="edit", instruction="x", status="queued"))
+    isolated_db.commit()
+
+    assert lifecycle.archive_workspace("late", str(ws), isolated_db) is False
+    assert ws.exists() and not lifecycle.archive_path("late").exists()
+
+
+def test_orphan_gc_removes_unowned_dirs_and_archives(tmp_path: Path, isolated_db, store_root: Path, monkeypatch):
+    root = tmp_path / "workspaces"
+    monkeypatch.setattr(lifecycle.settings, "WORKSPACE_ROOT", str(root))
+    owned = root / "owned"
+    orphan = root / "orphan"
+    sharded_orphan = create_workspace("abcdef")
+    for ws in (owned, orphan):
+        ws.mkdir(parents=True)
+        (ws / "f.txt").write_text("data", encoding="utf-8")
+    isolated_db.add(models.Project(id="owned", instruction="x", workspace_path=str(owned)))
+    isolated_db.commit()
+    bundle = lifecycle.archive_path("gone")
+    bundle.parent.mkdir(parents=True)
+    bundle.write_bytes(b"stale")
+    for kind in ("snapshots", "views"):
+        for name in ("owned", "gone"):
+            (store_root / kind / name).mkdir(parents=True)
+
+    # Young orphans survive (their project row may not be committed yet)
+    assert lifecycle.gc_orphan_workspaces(isolated_db)["workspaces"] == 0
+
+    stats = lifecycle.gc_orphan_workspaces(isolated_db, min_age_seconds=0)
+    assert stats["workspaces"] == 2 and stats["archives"] == 1
+    assert owned.exists() and not orphan.exists() and not bundle.exists()
+    assert not sharded_orphan.exists()
+    assert stats["snapshots"] == 1 and stats["views"] == 1
+    assert (store_root / "snapshots" / "owned").exists() and not (store_root / "snapshots" / "gone").exists()
+    assert (store_root / "views" / "owned").exists() and not (store_root / "views" / "gone").exists()
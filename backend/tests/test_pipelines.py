@@ -0,0 +1,181 @@
+import os
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+
+# Ensure we can import "app.*" both locally and inside the backend container (mirror pattern from other tests)
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+CANDIDATE_PATHS = [
+    os.path.join(REPO_ROOT, "backend"),  # host repo layout
+    REPO_ROOT,  # container layout where /app/app exists
+]
+for p in CANDIDATE_PATHS:
+    if os.path.isdir(p) and p not in sys.path:
+        sys.path.insert(0, p)
+
+from backend.main import create_app  # noqa: E402
+from app.db.models import Base  # noqa: E402
+from app.db import models  # noqa: E402
+from app.db.session import SessionLocal, engine as app_engine  # noqa: E402
+from app.services import codex_runner  # noqa: E402
+from app.services.scheduler import JobScheduler  # noqa: E402
+from app.services.cow import write_text_private  # noqa: E402
+
+
+class FakeWorker:
+    """Appends each instruction to notes.txt; "fail" fails, "branch" waits for the other branch."""
+
+    def __init__(self):
+        self.branches = threading.Barrier(2, timeout=10)
+
+    def __call__(self, job, workspace, hot=False):
+        if job.instruction == "fail":
+            raise subprocess.CalledProcessError(1, ["worker"])
+        if job.instruction.startswith("branch"):
+            # Only returns if both branches run at the same time
+            self.branches.wait()
+        notes = workspace / "notes.txt"
+        before = notes.read_text(encoding="utf-8") if notes.exists() else ""
+        write_text_private(notes, before + job.instruction + "\n")
+        write_text_private(workspace / ".codex" / "result.json", '{"status": "success"}')
+
+
+def _setup(monkeypatch):
+    Base.metadata.create_all(bind=app_engine)
+    client = TestClient(create_app())
+    project_id = client.post("/api/v1/projects/", json={"instruction": "Generate a minimal Python CLI."}).json()["id"]
+    monkeypatch.setattr(codex_runner.settings, "USE_DUMMY_WORKER", False)
+    monkeypatch.setattr(codex_runner, "run_worker_container", FakeWorker())
+    return client, project_id
+
+
+def _notes(client: TestClient, project_id: str) -> list:
+    workspace = Path(client.get(f"/api/v1/projects/{project_id}").json()["workspace_path"])
+    return (workspace / "notes.txt").read_text(encoding="utf-8").splitlines()
+
+
+def _wait(client: TestClient, pipeline_id: str) -> dict:
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        pipeline = client.get(f"/api/v1/pipelines/{pipeline_id}").json()
+        if pipeline["status"] in ("completed", "failed"):
+            return pipeline
+        time.sleep(0.05)
+    raise AssertionError(f"pipeline {pipeline_id} did not finish: {pipeline}")
+
+
+def test_ordered_list_runs_as_a_chain(monkeypatch):
+    client, project_id = _setup(monkeypatch)
+    resp = client.post("/api/v1/pipelines/", json={
+        "project_id": project_id,
+        "steps": [{"instruction": "refactor"}, {"instruction": "add cli"}, {"instruction": "docs"}],
+    })
+    assert resp.status_code == 200, resp.text
+    submitted = resp.json()
+    assert submitted["on_failure"] == "cancel_dependents"
+    first, second, third = submitted["jobs"]
+    assert [first["depends_on"], second["depends_on"], third["depends_on"]] == [[], [first["id"]], [second["id"]]]
+
+    pipeline = _wait(client, submitted["id"])
+    assert pipeline["status"] == "completed"
+    assert [j["status"] for j in pipeline["jobs"]] == ["completed"] * 3
+    assert _notes(client, project_id) == ["refactor", "add cli", "docs"]
+
+    # A standalone job can wait on any job; it is answered queued and run by the scheduler
+    resp = client.post(f"/api/v1/{project_id}/jobs", json={
+        "job_type": "edit", "instruction": "changelog", "depends_on": [third["id"]],
+    })
+    assert resp.json()["status"] in ("queued", "in_progress", "completed")
+    job_url = f"/api/v1/{project_id}/jobs/{resp.json()['id']}"
+    deadline = time.monotonic() + 30
+    while client.get(job_url).json()["status"] != "completed" and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert client.get(job_url).json()["depends_on"] == [third["id"]]
+    assert _notes(client, project_id)[-1] == "changelog"
+
+
+def test_independent_branches_on_forks_run_in_parallel(monkeypatch):
+    client, project_id = _setup(monkeypatch)
+    fork_id = client.post(f"/api/v1/{project_id}/fork").json()["id"]
+    resp = client.post("/api/v1/pipelines/", json={
+        "steps": [
+            {"key": "a", "project_id": project_id, "instruction": "branch a", "depends_on": []},
+            {"key": "b", "project_id": fork_id, "instruction": "branch b", "depends_on": []},
+            {"key": "join", "project_id": project_id, "instruction": "join", "depends_on": ["a", "b"]},
+        ],
+    })
+    pipeline = _wait(client, resp.json()["id"])
+    assert [j["status"] for j in pipeline["jobs"]] == ["completed"] * 3
+    assert _notes(client, project_id) == ["branch a", "join"]
+    assert _notes(client, fork_id) == ["branch b"]
+
+
+def test_failure_policies(monkeypatch):
+    client, project_id = _setup(monkeypatch)
+    steps = [
+        {"key": "fail", "instruction": "fail", "depends_on": []},
+        {"key": "dependent", "instruction": "dependent", "depends_on": ["fail"]},
+        {"key": "independent", "instruction": "independent", "depends_on": []},
+    ]
+
+    def run(on_failure):
+        resp = client.post("/api/v1/pipelines/", json={"project_id": project_id, "on_failure": on_failure, "steps": steps})
+        pipeline = _wait(client, resp.json()["id"])
+        assert pipeline["status"] == "failed"
+        return {j["step"]: j["status"] for j in pipeline["jobs"]}
+
+    assert run("cancel_dependents") == {"fail": "error", "dependent": "cancelled", "independent": "completed"}
+    assert run("continue") == {"fail": "error", "dependent": "completed", "independent": "completed"}
+    # Same project: "independent" queues behind "fail", then the whole pipeline is cancelled
+    assert run("cancel_pipeline") == {"fail": "error", "dependent": "cancelled", "independent": "cancelled"}
+
+
+def test_invalid_pipelines(monkeypatch):
+    client, project_id = _setup(monkeypatch)
+
+    def submit(steps, **extra):
+        return client.post("/api/v1/pipelines/", json={"project_id": project_id, "steps": steps, **extra})
+
+    resp = submit([{"key": "a", "instruction": "x", "depends_on": ["b"]}, {"key": "b", "instruction": "y"}])
+    assert resp.status_code == 400
+    assert resp.json()["detail"] == "Dependency cycle: a -> b -> a"
+    assert submit([{"instruction": "x", "depends_on": ["nope"]}]).status_code == 400
+    assert submit([{"instruction": "x"}, {"key": "0", "instruction": "y"}]).status_code == 422
+    assert submit([{"instruction": "x"}], on_failure="retry").status_code == 422
+    assert client.post("/api/v1/pipelines/", json={"steps": [{"instruction": "x"}]}).status_code == 422
+    assert submit([{"project_id": "missing", "instruction": "x"}]).status_code == 404
+    assert client.get("/api/v1/pipelines/missing").status_code == 404
+    resp = client.post(f"/api/v1/{project_id}/jobs", json={"job_type": "edit", "instruction": "x", "depends_on": ["nope"]})
+    assert resp.status_code == 400
+
+
+def test_jobs_orphaned_by_a_previous_process_fail_on_start(monkeypatch):
+    client, project_id = _setup(monkeypatch)
+    db = SessionLocal()
+    try:
+        # A process died while running "orphan": nothing will ever finish it
+        orphan = models.Job(project_id=project_id, job_type="edit", instruction="orphan",
+                            status="in_progress", depends_on=[])
+        db.add(orphan)
+        db.commit()
+        dependent = models.Job(project_id=project_id, job_type="edit", instruction="dependent",
+                               status="queued", depends_on=[orphan.id])
+        db.add(dependent)
+        db.commit()
+        orphan_id, dependent_id = orphan.id, dependent.id
+    finally:
+        db.close()
+
+    scheduler = JobScheduler()
+    scheduler.start()
+    try:
+        orphan = client.get(f"/api/v1/{project_id}/jobs/{orphan_id}").json()
+        assert orphan["status"] == "error" and orphan["finished_at"] is not None
+        # Its dependents are released by the failure policy instead of waiting forever
+        assert client.get(f"/api/v1/{project_id}/jobs/{dependent_id}").json()["status"] == "cancelled"
+    finally:
+        scheduler.shutdown()
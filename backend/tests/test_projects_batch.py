@@ -0,0 +1,205 @@
+import asyncio
+import json
+import os
+import sys
+import time
+import uuid
+from pathlib import Path
+from types import SimpleNamespace
+
+from fastapi.testclient import TestClient
+
+# Ensure we can import "app.*" both locally and inside the backend container (mirror pattern from other tests)
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+CANDIDATE_PATHS = [
+    os.path.join(REPO_ROOT, "backend"),  # host repo layout
+    REPO_ROOT,  # container layout where /app/app exists
+]
+for p in CANDIDATE_PATHS:
+    if os.path.isdir(p) and p not in sys.path:
+        sys.path.insert(0, p)
+
+from backend.main import create_app  # noqa: E402
+from app.api.routes import projects as projects_route  # noqa: E402
+from app.db import models  # noqa: E402
+from app.db.models import Base  # noqa: E402
+from app.db.session import SessionLocal, engine as app_engine  # noqa: E402
+from app.schemas import ProjectBatchCreate  # noqa: E402
+from app.services.workspaces import workspace_dir  # noqa: E402
+
+INSTRUCTION = "Generate a minimal Python CLI."
+
+
+def _client(**kwargs) -> TestClient:
+    Base.metadata.create_all(bind=app_engine)
+    return TestClient(create_app(), **kwargs)
+
+
+def _wait_for_status(client: TestClient, project_id: str, status: str) -> dict:
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        project = client.get(f"/api/v1/projects/{project_id}").json()
+        if project["status"] == status:
+            return project
+        time.sleep(0.05)
+    raise AssertionError(f"project {project_id} is {project['status']}, not {status}")
+
+
+def test_batch_creates_projects_and_queues_initial_jobs():
+    client = _client()
+    chosen = str(uuid.uuid4())
+    resp = client.post("/api/v1/projects:batch", json={"projects": [
+        {"id": chosen, "instruction": INSTRUCTION},
+        {"instruction": INSTRUCTION},
+        {"instruction": "From a scaffold", "template": "python-cli"},
+        {"id": chosen, "instruction": INSTRUCTION},
+        {"instruction": INSTRUCTION, "template": "nope"},
+    ]})
+    assert resp.status_code == 200, resp.text
+    body = resp.json()
+    assert (body["created"], body["failed"]) == (3, 2)
+    results = body["projects"]
+    assert [r["index"] for r in results] == [0, 1, 2, 3, 4]
+    assert results[0]["id"] == chosen
+    assert [r["status"] for r in results] == ["queued", "queued", "completed", None, None]
+    assert [r["error"] for r in results] == [None, None, None, "duplicate_id", "unknown_template"]
+
+    # Template projects are ready at once; initial jobs run in the background
+    template = client.get(f"/api/v1/projects/{results[2]['id']}").json()
+    assert [j["job_type"] for j in template["jobs"]] == ["template"]
+    assert (Path(template["workspace_path"]) / "app.py").exists()
+    for result in results[:2]:
+        project = _wait_for_status(client, result["id"], "completed")
+        assert project["summary"] == "Initial job status: completed"
+        assert [(j["job_type"], j["status"]) for j in project["jobs"]] == [("initial_project", "completed")]
+        assert Path(project["workspace_path"]) == workspace_dir(result["id"])
+        assert (Path(project["workspace_path"]) / "app.py").exists()
+
+    # Retrying with the same ids does not create duplicates
+    resp = client.post("/api/v1/projects:batch", json={"projects": [{"id": chosen, "instruction": INSTRUCTION}]})
+    assert resp.json()["projects"][0]["error"] == "already_exists"
+    assert resp.json()["created"] == 0
+
+
+def test_batch_streams_ndjson():
+    client = _client()
+    resp = client.post("/api/v1/projects:batch", params={"stream": "true"}, json={"projects": [
+        {"instruction": "From a scaffold", "template": "python-cli"},
+        {"instruction": "Another scaffold", "template": "python-cli"},
+    ]})
+    assert resp.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in resp.text.splitlines()]
+    assert [line.get("index") for line in lines[:2]] == [0, 1]
+    assert lines[-1] == {"done": True, "created": 2, "failed": 0}
+
+
+def test_batch_is_all_or_nothing(monkeypatch):
+    client = _client(raise_server_exceptions=False)
+    calls = []
+
+    def materialize(name, dest):
+        calls.append(dest)
+        if len(calls) == 2:
+            raise OSError("disk full")
+
+    monkeypatch.setattr(projects_route.templates, "materialize", materialize)
+    ids = [str(uuid.uuid4()) for _ in range(3)]
+    resp = client.post("/api/v1/projects:batch", json={"projects": [
+        {"id": pid, "instruction": "From a scaffold", "template": "python-cli"} for pid in ids
+    ]})
+    assert resp.status_code == 500
+    db = SessionLocal()
+    try:
+        assert db.query(models.Project).filter(models.Project.id.in_(ids)).count() == 0
+    finally:
+        db.close()
+    assert not any(workspace_dir(pid).exists() for pid in ids)
+
+
+def test_batch_never_touches_workspaces_it_did_not_create(monkeypatch):
+    client = _client(raise_server_exceptions=False)
+    foreign, ours = str(uuid.uuid4()), str(uuid.uuid4())
+    # Another request with the same id got there first
+    workspace_dir(foreign).mkdir(parents=True)
+    (workspace_dir(foreign) / "keep.txt").write_text("mine", encoding="utf-8")
+
+    resp = client.post("/api/v1/projects:batch", json={"projects": [
+        {"id": foreign, "instruction": INSTRUCTION},
+        {"id": ours, "instruction": "From a scaffold", "template": "python-cli"},
+    ]})
+    assert [r["error"] for r in resp.json()["projects"]] == ["already_exists", None]
+
+    def materialize(name, dest):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(projects_route.templates, "materialize", materialize)
+    again = str(uuid.uuid4())
+    resp = client.post("/api/v1/projects:batch", json={"projects": [
+        {"id": foreign, "instruction": INSTRUCTION},
+        {"id": again, "instruction": "From a scaffold", "template": "python-cli"},
+    ]})
+    assert resp.status_code == 500
+    assert (workspace_dir(foreign) / "keep.txt").read_text(encoding="utf-8") == "mine"
+    assert not workspace_dir(again).exists()
+
+
+def test_ids_inserted_concurrently_are_reported_per_item(monkeypatch):
+    client = _client()
+    racing, other = str(uuid.uuid4()), str(uuid.uuid4())
+    claim = projects_route._claim_workspace
+
+    def claim_after_a_concurrent_insert(project_id):
+        if project_id == racing:
+            db = SessionLocal()
+            try:
+                db.add(models.Project(id=racing, instruction=INSTRUCTION, status="queued", workspace_path="/elsewhere"))
+                db.commit()
+            finally:
+                db.close()
+        return claim(project_id)
+
+    monkeypatch.setattr(projects_route, "_claim_workspace", claim_after_a_concurrent_insert)
+    resp = client.post("/api/v1/projects:batch", json={"projects": [
+        {"id": racing, "instruction": INSTRUCTION},
+        {"id": other, "instruction": "From a scaffold", "template": "python-cli"},
+    ]})
+    assert resp.status_code == 200, resp.text
+    body = resp.json()
+    assert [r["error"] for r in body["projects"]] == ["already_exists", None]
+    assert (body["created"], body["failed"]) == (1, 1)
+    assert not workspace_dir(racing).exists()
+    assert client.get(f"/api/v1/projects/{other}").json()["status"] == "completed"
+
+
+def test_stream_yields_each_chunk_as_it_is_committed(monkeypatch):
+    Base.metadata.create_all(bind=app_engine)
+    monkeypatch.setattr(projects_route, "_ID_CHUNK", 1)
+    ids = [str(uuid.uuid4()) for _ in range(2)]
+    payload = ProjectBatchCreate(projects=[
+        {"id": pid, "instruction": "From a scaffold", "template": "python-cli"} for pid in ids
+    ])
+    db = SessionLocal()
+    try:
+        resp = projects_route.create_projects_batch(payload, SimpleNamespace(headers={}), stream=True, db=db)
+
+        async def consume():
+            lines = resp.body_iterator
+            first = json.loads(await lines.__anext__())
+            assert first == {"index": 0, "id": ids[0], "status": "completed", "error": None}
+            # The first project is committed before the second one is even started
+            assert _project_status(ids[0]) == "completed"
+            assert not workspace_dir(ids[1]).exists()
+            return [json.loads(line) async for line in lines]
+
+        rest = asyncio.run(consume())
+        assert rest[0]["id"] == ids[1] and rest[1] == {"done": True, "created": 2, "failed": 0}
+    finally:
+        db.close()
+
+
+def _project_status(project_id: str) -> str:
+    db = SessionLocal()
+    try:
+        return db.query(models.Project.status).filter(models.Project.id == project_id).scalar()
+    finally:
+        db.close()
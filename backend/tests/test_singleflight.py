@@ -0,0 +1,125 @@
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+# Ensure we can import "app.*" both locally and inside the backend container (mirror pattern from other tests)
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+CANDIDATE_PATHS = [
+    os.path.join(REPO_ROOT, "backend"),  # host repo layout
+    REPO_ROOT,  # container layout where /app/app exists
+]
+for p in CANDIDATE_PATHS:
+    if os.path.isdir(p) and p not in sys.path:
+        sys.path.insert(0, p)
+
+from app.services.singleflight import SingleFlight  # noqa: E402
+
+
+def _run_concurrently(n, target):
+    results = [None] * n
+    errors = [None] * n
+
+    def worker(i):
+        try:
+            results[i] = target()
+        except BaseException as exc:  # noqa: BLE001 - collected for assertions
+            errors[i] = exc
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(n)]
+    for t in threads:
+        t.start()
+    return threads, results, errors
+
+
+def test_concurrent_calls_share_one_computation():
+    sf = SingleFlight(timeout=5)
+    release = threading.Event()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        release.wait(5)
+        return {"value": 42}
+
+    threads, results, errors = _run_concurrently(8, lambda: sf.do("k", compute))
+    while sf.stats()["shared"] < 7:
+        time.sleep(0.01)
+    release.set()
+    for t in threads:
+        t.join()
+
+    assert len(calls) == 1
+    assert all(r == {"value": 42} for r in results)
+    assert errors == [None] * 8
+    assert sf.in_flight() == 0
+
+
+def test_errors_are_shared_and_key_is_released():
+    sf = SingleFlight(timeout=5)
+    release = threading.Event()
+
+    def boom():
+        release.wait(5)
+        raise FileNotFoundError("missing")
+
+    threads, _, errors = _run_concurrently(3, lambda: sf.do("k", boom))
+    while sf.stats()["shared"] < 2:
+        time.sleep(0.01)
+    release.set()
+    for t in threads:
+        t.join()
+    assert all(isinstance(e, FileNotFoundError) for e in errors)
+    # A later call starts a fresh flight
+    assert sf.do("k", lambda: "ok") == "ok"
+
+
+def test_follower_timeout_runs_independently():
+    sf = SingleFlight(timeout=0.2)
+    release = threading.Event()
+    leader = threading.Thread(target=lambda: sf.do("k", lambda: release.wait(5) and "slow"))
+    leader.start()
+    while sf.in_flight() == 0:
+        time.sleep(0.01)
+
+    assert sf.do("k", lambda: "fresh") == "fresh"
+    assert sf.stats()["timeouts"] == 1
+    release.set()
+    leader.join()
+
+
+class _Cancelled(BaseException):
+    pass
+
+
+def test_leader_cancellation_is_not_propagated():
+    sf = SingleFlight(timeout=5)
+    release = threading.Event()
+
+    def cancelled():
+        release.wait(5)
+        raise _Cancelled()
+
+    leader_threads, _, leader_errors = _run_concurrently(1, lambda: sf.do("k", cancelled))
+    while sf.in_flight() == 0:
+        time.sleep(0.01)
+    follower_threads, follower_results, follower_errors = _run_concurrently(1, lambda: sf.do("k", lambda: "retried"))
+    while sf.stats()["shared"] < 1:
+        time.sleep(0.01)
+    release.set()
+    for t in leader_threads + follower_threads:
+        t.join()
+
+    assert isinstance(leader_errors[0], _Cancelled)
+    assert follower_errors[0] is None
+    assert follower_results[0] == "retried"
+    assert sf.stats()["retries"] == 1
+
+
+def test_disabled_timeout_calls_through():
+    sf = SingleFlight(timeout=0)
+    with pytest.raises(ValueError):
+        sf.do("k", lambda: (_ for _ in ()).throw(ValueError("x")))
+    assert sf.stats()["leaders"] == 0
@@ -0,0 +1,112 @@
+import os
+import sys
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+
+# Ensure we can import "app.*" both locally and inside the backend container (mirror pattern from other tests)
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+CANDIDATE_PATHS = [
+    os.path.join(REPO_ROOT, "backend"),  # host repo layout
+    REPO_ROOT,  # container layout where /app/app exists
+]
+for p in CANDIDATE_PATHS:
+    if os.path.isdir(p) and p not in sys.path:
+        sys.path.insert(0, p)
+
+from backend.main import create_app  # noqa: E402
+from app.db import models  # noqa: E402
+from app.db.models import Base  # noqa: E402
+from app.db.session import SessionLocal, engine as app_engine  # noqa: E402
+from app.services import snapshot_views  # noqa: E402
+from app.services.snapshots import take_snapshot  # noqa: E402
+
+
+def _start_job(project_id: str) -> str:
+    db = SessionLocal()
+    try:
+        job = models.Job(project_id=project_id, job_type="edit", instruction="split", status="in_progress")
+        db.add(job)
+        db.commit()
+        return job.id
+    finally:
+        db.close()
+
+
+def _finish_job(job_id: str) -> None:
+    db = SessionLocal()
+    try:
+        job = db.query(models.Job).filter(models.Job.id == job_id).one()
+        job.status = "completed"
+        db.commit()
+    finally:
+        db.close()
+
+
+def test_reads_during_a_job_see_the_last_commit(tmp_path: Path, monkeypatch):
+    monkeypatch.setattr(snapshot_views.settings, "STORE_ROOT", str(tmp_path / "store"))
+    Base.metadata.create_all(bind=app_engine)
+    client = TestClient(create_app())
+
+    resp = client.post("/api/v1/projects/", json={"instruction": "Generate a minimal Python CLI with a test."})
+    assert resp.status_code == 200, resp.text
+    project_id = resp.json()["id"]
+    workspace = Path(client.get(f"/api/v1/projects/{project_id}").json()["workspace_path"])
+    committed_app = (workspace / "app.py").read_text(encoding="utf-8")
+    committed_files = [f["path"] for f in client.get(f"/api/v1/{project_id}/files").json()["files"]]
+
+    # A job is half-way through a refactor: app.py rewritten, the new module not written yet
+    job_id = _start_job(project_id)
+    (workspace / "app.py").unlink()
+    (workspace / "app.py").write_text("from fibonacci import fib\n", encoding="utf-8")
+
+    resp = client.get(f"/api/v1/{project_id}/files/app.py")
+    assert resp.json()["contents"] == committed_app
+    assert [f["path"] for f in client.get(f"/api/v1/{project_id}/files").json()["files"]] == committed_files
+    batch = client.post(f"/api/v1/{project_id}/files:batchGet", json={"paths": ["app.py"]}).json()
+    assert batch["files"][0]["contents"] == committed_app
+
+    live = client.get(f"/api/v1/{project_id}/files/app.py", params={"consistency": "live"})
+    assert live.json()["contents"] == "from fibonacci import fib\n"
+    assert client.get(f"/api/v1/{project_id}/files", params={"consistency": "bogus"}).status_code == 422
+
+    # The view is immutable: the job cannot write through it into the committed version
+    view = Path(snapshot_views.snapshot_view(project_id))
+    assert view != workspace
+    assert (view / "app.py").stat().st_mode & 0o222 == 0
+
+    (workspace / "fibonacci.py").write_text("def fib(n):\n    return n\n", encoding="utf-8")
+    take_snapshot(project_id, job_id, str(workspace))
+    # The job's snapshot is HEAD: readers switch to the new version as a whole
+    paths = [f["path"] for f in client.get(f"/api/v1/{project_id}/files").json()["files"]]
+    assert "fibonacci.py" in paths
+    assert client.get(f"/api/v1/{project_id}/files/app.py").json()["contents"] == "from fibonacci import fib\n"
+
+    _finish_job(job_id)
+    assert client.get(f"/api/v1/{project_id}/files/fibonacci.py").status_code == 200
+
+    db = SessionLocal()
+    try:
+        stats = snapshot_views.gc_snapshot_views(db, min_age_seconds=0)
+    finally:
+        db.close()
+    # Views of the project-creation job's snapshot and the refactor's snapshot
+    assert stats["removed"] == 2
+    assert not (tmp_path / "store" / "views" / project_id).exists()
+
+
+def test_files_committed_without_a_snapshot_stay_readable(tmp_path: Path, monkeypatch):
+    monkeypatch.setattr(snapshot_views.settings, "STORE_ROOT", str(tmp_path / "store"))
+    monkeypatch.setattr(snapshot_views.settings, "SNAPSHOTS_ENABLED", False)
+    Base.metadata.create_all(bind=app_engine)
+    client = TestClient(create_app())
+    resp = client.post("/api/v1/projects/", json={"instruction": "Generate a minimal Python CLI with a test."})
+    project_id = resp.json()["id"]
+    monkeypatch.setattr(snapshot_views.settings, "SNAPSHOTS_ENABLED", True)
+
+    # Created before snapshots were on: there is no HEAD, and the files must not vanish
+    _start_job(project_id)
+    assert snapshot_views.snapshot_view(project_id) is None
+    paths = [f["path"] for f in client.get(f"/api/v1/{project_id}/files").json()["files"]]
+    assert "app.py" in paths
+    assert client.get(f"/api/v1/{project_id}/files/app.py").status_code == 200
@@ -0,0 +1,142 @@
+import os
+import sys
+import json
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+# Ensure we can import "app.*" both locally and inside the backend container (mirror pattern from other tests)
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+CANDIDATE_PATHS = [
+    os.path.join(REPO_ROOT, "backend"),  # host repo layout
+    REPO_ROOT,  # container layout where /app/app exists
+]
+for p in CANDIDATE_PATHS:
+    if os.path.isdir(p) and p not in sys.path:
+        sys.path.insert(0, p)
+
+from backend.main import create_app  # noqa: E402
+from app.db.models import Base, Job  # noqa: E402
+from app.db.session import engine as app_engine, SessionLocal as AppSessionLocal  # noqa: E402
+from app.services import blobs, snapshots  # noqa: E402
+
+
+@pytest.fixture
+def store_root(tmp_path, monkeypatch):
+    root = tmp_path / "store"
+    monkeypatch.setattr(snapshots.settings, "STORE_ROOT", str(root))
+    monkeypatch.setattr(blobs.settings, "STORE_ROOT", str(root))
+    return root
+
+
+def test_snapshot_diff_and_restore(tmp_path: Path, store_root: Path):
+    ws = tmp_path / "ws_snap"
+    ws.mkdir()
+    (ws / "app.py").write_text("print(1)\n", encoding="utf-8")
+    (ws / "README.md").write_text("# Hi\n", encoding="utf-8")
+
+    first = snapshots.take_snapshot("p1", "job1", str(ws))
+    assert set(first["files"]) == {"app.py", "README.md"}
+    assert first["parent"] is None
+
+    (ws / "app.py").write_text("print(2)\n", encoding="utf-8")
+    (ws / "new.py").write_text("x = 1\n", encoding="utf-8")
+    (ws / "README.md").unlink()
+    second = snapshots.take_snapshot("p1", "job2", str(ws))
+    assert second["parent"] == "job1"
+    assert snapshots.head_job_id("p1") == "job2"
+
+    diff = snapshots.diff_job("p1", "job2")
+    assert diff["base_job_id"] == "job1"
+    kinds = {c["path"]: c["change"] for c in diff["changes"]}
+    assert kinds == {"app.py": "modified", "new.py": "added", "README.md": "deleted"}
+
+    patch = snapshots.unified_diff(diff["changes"])
+    assert "-print(1)\n+print(2)\n" in patch
+    assert "--- /dev/null\n+++ b/new.py" in patch
+
+    # Identical content is stored once
+    blob_count = len(list(snapshots.get_blob_store().iter_blobs()))
+    snapshots.take_snapshot("p1", "job3", str(ws))
+    assert len(list(snapshots.get_blob_store().iter_blobs())) == blob_count
+
+    applied = snapshots.restore_snapshot("p1", "job1", str(ws))
+    assert {c["path"] for c in applied} == {"app.py", "new.py", "README.md"}
+    assert (ws / "app.py").read_text(encoding="utf-8") == "print(1)\n"
+    assert (ws / "README.md").read_text(encoding="utf-8") == "# Hi\n"
+    assert not (ws / "new.py").exists()
+
+
+def test_snapshot_reuses_hashes_for_unchanged_files(tmp_path: Path, store_root: Path, monkeypatch):
+    ws = tmp_path / "ws_snap_stat"
+    ws.mkdir()
+    for i in range(5):
+        (ws / f"f{i}.txt").write_text(f"{i}\n", encoding="utf-8")
+    snapshots.take_snapshot("p2", "a", str(ws))
+
+    (ws / "f0.txt").write_text("changed\n", encoding="utf-8")
+    copied = []
+    real_put = snapshots.BlobStore.put_file
+
+    def counting_put(self, source):
+        copied.append(Path(source).name)
+        return real_put(self, source)
+
+    monkeypatch.setattr(snapshots.BlobStore, "put_file", counting_put)
+    snapshots.take_snapshot("p2", "b", str(ws))
+    assert copied == ["f0.txt"]
+
+
+def test_job_diff_and_restore_api(store_root: Path):
+    Base.metadata.create_all(bind=app_engine)
+    client = TestClient(create_app())
+
+    resp = client.post("/api/v1/projects/", json={"instruction": "Generate a minimal Python CLI with a test."})
+    assert resp.status_code == 200, resp.text
+    pid = resp.json()["id"]
+    initial_job = client.get(f"/api/v1/projects/{pid}").json()["jobs"][0]["id"]
+
+    resp = client.get(f"/api/v1/{pid}/jobs/{initial_job}/diff")
+    assert resp.status_code == 200, resp.text
+    added = {c["path"] for c in resp.json()["changes"] if c["change"] == "added"}
+    assert {"README.md", "app.py", "tests/test_cli.py"} <= added
+
+    resp = client.post(f"/api/v1/{pid}/jobs", json={"job_type": "edit", "instruction": "Append a comment."})
+    edit_job = resp.json()["id"]
+    resp = client.get(f"/api/v1/{pid}/jobs/{edit_job}/diff", params={"format": "unified"})
+    body = resp.json()
+    assert body["base_job_id"] == initial_job
+    assert [c["path"] for c in body["changes"]] == [".codex/request.json"]
+    assert '+  "instruction": "Append a comment."' in body["unified"]
+
+    resp = client.post(f"/api/v1/{pid}/jobs/{initial_job}/restore")
+    assert resp.status_code == 200, resp.text
+    assert resp.json()["job_type"] == "restore"
+    request_json = json.loads(client.get(f"/api/v1/{pid}/files/.codex/request.json").json()["contents"])
+    assert request_json["job_id"] == initial_job
+
+    assert client.get(f"/api/v1/{pid}/jobs/does-not-exist/diff").status_code == 404
+
+
+def test_restore_refused_while_job_running(store_root: Path):
+    Base.metadata.create_all(bind=app_engine)
+    client = TestClient(create_app())
+
+    resp = client.post("/api/v1/projects/", json={"instruction": "Generate a minimal Python CLI with a test."})
+    pid = resp.json()["id"]
+    initial_job = client.get(f"/api/v1/projects/{pid}").json()["jobs"][0]["id"]
+
+    db = AppSessionLocal()
+    try:
+        db.add(Job(project_id=pid, job_type="edit", instruction="Still running.", status="in_progress"))
+        db.commit()
+        resp = client.post(f"/api/v1/{pid}/jobs/{initial_job}/restore")
+        assert resp.status_code == 409, resp.text
+        assert "running" in resp.json()["detail"]
+
+        db.query(Job).filter(Job.project_id == pid, Job.status == "in_progress").update({"status": "error"})
+        db.commit()
+    finally:
+        db.close()
+    assert client.post(f"/api/v1/{pid}/jobs/{initial_job}/restore").status_code == 200
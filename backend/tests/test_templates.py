@@ -0,0 +1,97 @@
+import os
+import stat
+import sys
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+# Ensure we can import "app.*" both locally and inside the backend container (mirror pattern from other tests)
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+CANDIDATE_PATHS = [
+    os.path.join(REPO_ROOT, "backend"),  # host repo layout
+    REPO_ROOT,  # container layout where /app/app exists
+]
+for p in CANDIDATE_PATHS:
+    if os.path.isdir(p) and p not in sys.path:
+        sys.path.insert(0, p)
+
+from backend.main import create_app  # noqa: E402
+from app.db.models import Base  # noqa: E402
+from app.db.session import engine as app_engine  # noqa: E402
+from app.services import templates as templates_module  # noqa: E402
+from app.services.cow import write_text_private  # noqa: E402
+from app.services.templates import TemplateRegistry, UnknownTemplate  # noqa: E402
+
+
+@pytest.fixture
+def store_root(tmp_path, monkeypatch):
+    root = tmp_path / "store"
+    monkeypatch.setattr(templates_module.settings, "STORE_ROOT", str(root))
+    return root
+
+
+def test_prebuilt_template_is_immutable_and_shared(tmp_path: Path, store_root: Path):
+    src = tmp_path / "src"
+    (src / "pkg").mkdir(parents=True)
+    (src / "pkg" / "mod.py").write_text("x = 1\n", encoding="utf-8")
+    registry = TemplateRegistry({"demo": src, "missing": None})
+    assert registry.names() == ["demo"]
+    with pytest.raises(UnknownTemplate):
+        registry.prebuilt("missing")
+
+    built = registry.prebuilt("demo")
+    assert built.parent == store_root / "templates"
+    assert not os.stat(built / "pkg" / "mod.py").st_mode & stat.S_IWUSR
+
+    ws = tmp_path / "ws"
+    stats = registry.materialize("demo", ws, mode="hardlink")
+    assert stats["hardlink"] == 1
+    assert os.stat(ws / "pkg" / "mod.py").st_ino == os.stat(built / "pkg" / "mod.py").st_ino
+
+    # Writers get a private copy; the build is untouched
+    write_text_private(ws / "pkg" / "mod.py", "x = 2\n")
+    assert (built / "pkg" / "mod.py").read_text(encoding="utf-8") == "x = 1\n"
+
+    # The default never hardlinks: in-place writes cannot reach the build
+    stats = registry.materialize("demo", tmp_path / "ws_auto", mode="auto")
+    assert stats["hardlink"] == 0
+    auto_file = tmp_path / "ws_auto" / "pkg" / "mod.py"
+    assert os.stat(auto_file).st_ino != os.stat(built / "pkg" / "mod.py").st_ino
+    with open(auto_file, "a", encoding="utf-8") as fh:
+        fh.write("y = 2\n")
+    assert (built / "pkg" / "mod.py").read_text(encoding="utf-8") == "x = 1\n"
+
+    # Plain copies are private and writable
+    registry.materialize("demo", tmp_path / "ws_copy", mode="copy")
+    assert os.stat(tmp_path / "ws_copy" / "pkg" / "mod.py").st_mode & stat.S_IWUSR
+
+    # Editing the source yields a new build; the old one stays intact
+    (src / "pkg" / "mod.py").write_text("x = 3\n", encoding="utf-8")
+    fresh = TemplateRegistry({"demo": src}).prebuilt("demo")
+    assert fresh != built and (built / "pkg" / "mod.py").read_text(encoding="utf-8") == "x = 1\n"
+
+
+def test_create_project_from_template(store_root: Path):
+    Base.metadata.create_all(bind=app_engine)
+    client = TestClient(create_app())
+
+    listed = {t["name"]: t["files"] for t in client.get("/api/v1/templates").json()["templates"]}
+    assert listed["python-cli"] == ["README.md", "app.py", "tests/test_cli.py"]
+    assert "index.html" in listed["snake"]
+
+    resp = client.post("/api/v1/projects/", json={"instruction": "Start a snake game.", "template": "snake"})
+    assert resp.status_code == 200, resp.text
+    project = resp.json()
+    assert project["status"] == "completed"
+
+    files = [f["path"] for f in client.get(f"/api/v1/{project['id']}/files").json()["files"]]
+    assert {"index.html", "main.js", "style.css"} <= set(files)
+    jobs = client.get(f"/api/v1/projects/{project['id']}").json()["jobs"]
+    assert [j["job_type"] for j in jobs] == ["template"]
+    assert client.get(f"/api/v1/{project['id']}/jobs/{jobs[0]['id']}/diff").status_code == 200
+
+    resp = client.post("/api/v1/projects/", json={"instruction": "Start something.", "template": "nope"})
+    assert resp.status_code == 400
+    resp = client.post("/api/v1/projects/", json={"instruction": "Start something.", "template": "../etc"})
+    assert resp.status_code == 422
@@ -0,0 +1,182 @@
+import os
+import sys
+import time
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+# Ensure we can import "app.*" both locally and inside the backend container (mirror pattern from other tests)
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+CANDIDATE_PATHS = [
+    os.path.join(REPO_ROOT, "backend"),  # host repo layout
+    REPO_ROOT,  # container layout where /app/app exists
+]
+for p in CANDIDATE_PATHS:
+    if os.path.isdir(p) and p not in sys.path:
+        sys.path.insert(0, p)
+
+from backend.main import create_app  # noqa: E402
+from app.db.models import Base  # noqa: E402
+from app.db.session import engine as app_engine  # noqa: E402
+from app.services import verification  # noqa: E402
+from app.services.snapshots import take_snapshot  # noqa: E402
+
+APP = "def fibonacci(n):\n    seq = [0, 1]\n    while len(seq) < n:\n        seq.append(seq[-1] + seq[-2])\n    return seq[:n]\n"
+
+
+def _wait_for_verification(client: TestClient, project_id: str, job_id: str) -> dict:
+    deadline = time.monotonic() + 60
+    while True:
+        job = client.get(f"/api/v1/{project_id}/jobs/{job_id}").json()
+        if job["verification_status"] != "pending" or time.monotonic() > deadline:
+            return job
+        time.sleep(0.05)
+
+
+def _create_project(client: TestClient) -> tuple:
+    resp = client.post("/api/v1/projects/", json={"instruction": "Generate a minimal Python CLI with a test."})
+    assert resp.status_code == 200, resp.text
+    project = client.get(f"/api/v1/projects/{resp.json()['id']}").json()
+    return project["id"], project["jobs"][0]["id"]
+
+
+def test_successful_jobs_are_verified_once_per_tree(tmp_path: Path, monkeypatch):
+    monkeypatch.setattr(verification.settings, "STORE_ROOT", str(tmp_path / "store"))
+    monkeypatch.setattr(verification.settings, "VERIFY_JOBS", True)
+    Base.metadata.create_all(bind=app_engine)
+    client = TestClient(create_app())
+
+    first = _wait_for_verification(client, *_create_project(client))
+    assert first["verification_status"] == "passed", first["verification_output"]
+    assert first["verification_cached"] is False
+    assert first["verification_exit_code"] == 0
+    assert "1 passed" in first["verification_output"]
+
+    # Another project generated the same tree: its job is answered from the cache
+    second = _wait_for_verification(client, *_create_project(client))
+    assert second["verification_status"] == "passed"
+    assert second["verification_cached"] is True
+    assert second["verification_tree_sha256"] == first["verification_tree_sha256"]
+
+
+def test_verify_endpoint(tmp_path: Path, monkeypatch):
+    monkeypatch.setattr(verification.settings, "STORE_ROOT", str(tmp_path / "store"))
+    Base.metadata.create_all(bind=app_engine)
+    client = TestClient(create_app())
+    project_id, job_id = _create_project(client)
+    assert client.get(f"/api/v1/{project_id}/jobs/{job_id}").json()["verification_status"] is None
+
+    resp = client.post(f"/api/v1/{project_id}/jobs/{job_id}/verify")
+    assert resp.status_code == 202
+    assert resp.json()["verification_status"] == "pending"
+    job = _wait_for_verification(client, project_id, job_id)
+    assert job["verification_status"] == "passed"
+    assert job["verified_at"] is not None
+    assert client.post(f"/api/v1/{project_id}/jobs/nope/verify").status_code == 404
+
+
+def test_failures_are_cached_but_timeouts_are_not(tmp_path: Path, monkeypatch):
+    monkeypatch.setattr(verification.settings, "STORE_ROOT", str(tmp_path / "store"))
+    ws = tmp_path / "ws"
+    (ws / "tests").mkdir(parents=True)
+    (ws / ".codex").mkdir()
+    (ws / "app.py").write_text(APP, encoding="utf-8")
+    (ws / ".codex" / "result.json").write_text("{}", encoding="utf-8")
+    (ws / "tests" / "test_app.py").write_text(
+        "from app import fibonacci\n\ndef test_fib():\n    assert fibonacci(3) == [0, 1, 2]\n", encoding="utf-8"
+    )
+
+    take_snapshot("p", "j", str(ws))
+    outcome = verification.verify_job("p", "j")
+    assert outcome["status"] == "failed"
+    assert outcome["exit_code"] == 1 and outcome["cached"] is False
+    assert "assert" in outcome["output"]
+    assert not (ws / ".pytest_cache").exists() and not (ws / "tests" / "__pycache__").exists()
+
+    # .codex artifacts are not part of the tree
+    (ws / ".codex" / "result.json").write_text('{"status": "success"}', encoding="utf-8")
+    take_snapshot("p", "j2", str(ws))
+    again = verification.verify_job("p", "j2")
+    assert again["cached"] is True and again["tree_sha256"] == outcome["tree_sha256"]
+
+    (ws / "tests" / "test_app.py").write_text("import time\n\ndef test_slow():\n    time.sleep(30)\n", encoding="utf-8")
+    monkeypatch.setattr(verification.settings, "VERIFY_TIMEOUT_SECONDS", 1.0)
+    take_snapshot("p", "j3", str(ws))
+    started = time.monotonic()
+    slow = verification.verify_job("p", "j3")
+    assert slow["status"] == "timeout"
+    assert time.monotonic() - started < 10
+    assert verification.verify_job("p", "j3")["cached"] is False
+
+
+def test_real_worker_mode_runs_tests_in_a_container(tmp_path: Path, monkeypatch):
+    monkeypatch.setattr(verification.settings, "STORE_ROOT", str(tmp_path / "store"))
+    monkeypatch.setattr(verification.settings, "WORKSPACE_ROOT", str(tmp_path / "workspaces"))
+    monkeypatch.setattr(verification.settings, "HOST_WORKSPACES_DIR", "/srv/workspaces")
+    monkeypatch.setattr(verification.settings, "USE_DUMMY_WORKER", False)
+    monkeypatch.setattr(verification.settings, "VERIFY_IMAGE", "codex-verify:test")
+    ws = tmp_path / "ws"
+    (ws / "tests").mkdir(parents=True)
+    (ws / "tests" / "test_ok.py").write_text("def test_ok():\n    assert True\n", encoding="utf-8")
+    take_snapshot("p", "j", str(ws))
+
+    seen = {}
+
+    def fake_run(cmd, cwd=None, env=None, on_timeout=None):
+        mount = cmd[cmd.index("-v") + 1]
+        copy = Path(verification.settings.WORKSPACE_ROOT) / mount.split(":")[0][len("/srv/workspaces/"):]
+        seen.update(cmd=cmd, copied=(copy / "tests" / "test_ok.py").exists())
+        return {"status": "passed", "exit_code": 0, "output": "1 passed", "duration_seconds": 0.1}
+
+    monkeypatch.setattr(verification, "_run_command", fake_run)
+    outcome = verification.verify_job("p", "j")
+    assert outcome["status"] == "passed"
+    cmd = seen["cmd"]
+    assert cmd[:3] == ["docker", "run", "--rm"]
+    assert cmd[cmd.index("--network") + 1] == "none"
+    assert "codex-verify:test" in cmd and cmd[-3:] == ["-q", "-p", "no:cacheprovider"]
+    assert cmd[cmd.index("codex-verify:test") + 1] == "python"
+    assert seen["copied"]
+    # The copy is gone afterwards and never mistaken for a workspace
+    assert list((tmp_path / "workspaces" / ".verify").iterdir()) == []
+
+
+def test_a_missing_test_runner_is_an_error_and_not_cached(tmp_path: Path, monkeypatch):
+    monkeypatch.setattr(verification.settings, "STORE_ROOT", str(tmp_path / "store"))
+    monkeypatch.setattr(verification.settings, "VERIFY_COMMAND", "{python} -m codex_no_such_runner -q")
+    ws = tmp_path / "ws"
+    ws.mkdir()
+    (ws / "app.py").write_text(APP, encoding="utf-8")
+    take_snapshot("p", "j", str(ws))
+
+    outcome = verification.verify_job("p", "j")
+    assert outcome["status"] == "error" and outcome["exit_code"] == 1
+    assert "No module named codex_no_such_runner" in outcome["output"]
+    assert verification.verify_job("p", "j")["cached"] is False
+
+
+def test_jobs_without_a_snapshot_or_image_are_not_verified(tmp_path: Path, monkeypatch):
+    monkeypatch.setattr(verification.settings, "STORE_ROOT", str(tmp_path / "store"))
+    monkeypatch.setattr(verification.settings, "SNAPSHOTS_ENABLED", False)
+    Base.metadata.create_all(bind=app_engine)
+    client = TestClient(create_app())
+    project_id, job_id = _create_project(client)
+
+    # The workspace is not hashed in the snapshot's place
+    with pytest.raises(verification.VerificationUnavailable):
+        verification.verify_job(project_id, job_id)
+    resp = client.post(f"/api/v1/{project_id}/jobs/{job_id}/verify")
+    assert resp.status_code == 409 and "no snapshot" in resp.json()["detail"]
+    assert verification.verifier.submit(project_id, job_id).result(timeout=30) == "error"
+    assert "no snapshot" in client.get(f"/api/v1/{project_id}/jobs/{job_id}").json()["verification_output"]
+
+    # In a container the worker image has no test runner: VERIFY_IMAGE is required
+    ws = tmp_path / "ws"
+    ws.mkdir()
+    (ws / "app.py").write_text(APP, encoding="utf-8")
+    take_snapshot("p", "j", str(ws))
+    monkeypatch.setattr(verification.settings, "USE_DUMMY_WORKER", False)
+    monkeypatch.setattr(verification.settings, "VERIFY_IMAGE", "")
+    with pytest.raises(verification.VerificationUnavailable, match="VERIFY_IMAGE"):
+        verification.verify_job("p", "j")
@@ -0,0 +1,118 @@
+import importlib.util
+import os
+from pathlib import Path
+
+import pytest
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+WORKER = Path(REPO_ROOT) / "worker" / "run_codex_job.py"
+
+pytestmark = pytest.mark.skipif(not WORKER.exists(), reason="worker source not available in this layout")
+
+
+@pytest.fixture(scope="module")
+def worker():
+    spec = importlib.util.spec_from_file_location("run_codex_job", WORKER)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _registry(worker, calls: list, specs):
+    registry = worker.EditHandlerRegistry()
+    for name, options in specs:
+        registry.handler(name, **options)(lambda workspace, instruction, name=name: calls.append(name))
+    return registry
+
+
+def test_handlers_writing_the_same_file_conflict(worker, tmp_path: Path):
+    calls, stats = [], []
+    registry = _registry(worker, calls, [
+        ("rename", {"when": ("rename",), "writes": ("app.py",), "priority": 20}),
+        ("docs", {"when": ("rename",), "writes": ("README.md",), "priority": 30}),
+        ("retitle", {"when": ("rename",), "writes": ("README.md", "app.py"), "priority": 10}),
+    ])
+
+    registry.apply(tmp_path, "Rename the app", stats)
+
+    # The first handler to claim a file wins it; later ones writing it are skipped
+    assert calls == ["retitle"]
+    assert [(s["name"], s["status"]) for s in stats] == [
+        ("_match", "matched"),
+        ("retitle", "applied"),
+        ("rename", "skipped: conflicts with retitle"),
+        ("docs", "skipped: conflicts with retitle"),
+    ]
+
+
+def test_handlers_writing_different_files_all_apply(worker, tmp_path: Path):
+    calls, stats = [], []
+    registry = _registry(worker, calls, [
+        ("code", {"when": ("rename",), "writes": ("app.py",)}),
+        ("docs", {"when": ("rename",), "writes": ("README.md",)}),
+    ])
+
+    registry.apply(tmp_path, "rename", stats)
+
+    assert calls == ["code", "docs"]
+    assert [s["status"] for s in stats[1:]] == ["applied", "applied"]
+
+
+def test_priority_orders_handlers_and_ties_keep_registration_order(worker):
+    registry = _registry(worker, [], [
+        ("late", {"when": ("go",), "priority": 200}),
+        ("first", {"when": ("go",), "priority": 100}),
+        ("second", {"when": ("go",), "priority": 100}),
+        ("early", {"when": ("go",), "priority": 5}),
+        ("third", {"when": ("go",)}),
+    ])
+
+    assert [h.name for h in registry.handlers] == ["early", "first", "second", "third", "late"]
+    assert [h.name for h, _ in registry.match("go")] == ["early", "first", "second", "third", "late"]
+
+
+def test_fallback_applies_only_when_nothing_else_matches(worker):
+    registry = _registry(worker, [], [
+        ("default", {"fallback": True, "priority": 1}),
+        ("tests", {"when": ("test",)}),
+    ])
+
+    assert [h.name for h, _ in registry.match("add a test")] == ["tests"]
+    assert [(h.name, hits) for h, hits in registry.match("something else")] == [("default", 0)]
+
+
+def _naive_counts(patterns, text: str) -> dict:
+    """Overlapping occurrences of each keyword, checked at every position."""
+    counts = {}
+    for p in set(patterns):
+        n = sum(1 for i in range(len(text)) if text.startswith(p, i))
+        if n:
+            counts[p] = n
+    return counts
+
+
+@pytest.mark.parametrize("patterns, text", [
+    (["test", "tests", "testing"], "add tests, then testing the test"),
+    (["aa", "a", "aaa"], "aaaa"),
+    (["ana", "an", "nan"], "banana"),
+    (["15", "1", "5"], "increase to 15, then 155"),
+    (["readme", "read", "me"], "readme"),
+    (["add", "dd"], "add"),
+    (["start", "end"], "start in the middle and end"),
+    (["x"], ""),
+    ([], "anything"),
+    (["a.b", "(", "|"], "a.b (x|y) axb"),
+])
+def test_pattern_matcher_agrees_with_naive_search(worker, patterns, text):
+    assert worker.PatternMatcher(patterns).find(text) == _naive_counts(patterns, text)
+
+
+def test_pattern_matcher_agrees_on_the_registered_keywords(worker):
+    keywords = worker.EDIT_HANDLERS.matcher().patterns
+    for text in (
+        "increase to 15 and add tests to the readme",
+        "add a cli with argparse, then document it in the readme",
+        "rename the project and add logging",
+        "nothing to see here",
+    ):
+        assert worker.PatternMatcher(keywords).find(text) == _naive_counts(keywords, text)
@@ -0,0 +1,72 @@
+import importlib.util
+import os
+from pathlib import Path
+
+import pytest
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+WORKER = Path(REPO_ROOT) / "worker" / "run_codex_job.py"
+
+pytestmark = pytest.mark.skipif(not WORKER.exists(), reason="worker source not available in this layout")
+
+
+@pytest.fixture(scope="module")
+def worker():
+    spec = importlib.util.spec_from_file_location("run_codex_job", WORKER)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture
+def workspace(tmp_path: Path) -> Path:
+    (tmp_path / "src").mkdir()
+    (tmp_path / "app.py").write_text("print(1)\n", encoding="utf-8")
+    (tmp_path / "src" / "util.py").write_text("X = 1\n", encoding="utf-8")
+    return tmp_path
+
+
+def test_commit_writes_only_changed_files(worker, workspace: Path):
+    overlay = worker.WorkspaceOverlay(workspace)
+    untouched = os.stat(workspace / "src" / "util.py")
+
+    assert overlay.write(workspace / "src" / "util.py", "X = 1\n") is False
+    assert overlay.write(workspace / "app.py", "print(2)\n") is True
+    assert overlay.write(workspace / "new.py", "Y = 2\n") is True
+    # Nothing reaches the workspace before commit()
+    assert (workspace / "app.py").read_text(encoding="utf-8") == "print(1)\n"
+    assert not (workspace / "new.py").exists()
+
+    assert overlay.commit() == (["new.py"], ["app.py"])
+    assert (workspace / "app.py").read_text(encoding="utf-8") == "print(2)\n"
+    assert (workspace / "new.py").read_text(encoding="utf-8") == "Y = 2\n"
+    after = os.stat(workspace / "src" / "util.py")
+    assert (after.st_ino, after.st_mtime_ns) == (untouched.st_ino, untouched.st_mtime_ns)
+
+
+def test_discard_leaves_the_workspace_untouched(worker, workspace: Path):
+    before = {p: p.read_bytes() for p in workspace.rglob("*") if p.is_file()}
+    overlay = worker.WorkspaceOverlay(workspace)
+    overlay.write(workspace / "app.py", "print(2)\n")
+    overlay.write(workspace / "created.py", "Z = 3\n")
+
+    overlay.discard()
+    assert {p: p.read_bytes() for p in workspace.rglob("*") if p.is_file()} == before
+    # The overlay reads the disk again afterwards
+    assert overlay.read(workspace / "app.py") == b"print(1)\n"
+    assert overlay.changes() == ([], [])
+
+
+def test_unchanged_rewrites_are_not_changes(worker, workspace: Path):
+    overlay = worker.WorkspaceOverlay(workspace)
+    mtime = os.stat(workspace / "app.py").st_mtime_ns
+
+    # Edited, then reverted to the bytes on disk
+    assert overlay.write(workspace / "app.py", "print(2)\n") is True
+    assert overlay.write(workspace / "app.py", "print(1)\n") is True
+    # Rewritten with the bytes it already has
+    assert overlay.write(workspace / "src" / "util.py", "X = 1\n") is False
+
+    assert overlay.changes() == ([], [])
+    assert overlay.commit() == ([], [])
+    assert os.stat(workspace / "app.py").st_mtime_ns == mtime
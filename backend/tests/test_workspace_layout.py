@@ -0,0 +1,114 @@
+import os
+import sys
+
+from fastapi.testclient import TestClient
+
+# Ensure we can import "app.*" both locally and inside the backend container (mirror pattern from other tests)
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+CANDIDATE_PATHS = [
+    os.path.join(REPO_ROOT, "backend"),  # host repo layout
+    REPO_ROOT,  # container layout where /app/app exists
+]
+for p in CANDIDATE_PATHS:
+    if os.path.isdir(p) and p not in sys.path:
+        sys.path.insert(0, p)
+
+from backend.main import create_app  # noqa: E402
+from app.db import models  # noqa: E402
+from app.db.models import Base  # noqa: E402
+from app.db.session import SessionLocal, engine as app_engine  # noqa: E402
+from app.services import codex_runner  # noqa: E402
+from app.services.codex_runner import worker_mount_args  # noqa: E402
+from app.services.lifecycle import ensure_workspace, locked_workspace, project_lock  # noqa: E402
+from app.services.workspaces import legacy_workspace_dir, resolve_workspace_dir, workspace_dir  # noqa: E402
+
+
+def _client() -> TestClient:
+    Base.metadata.create_all(bind=app_engine)
+    return TestClient(create_app())
+
+
+def test_new_projects_use_sharded_layout():
+    client = _client()
+    resp = client.post("/api/v1/projects/", json={"instruction": "Generate a minimal Python CLI with a test."})
+    assert resp.status_code == 200, resp.text
+    project_id = resp.json()["id"]
+
+    ws = workspace_dir(project_id)
+    hexid = project_id.replace("-", "")
+    assert ws.parent.name == hexid[2:4] and ws.parent.parent.name == hexid[0:2]
+    assert (ws / "app.py").exists()
+    assert not legacy_workspace_dir(project_id).exists()
+
+
+def test_legacy_workspace_resolves_and_migrates_online():
+    client = _client()
+    resp = client.post("/api/v1/projects/", json={"instruction": "Generate a minimal Python CLI with a test."})
+    project_id = resp.json()["id"]
+
+    # Simulate a project created before sharding
+    sharded = workspace_dir(project_id)
+    legacy = legacy_workspace_dir(project_id)
+    os.rename(sharded, legacy)
+    db = SessionLocal()
+    try:
+        project = db.query(models.Project).filter(models.Project.id == project_id).first()
+        project.workspace_path = str(legacy)
+        for job in project.jobs:
+            job.result_path = str(legacy / ".codex" / "result.json")
+        db.commit()
+
+        assert resolve_workspace_dir(project_id) == legacy
+        assert client.get(f"/api/v1/{project_id}/files/app.py").status_code == 200
+
+        # A queued or running job keeps the workspace where it is
+        busy = models.Job(project_id=project_id, job_type="edit", instruction="busy", status="in_progress")
+        db.add(busy)
+        db.commit()
+        resp = client.post("/api/v1/storage/layout/migrate")
+        assert resp.status_code == 200, resp.text
+        assert resp.json()["busy"] >= 1
+        assert legacy.is_dir()
+
+        db.delete(busy)
+        db.commit()
+        resp = client.post("/api/v1/storage/layout/migrate")
+        assert resp.json()["migrated"] >= 1
+        db.refresh(project)
+        assert project.workspace_path == str(sharded)
+        assert all(job.result_path.startswith(str(sharded)) for job in project.jobs)
+    finally:
+        db.close()
+
+    assert not legacy.exists() and sharded.is_dir()
+    assert client.get(f"/api/v1/{project_id}/files/app.py").status_code == 200
+
+
+def test_lock_holders_resolve_the_workspace_again():
+    client = _client()
+    project_id = client.post("/api/v1/projects/", json={"instruction": "Generate a minimal Python CLI."}).json()["id"]
+    sharded = workspace_dir(project_id)
+    legacy = legacy_workspace_dir(project_id)
+    os.rename(sharded, legacy)
+
+    # Resolved before the lock, moved into its shard while the caller waited for it
+    assert ensure_workspace(project_id) == str(legacy)
+    os.rename(legacy, sharded)
+    with project_lock(project_id):
+        assert locked_workspace(project_id, str(legacy)) == str(sharded)
+
+
+def test_worker_mounts_only_the_project_directory(monkeypatch):
+    ws = workspace_dir("0123abcd")
+    ws.mkdir(parents=True, exist_ok=True)
+
+    monkeypatch.setattr(codex_runner.settings, "HOST_WORKSPACES_DIR", "/srv/codex/workspaces/")
+    args, container_ws = worker_mount_args(ws)
+    assert args == ["-v", "/srv/codex/workspaces/01/23/0123abcd:/workspace"]
+    assert container_ws == "/workspace"
+
+    monkeypatch.setattr(codex_runner.settings, "HOST_WORKSPACES_DIR", "")
+    args, container_ws = worker_mount_args(ws)
+    assert args == ["--volumes-from", "codex-backend"]
+    assert container_ws == "/app/workspaces/01/23/0123abcd"
+    os.rmdir(ws)
@@ -0,0 +1,103 @@
+"""
+Benchmark the worker's edit-handler matching over the live-suite instruction corpus.
+
+- Corpus: the default instructions of tools/http/live_suite/*.sh (plus a
+  fallback instruction), so it follows the suite as scenarios are added.
+- Compares the compiled matcher (one regex alternation of every handler
+  pattern, scanned once per instruction) with evaluating every handler
+  rule by plain substring checks, and checks both select the same handlers.
+- Then replays the corpus as one job sequence on a scratch workspace and
+  prints the per-handler hits and timings the worker reports.
+
+Usage: python tools/bench/edit_matching.py [--iterations N]
+"""
+import argparse
+import importlib.util
+import os
+import re
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+SUITE_DIR = REPO_ROOT / "tools" / "http" / "live_suite"
+INSTRUCTION_RE = re.compile(r'^INSTR\w*="\$\{INSTR\w*:-(.*)\}"\s*$', re.MULTILINE)
+
+
+def load_worker(workspace: Path):
+    os.environ["WORKSPACE_DIR"] = str(workspace)
+    spec = importlib.util.spec_from_file_location("run_codex_job", REPO_ROOT / "worker" / "run_codex_job.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def load_corpus() -> list:
+    corpus = []
+    for script in sorted(SUITE_DIR.glob("*.sh")):
+        corpus += INSTRUCTION_RE.findall(script.read_text(encoding="utf-8"))
+    corpus.append("Append a comment line to app.py describing the change.")
+    return corpus
+
+
+def naive_match(registry, instruction: str) -> list:
+    text = instruction.lower()
+    matched = [
+        h.name for h in registry.handlers
+        if not h.fallback and any(all(any(kw in text for kw in term) for term in alt) for alt in h.rule)
+    ]
+    return matched or [h.name for h in registry.handlers if h.fallback]
+
+
+def bench(fn, corpus: list, iterations: int) -> float:
+    started = time.perf_counter()
+    for _ in range(iterations):
+        for instruction in corpus:
+            fn(instruction)
+    return (time.perf_counter() - started) / (iterations * len(corpus)) * 1e6
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        workspace = Path(tmp)
+        worker = load_worker(workspace)
+        registry = worker.EDIT_HANDLERS
+        corpus = load_corpus()
+
+        mismatches = 0
+        for instruction in corpus:
+            compiled = [h.name for h, _ in registry.match(instruction)]
+            if compiled != naive_match(registry, instruction):
+                mismatches += 1
+                print(f"MISMATCH {instruction!r}: {compiled} != {naive_match(registry, instruction)}")
+            print(f"{', '.join(compiled):45} <- {instruction[:70]}")
+
+        registry.matcher()  # compile outside the timed loop, as the worker does once per job
+        keywords = len(registry.matcher().patterns)
+        print(f"\n{len(corpus)} instructions, {len(registry.handlers)} handlers, {keywords} keywords")
+        print(f"compiled matcher: {bench(registry.match, corpus, args.iterations):8.2f} us/instruction")
+        print(f"substring rules:  {bench(lambda i: naive_match(registry, i), corpus, args.iterations):8.2f} us/instruction")
+
+        print("\nJob sequence (hits / ms per handler):")
+        worker.ensure_dirs()
+        worker.generate_initial("")
+        worker.OVERLAY.commit()
+        for instruction in corpus:
+            stats = []
+            try:
+                worker.apply_edit(instruction, stats)
+                created, modified = worker.OVERLAY.commit()
+            finally:
+                worker.OVERLAY.discard()
+            handlers = " ".join(f"{s['name']}={s['hits']}/{s['elapsed_ms']}ms[{s['status']}]" for s in stats)
+            print(f"  +{len(created)} ~{len(modified)}  {handlers}")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
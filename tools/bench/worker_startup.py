@@ -0,0 +1,141 @@
+"""
+Measure worker launch-to-first-work latency per execution mode and check it against a baseline.
+
+- Modes:
+    source  `python worker/run_codex_job.py` (site import, script compiled on every launch)
+    slim    `python -I -B run_codex_job.pyc`, what the worker image runs
+    docker  `docker run --rm -v <ws>:/workspace <image>`, only with --image
+- Each run gets a fresh scratch workspace with an edit request. The worker's
+  result.json "timings" give the split: launch -> loaded_at is interpreter
+  start-up, then imports, then first_work_at (request read); total is until
+  the process exits.
+- Best-of-N times (stable under machine noise, unlike medians; added
+  start-up work still raises them) are compared with
+  tools/bench/worker_startup_baseline.json. A mode regresses when both the
+  relative tolerance and the absolute slack are exceeded. Exit status 1 on a regression. Baselines are per machine:
+  re-record with --update-baseline where the check runs.
+
+Usage: python tools/bench/worker_startup.py [--runs N] [--image TAG] [--update-baseline]
+"""
+import argparse
+import json
+import platform
+import py_compile
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+WORKER = REPO_ROOT / "worker" / "run_codex_job.py"
+BASELINE = Path(__file__).with_name("worker_startup_baseline.json")
+REQUEST = {"job_type": "edit", "instruction": "Modify the CLI to print the first 15 Fibonacci numbers."}
+METRICS = ("interpreter_ms", "imports_ms", "first_work_ms", "total_ms")
+
+
+def _epoch(iso: str) -> float:
+    return datetime.fromisoformat(iso.rstrip("Z")).replace(tzinfo=timezone.utc).timestamp()
+
+
+def launch_commands(scratch: Path, image: str = None) -> dict:
+    compiled = scratch / "run_codex_job.pyc"
+    py_compile.compile(str(WORKER), cfile=str(compiled), doraise=True)
+    commands = {
+        "source": lambda ws: ([sys.executable, str(WORKER)], {"WORKSPACE_DIR": str(ws)}),
+        "slim": lambda ws: ([sys.executable, "-I", "-B", str(compiled)], {"WORKSPACE_DIR": str(ws)}),
+    }
+    if image:
+        commands["docker"] = lambda ws: (["docker", "run", "--rm", "-v", f"{ws}:/workspace", image], {})
+    return commands
+
+
+def run_once(command, scratch: Path, index: int) -> dict:
+    ws = scratch / f"ws-{index}"
+    (ws / ".codex").mkdir(parents=True)
+    (ws / ".codex" / "request.json").write_text(json.dumps(REQUEST), encoding="utf-8")
+    argv, env = command(ws)
+    launched = time.time()
+    subprocess.run(argv, env={**env, "PATH": "/usr/bin:/bin:/usr/local/bin"}, check=True,
+                   stdout=subprocess.DEVNULL)
+    exited = time.time()
+    timings = json.loads((ws / ".codex" / "result.json").read_text(encoding="utf-8"))["timings"]
+    shutil.rmtree(ws)
+    return {
+        "interpreter_ms": (_epoch(timings["loaded_at"]) - launched) * 1000,
+        "imports_ms": timings["phases_ms"]["imports"],
+        "first_work_ms": (_epoch(timings["first_work_at"]) - launched) * 1000,
+        "total_ms": (exited - launched) * 1000,
+    }
+
+
+def measure(runs: int, image: str = None) -> dict:
+    report = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        scratch = Path(tmp)
+        for mode, command in launch_commands(scratch, image).items():
+            run_once(command, scratch, -1)  # warm the page cache (and the image) first
+            samples = [run_once(command, scratch, i) for i in range(runs)]
+            report[mode] = {
+                metric: {
+                    "min": round(min(s[metric] for s in samples), 2),
+                    "median": round(statistics.median(s[metric] for s in samples), 2),
+                    "p90": round(sorted(s[metric] for s in samples)[int(0.9 * (runs - 1))], 2),
+                }
+                for metric in METRICS
+            }
+    return report
+
+
+def regressions(report: dict, baseline: dict, tolerance: float, slack_ms: float) -> list:
+    found = []
+    for mode, metrics in report.items():
+        base = baseline.get("modes", {}).get(mode)
+        if not base:
+            continue
+        for metric in ("first_work_ms", "total_ms"):
+            now, before = metrics[metric]["min"], base[metric]
+            if now > before * (1 + tolerance) and now - before > slack_ms:
+                found.append(f"{mode} {metric}: {now:.2f} ms vs baseline {before:.2f} ms")
+    return found
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--image", help="worker image to measure in docker mode")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative slowdown")
+    parser.add_argument("--slack-ms", type=float, default=3.0, help="allowed absolute slowdown")
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args()
+
+    report = measure(args.runs, args.image)
+    print(f"{'mode':8} " + " ".join(f"{m + ' min/median/p90':>30}" for m in METRICS))
+    for mode, metrics in report.items():
+        cells = [f"{metrics[m]['min']:.2f} / {metrics[m]['median']:.2f} / {metrics[m]['p90']:.2f}" for m in METRICS]
+        print(f"{mode:8} " + " ".join(f"{c:>30}" for c in cells))
+
+    if args.update_baseline:
+        baseline = {
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "recorded_at": datetime.utcnow().isoformat() + "Z",
+            "modes": {mode: {m: metrics[m]["min"] for m in ("first_work_ms", "total_ms")} for mode, metrics in report.items()},
+        }
+        BASELINE.write_text(json.dumps(baseline, indent=2) + "\n", encoding="utf-8")
+        print(f"Baseline written to {BASELINE}")
+        return 0
+    if not BASELINE.exists():
+        print("No baseline recorded; run with --update-baseline")
+        return 0
+    found = regressions(report, json.loads(BASELINE.read_text(encoding="utf-8")), args.tolerance, args.slack_ms)
+    for line in found:
+        print(f"REGRESSION {line}")
+    return 1 if found else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
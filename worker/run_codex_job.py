@@ -1,7 +1,21 @@
-import os
-import json
-from pathlib import Path
-from datetime import datetime
+import time
+
+# Launch timing: taken before any other import, see PhaseTimer
+_LOADED_AT = time.time()
+
+import os  # noqa: E402
+import json  # noqa: E402
+import re  # noqa: E402
+import sys  # noqa: E402
+from collections.abc import Callable  # noqa: E402
+from contextlib import contextmanager  # noqa: E402
+from pathlib import Path  # noqa: E402
+from datetime import datetime  # noqa: E402
+
+# Start-up latency is part of every job. Keep module-level work to constants
+# and cheap registrations, and import what only some jobs need (resource)
+# where it is used. typing and tempfile are not imported at all.
+
 
 WORKSPACE = Path(os.getenv("WORKSPACE_DIR", "/workspace"))
 CODEX_DIR = WORKSPACE / ".codex"
@@ -26,9 +40,230 @@ def ensure_dirs():
     CODEX_DIR.mkdir(parents=True, exist_ok=True)
 
 
-def write_file(path: Path, contents: str):
+def _utc_now() -> str:
+    return datetime.utcnow().isoformat() + "Z"
+
+
+def _cgroup_memory_peak() -> int | None:
+    """Peak memory of this container's cgroup (v2); None outside a container or on older kernels."""
+    try:
+        return int(Path("/sys/fs/cgroup/memory.peak").read_text().strip())
+    except (OSError, ValueError):
+        return None
+
+
+def resource_usage() -> dict:
+    """
+    Peak RSS and CPU time of the worker (this process plus waited-for children).
+    Peak memory prefers the container's cgroup counter, which also covers
+    processes the worker did not wait for; getrusage() is the fallback.
+    """
+    try:
+        import resource
+    except ImportError:  # not on Windows
+        resource = None
+    usage = {"peak_rss_bytes": None, "peak_rss_source": None, "cpu_user_seconds": None, "cpu_system_seconds": None}
+    if resource is not None:
+        own = resource.getrusage(resource.RUSAGE_SELF)
+        children = resource.getrusage(resource.RUSAGE_CHILDREN)
+        scale = 1 if sys.platform == "darwin" else 1024  # ru_maxrss is KiB on Linux, bytes on macOS
+        usage.update(
+            peak_rss_bytes=max(own.ru_maxrss, children.ru_maxrss) * scale,
+            peak_rss_source="getrusage",
+            cpu_user_seconds=round(own.ru_utime + children.ru_utime, 3),
+            cpu_system_seconds=round(own.ru_stime + children.ru_stime, 3),
+        )
+    peak = _cgroup_memory_peak()
+    if peak is not None:
+        usage.update(peak_rss_bytes=peak, peak_rss_source="cgroup")
+    return usage
+
+
+def _iso(ts: float) -> str:
+    return datetime.utcfromtimestamp(ts).isoformat() + "Z"
+
+
+class PhaseTimer:
+    """
+    Wall-clock start/finish of the worker plus milliseconds per named phase, for result.json "timings".
+    - loaded_at: module start, before its imports; launch -> loaded_at is interpreter start-up.
+    - started_at: main() entered; loaded_at -> started_at is the "imports" phase.
+    - first_work_at: the request has been read.
+    """
+
+    def __init__(self):
+        now = time.time()
+        self.started_at = _iso(now)
+        self.first_work_at: str | None = None
+        self._phases: dict[str, float] = {"imports": round((now - _LOADED_AT) * 1000, 3)}
+
+    def first_work(self) -> None:
+        self.first_work_at = _utc_now()
+
+    @contextmanager
+    def phase(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._phases[name] = round((time.perf_counter() - started) * 1000, 3)
+
+    def report(self) -> dict:
+        return {
+            "loaded_at": _iso(_LOADED_AT),
+            "started_at": self.started_at,
+            "first_work_at": self.first_work_at,
+            "finished_at": _utc_now(),
+            "phases_ms": dict(self._phases),
+            **resource_usage(),
+        }
+
+
+def _read_bytes(path: Path) -> bytes | None:
+    try:
+        return path.read_bytes()
+    except (FileNotFoundError, IsADirectoryError):
+        return None
+
+
+_temp_counter = 0
+
+
+def _create_temp(directory: Path) -> tuple[int, str]:
+    """Exclusively create a hidden temp file in directory (what tempfile.mkstemp does, without importing it)."""
+    global _temp_counter
+    while True:
+        _temp_counter += 1
+        name = str(directory / f".codex-write-{os.getpid()}-{_temp_counter}")
+        try:
+            return os.open(name, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600), name
+        except FileExistsError:
+            continue  # left behind by an earlier, killed worker with the same pid
+
+
+def _replace_file(path: Path, data: bytes) -> None:
+    """
+    Atomically replace path with data: temp file next to it, then rename.
+    Readers and crashes see the old or the new file, never a torn one, and
+    renaming never writes through a hardlink shared with a fork, template or
+    blob (copy-on-first-write). Not durable until fsynced.
+    """
     path.parent.mkdir(parents=True, exist_ok=True)
-    path.write_text(contents, encoding="utf-8")
+    try:
+        mode = (path.stat().st_mode & 0o777) | 0o200  # keep the mode, but our copy is writable
+    except FileNotFoundError:
+        mode = 0o644
+    fd, tmp_name = _create_temp(path.parent)
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            fh.write(data)
+        os.chmod(tmp_name, mode)
+        os.replace(tmp_name, path)
+    except BaseException:
+        if os.path.exists(tmp_name):
+            os.unlink(tmp_name)
+        raise
+
+
+def _fsync_all(paths) -> None:
+    """Durability barrier: fsync every file, then each parent directory once."""
+    dirs: dict[Path, None] = {}
+    for path in paths:
+        try:
+            fd = os.open(path, os.O_RDONLY)
+        except FileNotFoundError:
+            continue
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+        dirs[path.parent] = None
+    for directory in dirs:
+        fd = os.open(directory, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+
+class WorkspaceOverlay:
+    """
+    In-memory overlay of the workspace for one job; the job's edits are a transaction.
+    - Reads go through the overlay: staged content if the job wrote the file,
+      otherwise the disk content, read once and cached.
+    - Writes are only staged. Nothing touches the workspace until commit().
+    - commit() flushes every staged file whose bytes differ from disk (atomic
+      rename each, unchanged content skipped so mtimes and downstream caches
+      stay intact), then fsyncs once.
+    - discard() drops all staged writes: a failed job leaves the workspace as it was.
+    - changes() compares the content on disk at first touch with the staged
+      content, so rewriting identical bytes (or reverting an edit) is not a
+      change.
+    """
+
+    def __init__(self, root: Path):
+        self.root = root
+        self._base: dict[str, bytes | None] = {}
+        self._staged: dict[str, bytes] = {}
+
+    def _rel(self, path: Path) -> str:
+        return path.relative_to(self.root).as_posix()
+
+    def _load(self, rel: str) -> bytes | None:
+        if rel not in self._base:
+            self._base[rel] = _read_bytes(self.root / rel)
+        return self._base[rel]
+
+    def read(self, path: Path) -> bytes | None:
+        rel = self._rel(path)
+        if rel in self._staged:
+            return self._staged[rel]
+        return self._load(rel)
+
+    def exists(self, path: Path) -> bool:
+        return self.read(path) is not None
+
+    def write(self, path: Path, contents: str) -> bool:
+        """Stage contents for path; returns False if the overlay already holds exactly that."""
+        data = contents.encode("utf-8")
+        if self.read(path) == data:
+            return False
+        self._staged[self._rel(path)] = data
+        return True
+
+    def changes(self) -> tuple:
+        """(created, modified) relative paths, by content, in first-write order."""
+        created: list[str] = []
+        modified: list[str] = []
+        for rel, data in self._staged.items():
+            before = self._base[rel]
+            if before == data:
+                continue
+            (created if before is None else modified).append(rel)
+        return created, modified
+
+    def commit(self) -> tuple:
+        """Flush the staged writes in one batch; returns changes() as flushed."""
+        created, modified = self.changes()
+        written = []
+        for rel in created + modified:
+            path = self.root / rel
+            _replace_file(path, self._staged[rel])
+            written.append(path)
+        _fsync_all(written)
+        self.discard()
+        return created, modified
+
+    def discard(self) -> None:
+        self._base.clear()
+        self._staged.clear()
+
+
+OVERLAY = WorkspaceOverlay(WORKSPACE)
+
+
+def write_file(path: Path, contents: str) -> bool:
+    return OVERLAY.write(path, contents)
 
 
 def generate_initial(instruction: str):
@@ -39,9 +274,6 @@ def generate_initial(instruction: str):
       - app.py
       - tests/test_cli.py
     """
-    created = []
-    modified = []
-
     readme_path = WORKSPACE / "README.md"
     app_path = WORKSPACE / "app.py"
     test_path = WORKSPACE / "tests" / "test_cli.py"
@@ -81,42 +313,18 @@ def generate_initial(instruction: str):
         "    assert seq[-1] == 34\n"
     )
 
-    # README.md
-    if readme_path.exists():
-        modified.append("README.md")
-    else:
-        created.append("README.md")
     write_file(readme_path, readme_contents)
-
-    # app.py
-    if app_path.exists():
-        modified.append("app.py")
-    else:
-        created.append("app.py")
     write_file(app_path, app_contents)
-
-    # tests/test_cli.py
-    if test_path.exists():
-        modified.append("tests/test_cli.py")
-    else:
-        created.append("tests/test_cli.py")
     write_file(test_path, test_contents)
 
-    return created, modified
-
 
 def _read_text(path: Path) -> str:
-    return path.read_text(encoding="utf-8") if path.exists() else ""
+    data = OVERLAY.read(path)
+    return data.decode("utf-8") if data is not None else ""
 
 
-def _mark(created: list[str], modified: list[str], path: Path, existed_before: bool):
-    rel = str(path.relative_to(WORKSPACE))
-    if existed_before:
-        if rel not in modified:
-            modified.append(rel)
-    else:
-        if rel not in created:
-            created.append(rel)
+def _exists(path: Path) -> bool:
+    return OVERLAY.exists(path)
 
 
 def _ensure_app_template(default_n: int = 10, use_import: bool = False, use_utils: bool = False, with_argparse: bool = False) -> str:
@@ -164,9 +372,138 @@ def _ensure_app_template(default_n: int = 10, use_import: bool = False, use_util
     return "\n".join(header + [""] + body) + "\n"
 
 
-def _edit_increase_to_15(app_path: Path, created: list[str], modified: list[str]):
+class PatternMatcher:
+    """
+    All keywords compiled once into a single regex, matched in one pass.
+    - A zero-width lookahead at every position with the alternatives longest
+      first finds the longest keyword starting there; keywords that are a
+      prefix of it are credited too, so overlapping occurrences are counted
+      exactly (plain substring semantics, like `keyword in text`).
+    """
+
+    def __init__(self, patterns: list[str]):
+        self.patterns = list(patterns)
+        ordered = sorted(set(self.patterns), key=len, reverse=True)
+        self._regex = re.compile("(?=(" + "|".join(re.escape(p) for p in ordered) + "))") if ordered else None
+        self._prefixes = {p: [q for q in ordered if p.startswith(q)] for p in ordered}
+
+    def find(self, text: str) -> dict[str, int]:
+        """Occurrence count of every keyword found in text."""
+        counts: dict[str, int] = {}
+        if self._regex is None:
+            return counts
+        for longest in self._regex.findall(text):
+            for keyword in self._prefixes[longest]:
+                counts[keyword] = counts.get(keyword, 0) + 1
+        return counts
+
+
+class EditHandler:
+    """
+    One edit scenario.
+    - when: alternatives; the handler matches if any alternative matches.
+      An alternative is "a|b + c" = (a or b) and c, on the lowercased instruction.
+    - writes: workspace files the handler may write. Matched handlers apply
+      in priority order; one whose files were already claimed by an earlier
+      handler in the same pass is skipped as conflicting.
+    - fallback: applies only when no other handler matched.
+    """
+
+    def __init__(self, name: str, fn: Callable[[Path, str], None], when: tuple[str, ...],
+                 writes: tuple[str, ...], priority: int, fallback: bool):
+        self.name = name
+        self.fn = fn
+        self.writes = writes
+        self.priority = priority
+        self.fallback = fallback
+        self.rule = [
+            [[kw.strip().lower() for kw in term.split("|")] for term in alternative.split("+")]
+            for alternative in when
+        ]
+
+        self.keywords = list({kw: None for alternative in self.rule for term in alternative for kw in term})
+        self._terms = [[frozenset(term) for term in alternative] for alternative in self.rule]
+
+    def hits(self, counts: dict[str, int]) -> int:
+        """Keyword occurrences if the rule matches, else 0."""
+        if counts.keys().isdisjoint(self.keywords):
+            return 0
+        for alternative in self._terms:
+            if all(not term.isdisjoint(counts) for term in alternative):
+                return sum(counts.get(kw, 0) for kw in self.keywords)
+        return 0
+
+
+class EditHandlerRegistry:
+    """Edit handlers plus the matcher compiled from all their keywords (rebuilt after a registration)."""
+
+    def __init__(self):
+        self.handlers: list[EditHandler] = []
+        self._matcher: PatternMatcher | None = None
+
+    def handler(self, name: str, *, when: tuple[str, ...] = (), writes: tuple[str, ...] = (),
+                priority: int = 100, fallback: bool = False):
+        def register(fn: Callable[[Path, str], None]):
+            self.handlers.append(EditHandler(name, fn, when, writes, priority, fallback))
+            self.handlers.sort(key=lambda h: h.priority)
+            self._matcher = None
+            return fn
+        return register
+
+    def matcher(self) -> PatternMatcher:
+        if self._matcher is None:
+            keywords = {kw: None for h in self.handlers for kw in h.keywords}
+            self._matcher = PatternMatcher(list(keywords))
+        return self._matcher
+
+    def match(self, instruction: str) -> list[tuple[EditHandler, int]]:
+        """(handler, hits) of every matching handler, in priority order; the fallback if none match."""
+        counts = self.matcher().find(instruction.lower())
+        matched = []
+        for h in self.handlers:
+            hits = 0 if h.fallback else h.hits(counts)
+            if hits:
+                matched.append((h, hits))
+        if not matched:
+            matched = [(h, 0) for h in self.handlers if h.fallback]
+        return matched
+
+    def apply(self, workspace: Path, instruction: str, stats: list[dict]) -> None:
+        """
+        Run every matching, non-conflicting handler in one pass.
+        Appends one entry per matched handler to stats (also for the one that raised).
+        """
+        started = time.perf_counter()
+        matched = self.match(instruction)
+        stats.append({"name": "_match", "hits": len(matched), "status": "matched",
+                      "elapsed_ms": round((time.perf_counter() - started) * 1000, 3)})
+        claimed: dict[str, str] = {}
+        for h, hits in matched:
+            entry = {"name": h.name, "hits": hits, "status": "applied", "elapsed_ms": 0.0}
+            stats.append(entry)
+            conflict = next((claimed[f] for f in h.writes if f in claimed), None)
+            if conflict:
+                entry["status"] = f"skipped: conflicts with {conflict}"
+                continue
+            started = time.perf_counter()
+            try:
+                h.fn(workspace, instruction)
+            except Exception:
+                entry["status"] = "error"
+                raise
+            finally:
+                entry["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 3)
+            for f in h.writes:
+                claimed[f] = h.name
+
+
+EDIT_HANDLERS = EditHandlerRegistry()
+
+
+@EDIT_HANDLERS.handler("increase_to_15", when=("15",), writes=("app.py",), priority=70)
+def _edit_increase_to_15(workspace: Path, instruction: str):
+    app_path = workspace / "app.py"
     prev = _read_text(app_path)
-    existed = app_path.exists()
     new = prev
     changed = False
 
@@ -191,10 +528,11 @@ def _edit_increase_to_15(app_path: Path, created: list[str], modified: list[str]
 
     if changed:
         write_file(app_path, new)
-        _mark(created, modified, app_path, existed)
 
 
-def _refactor_split_to_module(workspace: Path, created: list[str], modified: list[str]):
+@EDIT_HANDLERS.handler("refactor_split_module", when=("refactor + fibonacci.py",),
+                       writes=("fibonacci.py", "app.py"), priority=50)
+def _refactor_split_to_module(workspace: Path, instruction: str):
     app_path = workspace / "app.py"
     fib_path = workspace / "fibonacci.py"
 
@@ -210,58 +548,52 @@ def _refactor_split_to_module(workspace: Path, created: list[str], modified: lis
         "    return seq[:n]",
         "",
     ]
-    existed_fib = fib_path.exists()
     write_file(fib_path, "\n".join(fib_src))
-    _mark(created, modified, fib_path, existed_fib)
 
     # Inspect prior app to preserve 15 vs 10 if known
     prev = _read_text(app_path)
     default_n = 15 if "fibonacci(15)" in prev else 10
-    existed_app = app_path.exists()
     new_app = _ensure_app_template(default_n=default_n, use_import=True, use_utils=("from utils import format_sequence" in prev),
                                    with_argparse=("argparse" in prev))
     write_file(app_path, new_app)
-    _mark(created, modified, app_path, existed_app)
 
 
-def _enhance_readme_and_changelog(workspace: Path, created: list[str], modified: list[str]):
+@EDIT_HANDLERS.handler("readme_changelog", when=("changelog", "readme + enhance|usage|add"),
+                       writes=("README.md", "CHANGELOG.md"), priority=60)
+def _enhance_readme_and_changelog(workspace: Path, instruction: str):
     readme = workspace / "README.md"
-    existed_readme = readme.exists()
     text = _read_text(readme)
     if "## Usage" not in text:
         text = (text.rstrip() + "\n\n## Usage\n\nRun:\n\n  python app.py\n").rstrip() + "\n"
         write_file(readme, text)
-        _mark(created, modified, readme, existed_readme)
 
     changelog = workspace / "CHANGELOG.md"
-    existed_changelog = changelog.exists()
+    existed_changelog = _exists(changelog)
     entry = f"# Changelog\n\n- {datetime.utcnow().isoformat()}Z Initial entry created by live suite.\n"
     if not existed_changelog:
         write_file(changelog, entry)
-        _mark(created, modified, changelog, existed_changelog)
 
 
-def _add_cli_arg_parsing(workspace: Path, created: list[str], modified: list[str]):
+@EDIT_HANDLERS.handler("cli_arg_parsing", when=("arg|cli|accept n + parse|input|argument",),
+                       writes=("app.py", "README.md"), priority=40)
+def _add_cli_arg_parsing(workspace: Path, instruction: str):
     app_path = workspace / "app.py"
-    existed_app = app_path.exists()
-    use_import = (workspace / "fibonacci.py").exists()
+    use_import = _exists(workspace / "fibonacci.py")
     new_app = _ensure_app_template(default_n=10, use_import=use_import, use_utils=("from utils import format_sequence" in _read_text(app_path)), with_argparse=True)
     write_file(app_path, new_app)
-    _mark(created, modified, app_path, existed_app)
 
     # Optional README usage update
     readme = workspace / "README.md"
-    existed_readme = readme.exists()
     text = _read_text(readme)
     usage_hint = "\n\nExample:\n  python app.py -n 15\n"
     if "python app.py -n 15" not in text:
         write_file(readme, (text.rstrip() + usage_hint).rstrip() + "\n")
-        _mark(created, modified, readme, existed_readme)
 
 
-def _create_utils_module(workspace: Path, created: list[str], modified: list[str]):
+@EDIT_HANDLERS.handler("create_utils_module", when=("utils.py + format_sequence|helper|module",),
+                       writes=("utils.py",), priority=30)
+def _create_utils_module(workspace: Path, instruction: str):
     utils_path = workspace / "utils.py"
-    existed = utils_path.exists()
     utils_src = [
         "def format_sequence(seq: list[int]) -> str:",
         '    """Return a comma-joined representation of a sequence of ints."""',
@@ -269,14 +601,13 @@ def _create_utils_module(workspace: Path, created: list[str], modified: list[str
         "",
     ]
     write_file(utils_path, "\n".join(utils_src))
-    _mark(created, modified, utils_path, existed)
 
 
-def _use_utils_in_app(workspace: Path, created: list[str], modified: list[str]):
+@EDIT_HANDLERS.handler("use_utils_in_app", when=("use + format_sequence",), writes=("app.py",), priority=20)
+def _use_utils_in_app(workspace: Path, instruction: str):
     app_path = workspace / "app.py"
-    existed_app = app_path.exists()
     prev = _read_text(app_path)
-    use_import = (workspace / "fibonacci.py").exists()
+    use_import = _exists(workspace / "fibonacci.py")
     # Preserve argparse if present; default N = 10 otherwise
     with_argparse = "argparse" in prev
     new_app = _ensure_app_template(
@@ -286,23 +617,31 @@ def _use_utils_in_app(workspace: Path, created: list[str], modified: list[str]):
         with_argparse=with_argparse,
     )
     write_file(app_path, new_app)
-    _mark(created, modified, app_path, existed_app)
 
 
-def _idempotent_readme_trailing_newline(workspace: Path, created: list[str], modified: list[str]):
+@EDIT_HANDLERS.handler("readme_trailing_newline", when=("trailing newline", "newline + readme", "idempotent"),
+                       writes=("README.md",), priority=10)
+def _idempotent_readme_trailing_newline(workspace: Path, instruction: str):
     readme = workspace / "README.md"
-    existed_readme = readme.exists()
+    existed_readme = _exists(readme)
     txt = _read_text(readme)
     if txt and not txt.endswith("\n"):
         write_file(readme, txt + "\n")
-        _mark(created, modified, readme, existed_readme)
     # If README does not exist, create minimal one with trailing newline
     if not existed_readme:
         write_file(readme, "# README\n\n")
-        _mark(created, modified, readme, False)
 
 
-def apply_edit(instruction: str):
+@EDIT_HANDLERS.handler("append_comment", writes=("app.py",), fallback=True)
+def _append_edit_comment(workspace: Path, instruction: str):
+    app_path = workspace / "app.py"
+    existed = _exists(app_path)
+    prev = _read_text(app_path)
+    new = prev + f"\n# Edit applied: {instruction} at {datetime.utcnow().isoformat()}Z\n"
+    write_file(app_path, new if existed else _ensure_app_template(default_n=10, use_import=False, use_utils=False, with_argparse=False) + new)
+
+
+def apply_edit(instruction: str, stats: list[dict] | None = None):
     """
     Apply edits in a deterministic, instruction-keyword driven way to support the live suite scenarios:
       - Increase output to first 15 numbers
@@ -312,48 +651,20 @@ def apply_edit(instruction: str):
       - Multi-job continuity: create utils.py and update app.py to use it
       - Idempotent README newline behavior
       - Fallback: append a comment to app.py
+    Each scenario is a handler in EDIT_HANDLERS; every matching, non-conflicting one
+    applies, and per-handler hits/timings are appended to stats.
+    Edits are staged in OVERLAY; main() commits or discards them as one transaction.
     """
-    instruction_l = instruction.lower()
-    created: list[str] = []
-    modified: list[str] = []
-
-    # Route by scenario keywords (order matters)
-    if "trailing newline" in instruction_l or ("newline" in instruction_l and "readme" in instruction_l) or "idempotent" in instruction_l:
-        _idempotent_readme_trailing_newline(WORKSPACE, created, modified)
-
-    elif "use format_sequence" in instruction_l or ("use" in instruction_l and "format_sequence" in instruction_l):
-        _use_utils_in_app(WORKSPACE, created, modified)
-
-    elif "utils.py" in instruction_l and ("format_sequence" in instruction_l or "helper" in instruction_l or "module" in instruction_l):
-        _create_utils_module(WORKSPACE, created, modified)
-
-    elif ("arg" in instruction_l or "cli" in instruction_l or "accept n" in instruction_l) and ("parse" in instruction_l or "input" in instruction_l or "argument" in instruction_l):
-        _add_cli_arg_parsing(WORKSPACE, created, modified)
-
-    elif "refactor" in instruction_l and "fibonacci.py" in instruction_l:
-        _refactor_split_to_module(WORKSPACE, created, modified)
-
-    elif "changelog" in instruction_l or ("readme" in instruction_l and ("enhance" in instruction_l or "usage" in instruction_l or "add" in instruction_l)):
-        _enhance_readme_and_changelog(WORKSPACE, created, modified)
-
-    elif "15" in instruction_l:
-        _edit_increase_to_15(WORKSPACE / "app.py", created, modified)
-
-    else:
-        # Fallback generic edit: append a comment line to app.py
-        app_path = WORKSPACE / "app.py"
-        existed = app_path.exists()
-        prev = _read_text(app_path)
-        new = prev + f"\n# Edit applied: {instruction} at {datetime.utcnow().isoformat()}Z\n"
-        write_file(app_path, new if existed else _ensure_app_template(default_n=10, use_import=False, use_utils=False, with_argparse=False) + new)
-        _mark(created, modified, app_path, existed)
-
-    return created, modified
+    EDIT_HANDLERS.apply(WORKSPACE, instruction, stats if stats is not None else [])
 
 
 def main():
+    timer = PhaseTimer()
+    # Nothing ahead of reading the request: it is the first piece of real work
+    with timer.phase("read_request"):
+        req = read_request()
+    timer.first_work()
     ensure_dirs()
-    req = read_request()
     instruction = str(req.get("instruction", "")).strip()
     job_type = str(req.get("job_type", "initial_project"))
 
@@ -368,18 +679,20 @@ def main():
         "live_min_worker=running",
     ]
 
-    created = []
-    modified = []
+    created, modified = [], []
     errors = []
+    handler_stats: list[dict] = []
 
     try:
         if not force_error:
-            if job_type == "edit":
-                c, m = apply_edit(instruction)
-            else:
-                c, m = generate_initial(instruction)
-            created += c
-            modified += m
+            with timer.phase("edit"):
+                if job_type == "edit":
+                    apply_edit(instruction, handler_stats)
+                else:
+                    generate_initial(instruction)
+            # One batched flush (and fsync) of everything the job staged, before the result claims it
+            with timer.phase("commit"):
+                created, modified = OVERLAY.commit()
             status = "success"
             summary = "Live minimal worker executed successfully (Python CLI Fibonacci)."
         else:
@@ -390,6 +703,8 @@ def main():
         status = "error"
         summary = "Live minimal worker exception."
         errors.append(str(e))
+    # A failed job leaves the workspace as it was: its staged edits are dropped
+    OVERLAY.discard()
 
     result = {
         "status": status,
@@ -398,9 +713,12 @@ def main():
         "modified_files": modified,
         "errors": errors,
         "logs": logs,
-        "timestamp": datetime.utcnow().isoformat() + "Z",
+        "handlers": handler_stats,
+        "timings": timer.report(),
+        "timestamp": _utc_now(),
     }
-    RESULT_PATH.write_text(json.dumps(result, indent=2), encoding="utf-8")
+    _replace_file(RESULT_PATH, json.dumps(result, indent=2).encode("utf-8"))
+    _fsync_all([RESULT_PATH])
 
 
 if __name__ == "__main__":
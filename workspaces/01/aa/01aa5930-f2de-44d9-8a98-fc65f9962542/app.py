@@ -0,0 +1,12 @@
+def fibonacci(n: int) -> list[int]:
+    """Return the first n Fibonacci numbers as a list."""
+    if n <= 0:
+        return []
+    seq = [0, 1]
+    while len(seq) < n:
+        seq.append(seq[-1] + seq[-2])
+    return seq[:n]
+
+if __name__ == "__main__":
+    nums = fibonacci(10)
+    print(",".join(map(str, nums)))
@@ -0,0 +1,6 @@
+from app import fibonacci
+
+def test_fibonacci_basic():
+    seq = fibonacci(10)
+    assert len(seq) == 10
+    assert seq[-1] == 34
@@ -0,0 +1,8 @@
+const canvas = document.getElementById("board")
+const ctx = canvas.getContext("2d")
+
+ctx.fillStyle = "#222"
+ctx.fillRect(0, 0, canvas.width, canvas.height)
+
+// Dummy placeholder, no real game logic.
+console.log("Dummy snake game. Replace with Codex-generated code.")
@@ -0,0 +1 @@
+from fibonacci import fib
@@ -0,0 +1 @@
+print('dry run')